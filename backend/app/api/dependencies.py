@@ -0,0 +1,264 @@
+"""FastAPIの依存性（Depends）定義
+
+【なぜこのファイルが必要？】
+エンドポイントごとにSessionLocal()を作って閉じる処理を書くと、
+閉じ忘れやコピペの間違いが起きやすくなります。
+「リクエストごとに1つのセッションを作り、終わったら必ず閉じる」処理を
+ここにまとめて、エンドポイントはDependsで受け取るだけにします。
+
+【使い方】
+    @app.get("/api/users/me")
+    async def get_current_user(repository = Depends(get_user_repository)):
+        ...
+
+【テストでの差し替え】
+    app.dependency_overrides[get_user_repository] = lambda: fake_repository
+"""
+
+import os
+import threading
+from typing import AsyncIterator, Iterator, Optional
+
+import anyio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.domain.google_id_token import GOOGLE_ID_TOKEN_VERIFY_ENABLED, GoogleIdTokenVerifier, GoogleJWKSCache
+from app.domain.google_oauth_client import GoogleOAuthClient
+from app.domain.refresh_token_store import RefreshTokenStore
+from app.domain.token_cache import verified_token_cache
+from app.domain.token_denylist import TokenDenylist
+from app.domain.user_repository import AsyncUserRepository
+from app.infrastructure.async_user_repository import (
+    AsyncSqlAlchemyUserRepository,
+    ThreadedUserRepository,
+)
+from app.infrastructure.cached_user_repository import (
+    USER_CACHE_ENABLED,
+    USER_CACHE_REDIS_ENABLED,
+    AsyncCachedUserRepository,
+    user_cache,
+)
+from app.infrastructure.database import AsyncSessionLocal, SessionLocal, async_engine, engine, get_pool_stats
+from app.infrastructure.health import HealthChecker, check_database, check_password_executor, check_redis
+from app.infrastructure.metrics import (
+    StatsSampler,
+    sample_cache,
+    sample_db_pool,
+    sample_password_executor,
+    sample_token_denylist,
+)
+from app.infrastructure.password_executor import PasswordHashingExecutor, password_hashing_executor
+from app.infrastructure.redis_client import get_async_redis_client
+from app.infrastructure.refresh_token_store import RedisRefreshTokenStore
+from app.infrastructure.token_denylist import TOKEN_DENYLIST_ENABLED, RedisTokenDenylist
+from app.infrastructure.user_repository import SqlAlchemyUserRepository
+
+# DBアクセスを非同期ドライバ（asyncpg）で行うか
+# "false"にすると同期ドライバ（psycopg2）＋スレッドプールの経路になる（A/B比較用）
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "true").lower() == "true"
+
+
+def get_db() -> Iterator[Session]:
+    """リクエストごとの同期DBセッションを提供する"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """リクエストごとの非同期DBセッションを提供する"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def get_user_repository() -> AsyncIterator[AsyncUserRepository]:
+    """リクエストごとのUserRepositoryを提供する
+
+    USE_ASYNC_DBの設定に応じて、非同期版か同期版（スレッドプール）を返します。
+    どちらもAsyncUserRepositoryとして使えるので、エンドポイントは違いを意識しません。
+    USER_CACHE_ENABLEDならキャッシュ（AsyncCachedUserRepository）で包みます。
+    """
+    if USE_ASYNC_DB:
+        async with AsyncSessionLocal() as session:
+            yield _with_cache(AsyncSqlAlchemyUserRepository(session))
+    else:
+        db = SessionLocal()
+        try:
+            yield _with_cache(ThreadedUserRepository(SqlAlchemyUserRepository(db)))
+        finally:
+            await anyio.to_thread.run_sync(db.close)
+
+
+def _with_cache(repository: AsyncUserRepository) -> AsyncUserRepository:
+    """設定に応じてリポジトリをキャッシュで包む"""
+    if not USER_CACHE_ENABLED:
+        return repository
+    return AsyncCachedUserRepository(
+        repository,
+        local_cache=user_cache,
+        redis_client=get_async_redis_client() if USER_CACHE_REDIS_ENABLED else None,
+    )
+
+
+_refresh_token_store: Optional[RefreshTokenStore] = None
+
+
+def get_refresh_token_store() -> RefreshTokenStore:
+    """プロセス全体で共有するRefreshTokenStoreを提供する"""
+    global _refresh_token_store
+    if _refresh_token_store is None:
+        _refresh_token_store = RedisRefreshTokenStore()
+    return _refresh_token_store
+
+
+_token_denylist: Optional[RedisTokenDenylist] = None
+
+
+def get_token_denylist() -> Optional[TokenDenylist]:
+    """プロセス全体で共有するアクセストークンの失効リストを提供する
+
+    TOKEN_DENYLIST_ENABLEDがfalseならNone（失効を確認しない）。
+    失効の通知を購読するスレッドを持つため、1プロセスに1つだけ作ります。
+    """
+    global _token_denylist
+    if not TOKEN_DENYLIST_ENABLED:
+        return None
+    if _token_denylist is None:
+        _token_denylist = RedisTokenDenylist()
+    return _token_denylist
+
+
+def close_token_denylist() -> None:
+    """失効リストの購読を止める（アプリケーション終了時に呼ぶ）"""
+    global _token_denylist
+    denylist, _token_denylist = _token_denylist, None
+    if denylist is not None:
+        denylist.close()
+
+
+_google_oauth_client: Optional[GoogleOAuthClient] = None
+_google_id_token_verifier: Optional[GoogleIdTokenVerifier] = None
+
+
+def get_google_oauth_client() -> GoogleOAuthClient:
+    """プロセス全体で共有するGoogle OAuthクライアントを提供する
+
+    接続（keep-alive）を使い回すため、1プロセスに1つだけ作ります。
+    """
+    global _google_oauth_client
+    if _google_oauth_client is None:
+        _google_oauth_client = GoogleOAuthClient()
+    return _google_oauth_client
+
+
+def get_google_id_token_verifier() -> Optional[GoogleIdTokenVerifier]:
+    """プロセス全体で共有するid_tokenの検証器を提供する
+
+    GOOGLE_ID_TOKEN_VERIFY_ENABLEDがfalseならNone（毎回ユーザー情報のAPIを呼ぶ）。
+    GoogleのJWKSをキャッシュするため、1プロセスに1つだけ作ります。
+    """
+    global _google_id_token_verifier
+    if not GOOGLE_ID_TOKEN_VERIFY_ENABLED:
+        return None
+    if _google_id_token_verifier is None:
+        _google_id_token_verifier = GoogleIdTokenVerifier(GoogleJWKSCache(get_google_oauth_client().fetch_jwks))
+    return _google_id_token_verifier
+
+
+async def close_google_oauth_client() -> None:
+    """Google OAuthクライアントの接続を閉じる（アプリケーション終了時に呼ぶ）"""
+    global _google_oauth_client, _google_id_token_verifier
+    client, _google_oauth_client = _google_oauth_client, None
+    _google_id_token_verifier = None
+    if client is not None:
+        await client.aclose()
+
+
+_import_password_executor: Optional[PasswordHashingExecutor] = None
+# 一括インポートは1プロセスで同時に1件だけ（取れなければ409を返す）
+user_import_lock = threading.Lock()
+
+
+def get_import_password_executor() -> PasswordHashingExecutor:
+    """一括インポートで平文パスワードをハッシュ化するエグゼキューターを提供する
+
+    リクエストごとに作るとそのたびにプロセスプールが立ち上がるので、1プロセスに1つだけ作ります。
+    ログイン・会員登録用（password_hashing_executor）とは分けて、
+    インポート中もログインが503で弾かれないようにしています。
+    """
+    global _import_password_executor
+    if _import_password_executor is None:
+        _import_password_executor = PasswordHashingExecutor()
+    return _import_password_executor
+
+
+def close_import_password_executor() -> None:
+    """一括インポート用のプロセスプールを停止する（アプリケーション終了時に呼ぶ）"""
+    global _import_password_executor
+    executor, _import_password_executor = _import_password_executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+_stats_sampler: Optional[StatsSampler] = None
+
+
+def get_stats_sampler() -> StatsSampler:
+    """プロセス全体で共有する、統計をメトリクスに写すサンプラーを提供する
+
+    bcryptの待ち行列・DBのプール・各キャッシュ・失効リストの統計を読みます。
+    失効リストは、作られていれば（使われていれば）読みます。
+    """
+    global _stats_sampler
+    if _stats_sampler is None:
+        sampler = StatsSampler()
+        sampler.add_source(sample_password_executor(password_hashing_executor))
+        sampler.add_source(sample_db_pool("sync", lambda: get_pool_stats(engine)))
+        sampler.add_source(sample_db_pool("async", lambda: get_pool_stats(async_engine.sync_engine)))
+        if verified_token_cache is not None:
+            sampler.add_source(sample_cache("verified_token", verified_token_cache.stats))
+        if USER_CACHE_ENABLED:
+            sampler.add_source(sample_cache("user", user_cache.stats))
+        sampler.add_source(sample_token_denylist(
+            lambda: _token_denylist.stats() if _token_denylist is not None else None
+        ))
+        _stats_sampler = sampler
+    return _stats_sampler
+
+
+def close_stats_sampler() -> None:
+    """サンプラーのスレッドを止める（アプリケーション終了時に呼ぶ）"""
+    global _stats_sampler
+    sampler, _stats_sampler = _stats_sampler, None
+    if sampler is not None:
+        sampler.stop()
+
+
+_health_checker: Optional[HealthChecker] = None
+
+
+def get_health_checker() -> HealthChecker:
+    """プロセス全体で共有する依存先の確認を提供する
+
+    DB（USE_ASYNC_DBに応じて非同期・同期のエンジン）・Redis・bcryptの待ち行列を確認します。
+    結果をキャッシュして裏で更新するため、1プロセスに1つだけ作ります。
+    """
+    global _health_checker
+    if _health_checker is None:
+        _health_checker = HealthChecker({
+            "database": check_database(async_engine if USE_ASYNC_DB else engine),
+            "redis": check_redis(get_async_redis_client()),
+            "password_hasher": check_password_executor(password_hashing_executor),
+        })
+    return _health_checker
+
+
+async def close_health_checker() -> None:
+    """裏での確認を止める（アプリケーション終了時に呼ぶ）"""
+    global _health_checker
+    checker, _health_checker = _health_checker, None
+    if checker is not None:
+        await checker.stop()
@@ -0,0 +1,50 @@
+"""ルートごとのリクエスト数と処理時間を記録するミドルウェア
+
+【なぜパスではなくルートで数える？】
+/api/users/6f1c1d9e-... のように、パスにはIDが入ります。
+パスのままラベルにすると、ユーザーの数だけ時系列ができてPrometheusがあふれるため、
+FastAPIがマッチさせたルートのテンプレート（/api/users/{user_id}）で数えます。
+どのルートにもマッチしなかったリクエスト（404）は "unmatched" にまとめます。
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.infrastructure.metrics import observe_request
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class MetricsMiddleware:
+    """リクエストごとにhttp_requests_totalとhttp_request_duration_secondsを記録するASGIミドルウェア"""
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # ルーティングの後なら、FastAPIがscopeにマッチしたルートを入れている
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - started,
+            )
@@ -0,0 +1,82 @@
+"""リクエストIDとアクセスログのミドルウェア
+
+【なぜこのファイルが必要？】
+1つのリクエストの間に出たログを後からまとめて探せるように、
+すべてのログにリクエストID（とわかればユーザーID）を付けます。
+- X-Request-IDヘッダーがあればそれを使い（ロードバランサーなどが付けたID）、なければ作る
+- レスポンスにもX-Request-IDを付ける（問い合わせのときにユーザーから聞ける）
+- リクエストの最後に、処理時間（latency_ms）付きのアクセスログを1件出す
+
+【なぜBaseHTTPMiddlewareを使わない？】
+BaseHTTPMiddlewareはリクエストごとに別のタスクを作るので遅く、
+contextvarの変更もエンドポイント側に伝わりにくいためです。
+ここではASGIの呼び出しをそのまま包むだけにしています。
+"""
+
+import logging
+import os
+import re
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+from app.domain.logger import RequestContext, request_context
+
+# リクエストの最後にアクセスログを出すか
+LOG_ACCESS_ENABLED = os.getenv("LOG_ACCESS_ENABLED", "true").lower() == "true"
+
+# 外から受け取るリクエストIDとして認める形（ログに改行などを混ぜられないように）
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+
+access_logger = logging.getLogger("app.access")
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class RequestContextMiddleware:
+    """リクエストごとにRequestContextを作り、アクセスログを出すASGIミドルウェア"""
+
+    def __init__(self, app: Callable, access_log: bool = LOG_ACCESS_ENABLED):
+        self.app = app
+        self._access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(_incoming_request_id(scope) or uuid.uuid4().hex)
+        token = request_context.set(context)
+        status = 500
+
+        async def send_with_request_id(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", context.request_id.encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if self._access_log:
+                access_logger.info(
+                    "%s %s %d",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    extra={"status": status, "latency_ms": context.elapsed_ms()},
+                )
+            request_context.reset(token)
+
+
+def _incoming_request_id(scope: Scope) -> str:
+    """リクエストのX-Request-IDヘッダー（形が正しくなければ空文字）"""
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-id":
+            request_id = value.decode("latin-1")
+            return request_id if _REQUEST_ID_PATTERN.match(request_id) else ""
+    return ""
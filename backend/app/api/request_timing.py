@@ -0,0 +1,63 @@
+"""リクエストのフェーズ別の処理時間を返すミドルウェア
+
+【なぜこのファイルが必要？】
+app/domain/request_timing.pyで計ったフェーズ（db, redis, bcrypt, jwt, http）ごとの時間を
+- Server-Timingヘッダー（ブラウザの開発者ツールのNetworkタブで見られる）
+- リクエストごとの1行のログ（app.timing。phasesに内訳が入る）
+として出します。REQUEST_TIMING_ENABLEDがtrueのときだけmain.pyで登録します。
+
+【Server-Timingの例】
+    Server-Timing: db;dur=3.1;desc="1 calls", bcrypt;dur=212.4;desc="1 calls", total;dur=218.0
+
+【ヘッダーに入るのはどこまで？】
+ヘッダーはレスポンスの本文より先に送るので、そこまでに計った分だけです。
+ログの方にはリクエストの最後までの分が入ります。
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from app.domain.request_timing import current_timings, start_recording, stop_recording
+
+timing_logger = logging.getLogger("app.timing")
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class RequestTimingMiddleware:
+    """リクエストごとにフェーズ別の時間を記録し、Server-Timingヘッダーとログを出すASGIミドルウェア"""
+
+    def __init__(self, app: Callable, log: bool = True):
+        self.app = app
+        self._log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_recording()
+        timings = current_timings()
+
+        async def send_with_server_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            if self._log:
+                phases = timings.summary()
+                timing_logger.info(
+                    "%s %s %s",
+                    scope["method"],
+                    scope["path"],
+                    " ".join(f"{phase}={summary['ms']:.1f}ms/{summary['count']}" for phase, summary in phases.items()) or "-",
+                    extra={"phases": phases, "latency_ms": round(timings.total_ms(), 3)},
+                )
+            stop_recording(token)
@@ -9,6 +9,7 @@
 - ValidationError: バリデーションエラー（400）
 - AuthenticationError: 認証エラー（401）
 - NotFoundError: リソース未検出（404）
+- ServiceUnavailableError: 一時的な過負荷・依存サービス停止（503）
 """
 
 
@@ -60,6 +61,18 @@ class NotFoundError(Exception):
         super().__init__(message)
 
 
+class ServiceUnavailableError(Exception):
+    """一時的に処理を受け付けられないエラー
+
+    例：パスワードハッシュ化の待ち行列が満杯になった
+    """
+    status_code = 503
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
 def convert_exception_to_http_status(exception: Exception) -> int:
     """例外をHTTPステータスコードに変換する
     
@@ -0,0 +1,202 @@
+"""Google id_tokenの検証（JWKSのキャッシュ付き）
+
+【なぜこのファイルが必要？】
+スコープにopenidを含めているので、Googleはトークン交換の応答に
+id_token（Googleが署名したJWT。email・name・subが入っている）を入れてきます。
+その署名をここで確認できれば、ユーザー情報のAPIを呼ぶ必要がなくなり、
+ソーシャルログイン1回あたりGoogleへの往復が1回減ります。
+
+【JWKSとは？】
+Googleがid_tokenの署名に使う鍵の公開鍵の一覧です（鍵はkidで区別する）。
+Googleは鍵を数日ごとに入れ替え、応答のCache-Control（max-age）で
+「いつまでキャッシュしてよいか」を知らせてきます。
+
+【キャッシュの更新】
+- 期限のREFRESH_AHEAD秒前を過ぎたら、リクエストを待たせずに裏で取り直す
+- 期限が切れていたら、取り直すのを待つ（取り直せなければ古い鍵を使い続ける）
+- 知らないkidが来たら（鍵の入れ替え直後）、MIN_REFRESH秒に1回まで取り直す
+同時に何件ログインが来ても、取り直しは1回だけ行います。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import jwt
+
+from app.domain import oauth_config
+
+logger = logging.getLogger(__name__)
+
+# id_tokenを確認してユーザー情報のAPI呼び出しを省くか（falseなら毎回APIを呼ぶ）
+GOOGLE_ID_TOKEN_VERIFY_ENABLED = os.getenv("GOOGLE_ID_TOKEN_VERIFY_ENABLED", "true").lower() == "true"
+# Cache-Controlがないときに、JWKSをキャッシュする秒数
+GOOGLE_JWKS_DEFAULT_MAX_AGE_SECONDS = int(os.getenv("GOOGLE_JWKS_DEFAULT_MAX_AGE_SECONDS", "3600"))
+# 期限の何秒前から裏で取り直すか
+GOOGLE_JWKS_REFRESH_AHEAD_SECONDS = int(os.getenv("GOOGLE_JWKS_REFRESH_AHEAD_SECONDS", "300"))
+# 取り直す間隔の下限（秒）。知らないkidや取得失敗で何度も取りに行かないように
+GOOGLE_JWKS_MIN_REFRESH_SECONDS = int(os.getenv("GOOGLE_JWKS_MIN_REFRESH_SECONDS", "60"))
+# exp・iatの確認で許す時計のずれ（秒）
+GOOGLE_ID_TOKEN_LEEWAY_SECONDS = int(os.getenv("GOOGLE_ID_TOKEN_LEEWAY_SECONDS", "30"))
+
+# JWKSの鍵として認めるアルゴリズム（共通鍵のHS256などは認めない）
+_ALLOWED_ALGORITHMS = ("RS256", "ES256")
+
+
+class IdTokenError(Exception):
+    """id_tokenを確認できなかったエラー（ユーザー情報のAPIで代わりに確認する）"""
+
+
+class GoogleJWKSCache:
+    """GoogleのJWKS（公開鍵の一覧）をCache-Controlに従ってキャッシュする"""
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Tuple[Dict[str, Any], Optional[int]]]],
+        default_max_age_seconds: int = GOOGLE_JWKS_DEFAULT_MAX_AGE_SECONDS,
+        refresh_ahead_seconds: int = GOOGLE_JWKS_REFRESH_AHEAD_SECONDS,
+        min_refresh_seconds: int = GOOGLE_JWKS_MIN_REFRESH_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """キャッシュを初期化する
+
+        Args:
+            fetch: JWKSと「キャッシュしてよい秒数」を返す関数（GoogleOAuthClient.fetch_jwks）
+            default_max_age_seconds: 秒数が返ってこないときにキャッシュする秒数
+            refresh_ahead_seconds: 期限の何秒前から裏で取り直すか
+            min_refresh_seconds: 取り直す間隔の下限（秒）
+            clock: 現在時刻（UNIX秒）を返す関数（テスト用に注入可能）
+        """
+        self._fetch = fetch
+        self._default_max_age_seconds = default_max_age_seconds
+        self._refresh_ahead_seconds = refresh_ahead_seconds
+        self._min_refresh_seconds = min_refresh_seconds
+        self._clock = clock
+        # kid -> (公開鍵, アルゴリズム)
+        self._keys: Optional[Dict[str, Tuple[Any, str]]] = None
+        self._expires_at = 0.0
+        self._attempted_at: Optional[float] = None
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+        self.fetches = 0
+
+    async def get_key(self, kid: Optional[str]) -> Tuple[Any, str]:
+        """kidの公開鍵とそのアルゴリズムを返す
+
+        Raises:
+            IdTokenError: JWKSを取得できない・kidの鍵がない場合
+        """
+        now = self._clock()
+        if self._keys is None:
+            # 一度も取得できていない（失敗した直後なら、MIN_REFRESH秒はAPIの方に任せる）
+            if self._may_refetch():
+                await self._refresh()
+        elif now >= self._expires_at:
+            await self._refresh()
+        elif now >= self._expires_at - self._refresh_ahead_seconds:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid) if self._keys is not None else None
+        if key is None and self._may_refetch():
+            # Googleが鍵を入れ替えた直後かもしれない
+            await self._refresh()
+            key = self._keys.get(kid) if self._keys is not None else None
+        if key is None:
+            raise IdTokenError(f"Unknown signing key: {kid}")
+        return key
+
+    def _may_refetch(self) -> bool:
+        return self._attempted_at is None or self._clock() - self._attempted_at >= self._min_refresh_seconds
+
+    def _refresh_in_background(self) -> None:
+        """リクエストを待たせずに取り直す（取り直し中なら何もしない）"""
+        if self._running_refresh() is None:
+            self._refresh_task = asyncio.get_running_loop().create_task(self._load())
+
+    async def _refresh(self) -> None:
+        """取り直すのを待つ（取り直し中ならそれを待つ）"""
+        task = self._running_refresh()
+        if task is None:
+            task = self._refresh_task = asyncio.get_running_loop().create_task(self._load())
+        # 待っているリクエストが切断されても、取り直しは最後まで続ける
+        await asyncio.shield(task)
+
+    def _running_refresh(self) -> Optional["asyncio.Task[None]"]:
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return None
+        return task
+
+    async def _load(self) -> None:
+        """JWKSを取得してキャッシュを入れ替える（失敗してもこれまでの鍵は残す）"""
+        self._attempted_at = self._clock()
+        self.fetches += 1
+        try:
+            jwks, max_age = await self._fetch()
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                algorithm = jwk.get("alg", "RS256")
+                if algorithm not in _ALLOWED_ALGORITHMS:
+                    logger.warning("Ignoring Google signing key with algorithm %s", algorithm)
+                    continue
+                try:
+                    keys[jwk["kid"]] = (jwt.PyJWK(jwk, algorithm).key, algorithm)
+                except (KeyError, jwt.PyJWTError) as e:
+                    logger.warning("Ignoring unusable Google signing key: %s", e)
+        except Exception as e:
+            logger.warning("Failed to refresh Google signing keys: %s", e)
+            if self._keys is not None:
+                # 古い鍵で続け、MIN_REFRESH秒後にもう一度取りに行く
+                self._expires_at = self._clock() + self._min_refresh_seconds
+            return
+        self._keys = keys
+        self._expires_at = self._clock() + (self._default_max_age_seconds if max_age is None else max_age)
+
+
+class GoogleIdTokenVerifier:
+    """Googleのid_tokenの署名・発行者・宛先・有効期限を確認する"""
+
+    def __init__(
+        self,
+        jwks_cache: GoogleJWKSCache,
+        client_id: Optional[str] = None,
+        leeway_seconds: int = GOOGLE_ID_TOKEN_LEEWAY_SECONDS,
+    ):
+        """検証器を初期化する
+
+        Args:
+            jwks_cache: 公開鍵のキャッシュ
+            client_id: 宛先（aud）として認めるクライアントID（省略時はoauth_config）
+            leeway_seconds: 許す時計のずれ（秒）
+        """
+        self._jwks_cache = jwks_cache
+        self._client_id = client_id
+        self._leeway_seconds = leeway_seconds
+
+    async def verify(self, id_token: str) -> Dict[str, Any]:
+        """id_tokenを確認してクレーム（email, name, subなど）を返す
+
+        Raises:
+            IdTokenError: 署名・発行者・宛先・有効期限のどれかが正しくない場合
+        """
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise IdTokenError(f"Malformed id_token: {e}") from e
+        key, algorithm = await self._jwks_cache.get_key(header.get("kid"))
+        try:
+            claims = jwt.decode(
+                id_token,
+                key,
+                # 鍵に決められたアルゴリズムだけを認める（ヘッダーのalgは信用しない）
+                algorithms=[algorithm],
+                audience=self._client_id or oauth_config.GOOGLE_CLIENT_ID,
+                leeway=self._leeway_seconds,
+                options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise IdTokenError(f"Invalid id_token: {e}") from e
+        if claims["iss"] not in oauth_config.GOOGLE_ISSUERS:
+            raise IdTokenError("Invalid id_token issuer")
+        return claims
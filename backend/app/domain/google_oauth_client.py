@@ -0,0 +1,225 @@
+"""Google OAuth APIクライアント
+
+【なぜこのファイルが必要？】
+/auth/google/callbackでは、Googleに2回問い合わせます。
+1. 認証コード → アクセストークンの交換（oauth2.googleapis.com）
+2. ユーザー情報の取得（www.googleapis.com）
+リクエストのたびに httpx.AsyncClient() を作ると、毎回TCP接続とTLSハンドシェイクから
+やり直しになり、ログイン1回あたり数百ミリ秒が接続の準備だけで消えます。
+
+【このクラスがやること】
+1. 接続を使い回す（keep-alive。プロセス全体で1つのクライアントを共有し、lifespanで閉じる）
+2. HTTP/2（h2がインストールされていれば。1本の接続で複数のリクエストを同時に送れる）
+3. タイムアウトを明示する（接続・応答それぞれ。Googleが遅いときに待ち続けない）
+4. 回数を決めてリトライする
+   - 接続できなかった場合: どちらのリクエストもリトライする（まだ何も送っていないので安全）
+   - 応答が5xx・429・タイムアウトの場合: ユーザー情報の取得（GET）だけリトライする
+     （認証コードは1回しか使えないので、交換（POST）は送った後にはリトライしない）
+"""
+
+import asyncio
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.domain import oauth_config
+from app.domain.exceptions import AuthenticationError, ServiceUnavailableError
+from app.domain.request_timing import timed
+
+try:
+    import h2  # noqa: F401  HTTP/2に必要（pip install httpx[http2]）
+except ImportError:  # h2は任意（なければHTTP/1.1のkeep-aliveで動く）
+    h2 = None
+
+# HTTP/2を使うか（h2がインストールされている場合だけ有効になる）
+GOOGLE_HTTP2_ENABLED = os.getenv("GOOGLE_HTTP2_ENABLED", "true").lower() == "true"
+# 接続を張るときのタイムアウト（秒）
+GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS", "2.0"))
+# 応答を待つタイムアウト（秒）
+GOOGLE_HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_HTTP_READ_TIMEOUT_SECONDS", "5.0"))
+# 同時に張る接続の最大数
+GOOGLE_HTTP_MAX_CONNECTIONS = int(os.getenv("GOOGLE_HTTP_MAX_CONNECTIONS", "20"))
+# 使っていない接続を残しておく秒数
+GOOGLE_HTTP_KEEPALIVE_SECONDS = float(os.getenv("GOOGLE_HTTP_KEEPALIVE_SECONDS", "60"))
+# リトライの最大回数（最初の1回を含まない）
+GOOGLE_HTTP_MAX_RETRIES = int(os.getenv("GOOGLE_HTTP_MAX_RETRIES", "2"))
+# リトライまでの待ち時間（秒）。2回目以降は倍にしていく
+GOOGLE_HTTP_RETRY_BACKOFF_SECONDS = float(os.getenv("GOOGLE_HTTP_RETRY_BACKOFF_SECONDS", "0.1"))
+
+# リトライしてよい応答のステータスコード
+_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Google API用の設定でhttpx.AsyncClientを作る"""
+    return httpx.AsyncClient(
+        http2=GOOGLE_HTTP2_ENABLED and h2 is not None,
+        timeout=httpx.Timeout(
+            GOOGLE_HTTP_READ_TIMEOUT_SECONDS,
+            connect=GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS,
+            pool=GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS,
+        ),
+        limits=httpx.Limits(
+            max_connections=GOOGLE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=GOOGLE_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=GOOGLE_HTTP_KEEPALIVE_SECONDS,
+        ),
+    )
+
+
+class GoogleAPIError(Exception):
+    """Google APIが期待した応答を返さなかったエラー"""
+
+
+class GoogleOAuthClient:
+    """Google OAuthのトークン交換とユーザー情報取得を行うクライアント"""
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        token_url: Optional[str] = None,
+        userinfo_url: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        max_retries: int = GOOGLE_HTTP_MAX_RETRIES,
+        retry_backoff_seconds: float = GOOGLE_HTTP_RETRY_BACKOFF_SECONDS,
+    ):
+        """クライアントを初期化する
+
+        Args:
+            http_client: 使い回すhttpx.AsyncClient（省略時はcreate_http_clientで作る）
+            token_url: トークン交換のURL（省略時はoauth_config。テストでスタブサーバーを指定する）
+            userinfo_url: ユーザー情報のURL（省略時はoauth_config）
+            jwks_url: id_tokenの公開鍵（JWKS）のURL（省略時はoauth_config）
+            max_retries: リトライの最大回数
+            retry_backoff_seconds: 最初のリトライまでの待ち時間（秒）
+        """
+        self._http = http_client or create_http_client()
+        self._token_url = token_url
+        self._userinfo_url = userinfo_url
+        self._jwks_url = jwks_url
+        self._max_retries = max_retries
+        self._retry_backoff_seconds = retry_backoff_seconds
+
+    @timed("http")
+    async def exchange_code(self, code: str) -> Dict[str, Any]:
+        """認証コードをトークンに交換する
+
+        Returns:
+            Googleのトークン応答（access_token, id_tokenなど）
+
+        Raises:
+            AuthenticationError: 認証コードが無効などで交換できなかった場合
+            ServiceUnavailableError: Googleに接続できなかった場合
+        """
+        response = await self._send(
+            "post",
+            self._token_url or oauth_config.GOOGLE_TOKEN_URL,
+            retry_on_response=False,
+            data={
+                "code": code,
+                "client_id": oauth_config.GOOGLE_CLIENT_ID,
+                "client_secret": oauth_config.GOOGLE_CLIENT_SECRET,
+                "redirect_uri": oauth_config.GOOGLE_REDIRECT_URI,
+                "grant_type": "authorization_code",
+            },
+        )
+        if response.status_code != 200:
+            raise AuthenticationError(_error_of(response) or "Failed to exchange authorization code")
+        token_data = response.json()
+        if not token_data.get("access_token"):
+            raise AuthenticationError("Failed to get access token from Google")
+        return token_data
+
+    @timed("http")
+    async def fetch_userinfo(self, access_token: str) -> Dict[str, Any]:
+        """アクセストークンでユーザー情報を取得する
+
+        Raises:
+            GoogleAPIError: ユーザー情報を取得できなかった場合
+            ServiceUnavailableError: Googleに接続できなかった場合
+        """
+        response = await self._send(
+            "get",
+            self._userinfo_url or oauth_config.GOOGLE_USERINFO_URL,
+            retry_on_response=True,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        if response.status_code != 200:
+            raise GoogleAPIError("Failed to get user info from Google")
+        return response.json()
+
+    @timed("http")
+    async def fetch_jwks(self) -> Tuple[Dict[str, Any], Optional[int]]:
+        """id_tokenの署名を確認する公開鍵（JWKS）を取得する
+
+        Returns:
+            (JWKS, キャッシュしてよい秒数)。秒数はCache-Controlのmax-ageから
+            Ageを引いたもの（Cache-Controlがなければ None）
+
+        Raises:
+            GoogleAPIError: JWKSを取得できなかった場合
+            ServiceUnavailableError: Googleに接続できなかった場合
+        """
+        response = await self._send(
+            "get",
+            self._jwks_url or oauth_config.GOOGLE_JWKS_URL,
+            retry_on_response=True,
+        )
+        if response.status_code != 200:
+            raise GoogleAPIError("Failed to get signing keys from Google")
+        return response.json(), _max_age_of(response)
+
+    async def aclose(self) -> None:
+        """接続をすべて閉じる（アプリケーション終了時に呼ぶ）"""
+        await self._http.aclose()
+
+    async def _send(self, method: str, url: str, retry_on_response: bool, **kwargs: Any) -> httpx.Response:
+        """リクエストを送る（決めた回数までリトライする）
+
+        Args:
+            method: "post" または "get"
+            retry_on_response: 応答が5xx・429・タイムアウトのときもリトライするか
+                （同じリクエストを2回送ってもよい場合だけTrueにする）
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await getattr(self._http, method)(url, **kwargs)
+                if not (retry_on_response and response.status_code in _RETRYABLE_STATUS_CODES):
+                    return response
+                if attempt >= self._max_retries:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # まだリクエストを送っていないので、どのリクエストでもリトライしてよい
+                if attempt >= self._max_retries:
+                    raise ServiceUnavailableError(f"Google API is unavailable: {e}") from e
+            except httpx.TransportError as e:
+                # 送った後の失敗（応答のタイムアウトなど）
+                if not retry_on_response or attempt >= self._max_retries:
+                    raise ServiceUnavailableError(f"Google API is unavailable: {e}") from e
+            await asyncio.sleep(self._retry_backoff_seconds * (2 ** attempt))
+            attempt += 1
+
+
+def _error_of(response: httpx.Response) -> Optional[str]:
+    """Googleのエラー応答（JSON）からerrorを取り出す"""
+    try:
+        return response.json().get("error")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _max_age_of(response: httpx.Response) -> Optional[int]:
+    """Cache-Controlからキャッシュしてよい秒数を取り出す（no-cache・no-storeなら0）"""
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    if match is None:
+        return None
+    age = response.headers.get("Age", "0")
+    return max(0, int(match.group(1)) - (int(age) if age.isdigit() else 0))
@@ -1,29 +1,75 @@
 """JWT生成・検証機能"""
 
 import os
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import jwt
 
+from app.domain.jwt_keys import KeySet, SigningKey, load_key_set
+from app.domain.request_timing import span, timed
+from app.domain.token_cache import VerifiedTokenCache
+
 # JWT設定
 # 環境変数から読み込む（本番環境では.envファイルから）
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-here")
-ALGORITHM = "HS256"
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 DEFAULT_EXPIRE_MINUTES = 15
 DEFAULT_REFRESH_EXPIRE_DAYS = 7
 
+# 鍵セットファイル（EdDSA / ES256などの公開鍵暗号を使う場合に指定）
+# 未設定ならSECRET_KEYによる共通鍵（HS256）1本で動く
+JWT_KEYSET_FILE = os.getenv("JWT_KEYSET_FILE")
+
+
+def _default_key_set() -> KeySet:
+    """環境変数から鍵セットを作る"""
+    # 古い鍵はリフレッシュトークンの有効期限まで検証に使い続ける
+    grace = timedelta(days=DEFAULT_REFRESH_EXPIRE_DAYS)
+    if JWT_KEYSET_FILE:
+        return load_key_set(JWT_KEYSET_FILE, verify_grace=grace)
+    return KeySet([SigningKey.hmac("default", SECRET_KEY, ALGORITHM)], verify_grace=grace)
+
+
+_key_set = _default_key_set()
+
+
+def get_key_set() -> KeySet:
+    """現在の鍵セットを返す（JWKSエンドポイントなどで使う）"""
+    return _key_set
+
+
+def set_key_set(key_set: KeySet) -> None:
+    """鍵セットを差し替える（鍵の再読み込みやテストで使う）"""
+    global _key_set
+    _key_set = key_set
+
+
+def _encode(payload: dict) -> str:
+    """今の署名鍵でペイロードに署名する（ヘッダーにkidを入れる）"""
+    key = _key_set.signing_key()
+    return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+
+@timed("jwt")
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """アクセストークンを生成する"""
+    """アクセストークンを生成する
+
+    【jtiとは？】
+    トークンごとのID。失効させるとき（token_denylist.py）に使います。
+    """
     to_encode = data.copy()
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     if expires_delta is None:
         expires_delta = timedelta(minutes=DEFAULT_EXPIRE_MINUTES)
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
+@timed("jwt")
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """リフレッシュトークンを生成する"""
     to_encode = data.copy()
@@ -32,14 +78,33 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
         expires_delta = timedelta(days=DEFAULT_REFRESH_EXPIRE_DAYS)
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
-def verify_token(token: str) -> dict:
-    """トークンを検証してペイロードを返す"""
+def verify_token(token: str, cache: Optional[VerifiedTokenCache] = None) -> dict:
+    """トークンを検証してペイロードを返す
+
+    Args:
+        token: 検証するJWT
+        cache: 検証済みトークンのキャッシュ（指定すると2回目以降の検証を省略する）
+    """
+    if cache is not None:
+        cached = cache.get(token)
+        if cached is not None:
+            return cached
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # 【なぜalgorithmsを鍵のものに限定する？】
+        # ヘッダーのalgをそのまま信じると、公開鍵をHMACの共通鍵として使わせる
+        # 「アルゴリズム混同攻撃」を受けるため。
+        # キャッシュに当たったときは署名を確認しないので、ここからだけを計る
+        with span("jwt", "verify_token"):
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = _key_set.verification_key(kid)
+            payload = jwt.decode(token, key.verification_key, algorithms=[key.algorithm])
+        if cache is not None:
+            cache.put(token, payload)
         return payload
     except jwt.ExpiredSignatureError:
         raise jwt.ExpiredSignatureError("トークンの有効期限が切れています")
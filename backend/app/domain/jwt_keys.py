@@ -0,0 +1,266 @@
+"""JWT署名鍵の管理（鍵セットとローテーション）
+
+【なぜこのファイルが必要？】
+HS256（共通鍵）だと、トークンを検証する側も同じSECRET_KEYを持つ必要があります。
+つまり他のサービスは「このトークン正しい？」と毎回この認証APIに問い合わせるしかありません。
+
+EdDSA / ES256（公開鍵暗号）なら：
+- 署名: 認証APIだけが持つ「秘密鍵」で行う
+- 検証: 誰でも持てる「公開鍵」で行える
+公開鍵を /.well-known/jwks.json で配れば、他のサービスは手元で検証できます。
+
+【kid（Key ID）とローテーションとは？】
+鍵は定期的に新しいものへ入れ替えます（ローテーション）。
+トークンのヘッダーに「どの鍵で署名したか（kid）」を書いておけば、
+入れ替え期間中に新旧どちらの鍵で署名されたトークンも検証できます。
+
+    not_before        not_after        not_after + 猶予期間
+        |---- 署名に使う ----|---- 検証だけできる ----|
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import get_default_algorithms
+
+# 公開鍵暗号のアルゴリズム（JWKSで公開できるもの）
+ASYMMETRIC_ALGORITHMS = {"EdDSA", "ES256", "ES384", "ES512", "RS256", "RS384", "RS512", "PS256", "PS384", "PS512"}
+# 共通鍵のアルゴリズム
+SYMMETRIC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+
+
+class SigningKey:
+    """1本の署名鍵
+
+    【なぜ鍵オブジェクトを保持する？】
+    PEM文字列のまま渡すと、PyJWTが署名・検証のたびに解析し直します。
+    読み込み時に一度だけ解析して、以後は同じオブジェクトを使い回します。
+    """
+
+    def __init__(
+        self,
+        kid: str,
+        algorithm: str,
+        private_key: Any = None,
+        public_key: Any = None,
+        not_before: Optional[datetime] = None,
+        not_after: Optional[datetime] = None,
+    ):
+        """署名鍵を初期化する
+
+        Args:
+            kid: 鍵のID（トークンのヘッダーに入る）
+            algorithm: 署名アルゴリズム（HS256, EdDSA, ES256など）
+            private_key: 署名用の鍵（共通鍵ならbytes、公開鍵暗号なら秘密鍵オブジェクト）
+            public_key: 検証用の公開鍵（省略時は秘密鍵から導出）
+            not_before: この時刻から署名に使う（Noneなら制限なし）
+            not_after: この時刻以降は署名に使わない（Noneなら制限なし）
+        """
+        if algorithm not in ASYMMETRIC_ALGORITHMS | SYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        if private_key is None and public_key is None:
+            raise ValueError(f"Key {kid} has neither a private nor a public key")
+
+        self.kid = kid
+        self.algorithm = algorithm
+        self.private_key = private_key
+        if public_key is None and self.is_asymmetric:
+            public_key = private_key.public_key()
+        self.public_key = public_key
+        self.not_before = not_before
+        self.not_after = not_after
+
+    @classmethod
+    def hmac(cls, kid: str, secret: str, algorithm: str = "HS256", **kwargs: Any) -> "SigningKey":
+        """共通鍵（HMAC）の署名鍵を作る"""
+        return cls(kid, algorithm, private_key=secret.encode("utf-8"), **kwargs)
+
+    @property
+    def is_asymmetric(self) -> bool:
+        """公開鍵暗号の鍵か"""
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    @property
+    def verification_key(self) -> Any:
+        """検証に使う鍵（公開鍵暗号なら公開鍵、共通鍵なら同じ鍵）"""
+        return self.public_key if self.is_asymmetric else self.private_key
+
+    def can_sign(self, now: datetime) -> bool:
+        """指定時刻に署名に使える鍵か"""
+        if self.private_key is None:
+            return False
+        if self.not_before is not None and now < self.not_before:
+            return False
+        if self.not_after is not None and now >= self.not_after:
+            return False
+        return True
+
+    def can_verify(self, now: datetime, grace: timedelta) -> bool:
+        """指定時刻にこの鍵で署名されたトークンを受け付けるか
+
+        【なぜ猶予期間（grace）がある？】
+        署名に使わなくなった直後でも、その鍵で署名済みのトークンは
+        有効期限まで使われ続けるため。
+        """
+        return self.not_after is None or now < self.not_after + grace
+
+    def to_jwk(self) -> Dict[str, Any]:
+        """公開鍵をJWK形式（JSON Web Key）の辞書にする"""
+        if not self.is_asymmetric:
+            raise ValueError("Symmetric keys must not be published")
+        jwk = get_default_algorithms()[self.algorithm].to_jwk(self.public_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeySet:
+    """署名鍵の集まり（ローテーション期間中は複数の鍵を持つ）"""
+
+    def __init__(self, keys: Iterable[SigningKey], verify_grace: timedelta = timedelta(0)):
+        """鍵セットを初期化する
+
+        Args:
+            keys: 署名鍵のリスト
+            verify_grace: 署名に使わなくなった鍵を検証に使い続ける期間
+                （発行するトークンの最長有効期限に合わせる）
+        """
+        self._keys: Dict[str, SigningKey] = {}
+        for key in keys:
+            if key.kid in self._keys:
+                raise ValueError(f"Duplicate kid: {key.kid}")
+            self._keys[key.kid] = key
+        if not self._keys:
+            raise ValueError("Key set must contain at least one key")
+        self._verify_grace = verify_grace
+        self._jwks: Optional[Dict[str, Any]] = None
+
+    @property
+    def keys(self) -> List[SigningKey]:
+        """すべての鍵"""
+        return list(self._keys.values())
+
+    def signing_key(self, now: Optional[datetime] = None) -> SigningKey:
+        """今署名に使う鍵を返す
+
+        【どれを選ぶ？】
+        署名に使える鍵のうち、not_beforeが一番新しいもの。
+        新しい鍵のnot_beforeが来た瞬間に自動で切り替わります。
+
+        Raises:
+            ValueError: 署名に使える鍵がない場合
+        """
+        now = now or datetime.now(timezone.utc)
+        candidates = [key for key in self._keys.values() if key.can_sign(now)]
+        if not candidates:
+            raise ValueError("No active JWT signing key")
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        return max(candidates, key=lambda key: key.not_before or epoch)
+
+    def verification_key(self, kid: Optional[str], now: Optional[datetime] = None) -> SigningKey:
+        """トークンのkidに対応する検証用の鍵を返す
+
+        【kidがないトークンは？】
+        kid導入前に発行されたトークンのため、今の署名鍵で検証します。
+
+        Raises:
+            jwt.InvalidTokenError: kidが不明、または猶予期間を過ぎた鍵の場合
+        """
+        now = now or datetime.now(timezone.utc)
+        if kid is None:
+            return self.signing_key(now)
+        key = self._keys.get(kid)
+        if key is None or not key.can_verify(now, self._verify_grace):
+            raise jwt.InvalidTokenError(f"Unknown or retired signing key: {kid}")
+        return key
+
+    def jwks(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """公開鍵をJWKS形式（{"keys": [...]}）で返す
+
+        【何を公開する？】
+        - これから使う予定の鍵（事前に配っておくと、切り替え時に検証側が困らない）
+        - 今使っている鍵
+        - 猶予期間中の古い鍵
+        共通鍵（HS256など）は秘密なので絶対に公開しません。
+
+        【キャッシュ】
+        JWKへの変換結果は一度作ったら使い回します。
+        """
+        now = now or datetime.now(timezone.utc)
+        if self._jwks is None:
+            self._jwks = {key.kid: key.to_jwk() for key in self._keys.values() if key.is_asymmetric}
+        return {
+            "keys": [
+                jwk for kid, jwk in self._jwks.items()
+                if self._keys[kid].can_verify(now, self._verify_grace)
+            ]
+        }
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601形式の日時文字列を読み込む（タイムゾーンなしはUTC扱い）"""
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _load_pem(path: str, private: bool) -> Any:
+    """PEMファイルから鍵オブジェクトを読み込む"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if private:
+        return serialization.load_pem_private_key(data, password=None)
+    return serialization.load_pem_public_key(data)
+
+
+def load_key_set(path: str, verify_grace: timedelta = timedelta(0)) -> KeySet:
+    """JSONファイルから鍵セットを読み込む
+
+    【ファイルの形式】
+        {
+          "keys": [
+            {
+              "kid": "2026-10",
+              "algorithm": "EdDSA",
+              "private_key_file": "keys/2026-10.pem",
+              "not_before": "2026-10-01T00:00:00Z",
+              "not_after": "2026-11-01T00:00:00Z"
+            },
+            {
+              "kid": "2026-09",
+              "algorithm": "EdDSA",
+              "public_key_file": "keys/2026-09.pub.pem"
+            }
+          ]
+        }
+
+    鍵ファイルのパスは、JSONファイルのあるディレクトリからの相対パスです。
+    検証専用の古い鍵は public_key_file だけを書けばOKです。
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    keys = []
+    for entry in config["keys"]:
+        private_key = None
+        public_key = None
+        if "private_key_file" in entry:
+            private_key = _load_pem(os.path.join(base_dir, entry["private_key_file"]), private=True)
+        if "public_key_file" in entry:
+            public_key = _load_pem(os.path.join(base_dir, entry["public_key_file"]), private=False)
+        keys.append(SigningKey(
+            kid=entry["kid"],
+            algorithm=entry["algorithm"],
+            private_key=private_key,
+            public_key=public_key,
+            not_before=_parse_datetime(entry.get("not_before")),
+            not_after=_parse_datetime(entry.get("not_after")),
+        ))
+    return KeySet(keys, verify_grace=verify_grace)
@@ -18,17 +18,86 @@
 - secrets（シークレット）
 - full PII（完全な個人情報）
 - full bodies with sensitive data（機密データを含む完全なボディ）
+
+【ログの流れ】
+ログを出すたびにリクエストのスレッドでフォーマットと書き込みをすると、
+その分だけレスポンスが遅れます。そこで、リクエスト側はキューに入れるだけにして、
+マスキング・フォーマット・書き込みは専用のスレッド（QueueListener）で行います。
+
+    logger.info(...) → ContextQueueHandler（リクエストIDなどを付けてキューに入れる）
+                          │ キューが満杯なら捨てる（LOG_QUEUE_FULL_POLICY=blockなら少し待つ）
+                          ▼
+                      QueueListenerのスレッド → RedactingFilter → JSON/テキスト → 標準エラー
 """
 
+import atexit
+import contextvars
+import json
 import logging
 import os
+import queue
+import random
 import re
-from typing import Optional
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ログの形式（text: 人が読む形式 / json: 1行1JSON。ログ基盤に送るとき）
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# キューと専用スレッドでログを書き出すか（falseならリクエストのスレッドで書き出す）
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE_ENABLED", "true").lower() == "true"
+# キューに溜められるログの件数
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# キューが満杯のとき（drop: すぐ捨てる / block: LOG_QUEUE_BLOCK_TIMEOUT_SECONDSまで待ってから捨てる）
+LOG_QUEUE_FULL_POLICY = os.getenv("LOG_QUEUE_FULL_POLICY", "drop")
+LOG_QUEUE_BLOCK_TIMEOUT_SECONDS = float(os.getenv("LOG_QUEUE_BLOCK_TIMEOUT_SECONDS", "0.1"))
+# INFOより下（DEBUG）のログを出す割合（ロガー名ごと。例: "sqlalchemy.engine=0.01,app.infrastructure=0.1"）
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+
+class RequestContext:
+    """1リクエストの間、すべてのログに付ける情報
+
+    【なぜ値ではなくオブジェクトをcontextvarに入れる？】
+    user_idは認証（Depends）の中でわかります。
+    contextvarに入れた値を書き換えても呼び出し元には伝わらないことがある
+    （同期のDependsは別スレッドで動く）ので、同じオブジェクトの属性を書き換えます。
+    """
+
+    __slots__ = ("request_id", "user_id", "started_at")
+
+    def __init__(self, request_id: str, user_id: Optional[str] = None):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.started_at = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        """リクエストを受け取ってからの時間（ミリ秒）"""
+        return round((time.perf_counter() - self.started_at) * 1000, 3)
+
+
+request_context: "contextvars.ContextVar[Optional[RequestContext]]" = contextvars.ContextVar(
+    "request_context", default=None
+)
+
+
+def bind_user_id(user_id: str) -> None:
+    """今のリクエストのログにユーザーIDを付ける（リクエストの外では何もしない）"""
+    context = request_context.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
 
 
 def configure_logging(level: Optional[str] = None) -> None:
     """ログ設定を初期化する
     
+    ルートロガーにハンドラーがあれば何もしない（logging.basicConfigと同じ）。
+    
     Args:
         level: ログレベル（環境変数LOG_LEVELから読み込む、デフォルトはINFO）
     """
@@ -38,16 +107,84 @@ def configure_logging(level: Optional[str] = None) -> None:
     # ログレベルを文字列から数値に変換
     numeric_level = getattr(logging, level.upper(), logging.INFO)
     
+    root = logging.root
+    if root.handlers:
+        return
+    # 前回の設定のスレッドが残っていれば止める
+    stop_logging()
+
     # ログフォーマットを設定
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    date_format = "%Y-%m-%d %H:%M:%S"
-    
+    output = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s", "%Y-%m-%d %H:%M:%S"))
+    # 出力するすべてのログから機密情報をマスキングする（キューを使う場合は専用スレッドで）
+    if LOG_REDACTION_ENABLED:
+        add_redacting_filter(output)
+
+    handler: logging.Handler = output
+    if LOG_QUEUE_ENABLED:
+        global _listener, _queue_handler
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _queue_handler = ContextQueueHandler(
+            log_queue,
+            block=LOG_QUEUE_FULL_POLICY == "block",
+            block_timeout=LOG_QUEUE_BLOCK_TIMEOUT_SECONDS,
+        )
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+    sample_rates = parse_sample_rates(LOG_SAMPLE_RATES)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
     # ルートロガーの設定
-    logging.basicConfig(
-        level=numeric_level,
-        format=log_format,
-        datefmt=date_format
-    )
+    root.addHandler(handler)
+    root.setLevel(numeric_level)
+
+
+def stop_logging() -> None:
+    """キューに残ったログを書き出して専用スレッドを止める（アプリケーション終了時に呼ぶ）"""
+    global _listener, _queue_handler
+    listener, _listener = _listener, None
+    handler, _queue_handler = _queue_handler, None
+    if handler is not None:
+        logging.root.removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
+
+# ログのマスキングを行うか（configure_loggingがハンドラーにRedactingFilterを付ける）
+LOG_REDACTION_ENABLED = os.getenv("LOG_REDACTION_ENABLED", "true").lower() == "true"
+
+REDACTED = "[REDACTED]"
+
+# キーの後ろの「: 値」「=値」「"key": "値"」の値の部分
+_VALUE_PATTERN = re.compile(r'["\']?\s*[:=]\s*["\']?([^"\'\s]+)')
+# 「Bearer 値」の値の部分
+_BEARER_VALUE_PATTERN = re.compile(r'\s+([A-Za-z0-9\-_\.]+)')
+
+# 機密情報のキーワード（小文字）と、その直後に続く値のパターン
+# access_token・refresh_token・api_secretなどは、token・secretを含むのでここに含まれる
+_KEYWORD_PATTERNS = (
+    ("password", _VALUE_PATTERN),
+    ("passwd", _VALUE_PATTERN),
+    ("pwd", _VALUE_PATTERN),
+    ("token", _VALUE_PATTERN),
+    ("secret", _VALUE_PATTERN),
+    ("api_key", _VALUE_PATTERN),
+    ("bearer", _BEARER_VALUE_PATTERN),
+)
+
+# 上のキーワードを1つの正規表現にまとめたもの（ASCII以外を含むメッセージに使う）
+_SENSITIVE_PATTERN = re.compile(
+    r'(?:password|passwd|pwd|token|secret|api_key)["\']?\s*[:=]\s*["\']?([^"\'\s]+)'
+    r'|bearer\s+([A-Za-z0-9\-_\.]+)',
+    re.IGNORECASE,
+)
 
 
 def sanitize_log_message(message: str) -> str:
@@ -58,49 +195,270 @@ def sanitize_log_message(message: str) -> str:
     - token: JWTトークンやアクセストークン
     - secret: シークレットキー
     
+    【どうやって速くしている？】
+    すべてのログに呼ばれるので、メッセージを1回だけ小文字にして、
+    キーワードを文字列検索（str.find）で探します。
+    ほとんどのログにはキーワードがないので、正規表現を1回も使わずに返ります。
+    キーワードが見つかったときだけ、その直後に値が続くかを正規表現で確認します。
+    ASCII以外の文字を含むメッセージは、小文字にすると位置がずれることがあるため、
+    大文字小文字を区別しない正規表現1つでまとめて置き換えます。
+    
     Args:
         message: 元のログメッセージ
         
     Returns:
-        機密情報がマスキングされたログメッセージ
+        機密情報がマスキングされたログメッセージ（機密情報がなければmessageそのもの）
     """
-    # パスワード関連のパターン（password, pwd, passwdなど）
-    password_patterns = [
-        r'password["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'pwd["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'passwd["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-    ]
-    
-    # トークン関連のパターン（token, access_token, refresh_tokenなど）
-    token_patterns = [
-        r'token["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'access_token["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'refresh_token["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'bearer\s+([A-Za-z0-9\-_\.]+)',  # Bearerトークン
-    ]
-    
-    # シークレット関連のパターン（secret, api_key, api_secretなど）
-    secret_patterns = [
-        r'secret["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'api_key["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-        r'api_secret["\']?\s*[:=]\s*["\']?([^"\'\s]+)',
-    ]
-    
-    sanitized = message
-    
-    # パスワードをマスキング
-    for pattern in password_patterns:
-        sanitized = re.sub(pattern, lambda m: m.group(0).replace(m.group(1), "[REDACTED]"), sanitized, flags=re.IGNORECASE)
-    
-    # トークンをマスキング
-    for pattern in token_patterns:
-        sanitized = re.sub(pattern, lambda m: m.group(0).replace(m.group(1), "[REDACTED]"), sanitized, flags=re.IGNORECASE)
-    
-    # シークレットをマスキング
-    for pattern in secret_patterns:
-        sanitized = re.sub(pattern, lambda m: m.group(0).replace(m.group(1), "[REDACTED]"), sanitized, flags=re.IGNORECASE)
-    
-    return sanitized
+    if not message.isascii():
+        return _SENSITIVE_PATTERN.sub(_redact_match, message)
+
+    lowered = message.lower()
+    spans = None
+    for keyword, value_pattern in _KEYWORD_PATTERNS:
+        index = lowered.find(keyword)
+        while index != -1:
+            match = value_pattern.match(lowered, index + len(keyword))
+            if match is not None:
+                if spans is None:
+                    spans = []
+                spans.append((index, match.start(1), match.end(1)))
+            index = lowered.find(keyword, index + 1)
+    if spans is None:
+        return message
+    return _redact_spans(message, spans)
+
+
+def _redact_match(match: "re.Match[str]") -> str:
+    """_SENSITIVE_PATTERNに一致した部分のうち、値だけを置き換える"""
+    value = match.lastindex
+    return match.group()[:match.start(value) - match.start()] + REDACTED
+
+
+def _redact_spans(message: str, spans: List[Tuple[int, int, int]]) -> str:
+    """見つかった値を置き換える
+
+    Args:
+        spans: (キーワードの位置, 値の開始位置, 値の終了位置) のリスト
+
+    【値の中にキーワードがあったら？】
+    「token: password=abc」のpasswordのように、前の値の中から始まるものは飛ばします。
+    正規表現のsubと同じく、左から順に重ならないものだけを置き換えるためです。
+    """
+    spans.sort()
+    parts = []
+    position = 0
+    for keyword_start, value_start, value_end in spans:
+        if keyword_start < position:
+            continue
+        parts.append(message[position:value_start])
+        parts.append(REDACTED)
+        position = value_end
+    parts.append(message[position:])
+    return "".join(parts)
+
+
+class RedactingFilter(logging.Filter):
+    """ログレコードのメッセージをsanitize_log_messageでマスキングするフィルター
+
+    【使い方】
+    ハンドラーに付けると、そのハンドラーが出力するすべてのログに効きます
+    （ロガーに付けると、子のロガーのログには効かない）。
+    configure_loggingは書き出し用のハンドラー（専用スレッドで動く）に自動で付けます。
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        sanitized = sanitize_log_message(message)
+        if sanitized is not message:
+            # 書き換えたときだけ、フォーマット済みのメッセージに置き換える
+            record.msg = sanitized
+            record.args = None
+        if record.exc_info and not record.exc_text:
+            # 例外のメッセージにも機密情報が入ることがある（Formatterはexc_textをそのまま使う）
+            record.exc_text = sanitize_log_message(_exception_formatter.formatException(record.exc_info))
+        return True
+
+
+_exception_formatter = logging.Formatter()
+
+
+def add_redacting_filter(handler: logging.Handler) -> None:
+    """ハンドラーにRedactingFilterを付ける（付いていれば何もしない）"""
+    if not any(isinstance(existing, RedactingFilter) for existing in handler.filters):
+        handler.addFilter(RedactingFilter())
+
+
+class ContextQueueHandler(QueueHandler):
+    """リクエストの情報を付けてキューに入れるだけのハンドラー（リクエストのスレッドで動く）
+
+    【標準のQueueHandlerとの違い】
+    - 標準のprepareはここでフォーマットまでしてしまうので、引数の埋め込みだけにする
+    - contextvarは専用スレッドからは見えないので、リクエストID・ユーザーID・経過時間をここで写す
+    - キューが満杯なら捨てて数え、次に入れられたときに「何件捨てたか」を1件のログにする
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]", block: bool = False, block_timeout: float = 0.1):
+        """ハンドラーを初期化する
+
+        Args:
+            log_queue: 大きさを決めたキュー
+            block: 満杯のとき少し待つか（Falseならすぐ捨てる）
+            block_timeout: 待つ秒数
+        """
+        super().__init__(log_queue)
+        self._block = block
+        self._block_timeout = block_timeout
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0
+        self._reported_dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数はここで埋め込む（後から中身が変わるオブジェクトが渡されることがあるため）
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        context = request_context.get()
+        if context is not None:
+            record.request_id = context.request_id
+            record.user_id = context.user_id
+            record.elapsed_ms = context.elapsed_ms()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self._block:
+                self.queue.put(record, timeout=self._block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+        if self.dropped != self._reported_dropped:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        with self._dropped_lock:
+            count = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        if count <= 0:
+            return
+        warning = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Dropped %d log records because the log queue was full", (count,), None,
+        )
+        try:
+            self.queue.put_nowait(self.prepare(warning))
+        except queue.Full:
+            pass
+
+
+class SamplingFilter(logging.Filter):
+    """INFOより下のログを、ロガー名ごとに決めた割合だけ通すフィルター
+
+    大量に出るDEBUGログ（SQLなど）を一部だけ残すために使います。
+    ロガー名は前方一致で、いちばん長く一致した設定を使います
+    （"app.infrastructure" の設定は "app.infrastructure.database" にも効く）。
+    """
+
+    def __init__(
+        self,
+        rates: Dict[str, float],
+        below_level: int = logging.INFO,
+        random_source: Callable[[], float] = random.random,
+    ):
+        """フィルターを初期化する
+
+        Args:
+            rates: ロガー名 -> 通す割合（0.0〜1.0）
+            below_level: このレベルより下のログだけを間引く
+            random_source: 0以上1未満の乱数を返す関数（テスト用に注入可能）
+        """
+        super().__init__()
+        self._rates = rates
+        self._below_level = below_level
+        self._random = random_source
+        self._rate_by_logger: Dict[str, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self._below_level:
+            return True
+        rate = self._rate_by_logger.get(record.name)
+        if rate is None:
+            rate = self._rate_by_logger[record.name] = self._rate_for(record.name)
+        return rate >= 1.0 or self._random() < rate
+
+    def _rate_for(self, name: str) -> float:
+        matched = ""
+        for prefix in self._rates:
+            if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > len(matched):
+                matched = prefix
+        return self._rates[matched] if matched else 1.0
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"ロガー名=割合,..." の形式を辞書にする（LOG_SAMPLE_RATES用）
+
+    Raises:
+        ValueError: 形式が正しくない、または割合が0.0〜1.0でない場合
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, separator, rate = item.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid log sample rate: {item!r}")
+        value = float(rate)
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"Log sample rate must be between 0 and 1: {item!r}")
+        rates[name.strip()] = value
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """1件を1行のJSONにするフォーマッター
+
+    出力例:
+        {"time": "2026-01-01T00:00:00.123Z", "level": "INFO", "logger": "app.access",
+         "message": "GET /api/users/me 200", "request_id": "...", "user_id": "...", "latency_ms": 12.3}
+
+    【なぜlogging.Formatter.formatを使わない？】
+    %(asctime)s などの置き換えやstrftimeを毎回行わないようにするためです。
+    時刻の秒までの部分は、同じ秒の間は使い回します。
+    """
+
+    # レコードにあればJSONに入れる項目（ContextQueueHandlerやextraで付く）
+    CONTEXT_FIELDS = ("request_id", "user_id", "elapsed_ms", "latency_ms", "status", "phases")
+
+    def __init__(self):
+        super().__init__()
+        # (秒, その秒の文字列)。別々の属性にすると、複数スレッドで使ったときに組がずれる
+        self._cached_second: Tuple[int, str] = (-1, "")
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self._time(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        attributes = record.__dict__
+        for field in self.CONTEXT_FIELDS:
+            value = attributes.get(field)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    def _time(self, created: float) -> str:
+        second = int(created)
+        cached_second, text = self._cached_second
+        if second != cached_second:
+            text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._cached_second = (second, text)
+        return f"{text}.{int((created - second) * 1000):03d}Z"
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -16,9 +16,9 @@
 など、機能ごとに分けると管理しやすくなります。
 """
 
-from typing import Callable
+from typing import Awaitable, Callable
 
-from app.domain.password import verify_password
+from app.domain.password import verify_password, verify_password_async
 from app.domain.jwt import create_access_token
 
 
@@ -123,3 +123,43 @@ class LoginService:
         # ステップ4: トークンを返す
         return token
 
+
+
+class AsyncLoginService:
+    """LoginServiceの非同期版
+
+    処理の流れはLoginServiceと同じです。
+    リポジトリ（AsyncUserRepository）とverifierがawaitできる関数になります。
+    """
+
+    def __init__(
+        self,
+        repository,
+        verifier: Callable[[str, str], Awaitable[bool]] = verify_password_async,
+        token_creator: Callable[[dict], str] = create_access_token
+    ):
+        """サービスを初期化する
+
+        Args:
+            repository: AsyncUserRepositoryの実装
+            verifier: 非同期のパスワード検証関数（デフォルト: verify_password_async）
+            token_creator: JWT生成関数（CPU処理のみなので同期のまま）
+        """
+        self._repository = repository
+        self._verifier = verifier
+        self._token_creator = token_creator
+
+    async def login(self, email: str, password: str) -> str:
+        """ユーザーをログインさせる（処理の流れはLoginService.loginと同じ）
+
+        Raises:
+            ValueError: ユーザーが見つからない、またはパスワードが間違っている場合
+        """
+        user = await self._repository.find_by_email(email)
+        if not user or not user.is_active:
+            raise ValueError("Invalid email or password")
+
+        if not await self._verifier(password, user.hashed_password):
+            raise ValueError("Invalid email or password")
+
+        return self._token_creator({"sub": str(user.id)})
@@ -26,6 +26,11 @@ GOOGLE_REDIRECT_URI: Optional[str] = os.getenv(
 GOOGLE_AUTHORIZATION_BASE_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
+# id_tokenの署名を確認する公開鍵（JWKS）のURL
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+
+# id_tokenの発行者（iss）として認めるもの（Googleはどちらも使う）
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
 
 # リクエストするスコープ（ユーザー情報とメールアドレス）
 GOOGLE_SCOPES = [
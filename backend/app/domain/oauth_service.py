@@ -9,12 +9,24 @@ Google OAuth認証のビジネスロジックを担当します。
 3. 既存ユーザーが存在すれば返す
 4. 存在しなければ新規ユーザーを作成して保存
 5. ユーザーを返す
+
+【ユーザー情報はどこから取る？】
+トークン交換の応答に入っているid_token（Googleが署名したJWT）を
+google_id_token.pyで確認できれば、そのクレームを使います（Googleへの往復が1回減る）。
+確認できなかったときだけ、ユーザー情報のAPIを呼びます。
 """
 
+import logging
+from typing import Any, Dict, Optional
+
+from app.domain.google_id_token import GoogleIdTokenVerifier, IdTokenError
+from app.domain.google_oauth_client import GoogleOAuthClient
 from app.domain.user import User
-from app.domain.user_repository import UserRepository
+from app.domain.user_repository import AsyncUserRepository, UserRepository
 from app.domain.exceptions import ValidationError
 
+logger = logging.getLogger(__name__)
+
 
 class GoogleOAuthService:
     """Google OAuth認証のビジネスロジックを担当
@@ -99,9 +111,86 @@ class GoogleOAuthService:
             hashed_password=dummy_password
         )
 
-        # ステップ4: リポジトリに保存
-        saved_user = self._repository.save(user)
+        # ステップ4: 重複していなければ保存
+        # 【なぜsaveではなくcreate_if_absent？】
+        # 同じGoogleアカウントで同時にログインされると、
+        # ステップ2の確認とこの保存の間に別のリクエストがユーザーを作ることがある。
+        # その場合も制約違反のエラーにせず、先に作られたユーザーを返すため。
+        saved_user = self._repository.create_if_absent(user)
+        if saved_user is None:
+            saved_user = self._repository.find_by_email(email)
 
         # ステップ5: 保存されたユーザーを返す
         return saved_user
 
+
+
+class AsyncGoogleOAuthService:
+    """GoogleOAuthServiceの非同期版
+
+    処理の流れはGoogleOAuthServiceと同じです。
+    リポジトリにAsyncUserRepositoryを受け取ります。
+    """
+
+    def __init__(
+        self,
+        repository: AsyncUserRepository,
+        id_token_verifier: Optional[GoogleIdTokenVerifier] = None,
+    ):
+        """サービスを初期化する
+
+        Args:
+            repository: ユーザーを検索・保存するリポジトリ
+            id_token_verifier: id_tokenの検証器（省略時は毎回ユーザー情報のAPIを呼ぶ）
+        """
+        self._repository = repository
+        self._id_token_verifier = id_token_verifier
+
+    async def fetch_user_info(self, token_data: Dict[str, Any], client: GoogleOAuthClient) -> Dict[str, Any]:
+        """トークン交換の応答からGoogleユーザー情報を得る
+
+        id_tokenを確認できればそのクレームを返し、
+        できなければ（id_tokenがない・鍵を取得できない・emailがない・
+        emailが確認済みでないなど）ユーザー情報のAPIを呼びます。
+
+        【なぜemail_verifiedを見る？】
+        authenticateはemailで既存のユーザーを探すので、確認されていないemailを信じると、
+        他人のemailを名乗るGoogleアカウントでそのユーザーとしてログインできてしまうためです。
+
+        Args:
+            token_data: GoogleOAuthClient.exchange_codeの戻り値
+            client: ユーザー情報のAPIを呼ぶクライアント
+        """
+        id_token = token_data.get("id_token")
+        if id_token and self._id_token_verifier is not None:
+            try:
+                claims = await self._id_token_verifier.verify(id_token)
+            except IdTokenError as e:
+                logger.warning("Falling back to the userinfo endpoint: %s", e)
+            else:
+                if claims.get("email") and claims.get("email_verified") is True:
+                    return claims
+        return await client.fetch_userinfo(token_data["access_token"])
+
+    async def authenticate(self, google_user_info: dict) -> User:
+        """Googleユーザー情報で認証し、ユーザーを作成または取得する
+
+        Raises:
+            ValidationError: emailが欠けている場合
+        """
+        email = google_user_info.get("email")
+        if not email:
+            raise ValidationError("Email is required in google_user_info")
+
+        existing_user = await self._repository.find_by_email(email)
+        if existing_user:
+            return existing_user
+
+        user = User(
+            email=email,
+            hashed_password="oauth_user_no_password"
+        )
+        saved_user = await self._repository.create_if_absent(user)
+        if saved_user is None:
+            saved_user = await self._repository.find_by_email(email)
+        return saved_user
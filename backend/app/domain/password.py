@@ -19,8 +19,12 @@
 同じ肉なら同じミンチになる。
 """
 
+import asyncio
+
 from passlib.context import CryptContext
 
+from app.domain.request_timing import timed
+
 # 【CryptContextとは？】
 # パスワードの暗号化方法を設定する「設定書」。
 # bcryptは現在最も安全とされている暗号化方式。
@@ -28,6 +32,7 @@ from passlib.context import CryptContext
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@timed("bcrypt")
 def hash_password(password: str) -> str:
     """パスワードをハッシュ化する
 
@@ -52,6 +57,7 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+@timed("bcrypt")
 def verify_password(password: str, hashed: str) -> bool:
     """パスワードを検証する
 
@@ -79,3 +85,21 @@ def verify_password(password: str, hashed: str) -> bool:
         → False（間違ったパスワード）
     """
     return pwd_context.verify(password, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    """パスワードをハッシュ化する（非同期版）
+
+    【なぜ非同期版が必要？】
+    async defの処理からhash_passwordを直接呼ぶと、
+    bcryptの計算中（0.1秒くらい）イベントループが止まってしまいます。
+    別スレッドで実行して、その間は他のリクエストを処理できるようにします。
+
+    本番ではPasswordHashingExecutor.hash_password_async（別プロセス）を注入します。
+    """
+    return await asyncio.to_thread(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """パスワードを検証する（非同期版）"""
+    return await asyncio.to_thread(verify_password, password, hashed)
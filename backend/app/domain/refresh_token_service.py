@@ -0,0 +1,120 @@
+"""リフレッシュトークンの発行・更新サービス
+
+【なぜこのファイルが必要？】
+リフレッシュトークンの「発行」と「更新（ローテーション）」の手順書です。
+- 発行: ファミリーを作り、jti（トークンID）とfam（ファミリーID）入りのトークンを返す
+- 更新: 署名を確認し、jtiが今有効なものなら新しいアクセストークンと
+        新しいリフレッシュトークンを返す（古いリフレッシュトークンは使えなくなる）
+
+ファミリーの考え方は refresh_token_store.py を参照。
+
+【jtiのない古いトークンは？】
+この仕組みを入れる前に発行したトークン（jtiなし）は、
+REFRESH_TOKEN_ALLOW_LEGACYがtrueの間だけ、新しいファミリーに乗り換えさせます。
+古いトークンは使い回しを検知できるファミリーを持たないので、
+トークンのSHA-256を使用済みとして記録し、1回しか使えないようにします
+（ログアウトに使われた場合も使用済みにします）。
+古いトークンの有効期限（7日）が過ぎたらfalseにします。
+"""
+
+import hashlib
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Tuple
+
+from app.domain.exceptions import AuthenticationError
+from app.domain.jwt import DEFAULT_REFRESH_EXPIRE_DAYS, create_access_token, create_refresh_token, verify_token
+from app.domain.refresh_token_store import REUSED, ROTATED, RefreshTokenStore
+
+# jtiのない（この仕組みを入れる前の）リフレッシュトークンを受け付けるか
+REFRESH_TOKEN_ALLOW_LEGACY = os.getenv("REFRESH_TOKEN_ALLOW_LEGACY", "true").lower() == "true"
+
+_REFRESH_TTL_SECONDS = int(timedelta(days=DEFAULT_REFRESH_EXPIRE_DAYS).total_seconds())
+
+
+class RefreshTokenService:
+    """リフレッシュトークンの発行とローテーションを担当"""
+
+    def __init__(self, store: RefreshTokenStore, allow_legacy: bool = REFRESH_TOKEN_ALLOW_LEGACY):
+        """サービスを初期化する
+
+        Args:
+            store: ファミリーの保存先
+            allow_legacy: jtiのない古いトークンを受け付けるか
+        """
+        self._store = store
+        self._allow_legacy = allow_legacy
+
+    async def issue(self, user_id: str) -> str:
+        """新しいファミリーを作って、最初のリフレッシュトークンを返す（ログイン時）"""
+        family_id = uuid.uuid4().hex
+        jti = uuid.uuid4().hex
+        await self._store.start_family(family_id, jti, ttl=_REFRESH_TTL_SECONDS)
+        return self._create(user_id, family_id, jti)
+
+    async def refresh(self, refresh_token: str) -> Tuple[str, str]:
+        """リフレッシュトークンを使って、アクセストークンとリフレッシュトークンを更新する
+
+        Returns:
+            (新しいアクセストークン, 新しいリフレッシュトークン)
+
+        Raises:
+            AuthenticationError: トークンが無効・期限切れ・使用済みの場合
+            ServiceUnavailableError: ファミリーの保存先に接続できない場合
+        """
+        try:
+            payload = verify_token(refresh_token)
+        except Exception:
+            raise AuthenticationError("Invalid or expired refresh token")
+        if payload.get("type") != "refresh":
+            raise AuthenticationError("Invalid token type. Refresh token required.")
+        user_id = payload.get("sub")
+        if not user_id:
+            raise AuthenticationError("Invalid token payload")
+
+        family_id = payload.get("fam")
+        jti = payload.get("jti")
+        if not family_id or not jti:
+            if not self._allow_legacy:
+                raise AuthenticationError("Invalid or expired refresh token")
+            if not await self._consume_legacy(refresh_token, payload):
+                raise AuthenticationError("Refresh token reuse detected")
+            return create_access_token({"sub": user_id}), await self.issue(user_id)
+
+        new_jti = uuid.uuid4().hex
+        result = await self._store.rotate(family_id, jti, new_jti, ttl=_REFRESH_TTL_SECONDS)
+        if result == REUSED:
+            raise AuthenticationError("Refresh token reuse detected")
+        if result != ROTATED:
+            raise AuthenticationError("Invalid or expired refresh token")
+        return create_access_token({"sub": user_id}), self._create(user_id, family_id, new_jti)
+
+    async def revoke(self, refresh_token: str) -> None:
+        """リフレッシュトークンのファミリーを無効にする（ログアウト時）
+
+        無効なトークンは何もしない（ログアウトは失敗させない）。
+        jtiのない古いトークンは、使用済みとして記録する。
+        """
+        try:
+            payload = verify_token(refresh_token)
+        except Exception:
+            return
+        if payload.get("type") != "refresh":
+            return
+        if payload.get("fam"):
+            await self._store.revoke_family(payload["fam"])
+        elif self._allow_legacy:
+            await self._consume_legacy(refresh_token, payload)
+
+    async def _consume_legacy(self, refresh_token: str, payload: Dict[str, Any]) -> bool:
+        """jtiのない古いトークンを使用済みにする（初めて使われたならTrue）"""
+        # 記録はトークンの有効期限が切れるまで残せばよい（それ以降は署名の確認で弾かれる）
+        exp = payload.get("exp")
+        ttl = max(1, int(exp - time.time()) + 1) if exp else _REFRESH_TTL_SECONDS
+        token_hash = hashlib.sha256(refresh_token.encode()).hexdigest()
+        return await self._store.consume_legacy(token_hash, ttl)
+
+    def _create(self, user_id: str, family_id: str, jti: str) -> str:
+        return create_refresh_token({"sub": user_id, "fam": family_id, "jti": jti})
@@ -0,0 +1,127 @@
+"""リフレッシュトークンのファミリー管理（インターフェース）
+
+【なぜこのファイルが必要？】
+リフレッシュトークンは7日間有効です。署名を確認するだけだと、
+- 盗まれたトークンを7日間使われ続けても気づけない
+- 特定のトークンだけを無効にできない（SECRET_KEYを変えると全員がログアウトになる）
+
+【ファミリーとローテーションとは？】
+ログインのたびに「ファミリー」を1つ作り、そこに「今有効なトークンのjti（ID）」を1つだけ記録します。
+
+    ログイン     → ファミリーF: jti=A         （トークンAを発行）
+    Aで更新      → ファミリーF: jti=B         （Aは使用済み。トークンBを発行）
+    Bで更新      → ファミリーF: jti=C
+    Aをもう一度  → jtiが違う＝使い回し！ → ファミリーFごと無効にする
+
+使い回しを見つけたら、正規のユーザーと攻撃者のどちらが使ったのかは区別できないので、
+ファミリーごと無効にして、もう一度ログインしてもらいます（RFC 6819 / OAuth 2.0 Security BCP）。
+"""
+
+import threading
+from abc import ABC, abstractmethod
+
+from app.domain.session_store import SessionStore
+
+# rotateの結果
+ROTATED = "rotated"  # ローテーションした（新しいjtiが有効になった）
+REUSED = "reused"  # 使用済みのjtiが使われた（ファミリーを無効にした）
+UNKNOWN = "unknown"  # ファミリーがない（期限切れ・無効化済み）
+
+# ファミリーを保存するキーの接頭辞（セッションIDと衝突しないように）
+FAMILY_KEY_PREFIX = "refresh_family:"
+# 使用済みのjtiのない古いトークン（のSHA-256）を記録するキーの接頭辞
+LEGACY_KEY_PREFIX = "refresh_legacy:"
+
+
+class RefreshTokenStore(ABC):
+    """リフレッシュトークンのファミリーを保存するインターフェース"""
+
+    @abstractmethod
+    async def start_family(self, family_id: str, jti: str, ttl: int) -> None:
+        """新しいファミリーを作る（ログイン時）
+
+        Args:
+            family_id: ファミリーID
+            jti: 最初のトークンのID
+            ttl: ファミリーの有効期限（秒）。リフレッシュトークンの有効期限と同じにする
+        """
+        pass
+
+    @abstractmethod
+    async def rotate(self, family_id: str, jti: str, new_jti: str, ttl: int) -> str:
+        """jtiが今有効なものなら新しいjtiに入れ替える（トークンの更新時）
+
+        確認と入れ替えは1回の操作で行うこと（同じトークンで同時に更新されても、
+        成功するのは1回だけにするため）。
+
+        Returns:
+            ROTATED / REUSED（ファミリーを無効にした）/ UNKNOWN
+        """
+        pass
+
+    @abstractmethod
+    async def revoke_family(self, family_id: str) -> None:
+        """ファミリーを無効にする（ログアウト時など）"""
+        pass
+
+    @abstractmethod
+    async def consume_legacy(self, token_hash: str, ttl: int) -> bool:
+        """jtiのない古いトークンを使用済みにする（1回しか使えないようにする）
+
+        確認と記録は1回の操作で行うこと（同じトークンで同時に更新されても、
+        成功するのは1回だけにするため）。
+
+        Args:
+            token_hash: トークンのSHA-256（16進数）
+            ttl: 記録を残す秒数。トークンの残りの有効期限と同じにする
+
+        Returns:
+            初めて使われたならTrue、使用済みならFalse
+        """
+        pass
+
+
+class SessionRefreshTokenStore(RefreshTokenStore):
+    """SessionStoreにファミリーを保存するRefreshTokenStore実装
+
+    【どんなときに使う？】
+    MemorySessionStoreと組み合わせて、Redisを使わない1台構成やテストで使います。
+    SessionStoreの操作は待ち時間のないもの（メモリ）を想定しています。
+    Redisを使う場合は、確認と入れ替えを1往復で行う RedisRefreshTokenStore を使います。
+    """
+
+    def __init__(self, session_store: SessionStore):
+        """RefreshTokenStoreを初期化
+
+        Args:
+            session_store: ファミリーの保存先
+        """
+        self._sessions = session_store
+        # 確認と入れ替えの間に、ほかのリクエストが割り込まないようにする
+        self._lock = threading.Lock()
+
+    async def start_family(self, family_id: str, jti: str, ttl: int) -> None:
+        self._sessions.save(FAMILY_KEY_PREFIX + family_id, {"jti": jti}, ttl=ttl)
+
+    async def rotate(self, family_id: str, jti: str, new_jti: str, ttl: int) -> str:
+        key = FAMILY_KEY_PREFIX + family_id
+        with self._lock:
+            family = self._sessions.get(key)
+            if family is None:
+                return UNKNOWN
+            if family["jti"] != jti:
+                self._sessions.delete(key)
+                return REUSED
+            self._sessions.save(key, {"jti": new_jti}, ttl=ttl)
+            return ROTATED
+
+    async def revoke_family(self, family_id: str) -> None:
+        self._sessions.delete(FAMILY_KEY_PREFIX + family_id)
+
+    async def consume_legacy(self, token_hash: str, ttl: int) -> bool:
+        key = LEGACY_KEY_PREFIX + token_hash
+        with self._lock:
+            if self._sessions.get(key) is not None:
+                return False
+            self._sessions.save(key, {"used": True}, ttl=ttl)
+            return True
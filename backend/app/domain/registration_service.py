@@ -16,9 +16,9 @@
 など、機能ごとに分けると管理しやすくなります。
 """
 
-from typing import Callable
+from typing import Awaitable, Callable
 
-from app.domain.password import hash_password
+from app.domain.password import hash_password, hash_password_async
 from app.domain.user import User
 from app.domain.exceptions import BusinessError
 
@@ -68,43 +68,74 @@ class RegistrationService:
         """新しいユーザーを登録する
 
         【処理の流れ】
-        1. 同じメールがすでに登録されていないかチェック
-        2. パスワードを暗号化
-        3. Userを作成
-        4. リポジトリに保存
+        1. パスワードを暗号化
+        2. Userを作成
+        3. 「同じメールがなければ保存」をリポジトリに1回で頼む
+        4. 保存されなかった（重複）ならエラー
         5. 作成したUserを返す
 
         【なぜUserを返す？】
         呼び出し側が「登録できたユーザー」を使えるように。
         例：登録完了メールを送る、ログに記録する等。
         """
-        # ステップ1: 重複チェック
-        # 【なぜ先にチェック？】
-        # 無駄な処理（パスワード暗号化等）を避けるため。
-        # 「早く失敗する」のがプログラミングの原則。
-        existing = self._repository.find_by_email(email)
-        if existing:
-            # 【なぜBusinessError？】
-            # 「ビジネスルール違反」というエラー。
-            # 既に登録済みのメールアドレスで登録しようとした場合。
-            raise BusinessError(f"Email {email} is already registered")
-
-        # ステップ2: パスワード暗号化
+        # ステップ1: パスワード暗号化
         # 【なぜここで暗号化？】
         # Userは「暗号化済み」のパスワードしか受け付けない。
         # 平文パスワードを持ち歩くのは危険だから。
         hashed = self._hasher(password)
 
-        # ステップ3: Userオブジェクト作成
+        # ステップ2: Userオブジェクト作成
         # 【なぜemailとhashed_passwordだけ？】
         # id, created_at, is_activeは自動設定される。
         # 必要なものだけ渡せばOK。
         user = User(email=email, hashed_password=hashed)
 
-        # ステップ4: 保存
-        # 【なぜsaveの戻り値を使わない？】
-        # 今は使わないが、将来DBがIDを振る場合に備えて。
-        self._repository.save(user)
+        # ステップ3: 重複していなければ保存
+        # 【なぜ先にfind_by_emailでチェックしない？】
+        # 「確認 → 保存」だとDBへの問い合わせが2回になり、
+        # その間に同じメールで登録されると制約違反のエラーになってしまう。
+        # create_if_absentなら重複チェックと保存が1回で、同時登録にも強い。
+        # （重複時にもハッシュ化が走るが、正常な登録の速さを優先している）
+        saved = self._repository.create_if_absent(user)
+        if saved is None:
+            # 【なぜBusinessError？】
+            # 「ビジネスルール違反」というエラー。
+            # 既に登録済みのメールアドレスで登録しようとした場合。
+            raise BusinessError(f"Email {email} is already registered")
+
+        # ステップ4: 作成したUserを返す
+        return user
+
 
-        # ステップ5: 作成したUserを返す
+class AsyncRegistrationService:
+    """RegistrationServiceの非同期版
+
+    【なぜ別クラス？】
+    処理の流れはRegistrationServiceと同じですが、
+    リポジトリ（AsyncUserRepository）とhasherがawaitできる関数になります。
+    同期版と非同期版を混ぜるとイベントループが止まるため、クラスごと分けています。
+    """
+
+    def __init__(
+        self,
+        repository,
+        hasher: Callable[[str], Awaitable[str]] = hash_password_async
+    ):
+        """サービスを初期化する
+
+        Args:
+            repository: AsyncUserRepositoryの実装
+            hasher: 非同期のパスワードハッシュ化関数（デフォルト: hash_password_async）
+        """
+        self._repository = repository
+        self._hasher = hasher
+
+    async def register(self, email: str, password: str) -> User:
+        """新しいユーザーを登録する（処理の流れはRegistrationService.registerと同じ）"""
+        hashed = await self._hasher(password)
+        user = User(email=email, hashed_password=hashed)
+
+        saved = await self._repository.create_if_absent(user)
+        if saved is None:
+            raise BusinessError(f"Email {email} is already registered")
         return user
@@ -0,0 +1,193 @@
+"""リクエストの処理時間をフェーズごとに記録する
+
+【なぜこのファイルが必要？】
+/api/loginが遅いとき、それがbcrypt（verify_password）なのか、
+DB（find_by_email）なのか、JWTの作成なのかが、全体の時間だけではわかりません。
+そこで、時間のかかる処理を「フェーズ」ごとに計って、リクエストごとに合計します。
+
+    フェーズ   計っている処理
+    db        SqlAlchemyUserRepository / AsyncSqlAlchemyUserRepository
+    redis     RedisSessionStore / AsyncRedisSessionStore
+    bcrypt    password.py / PasswordHashingExecutor
+    jwt       jwt.py（トークンの作成・検証）
+    http      GoogleOAuthClient（Googleへのリクエスト）
+
+結果はServer-Timingヘッダー（ブラウザの開発者ツールで見られる）と
+リクエストごとの1行のログ（app.timing）になります（app/api/request_timing.py）。
+
+【計っていないときのコストは？】
+計る処理はspan()かtimed()で包みます。
+リクエストを記録中でなく、オブザーバーもいなければ、
+contextvarを1回読むだけで何もしません（数十ナノ秒）。
+
+【オブザーバーとは？】
+add_observerで登録した関数には、リクエストの記録とは別に
+すべての計測結果（フェーズ・処理名・秒数）が渡されます（メトリクスの集計などに使う）。
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+# リクエストごとのフェーズ別の時間を記録するか（Server-Timingヘッダーとapp.timingのログ）
+REQUEST_TIMING_ENABLED = os.getenv("REQUEST_TIMING_ENABLED", "false").lower() == "true"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# (フェーズ, 処理名, 秒数) を受け取る関数
+Observer = Callable[[str, str, float], None]
+
+
+class RequestTimings:
+    """1リクエストの中の、フェーズごとの合計時間と回数"""
+
+    __slots__ = ("_lock", "durations", "counts", "started_at")
+
+    def __init__(self):
+        # スレッドプールで動く処理（DB・bcrypt）からも足されるのでロックを取る
+        self._lock = threading.Lock()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.started_at = time.perf_counter()
+
+    def add(self, phase: str, seconds: float) -> None:
+        """フェーズの時間を足す"""
+        with self._lock:
+            self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+            self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def total_ms(self) -> float:
+        """記録を始めてからの時間（ミリ秒）"""
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{フェーズ: {"ms": 合計ミリ秒, "count": 回数}}"""
+        with self._lock:
+            return {
+                phase: {"ms": round(seconds * 1000, 3), "count": self.counts[phase]}
+                for phase, seconds in self.durations.items()
+            }
+
+    def server_timing(self) -> str:
+        """Server-Timingヘッダーの値（例: db;dur=12.3;desc="2 calls", total;dur=130.2）"""
+        entries = [
+            f'{phase};dur={phase_summary["ms"]:.1f};desc="{phase_summary["count"]} calls"'
+            for phase, phase_summary in self.summary().items()
+        ]
+        entries.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(entries)
+
+
+_current: "contextvars.ContextVar[Optional[RequestTimings]]" = contextvars.ContextVar(
+    "request_timings", default=None
+)
+_observers: List[Observer] = []
+_NOOP = nullcontext()
+
+
+def start_recording() -> "contextvars.Token[Optional[RequestTimings]]":
+    """今のリクエスト（コンテキスト）の記録を始める（stop_recordingにトークンを渡して終える）"""
+    return _current.set(RequestTimings())
+
+
+def stop_recording(token: "contextvars.Token[Optional[RequestTimings]]") -> None:
+    """記録を終える"""
+    _current.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """今のリクエストの記録（記録中でなければNone）"""
+    return _current.get()
+
+
+def add_observer(observer: Observer) -> None:
+    """すべての計測結果を受け取る関数を登録する"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_observer(observer: Observer) -> None:
+    """登録した関数を外す"""
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def record(phase: str, operation: str, seconds: float) -> None:
+    """計った時間を記録する（span・timedを使えないところから直接呼ぶ）"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+    for observer in _observers:
+        observer(phase, operation, seconds)
+
+
+class _Span:
+    """withの間の時間を計る"""
+
+    __slots__ = ("_phase", "_operation", "_started")
+
+    def __init__(self, phase: str, operation: str):
+        self._phase = phase
+        self._operation = operation
+
+    def __enter__(self) -> "_Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        record(self._phase, self._operation, time.perf_counter() - self._started)
+
+
+def span(phase: str, operation: str = ""):
+    """withの間の時間をフェーズに足す
+
+    例:
+        with span("redis", "get"):
+            pipeline.execute()
+    """
+    if _current.get() is None and not _observers:
+        return _NOOP
+    return _Span(phase, operation)
+
+
+def timed(phase: str, operation: Optional[str] = None) -> Callable[[F], F]:
+    """関数（同期・async defのどちらでも）の時間をフェーズに足すデコレーター
+
+    Args:
+        phase: フェーズ（db, redis, bcrypt, jwt, http）
+        operation: 処理名（省略時は関数名。オブザーバーに渡す）
+    """
+    def decorate(function: F) -> F:
+        name = operation or function.__name__
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current.get() is None and not _observers:
+                    return await function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    record(phase, name, time.perf_counter() - started)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current.get() is None and not _observers:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(phase, name, time.perf_counter() - started)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
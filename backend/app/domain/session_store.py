@@ -20,7 +20,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
 
 
 class SessionStore(ABC):
@@ -82,3 +82,128 @@ class SessionStore(ABC):
         """
         pass
 
+
+    def save_many(self, sessions: Dict[str, Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """複数のセッションをまとめて保存する
+
+        Args:
+            sessions: セッションIDとデータの辞書
+            ttl: 有効期限（秒単位、すべてのセッションに同じ値を使う）
+
+        【なぜまとめて保存する？】
+        Redisのように通信の往復（ラウンドトリップ）がかかる保存先では、
+        N件を1回の往復で送れるため。
+        実装クラスで上書きしない場合は、1件ずつsaveを呼びます。
+        """
+        for session_id, data in sessions.items():
+            self.save(session_id, data, ttl=ttl)
+
+    def get_many(self, session_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """複数のセッションをまとめて取得する
+
+        Returns:
+            session_idsと同じ順番のリスト（見つからないものはNone）
+        """
+        return [self.get(session_id) for session_id in session_ids]
+
+    def delete_many(self, session_ids: Iterable[str]) -> None:
+        """複数のセッションをまとめて削除する
+
+        【どういうときに使う？】
+        「すべての端末からログアウト」のように、
+        1人のユーザーのセッションを一度に無効化するとき。
+        """
+        for session_id in session_ids:
+            self.delete(session_id)
+
+    def touch(self, session_id: str, ttl: int) -> bool:
+        """セッションの有効期限を延ばす（スライディング有効期限）
+
+        【スライディング有効期限とは？】
+        「最後にアクセスしてからttl秒」で切れるようにすること。
+        使い続けているユーザーはログアウトされず、放置されたセッションだけが切れます。
+
+        Args:
+            session_id: セッションID
+            ttl: 今からの有効期限（秒）
+
+        Returns:
+            セッションが存在して延長できたらTrue
+
+        実装クラスで上書きしない場合は、取得して保存し直します（2往復）。
+        """
+        data = self.get(session_id)
+        if data is None:
+            return False
+        self.save(session_id, data, ttl=ttl)
+        return True
+
+    def get_and_touch(self, session_id: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """セッションを取得して、同時に有効期限を延ばす
+
+        リクエストのたびに呼べば、1回の操作でスライディング有効期限を実現できます。
+
+        Returns:
+            セッションデータ（辞書形式）。見つからない場合はNone
+        """
+        data = self.get(session_id)
+        if data is not None:
+            self.save(session_id, data, ttl=ttl)
+        return data
+
+
+class AsyncSessionStore(ABC):
+    """SessionStoreの非同期版インターフェース
+
+    【なぜ非同期版が必要？】
+    async defのエンドポイントから同期のRedisクライアントを呼ぶと、
+    Redisの応答を待つ間イベントループ全体が止まってしまいます。
+    スレッドプールに逃がす方法もありますが、リクエストのたびにスレッドを
+    行き来するコストがかかるため、awaitできるクライアントを直接使います。
+
+    メソッドの意味はSessionStoreと同じです。
+    """
+
+    @abstractmethod
+    async def save(self, session_id: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """セッションを保存する"""
+        pass
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """セッションを取得する"""
+        pass
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """セッションを削除する"""
+        pass
+
+    async def save_many(self, sessions: Dict[str, Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """複数のセッションをまとめて保存する（SessionStore.save_manyと同じ）"""
+        for session_id, data in sessions.items():
+            await self.save(session_id, data, ttl=ttl)
+
+    async def get_many(self, session_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """複数のセッションをまとめて取得する（SessionStore.get_manyと同じ）"""
+        return [await self.get(session_id) for session_id in session_ids]
+
+    async def delete_many(self, session_ids: Iterable[str]) -> None:
+        """複数のセッションをまとめて削除する（SessionStore.delete_manyと同じ）"""
+        for session_id in session_ids:
+            await self.delete(session_id)
+
+    async def touch(self, session_id: str, ttl: int) -> bool:
+        """セッションの有効期限を延ばす（SessionStore.touchと同じ）"""
+        data = await self.get(session_id)
+        if data is None:
+            return False
+        await self.save(session_id, data, ttl=ttl)
+        return True
+
+    async def get_and_touch(self, session_id: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """セッションを取得して、同時に有効期限を延ばす（SessionStore.get_and_touchと同じ）"""
+        data = await self.get(session_id)
+        if data is not None:
+            await self.save(session_id, data, ttl=ttl)
+        return data
@@ -0,0 +1,134 @@
+"""検証済みトークンのキャッシュ
+
+【なぜこのファイルが必要？】
+保護されたAPI（/api/users/meなど）は、リクエストのたびに
+verify_tokenでJWTを検証します（base64デコード、JSON解析、HMAC計算）。
+フロントエンドは同じアクセストークンを1分間に何十回も送ってくるので、
+「一度検証したトークン」の結果を覚えておけば、計算を省けます。
+
+【安全性の考え方】
+- キーはトークンそのものではなくSHA-256ダイジェスト（メモリにトークンを残さない）
+- トークンのexp（有効期限）を過ぎたエントリは絶対に返さない
+- TTL（キャッシュ自体の有効期限）と最大件数で古いものから捨てる（LRU）
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# キャッシュを使うか
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+# 最大件数
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+# 1件あたりの最大保持秒数
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+
+
+class VerifiedTokenCache:
+    """検証済みトークンのペイロードを覚えておくLRUキャッシュ
+
+    【LRUとは？】
+    Least Recently Used（最近使われていないもの）から捨てる方式。
+    OrderedDictの並び順を「最近使った順」として使います。
+    """
+
+    def __init__(
+        self,
+        max_size: int = TOKEN_CACHE_MAX_SIZE,
+        ttl_seconds: float = TOKEN_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """キャッシュを初期化する
+
+        Args:
+            max_size: 最大件数
+            ttl_seconds: 1件あたりの最大保持秒数
+            clock: 現在時刻（UNIX秒）を返す関数（テスト用に注入可能）
+        """
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """キャッシュからペイロードを取り出す
+
+        Returns:
+            ペイロードのコピー。見つからない・期限切れの場合はNone
+        """
+        key = self._key(token)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, payload = entry
+            if expires_at <= now:
+                # 期限切れのエントリは返さずに捨てる
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # 【なぜコピー？】呼び出し側が書き換えてもキャッシュが汚れないように
+            return dict(payload)
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        """検証済みのペイロードをキャッシュに入れる
+
+        【保持期限】
+        「今＋TTL」と「トークンのexp」の早いほうまでしか保持しません。
+        """
+        now = self._clock()
+        expires_at = now + self._ttl_seconds
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """すべてのエントリを捨てる"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット数・ミス数・ヒット率・件数を返す"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self._max_size,
+        }
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        """トークンのダイジェスト（キャッシュのキー）を作る"""
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+# アプリケーション全体で共有するキャッシュ（無効化されていればNone）
+verified_token_cache: Optional[VerifiedTokenCache] = (
+    VerifiedTokenCache() if TOKEN_CACHE_ENABLED else None
+)
@@ -0,0 +1,203 @@
+"""アクセストークンの失効リスト（インターフェースとブルームフィルター）
+
+【なぜこのファイルが必要？】
+アクセストークンは署名を確認するだけで受け付けるので、一度発行すると
+有効期限（15分）が切れるまで取り消せません。
+失効させたトークンのjti（トークンID）をRedisに記録すれば取り消せますが、
+認証が必要なリクエストのたびにRedisに問い合わせると、毎回1往復ぶん遅くなります。
+
+【ブルームフィルターとは？】
+「この値は入っているか？」に
+- 「入っていない」なら必ず正しい
+- 「入っているかも」はたまに間違える（誤検知。確率は設定で決める）
+と答える、とても小さな集合です（10万件・誤検知0.1%で約180KB）。
+
+ほとんどのトークンは失効していないので、
+「入っていない」と言われたらRedisに聞かずに通せます（CPUだけ・数マイクロ秒）。
+「入っているかも」のときだけRedisで本当に失効しているか確認します。
+
+【ローリングとは？】
+ブルームフィルターは要素を消せません。ずっと足し続けると誤検知が増えるので、
+2世代（今と1つ前）を持って、window秒ごとに古い世代を捨てます。
+アクセストークンの有効期限をwindowにすれば、捨てたjtiのトークンはもう期限切れです。
+"""
+
+import hashlib
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict
+
+
+class BloomFilter:
+    """ブルームフィルター（要素の追加と「入っているかも」の確認だけができる）"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        """フィルターを作る
+
+        Args:
+            capacity: 入れる予定の件数（超えると誤検知の確率が上がる）
+            error_rate: capacity件入れたときの誤検知の確率（0.001なら0.1%）
+        """
+        # ビット数と使うハッシュの数は、件数と誤検知の確率から決まる（標準的な式）
+        self._size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self.count = 0
+
+    def add(self, item: str) -> None:
+        """要素を追加する（複数スレッドから呼ぶ場合は呼び出し側でロックする）"""
+        h1, h2 = _hash_pair(item)
+        size = self._size
+        for i in range(self._hashes):
+            index = (h1 + i * h2) % size
+            self._bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """入っているかもしれなければTrue（Falseなら絶対に入っていない）"""
+        return self.contains_hashed(*_hash_pair(item))
+
+    def contains_hashed(self, h1: int, h2: int) -> bool:
+        """_hash_pairの結果で確認する（同じ要素を何個ものフィルターで確認するときに使う）
+
+        【なぜall()やジェネレーターを使わない？】
+        毎回の認証で呼ばれるので、関数呼び出しを減らしています。
+        入っていない要素はたいてい最初の1〜2ビットで終わります。
+        """
+        bits = self._bits
+        size = self._size
+        for i in range(self._hashes):
+            index = (h1 + i * h2) % size
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+
+def _hash_pair(item: str):
+    """ハッシュ2つを作る（k個の位置はh1 + i*h2で作る。ダブルハッシュ法）"""
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class RollingBloomFilter:
+    """2世代のブルームフィルターを一定時間ごとに入れ替えるフィルター
+
+    【追加した要素はいつまで残る？】
+    最低でもwindow秒（最長で2×window秒）。
+    expires_atがそれより先の要素（長い有効期限のトークン）は、
+    世代を入れ替えるときに新しい世代へ入れ直します。
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        window_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        """フィルターを作る
+
+        Args:
+            capacity: 1世代に入れる予定の件数
+            error_rate: 1世代あたりの誤検知の確率
+            window_seconds: 世代を入れ替える間隔（アクセストークンの有効期限と同じにする）
+            clock: 現在時刻（UNIX秒）を返す関数（テスト用に注入可能）
+        """
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = clock()
+        # window秒より長く残す必要がある要素 -> 期限
+        self._long_lived: Dict[str, float] = {}
+
+    def add(self, item: str, expires_at: float) -> None:
+        """要素を追加する
+
+        Args:
+            item: 要素（jti）
+            expires_at: この要素を覚えておく必要がある期限（トークンのexp。UNIX秒）
+        """
+        with self._lock:
+            self._rotate_if_due()
+            self._current.add(item)
+            if expires_at > self._clock() + self._window_seconds:
+                self._long_lived[item] = expires_at
+
+    def __contains__(self, item: str) -> bool:
+        """入っているかもしれなければTrue"""
+        if self._clock() - self._rotated_at >= self._window_seconds:
+            with self._lock:
+                self._rotate_if_due()
+        h1, h2 = _hash_pair(item)
+        return self._current.contains_hashed(h1, h2) or self._previous.contains_hashed(h1, h2)
+
+    def clear(self) -> None:
+        """すべての要素を捨てる（Redisから読み直す前に使う）"""
+        with self._lock:
+            self._current = BloomFilter(self._capacity, self._error_rate)
+            self._previous = BloomFilter(self._capacity, self._error_rate)
+            self._long_lived.clear()
+            self._rotated_at = self._clock()
+
+    def __len__(self) -> int:
+        """今の世代と1つ前の世代に追加した件数"""
+        return self._current.count + self._previous.count
+
+    def _rotate_if_due(self) -> None:
+        """window秒経っていたら世代を入れ替える（ロックを取ってから呼ぶ）"""
+        now = self._clock()
+        if now - self._rotated_at < self._window_seconds:
+            return
+        fresh = BloomFilter(self._capacity, self._error_rate)
+        for item, expires_at in list(self._long_lived.items()):
+            if expires_at <= now:
+                del self._long_lived[item]
+            else:
+                fresh.add(item)
+        # 2世代分経っていたら、1つ前の世代も空にする
+        self._previous = self._current if now - self._rotated_at < 2 * self._window_seconds else fresh
+        self._current = fresh
+        self._rotated_at = now
+
+
+class TokenDenylist(ABC):
+    """失効させたアクセストークン（jti）のリスト"""
+
+    @abstractmethod
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """トークンを失効させる
+
+        Args:
+            jti: トークンID
+            expires_at: トークンの有効期限（UNIX秒）。この時刻を過ぎたら記録を消してよい
+        """
+        pass
+
+    @abstractmethod
+    async def is_revoked(self, jti: str) -> bool:
+        """トークンが失効しているか"""
+        pass
+
+
+class MemoryTokenDenylist(TokenDenylist):
+    """プロセス内だけのTokenDenylist実装（1台構成・テスト用）"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._revoked: Dict[str, float] = {}
+        self._clock = clock
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        now = self._clock()
+        # 期限切れの記録をついでに捨てる
+        self._revoked = {j: exp for j, exp in self._revoked.items() if exp > now}
+        self._revoked[jti] = expires_at
+
+    async def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > self._clock()
@@ -21,7 +21,7 @@
 
 from abc import ABC, abstractmethod
 from uuid import UUID
-from typing import Union
+from typing import Dict, Iterable, List, Union
 
 from app.domain.user import User
 
@@ -75,3 +75,123 @@ class UserRepository(ABC):
         メールアドレスが変わっても履歴が消えないように。
         """
         pass
+
+    def create_if_absent(self, user: User) -> Union[User, None]:
+        """同じメールアドレスのユーザーがいなければ保存する
+
+        【なぜ必要？】
+        「find_by_emailで確認 → saveで保存」だと、
+        - DBへの問い合わせが2回になる
+        - 確認と保存の間に同じメールで登録されると、保存が制約違反で失敗する
+        DBが「なければ入れる」を1回でできるなら、そちらを使うほうが速くて安全です。
+
+        Returns:
+            保存したUser。すでに同じメールアドレスのユーザーがいればNone
+
+        【なぜabstractmethodではない？】
+        ここにあるのは「確認してから保存する」素直な実装です。
+        DBの機能（INSERT ... ON CONFLICT）を使える実装クラスで上書きします。
+        """
+        if self.find_by_email(user.email) is not None:
+            return None
+        return self.save(user)
+
+    def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        """複数のIDでユーザーをまとめて探す
+
+        【どういうときに使う？】
+        管理画面や他のサービスが数百人分のユーザーを一度に必要とするとき。
+        find_by_idを500回呼ぶと問い合わせも500回になるため、
+        実装クラスでは WHERE id IN (...) にまとめます。
+
+        Returns:
+            見つかったユーザーだけを入れた辞書（キーはID）
+        """
+        found = {}
+        for id in ids:
+            user = self.find_by_id(id)
+            if user is not None:
+                found[user.id] = user
+        return found
+
+    def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        """複数のメールアドレスでユーザーをまとめて探す
+
+        Returns:
+            見つかったユーザーだけを入れた辞書（キーはメールアドレス）
+        """
+        found = {}
+        for email in emails:
+            user = self.find_by_email(email)
+            if user is not None:
+                found[user.email] = user
+        return found
+
+    def bulk_create_if_absent(self, users: List[User]) -> List[User]:
+        """複数のユーザーを、メールアドレスが重複しないものだけまとめて保存する
+
+        【どういうときに使う？】
+        他システムからの一括移行（数十万件）など。
+        1件ずつ保存すると問い合わせ回数が件数分になるため、
+        実装クラスでは複数行のINSERTを1回で投げます。
+
+        Returns:
+            実際に保存されたUserのリスト（重複したものは含まれない）
+        """
+        created = []
+        for user in users:
+            saved = self.create_if_absent(user)
+            if saved is not None:
+                created.append(saved)
+        return created
+
+
+class AsyncUserRepository(ABC):
+    """UserRepositoryの非同期版インターフェース
+
+    【なぜ非同期版が必要？】
+    async defのエンドポイントから同期のDB操作を呼ぶと、
+    待っている間イベントループ全体が止まってしまいます。
+    awaitできるメソッドにすることで、待ち時間に他のリクエストを処理できます。
+
+    メソッドの意味はUserRepositoryと同じです。
+    """
+
+    @abstractmethod
+    async def save(self, user: User) -> User:
+        """ユーザーを保存する"""
+        pass
+
+    @abstractmethod
+    async def find_by_email(self, email: str) -> Union[User, None]:
+        """メールアドレスでユーザーを探す"""
+        pass
+
+    @abstractmethod
+    async def find_by_id(self, id: UUID) -> Union[User, None]:
+        """IDでユーザーを探す"""
+        pass
+
+    async def create_if_absent(self, user: User) -> Union[User, None]:
+        """同じメールアドレスのユーザーがいなければ保存する（UserRepository.create_if_absentと同じ）"""
+        if await self.find_by_email(user.email) is not None:
+            return None
+        return await self.save(user)
+
+    async def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        """複数のIDでユーザーをまとめて探す（UserRepository.find_by_idsと同じ）"""
+        found = {}
+        for id in ids:
+            user = await self.find_by_id(id)
+            if user is not None:
+                found[user.id] = user
+        return found
+
+    async def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        """複数のメールアドレスでユーザーをまとめて探す（UserRepository.find_by_emailsと同じ）"""
+        found = {}
+        for email in emails:
+            user = await self.find_by_email(email)
+            if user is not None:
+                found[user.email] = user
+        return found
@@ -0,0 +1,150 @@
+"""非同期 Redis SessionStore実装
+
+【このファイルの目的】
+AsyncSessionStoreインターフェースをredis.asyncioで実装します。
+RedisSessionStoreと同じデータ形式（SessionSerializer）なので、
+同期版と非同期版を混在させても同じセッションを読み書きできます。
+
+【実装のポイント】
+1. 共有のコネクションプール（lifespanで閉じる）を使う
+2. 接続・応答にタイムアウトを設定する（redis_client.pyの設定）
+3. Redisの障害が続いたらサーキットブレーカーで即座に503を返す
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import redis
+import redis.asyncio
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.domain.request_timing import timed
+from app.domain.session_store import AsyncSessionStore
+from app.infrastructure.circuit_breaker import CircuitBreaker
+from app.infrastructure.redis_client import get_async_redis_client
+from app.infrastructure.session_serializer import SessionSerializer, get_default_serializer
+from app.infrastructure.session_store import SESSION_KEY_PREFIX
+
+T = TypeVar("T")
+
+
+class AsyncRedisSessionStore(AsyncSessionStore):
+    """redis.asyncioを使ったAsyncSessionStore実装
+
+    【Redisのエラーはどうなる？】
+    接続できない・タイムアウトした場合は ServiceUnavailableError（503）に変換します。
+    連続して失敗したらサーキットブレーカーが開き、しばらくはRedisに問い合わせずに
+    即座にServiceUnavailableErrorを返します。
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.asyncio.Redis] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        serializer: Optional[SessionSerializer] = None,
+        key_prefix: str = SESSION_KEY_PREFIX,
+    ):
+        """SessionStoreを初期化
+
+        Args:
+            redis_client: 非同期Redisクライアント（テスト用に注入可能）
+            circuit_breaker: サーキットブレーカー（テスト用に注入可能）
+            serializer: セッションデータの変換方法（省略時は環境変数の設定）
+            key_prefix: Redisキーの接頭辞（RedisSessionStoreと同じ値にする）
+        """
+        self._redis = redis_client or get_async_redis_client(decode_responses=False)
+        self._breaker = circuit_breaker or CircuitBreaker("redis")
+        self._serializer = serializer or get_default_serializer()
+        self._key_prefix = key_prefix
+
+    def _key(self, session_id: str) -> str:
+        """セッションIDのRedisキー"""
+        return self._key_prefix + session_id
+
+    @timed("redis")
+    async def save(self, session_id: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """セッションをRedisに保存する"""
+        payload = self._serializer.dumps(data)
+        if ttl is not None:
+            await self._call(lambda: self._redis.setex(self._key(session_id), ttl, payload))
+        else:
+            await self._call(lambda: self._redis.set(self._key(session_id), payload))
+
+    @timed("redis")
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """セッションをRedisから取得する"""
+        payload = await self._call(lambda: self._redis.get(self._key(session_id)))
+        if payload is None:
+            return None
+        return self._serializer.loads(payload)
+
+    @timed("redis")
+    async def delete(self, session_id: str) -> None:
+        """セッションをRedisから削除する"""
+        await self._call(lambda: self._redis.delete(self._key(session_id)))
+
+    @timed("redis")
+    async def save_many(self, sessions: Dict[str, Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """複数のセッションをパイプラインで1往復でまとめて保存する"""
+        if not sessions:
+            return
+        pipeline = self._redis.pipeline(transaction=False)
+        for session_id, data in sessions.items():
+            payload = self._serializer.dumps(data)
+            if ttl is not None:
+                pipeline.setex(self._key(session_id), ttl, payload)
+            else:
+                pipeline.set(self._key(session_id), payload)
+        await self._call(pipeline.execute)
+
+    @timed("redis")
+    async def get_many(self, session_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """複数のセッションをMGETで1往復でまとめて取得する"""
+        session_ids = list(session_ids)
+        if not session_ids:
+            return []
+        values = await self._call(lambda: self._redis.mget([self._key(session_id) for session_id in session_ids]))
+        return [self._serializer.loads(value) if value is not None else None for value in values]
+
+    @timed("redis")
+    async def delete_many(self, session_ids: Iterable[str]) -> None:
+        """複数のセッションを1回のDELでまとめて削除する"""
+        session_ids = list(session_ids)
+        if session_ids:
+            await self._call(lambda: self._redis.delete(*(self._key(session_id) for session_id in session_ids)))
+
+    @timed("redis")
+    async def touch(self, session_id: str, ttl: int) -> bool:
+        """EXPIREで有効期限だけを延ばす"""
+        return bool(await self._call(lambda: self._redis.expire(self._key(session_id), ttl)))
+
+    @timed("redis")
+    async def get_and_touch(self, session_id: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """GETEXで取得と有効期限の延長を1往復で行う"""
+        payload = await self._call(lambda: self._redis.getex(self._key(session_id), ex=ttl))
+        if payload is None:
+            return None
+        return self._serializer.loads(payload)
+
+    async def _call(self, command: Callable[[], Awaitable[T]]) -> T:
+        """サーキットブレーカー越しにRedisのコマンドを実行する
+
+        【なぜ接続エラーとタイムアウトだけ数える？】
+        それ以外のエラー（型の違うキーへの操作など）はRedis自体の障害ではなく、
+        呼び出し側の問題なので、回路を開く理由にならないためです。
+        """
+        self._breaker.before_call()
+        try:
+            result = await command()
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self._breaker.record_failure()
+            raise ServiceUnavailableError(f"Session store is unavailable: {e}") from e
+        except Exception:
+            # Redisからは応答があった（Redis自体は生きている）
+            self._breaker.record_success()
+            raise
+        except BaseException:
+            # キャンセル（クライアントの切断など）。Redisの状態はわからないので、試しの枠だけ返す
+            self._breaker.release_trial()
+            raise
+        self._breaker.record_success()
+        return result
@@ -0,0 +1,179 @@
+"""非同期 UserRepository実装
+
+【このファイルの目的】
+AsyncUserRepositoryインターフェースを2通りで実装します。
+
+1. AsyncSqlAlchemyUserRepository
+   asyncpg（非同期ドライバ）でPostgreSQLに問い合わせます。
+   DBの応答を待つ間、イベントループは他のリクエストを処理できます。
+
+2. ThreadedUserRepository
+   既存の同期リポジトリ（SqlAlchemyUserRepository）をスレッドプールで実行します。
+   非同期版と同期版のレイテンシを比較（A/Bテスト）するために残しています。
+"""
+
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Union
+from uuid import UUID
+
+import anyio
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.request_timing import timed
+from app.domain.user import User
+from app.domain.user_repository import AsyncUserRepository, UserRepository
+from app.infrastructure.database import UserModel
+from app.infrastructure.user_repository import chunked, insert_ignoring_duplicate_email, to_user_row
+
+
+class AsyncSqlAlchemyUserRepository(AsyncUserRepository):
+    """SQLAlchemy（AsyncSession）を使ったAsyncUserRepository実装
+
+    【変換処理】
+    SqlAlchemyUserRepositoryと同じく、ドメインUser ←→ UserModel の相互変換を行います。
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    @timed("db")
+    async def save(self, user: User) -> User:
+        """ユーザーをデータベースに保存
+
+        【なぜrefreshしない？】
+        保存する値はすべてドメインUserが持っているため、
+        DBから読み直す（SELECTを1回余分に投げる）必要がないからです。
+        """
+        user_model = UserModel(
+            id=str(user.id),
+            email=user.email,
+            hashed_password=user.hashed_password,
+            created_at=user.created_at,
+            is_active=user.is_active
+        )
+
+        try:
+            self._session.add(user_model)
+            await self._session.commit()
+            return self._to_domain_user(user_model)
+        except IntegrityError:
+            await self._session.rollback()
+            raise
+
+    @timed("db")
+    async def create_if_absent(self, user: User) -> Union[User, None]:
+        """同じメールアドレスのユーザーがいなければ保存する
+
+        INSERT ... ON CONFLICT (email) DO NOTHING RETURNING の1往復で済ませます。
+        """
+        statement = insert_ignoring_duplicate_email(
+            self._session.get_bind().dialect.name, [to_user_row(user)]
+        )
+        try:
+            result = await self._session.execute(statement)
+            inserted = result.first()
+            await self._session.commit()
+        except SQLAlchemyError:
+            # 制約違反に限らず、失敗したトランザクションはロールバックしてセッションを使える状態に戻す
+            await self._session.rollback()
+            raise
+
+        return user if inserted is not None else None
+
+    @timed("db")
+    async def find_by_id(self, id: UUID) -> Union[User, None]:
+        """IDでユーザーを検索"""
+        result = await self._session.execute(
+            select(UserModel).where(UserModel.id == str(id)).limit(1)
+        )
+        user_model = result.scalars().first()
+
+        if user_model is None:
+            return None
+
+        return self._to_domain_user(user_model)
+
+    @timed("db")
+    async def find_by_email(self, email: str) -> Union[User, None]:
+        """メールアドレスでユーザーを検索"""
+        result = await self._session.execute(
+            select(UserModel).where(UserModel.email == email).limit(1)
+        )
+        user_model = result.scalars().first()
+
+        if user_model is None:
+            return None
+
+        return self._to_domain_user(user_model)
+
+    @timed("db")
+    async def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        """複数のIDでまとめて検索（WHERE id IN (...)をチャンクごとに1回）"""
+        found = {}
+        for chunk in chunked(str(id) for id in ids):
+            result = await self._session.execute(select(UserModel).where(UserModel.id.in_(chunk)))
+            for user_model in result.scalars():
+                user = self._to_domain_user(user_model)
+                found[user.id] = user
+        return found
+
+    @timed("db")
+    async def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        """複数のメールアドレスでまとめて検索（WHERE email IN (...)をチャンクごとに1回）"""
+        found = {}
+        for chunk in chunked(emails):
+            result = await self._session.execute(select(UserModel).where(UserModel.email.in_(chunk)))
+            for user_model in result.scalars():
+                user = self._to_domain_user(user_model)
+                found[user.email] = user
+        return found
+
+    def _to_domain_user(self, user_model: UserModel) -> User:
+        """SQLAlchemyモデルをドメインモデルに変換"""
+        return User(
+            id=UUID(user_model.id),
+            email=user_model.email,
+            hashed_password=user_model.hashed_password,
+            created_at=user_model.created_at,
+            is_active=user_model.is_active
+        )
+
+
+class ThreadedUserRepository(AsyncUserRepository):
+    """同期のUserRepositoryをスレッドプールで実行するアダプター
+
+    【なぜ必要？】
+    「同期ドライバ（psycopg2）＋スレッドプール」の経路を残しておくと、
+    設定を切り替えるだけで非同期版とp99レイテンシを比較できます。
+
+    【スレッドプールの上限】
+    FastAPIの同期エンドポイントと同じanyioのスレッドプール（デフォルト40）を使うため、
+    これまでの同期版と同じ条件で比較できます。
+    """
+
+    def __init__(self, repository: UserRepository):
+        self._repository = repository
+
+    async def save(self, user: User) -> User:
+        return await self._run(self._repository.save, user)
+
+    async def find_by_email(self, email: str) -> Union[User, None]:
+        return await self._run(self._repository.find_by_email, email)
+
+    async def find_by_id(self, id: UUID) -> Union[User, None]:
+        return await self._run(self._repository.find_by_id, id)
+
+    async def create_if_absent(self, user: User) -> Union[User, None]:
+        return await self._run(self._repository.create_if_absent, user)
+
+    async def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        return await self._run(self._repository.find_by_ids, list(ids))
+
+    async def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        return await self._run(self._repository.find_by_emails, list(emails))
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """同期関数をスレッドプールで実行して結果を待つ"""
+        return await anyio.to_thread.run_sync(partial(fn, *args))
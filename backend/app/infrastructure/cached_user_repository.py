@@ -0,0 +1,484 @@
+"""キャッシュ付きUserRepository
+
+【なぜこのファイルが必要？】
+/api/users/me はリクエストのたびに find_by_id で、
+ログインは find_by_email でPostgreSQLに問い合わせます。
+ユーザーの行はほとんど変わらないので、一度読んだ結果を覚えておけば
+DBへの問い合わせの大半をなくせます。
+
+【2段のキャッシュ】
+1. ローカル（プロセス内のLRU）: 一番速い。ただしプロセスごとに別々
+2. Redis（任意）: 全プロセスで共有。ローカルより遅いがDBよりずっと速い
+
+    find_by_id → ローカル → Redis → DB
+                  （見つかった段より手前の段に書き戻す）
+
+【データが変わったら？（ライトスルー無効化）】
+save / create_if_absent でユーザーを書き込んだら、
+そのユーザーのキャッシュを両方の段から消します。
+
+【ネガティブキャッシュ】
+「このメールアドレスのユーザーはいない」という結果もRedisに短時間覚えておきます。
+存在しないアドレスでのログイン試行が続いても、DBまで届きません。
+
+【なぜネガティブキャッシュはローカルに置かない？】
+別プロセスで会員登録されたとき、このプロセスのローカルキャッシュは消せません。
+「いない」を覚えたままだと、登録直後のユーザーがログインできなくなるためです。
+Redisなら登録したプロセスが消すので、全プロセスにすぐ反映されます。
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+
+import redis
+import redis.asyncio
+
+from app.domain.request_timing import span
+from app.domain.user import User
+from app.domain.user_repository import AsyncUserRepository, UserRepository
+
+logger = logging.getLogger(__name__)
+
+# キャッシュを使うか
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+# ローカルキャッシュの最大件数
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+# ローカルキャッシュの保持秒数
+# （他のプロセスでの変更はこの秒数だけ遅れて見えることがあるため、短めにする）
+USER_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("USER_CACHE_LOCAL_TTL_SECONDS", "30"))
+# Redisキャッシュを使うか
+USER_CACHE_REDIS_ENABLED = os.getenv("USER_CACHE_REDIS_ENABLED", "false").lower() == "true"
+# Redisキャッシュの保持秒数
+USER_CACHE_REDIS_TTL_SECONDS = int(os.getenv("USER_CACHE_REDIS_TTL_SECONDS", "300"))
+# 「見つからなかった」結果の保持秒数
+USER_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+# Redisのキーの接頭辞
+USER_CACHE_KEY_PREFIX = os.getenv("USER_CACHE_KEY_PREFIX", "user-cache:")
+
+# 「見つからなかった」ことを表すRedisの値
+_NEGATIVE = "null"
+
+
+def id_key(id: UUID) -> str:
+    """IDで引くときのキャッシュキー"""
+    return f"{USER_CACHE_KEY_PREFIX}id:{id}"
+
+
+def email_key(email: str) -> str:
+    """メールアドレスで引くときのキャッシュキー"""
+    return f"{USER_CACHE_KEY_PREFIX}email:{email}"
+
+
+def _user_keys(user: User) -> List[str]:
+    """1人のユーザーに対応するすべてのキャッシュキー"""
+    return [id_key(user.id), email_key(user.email)]
+
+
+def _decode(raw: str) -> Optional[User]:
+    """Redisの値をUserに戻す（ネガティブキャッシュならNone）"""
+    if raw == _NEGATIVE:
+        return None
+    return User.model_validate_json(raw)
+
+
+class LocalUserCache:
+    """プロセス内のLRUキャッシュ（ユーザーの見つかった結果だけを持つ）"""
+
+    def __init__(
+        self,
+        max_size: int = USER_CACHE_MAX_SIZE,
+        ttl_seconds: float = USER_CACHE_LOCAL_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """キャッシュを初期化する
+
+        Args:
+            max_size: 最大件数
+            ttl_seconds: 1件あたりの保持秒数
+            clock: 現在時刻を返す関数（テスト用に注入可能）
+        """
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[User]:
+        """キャッシュからユーザーを取り出す（見つからない・期限切れならNone）"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: User) -> None:
+        """ユーザーをIDとメールアドレスの両方のキーで覚える"""
+        expires_at = self._clock() + self._ttl_seconds
+        with self._lock:
+            for key in _user_keys(user):
+                self._entries[key] = (expires_at, user)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        """指定したキーを消す"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """すべてのエントリを捨てる"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット数・ミス数・ヒット率・件数を返す"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self._max_size,
+        }
+
+
+class CachedUserRepository(UserRepository):
+    """UserRepositoryにキャッシュをかぶせるデコレーター
+
+    【デコレーターパターンとは？】
+    同じインターフェース（UserRepository）を実装したクラスで本物を包み、
+    呼び出しの前後に処理（ここではキャッシュ）を足す方法です。
+    使う側（LoginServiceなど）は何も変えずにキャッシュの恩恵を受けられます。
+
+    【Redisが落ちていたら？】
+    キャッシュはあくまで高速化のためのものなので、
+    Redisのエラーは警告ログだけ出して、DBから読むことで処理を続けます。
+    """
+
+    def __init__(
+        self,
+        repository: UserRepository,
+        local_cache: Optional[LocalUserCache] = None,
+        redis_client: Optional[redis.Redis] = None,
+        redis_ttl_seconds: int = USER_CACHE_REDIS_TTL_SECONDS,
+        negative_ttl_seconds: int = USER_CACHE_NEGATIVE_TTL_SECONDS,
+    ):
+        """キャッシュ付きリポジトリを初期化する
+
+        Args:
+            repository: 本物のリポジトリ（DBに問い合わせるもの）
+            local_cache: プロセス内キャッシュ（Noneなら使わない）
+            redis_client: Redisクライアント（Noneなら使わない、decode_responses=Trueのもの）
+            redis_ttl_seconds: Redisに覚えておく秒数
+            negative_ttl_seconds: 「見つからなかった」結果を覚えておく秒数（0なら覚えない）
+        """
+        self._repository = repository
+        self._local = local_cache
+        self._redis = redis_client
+        self._redis_ttl_seconds = redis_ttl_seconds
+        self._negative_ttl_seconds = negative_ttl_seconds
+
+    def save(self, user: User) -> User:
+        """保存して、そのユーザーのキャッシュを消す（ライトスルー無効化）"""
+        saved = self._repository.save(user)
+        self._invalidate([saved])
+        return saved
+
+    def create_if_absent(self, user: User) -> Union[User, None]:
+        """保存できたら、そのメールアドレスのネガティブキャッシュを消す"""
+        created = self._repository.create_if_absent(user)
+        if created is not None:
+            self._invalidate([created])
+        return created
+
+    def bulk_create_if_absent(self, users: List[User]) -> List[User]:
+        created = self._repository.bulk_create_if_absent(users)
+        if created:
+            self._invalidate(created)
+        return created
+
+    def find_by_id(self, id: UUID) -> Union[User, None]:
+        """IDでユーザーを探す（ローカル → Redis → DBの順）"""
+        found, user = self._lookup(id_key(id))
+        if found:
+            return user
+        user = self._repository.find_by_id(id)
+        if user is not None:
+            self._store(user)
+        return user
+
+    def find_by_email(self, email: str) -> Union[User, None]:
+        """メールアドレスでユーザーを探す（見つからなかった結果もRedisに覚える）"""
+        key = email_key(email)
+        found, user = self._lookup(key)
+        if found:
+            return user
+        user = self._repository.find_by_email(email)
+        if user is not None:
+            self._store(user)
+        else:
+            self._store_negative(key)
+        return user
+
+    def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        """キャッシュにないIDだけをまとめてDBに問い合わせる"""
+        found: Dict[UUID, User] = {}
+        misses = []
+        for id in ids:
+            hit, user = self._lookup(id_key(id))
+            if not hit:
+                misses.append(id)
+            elif user is not None:
+                found[user.id] = user
+        if misses:
+            loaded = self._repository.find_by_ids(misses)
+            for user in loaded.values():
+                self._store(user)
+            found.update(loaded)
+        return found
+
+    def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        """キャッシュにないメールアドレスだけをまとめてDBに問い合わせる"""
+        found: Dict[str, User] = {}
+        misses = []
+        for email in emails:
+            hit, user = self._lookup(email_key(email))
+            if not hit:
+                misses.append(email)
+            elif user is not None:
+                found[user.email] = user
+        if misses:
+            loaded = self._repository.find_by_emails(misses)
+            for user in loaded.values():
+                self._store(user)
+            found.update(loaded)
+        return found
+
+    def _lookup(self, key: str) -> Tuple[bool, Optional[User]]:
+        """キャッシュを引く
+
+        Returns:
+            (キャッシュに答えがあったか, ユーザー)
+            ネガティブキャッシュに当たった場合は (True, None)
+        """
+        if self._local is not None:
+            user = self._local.get(key)
+            if user is not None:
+                return True, user
+        if self._redis is None:
+            return False, None
+        try:
+            with span("redis", "user_cache_get"):
+                raw = self._redis.get(key)
+        except redis.RedisError as e:
+            logger.warning("User cache read failed: %s", e)
+            return False, None
+        if raw is None:
+            return False, None
+        user = _decode(raw)
+        if user is not None and self._local is not None:
+            self._local.put(user)
+        return True, user
+
+    def _store(self, user: User) -> None:
+        """DBから読んだユーザーを両方の段に書く"""
+        if self._local is not None:
+            self._local.put(user)
+        if self._redis is None:
+            return
+        raw = user.model_dump_json()
+        try:
+            pipeline = self._redis.pipeline(transaction=False)
+            for key in _user_keys(user):
+                pipeline.set(key, raw, ex=self._redis_ttl_seconds)
+            with span("redis", "user_cache_set"):
+                pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning("User cache write failed: %s", e)
+
+    def _store_negative(self, key: str) -> None:
+        """「見つからなかった」ことをRedisに短時間覚える"""
+        if self._redis is None or self._negative_ttl_seconds <= 0:
+            return
+        try:
+            with span("redis", "user_cache_set"):
+                self._redis.set(key, _NEGATIVE, ex=self._negative_ttl_seconds)
+        except redis.RedisError as e:
+            logger.warning("User cache write failed: %s", e)
+
+    def _invalidate(self, users: Iterable[User]) -> None:
+        """ユーザーのキャッシュを両方の段から消す"""
+        keys = [key for user in users for key in _user_keys(user)]
+        if self._local is not None:
+            self._local.invalidate(keys)
+        if self._redis is None:
+            return
+        try:
+            with span("redis", "user_cache_delete"):
+                self._redis.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning("User cache invalidation failed: %s", e)
+
+
+class AsyncCachedUserRepository(AsyncUserRepository):
+    """AsyncUserRepositoryにキャッシュをかぶせるデコレーター
+
+    CachedUserRepositoryの非同期版です。キャッシュの動きは同じで、
+    Redisへの問い合わせもredis.asyncioでawaitします。
+    """
+
+    def __init__(
+        self,
+        repository: AsyncUserRepository,
+        local_cache: Optional[LocalUserCache] = None,
+        redis_client: Optional[redis.asyncio.Redis] = None,
+        redis_ttl_seconds: int = USER_CACHE_REDIS_TTL_SECONDS,
+        negative_ttl_seconds: int = USER_CACHE_NEGATIVE_TTL_SECONDS,
+    ):
+        self._repository = repository
+        self._local = local_cache
+        self._redis = redis_client
+        self._redis_ttl_seconds = redis_ttl_seconds
+        self._negative_ttl_seconds = negative_ttl_seconds
+
+    async def save(self, user: User) -> User:
+        saved = await self._repository.save(user)
+        await self._invalidate([saved])
+        return saved
+
+    async def create_if_absent(self, user: User) -> Union[User, None]:
+        created = await self._repository.create_if_absent(user)
+        if created is not None:
+            await self._invalidate([created])
+        return created
+
+    async def find_by_id(self, id: UUID) -> Union[User, None]:
+        found, user = await self._lookup(id_key(id))
+        if found:
+            return user
+        user = await self._repository.find_by_id(id)
+        if user is not None:
+            await self._store(user)
+        return user
+
+    async def find_by_email(self, email: str) -> Union[User, None]:
+        key = email_key(email)
+        found, user = await self._lookup(key)
+        if found:
+            return user
+        user = await self._repository.find_by_email(email)
+        if user is not None:
+            await self._store(user)
+        else:
+            await self._store_negative(key)
+        return user
+
+    async def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        found: Dict[UUID, User] = {}
+        misses = []
+        for id in ids:
+            hit, user = await self._lookup(id_key(id))
+            if not hit:
+                misses.append(id)
+            elif user is not None:
+                found[user.id] = user
+        if misses:
+            loaded = await self._repository.find_by_ids(misses)
+            for user in loaded.values():
+                await self._store(user)
+            found.update(loaded)
+        return found
+
+    async def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        found: Dict[str, User] = {}
+        misses = []
+        for email in emails:
+            hit, user = await self._lookup(email_key(email))
+            if not hit:
+                misses.append(email)
+            elif user is not None:
+                found[user.email] = user
+        if misses:
+            loaded = await self._repository.find_by_emails(misses)
+            for user in loaded.values():
+                await self._store(user)
+            found.update(loaded)
+        return found
+
+    async def _lookup(self, key: str) -> Tuple[bool, Optional[User]]:
+        if self._local is not None:
+            user = self._local.get(key)
+            if user is not None:
+                return True, user
+        if self._redis is None:
+            return False, None
+        try:
+            with span("redis", "user_cache_get"):
+                raw = await self._redis.get(key)
+        except redis.RedisError as e:
+            logger.warning("User cache read failed: %s", e)
+            return False, None
+        if raw is None:
+            return False, None
+        user = _decode(raw)
+        if user is not None and self._local is not None:
+            self._local.put(user)
+        return True, user
+
+    async def _store(self, user: User) -> None:
+        if self._local is not None:
+            self._local.put(user)
+        if self._redis is None:
+            return
+        raw = user.model_dump_json()
+        try:
+            pipeline = self._redis.pipeline(transaction=False)
+            for key in _user_keys(user):
+                pipeline.set(key, raw, ex=self._redis_ttl_seconds)
+            with span("redis", "user_cache_set"):
+                await pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning("User cache write failed: %s", e)
+
+    async def _store_negative(self, key: str) -> None:
+        if self._redis is None or self._negative_ttl_seconds <= 0:
+            return
+        try:
+            with span("redis", "user_cache_set"):
+                await self._redis.set(key, _NEGATIVE, ex=self._negative_ttl_seconds)
+        except redis.RedisError as e:
+            logger.warning("User cache write failed: %s", e)
+
+    async def _invalidate(self, users: Iterable[User]) -> None:
+        keys = [key for user in users for key in _user_keys(user)]
+        if self._local is not None:
+            self._local.invalidate(keys)
+        if self._redis is None:
+            return
+        try:
+            with span("redis", "user_cache_delete"):
+                await self._redis.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning("User cache invalidation failed: %s", e)
+
+
+# アプリケーション全体で共有するローカルキャッシュ（無効化されていればNone）
+user_cache: Optional[LocalUserCache] = LocalUserCache() if USER_CACHE_ENABLED else None
@@ -0,0 +1,117 @@
+"""サーキットブレーカー
+
+【なぜこのファイルが必要？】
+Redisが落ちたり応答が遅くなったりしたとき、そのまま全リクエストが
+Redisに問い合わせ続けると、1件ごとにタイムアウト（数百ミリ秒）まで待たされます。
+待っている間にリクエストが積み上がり、API全体が止まってしまいます。
+
+【サーキットブレーカーとは？】
+家のブレーカーと同じ考え方です。
+失敗が続いたら「回路を開いて」、しばらくは問い合わせずに即座にエラーを返します。
+
+    CLOSED（通常）──失敗がfailure_threshold回続く──> OPEN（即エラー）
+       ^                                                  |
+       |                                          reset_timeout秒後
+       |                                                  v
+       +──────────── 試しの1回が成功 ──────────── HALF_OPEN（1回だけ試す）
+                                                  （失敗したらOPENに戻る）
+"""
+
+import os
+import threading
+import time
+from typing import Callable
+
+from app.domain.exceptions import ServiceUnavailableError
+
+# 回路を開くまでの連続失敗回数
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+# 回路を開いてから、試しに1回通すまでの秒数
+CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = float(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS", "10"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """連続した失敗を検知して、依存先への問い合わせを一時的に止める"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout_seconds: float = CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """サーキットブレーカーを初期化する
+
+        Args:
+            name: 依存先の名前（エラーメッセージに使う）
+            failure_threshold: 回路を開くまでの連続失敗回数
+            reset_timeout_seconds: 回路を開いてから試しに1回通すまでの秒数
+            clock: 現在時刻を返す関数（テスト用に注入可能）
+        """
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_seconds = reset_timeout_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """現在の状態（closed / open / half_open）"""
+        with self._lock:
+            if self._state == OPEN and self._reset_timeout_elapsed():
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """依存先を呼ぶ前に確認する
+
+        Raises:
+            ServiceUnavailableError: 回路が開いている場合
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and self._reset_timeout_elapsed():
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                # 試しの1回だけ通す（ほかは結果が出るまで即エラー）
+                self._trial_in_flight = True
+                return
+        raise ServiceUnavailableError(f"{self._name} is unavailable (circuit open)")
+
+    def record_success(self) -> None:
+        """呼び出しが成功したことを記録する（回路を閉じる）"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """呼び出しが失敗したことを記録する"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self._failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def release_trial(self) -> None:
+        """結果が出ないまま終わった呼び出し（キャンセルなど）を記録する
+
+        成功とも失敗ともみなさず、試しの1回の枠だけを返します。
+        返さないと、HALF_OPENのまま次の試しが通らず、ずっと即エラーになってしまいます。
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _reset_timeout_elapsed(self) -> bool:
+        return self._clock() - self._opened_at >= self._reset_timeout_seconds
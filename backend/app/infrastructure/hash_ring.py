@@ -0,0 +1,94 @@
+"""コンシステントハッシュリング
+
+【なぜこのファイルが必要？】
+セッションを複数のRedisに分けて保存するには、
+「このセッションIDはどのRedisに置くか」を全サーバーで同じように決める必要があります。
+
+【単純な割り算（hash % N）ではだめ？】
+Redisを1台増やしてNが変わると、ほぼ全部のセッションの置き場所が変わってしまいます。
+コンシステントハッシュなら、N台→N+1台で移動するのは約1/(N+1)だけです。
+
+【仕組み】
+0〜2^64のハッシュ値を円（リング）に見立て、各ノードを円周上に置きます。
+キーはハッシュ値から時計回りに進んで、最初に当たったノードに置きます。
+
+    ノード1台につき1点だけだと偏るので、1台を「仮想ノード」として
+    vnodes個の点に分けて置きます（既定160個。ノード間の偏りは数%程度になる）。
+"""
+
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Tuple, Union
+
+# 1ノードあたりの仮想ノード数
+DEFAULT_VNODES = 160
+
+
+def _hash(key: bytes) -> int:
+    """キーを64ビットの整数にする（全サーバーで同じ値になるよう、hash()は使わない）"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """コンシステントハッシュリング（仮想ノードつき）
+
+    【スレッドセーフ？】
+    作成後に変更しない前提です。ノードを増減するときは新しいHashRingを作ります
+    （add_node / remove_node は新しいリングを返します）。
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = DEFAULT_VNODES):
+        """リングを作る
+
+        Args:
+            nodes: ノード名（Redisなら認証情報を除いたURL）
+            vnodes: 1ノードあたりの仮想ノード数
+
+        Raises:
+            ValueError: ノードが1つもない、または重複している場合
+        """
+        nodes = list(nodes)
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        if len(set(nodes)) != len(nodes):
+            raise ValueError("HashRing nodes must be unique")
+        self._nodes = nodes
+        self._vnodes = vnodes
+
+        points: List[Tuple[int, str]] = []
+        for node in nodes:
+            for i in range(vnodes):
+                points.append((_hash(f"{node}#{i}".encode("utf-8")), node))
+        points.sort()
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    @property
+    def nodes(self) -> List[str]:
+        """ノード名の一覧（作成時の順番）"""
+        return list(self._nodes)
+
+    def get_node(self, key: Union[str, bytes]) -> str:
+        """キーを置くノードを返す"""
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        index = bisect.bisect_right(self._hashes, _hash(key))
+        if index == len(self._hashes):
+            # 円なので、最後の点を過ぎたら先頭の点に戻る
+            index = 0
+        return self._owners[index]
+
+    def group(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """キーをノードごとに分ける（順番は入力の順を保つ）"""
+        groups: Dict[str, List[str]] = {}
+        for key in keys:
+            groups.setdefault(self.get_node(key), []).append(key)
+        return groups
+
+    def add_node(self, node: str) -> "HashRing":
+        """ノードを1つ増やした新しいリングを返す"""
+        return HashRing(self._nodes + [node], vnodes=self._vnodes)
+
+    def remove_node(self, node: str) -> "HashRing":
+        """ノードを1つ減らした新しいリングを返す"""
+        return HashRing([n for n in self._nodes if n != node], vnodes=self._vnodes)
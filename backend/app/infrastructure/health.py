@@ -0,0 +1,237 @@
+"""依存先（DB・Redis・bcrypt）の状態確認
+
+【なぜこのファイルが必要？】
+/healthは常に{"status": "healthy"}を返すので、PostgreSQLやRedisが落ちていても
+ロードバランサーはそのPodにリクエストを送り続けてしまいます。
+そこで、依存先を実際に確認した結果を/readyzで返します（/livezは確認しない）。
+
+    /livez   プロセスが応答できるか（依存先は見ない。落ちていたら再起動してもらう）
+    /readyz  依存先が使えるか（使えなければ503。ロードバランサーが外してくれる）
+
+【なぜ/livezで依存先を見ない？】
+DBが落ちたときに全Podの/livezが失敗すると、全Podが一斉に再起動されてしまい、
+DBが戻っても立ち上がるまで復旧できなくなるためです。
+
+【なぜ結果をキャッシュする？】
+ロードバランサーやKubernetesは、数千のプローブを1秒ごとのような間隔で送ってきます。
+そのたびにDBとRedisへ問い合わせると、確認そのものが負荷になります。
+HealthCheckerはHEALTH_CHECK_INTERVAL_SECONDSごとに裏で1回だけ確認し、
+/readyzはその結果を返すだけにしています。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import anyio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.infrastructure.database import get_pool_stats
+
+logger = logging.getLogger(__name__)
+
+# 依存先を確認する間隔（秒）
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+# 1つの確認を待つ上限（秒）。超えたら「使えない」とみなす
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+# 結果がこれより古ければ、/readyzで確認し直す（裏の確認が動いていないとき用）
+HEALTH_CHECK_MAX_AGE_SECONDS = float(os.getenv("HEALTH_CHECK_MAX_AGE_SECONDS", "30"))
+
+# 確認する関数（使えなければ例外を投げる。返した辞書は結果に載せる）
+Check = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class CheckResult:
+    """1つの依存先の確認結果"""
+
+    __slots__ = ("healthy", "latency_ms", "error", "details", "message")
+
+    def __init__(
+        self,
+        healthy: bool,
+        latency_ms: float,
+        error: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+        message: Optional[str] = None,
+    ):
+        """確認結果を作る
+
+        Args:
+            healthy: 使えるか
+            latency_ms: 確認にかかった時間（ミリ秒）
+            error: 応答に載せるエラーの種類（例外の型の名前・"timeout"）
+            details: 応答に載せる追加の情報（プールの使用率など）
+            message: ログにだけ出す詳しいエラー（接続先などが入るので応答には載せない）
+        """
+        self.healthy = healthy
+        self.latency_ms = latency_ms
+        self.error = error
+        self.details = details
+        self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "status": "ok" if self.healthy else "error",
+            "latency_ms": round(self.latency_ms, 3),
+        }
+        if self.error is not None:
+            result["error"] = self.error
+        if self.details:
+            result.update(self.details)
+        return result
+
+
+class HealthChecker:
+    """依存先を定期的に確認し、最新の結果を覚えておく"""
+
+    def __init__(
+        self,
+        checks: Dict[str, Check],
+        interval_seconds: float = HEALTH_CHECK_INTERVAL_SECONDS,
+        timeout_seconds: float = HEALTH_CHECK_TIMEOUT_SECONDS,
+        max_age_seconds: float = HEALTH_CHECK_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """確認を初期化する
+
+        Args:
+            checks: {名前: 確認する関数}
+            interval_seconds: 裏で確認する間隔（秒）
+            timeout_seconds: 1つの確認を待つ上限（秒）
+            max_age_seconds: 結果をそのまま返してよい古さの上限（秒）
+            clock: 現在時刻を返す関数（テスト用に注入可能）
+        """
+        self._checks = checks
+        self._interval_seconds = interval_seconds
+        self._timeout_seconds = timeout_seconds
+        self._max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._results: Optional[Dict[str, CheckResult]] = None
+        self._checked_at = 0.0
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+        self._loop_task: Optional["asyncio.Task[None]"] = None
+        self.runs = 0
+
+    async def results(self) -> Dict[str, CheckResult]:
+        """最新の結果を返す（まだない・古すぎるときだけ、確認を待つ）"""
+        if self._results is None or self._clock() - self._checked_at > self._max_age_seconds:
+            await self.refresh()
+        return self._results
+
+    async def is_ready(self) -> bool:
+        """すべての依存先が使えるか"""
+        return all(result.healthy for result in (await self.results()).values())
+
+    async def refresh(self) -> None:
+        """今すぐ確認する（確認中ならそれを待つ。同時に何件来ても確認は1回だけ）"""
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._refresh_task = asyncio.get_running_loop().create_task(self._run_checks())
+        # 待っているリクエストが切断されても、確認は最後まで続ける
+        await asyncio.shield(task)
+
+    def start(self) -> None:
+        """裏での定期的な確認を始める（イベントループの中で呼ぶ）"""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.get_running_loop().create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """裏での確認を止める"""
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._loop_task = self._refresh_task = None
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Health check failed to run: %s", e)
+            await asyncio.sleep(self._interval_seconds)
+
+    async def _run_checks(self) -> None:
+        """すべての確認を並行して行い、結果を入れ替える"""
+        names = list(self._checks)
+        outcomes = await asyncio.gather(*(self._run_check(self._checks[name]) for name in names))
+        results = dict(zip(names, outcomes))
+        self._log_changes(results)
+        self._results = results
+        self._checked_at = self._clock()
+        self.runs += 1
+
+    async def _run_check(self, check: Check) -> CheckResult:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(check(), timeout=self._timeout_seconds)
+        except asyncio.TimeoutError:
+            return CheckResult(False, (time.perf_counter() - started) * 1000, "timeout")
+        except Exception as e:
+            # 例外のメッセージには接続先などが入るので、応答には型の名前だけを載せる
+            return CheckResult(False, (time.perf_counter() - started) * 1000, type(e).__name__, message=str(e))
+        return CheckResult(True, (time.perf_counter() - started) * 1000, details=details)
+
+    def _log_changes(self, results: Dict[str, CheckResult]) -> None:
+        """状態が変わったときだけログを出す（確認のたびに出すとログがあふれる）"""
+        for name, result in results.items():
+            previous = self._results.get(name) if self._results is not None else None
+            was_healthy = previous.healthy if previous is not None else True
+            if was_healthy and not result.healthy:
+                logger.warning("Dependency %s is unhealthy: %s", name, result.message or result.error)
+            elif not was_healthy and result.healthy:
+                logger.info("Dependency %s has recovered", name)
+
+
+def check_database(engine: Any) -> Check:
+    """コネクションプールから接続を借りてSELECT 1を実行する（プールの状態も載せる）"""
+
+    async def check() -> Dict[str, Any]:
+        if isinstance(engine, AsyncEngine):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+            stats = get_pool_stats(engine.sync_engine)
+        else:
+            await anyio.to_thread.run_sync(_select_one, engine)
+            stats = get_pool_stats(engine)
+        return {key: stats[key] for key in ("checked_out", "capacity", "saturation") if key in stats}
+
+    return check
+
+
+def _select_one(engine: Any) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def check_redis(client: Any) -> Check:
+    """RedisにPINGを送る（非同期版のクライアント）"""
+
+    async def check() -> None:
+        await client.ping()
+
+    return check
+
+
+def check_password_executor(executor: Any) -> Check:
+    """bcryptのプロセスプールが動いているか（待ち行列の長さは詳細として返す）
+
+    【なぜ待ち行列が満杯でも失敗にしない？】
+    ログインが殺到すると、全Podの待ち行列が同時に満杯になります。
+    そこで失敗にすると全Podが一斉に外され、ただの高負荷が全面停止になってしまいます。
+    満杯の間のリクエストは各Podが503で断るので、外すのはプールが止まっている・壊れているときだけです。
+    プロセスプールに処理を投入すると待ち行列の枠を使うので、状態を見るだけにしています。
+    """
+
+    async def check() -> Dict[str, Any]:
+        if not executor.is_running:
+            raise RuntimeError("Password hashing pool is not running")
+        return {"queue_depth": executor.queue_depth, "max_queue_depth": executor.max_queue_depth}
+
+    return check
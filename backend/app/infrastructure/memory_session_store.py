@@ -0,0 +1,200 @@
+"""メモリ上のSessionStore実装
+
+【このファイルの目的】
+Redisを使わずにセッションを保存します。
+- 1台だけで動かす環境（Redisを立てるほどでもない）
+- 速いテスト（Redisを起動しなくてよい）
+
+【RedisSessionStoreと同じ動き】
+- ttlを指定すると、その秒数が過ぎたら取得できなくなる
+- ttlなしで保存し直すと有効期限は消える（RedisのSETと同じ）
+- 保存した値は保存時点のコピー（後から元の辞書を書き換えても影響しない）
+- 値はJSONとして保存できるものだけ（タプルはリストになって返る）
+
+【実装のポイント】
+1. シャード（分割）ごとのロック
+   全体で1つのロックだと、スレッドが増えるほど待ち時間が増えます。
+   セッションIDのハッシュで16個などに振り分け、シャードごとにロックします。
+2. 有効期限はヒープ（優先度付きキュー）で管理
+   全件を見回るのではなく、「一番早く期限が来るもの」から順に取り出して捨てます。
+3. LRUで件数の上限をかける
+   上限を超えたら、最近使われていないものから捨てます（Redisのallkeys-lruと同じ考え方）。
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.domain.session_store import SessionStore
+
+# 保存できるセッションの最大件数（全シャードの合計）
+MEMORY_SESSION_MAX_ENTRIES = int(os.getenv("MEMORY_SESSION_MAX_ENTRIES", "100000"))
+# シャード（ロックの単位）の数
+MEMORY_SESSION_SHARDS = int(os.getenv("MEMORY_SESSION_SHARDS", "16"))
+
+# 有効期限なしを表す値
+_NO_EXPIRY = float("inf")
+
+
+class _Shard:
+    """セッションの一部（ロック・LRU・有効期限のヒープを1セットずつ持つ）"""
+
+    def __init__(self, max_entries: int):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        # session_id -> (有効期限, JSON文字列)。並び順が「最近使った順」
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # (有効期限, session_id) のヒープ。上書きされた古い要素は取り出したときに読み飛ばす
+        self.expiry_heap: List[Tuple[float, str]] = []
+
+    def purge_expired(self, now: float) -> None:
+        """期限切れのセッションを捨てる（ロックを取ってから呼ぶ）"""
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, session_id = heapq.heappop(heap)
+            entry = self.entries.get(session_id)
+            if entry is not None and entry[0] == expires_at:
+                del self.entries[session_id]
+        # 上書きで読み飛ばす要素ばかりになったら、作り直してメモリを返す
+        if len(heap) > 2 * len(self.entries) + 64:
+            self.expiry_heap = [
+                (expires_at, session_id)
+                for session_id, (expires_at, _) in self.entries.items()
+                if expires_at != _NO_EXPIRY
+            ]
+            heapq.heapify(self.expiry_heap)
+
+    def set(self, session_id: str, expires_at: float, payload: str) -> None:
+        """保存する（ロックを取ってから呼ぶ）"""
+        self.entries[session_id] = (expires_at, payload)
+        self.entries.move_to_end(session_id)
+        if expires_at != _NO_EXPIRY:
+            heapq.heappush(self.expiry_heap, (expires_at, session_id))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def lookup(self, session_id: str, now: float) -> Optional[Tuple[float, str]]:
+        """期限切れでなければエントリを返す（ロックを取ってから呼ぶ）"""
+        entry = self.entries.get(session_id)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self.entries[session_id]
+            return None
+        self.entries.move_to_end(session_id)
+        return entry
+
+
+class MemorySessionStore(SessionStore):
+    """メモリ上のSessionStore実装（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        max_entries: int = MEMORY_SESSION_MAX_ENTRIES,
+        shards: int = MEMORY_SESSION_SHARDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """SessionStoreを初期化
+
+        Args:
+            max_entries: 保存できるセッションの最大件数
+            shards: シャード（ロックの単位）の数
+            clock: 現在時刻（秒）を返す関数（テスト用に注入可能）
+        """
+        per_shard = max(1, -(-max_entries // shards))
+        self._shards = [_Shard(per_shard) for _ in range(shards)]
+        self._clock = clock
+
+    def save(self, session_id: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """セッションを保存する
+
+        【なぜJSON文字列で持つ？】
+        RedisSessionStoreと同じく「保存時点のコピー」にするためと、
+        JSONにできない値をRedisと同じく保存時にエラーにするためです。
+        """
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be a positive number of seconds")
+        payload = json.dumps(data)
+        shard = self._shard(session_id)
+        now = self._clock()
+        expires_at = now + ttl if ttl is not None else _NO_EXPIRY
+        with shard.lock:
+            shard.purge_expired(now)
+            shard.set(session_id, expires_at, payload)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """セッションを取得する（期限切れならNone）"""
+        shard = self._shard(session_id)
+        with shard.lock:
+            entry = shard.lookup(session_id, self._clock())
+        if entry is None:
+            return None
+        return json.loads(entry[1])
+
+    def delete(self, session_id: str) -> None:
+        """セッションを削除する"""
+        shard = self._shard(session_id)
+        with shard.lock:
+            shard.entries.pop(session_id, None)
+
+    def touch(self, session_id: str, ttl: int) -> bool:
+        """有効期限だけを延ばす（RedisのEXPIREと同じ）"""
+        return self._touch(session_id, ttl) is not None
+
+    def get_and_touch(self, session_id: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """取得と有効期限の延長を1回のロックで行う（RedisのGETEXと同じ）"""
+        payload = self._touch(session_id, ttl)
+        if payload is None:
+            return None
+        return json.loads(payload)
+
+    def ttl(self, session_id: str) -> int:
+        """残りの有効期限（秒）を返す（RedisのTTLコマンドと同じ）
+
+        Returns:
+            残り秒数（切り上げ）。有効期限なしなら-1、存在しなければ-2
+        """
+        shard = self._shard(session_id)
+        now = self._clock()
+        with shard.lock:
+            entry = shard.lookup(session_id, now)
+        if entry is None:
+            return -2
+        if entry[0] == _NO_EXPIRY:
+            return -1
+        return max(1, int(-(-(entry[0] - now) // 1)))
+
+    def purge_expired(self) -> None:
+        """すべてのシャードから期限切れのセッションを捨てる
+
+        普段は保存のたびに同じシャードの期限切れを捨てているので呼ばなくてもよいですが、
+        書き込みが止まった後にメモリを返したいときに使います。
+        """
+        now = self._clock()
+        for shard in self._shards:
+            with shard.lock:
+                shard.purge_expired(now)
+
+    def __len__(self) -> int:
+        """保存されている件数（期限切れでまだ捨てていないものを含む）"""
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def _touch(self, session_id: str, ttl: int) -> Optional[str]:
+        """有効期限を延ばして、保存されているJSON文字列を返す（なければNone）"""
+        if ttl <= 0:
+            raise ValueError("ttl must be a positive number of seconds")
+        shard = self._shard(session_id)
+        now = self._clock()
+        with shard.lock:
+            entry = shard.lookup(session_id, now)
+            if entry is None:
+                return None
+            shard.set(session_id, now + ttl, entry[1])
+        return entry[1]
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
@@ -0,0 +1,264 @@
+"""Prometheusのメトリクス
+
+【なぜこのファイルが必要？】
+「ワーカーを何台に増やせばよいか」「どこがボトルネックか」を推測ではなく
+実際の数字で決められるように、/metricsでPrometheusの形式の計測値を公開します。
+
+    メトリクス                                   内容
+    http_requests_total                         ルート・ステータスごとのリクエスト数（エラー率もここから）
+    http_request_duration_seconds               ルートごとの処理時間（ヒストグラム）
+    app_dependency_duration_seconds             DB・Redis・bcrypt・JWT・Googleの処理時間（ヒストグラム）
+    app_bcrypt_queue_depth / _rejected_total    bcryptの待ち行列の長さと、満杯で断った数
+    app_db_pool_*                               DBの接続の貸し出し数・待ち時間・タイムアウト
+    app_cache_requests_total                    キャッシュのヒット・ミス（ヒット率はPromQLで計算）
+    app_token_denylist_checks_total             失効リストの確認の内訳
+
+ヒット率の例:
+    sum(rate(app_cache_requests_total{result="hit"}[5m])) by (cache)
+      / sum(rate(app_cache_requests_total[5m])) by (cache)
+
+【どうやって集めている？】
+- リクエストと依存先の処理時間は、その場でカウンター・ヒストグラムに足す
+  （依存先はrequest_timingのオブザーバーとして受け取る）
+- 待ち行列の長さやキャッシュのヒット数は、もともと各クラスが数えているので、
+  StatsSamplerがMETRICS_SAMPLE_INTERVAL_SECONDSごとに読んでメトリクスに写す
+  （リクエストの処理には何も足さない）
+
+【uvicornのワーカーが複数のとき】
+ワーカー（プロセス）ごとに別々に数えているので、そのままでは
+/metricsを受けたワーカーの分しか見えません。
+PROMETHEUS_MULTIPROC_DIRに空のディレクトリを指定して起動すると、
+各ワーカーがそこにファイルで書き出し、/metricsで全ワーカー分を合計して返します。
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus uvicorn main:app --workers 4
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from app.domain.request_timing import add_observer, remove_observer
+
+logger = logging.getLogger(__name__)
+
+# /metricsを公開し、メトリクスを集めるか
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# 各クラスの統計（待ち行列の長さ・キャッシュのヒット数など）をメトリクスに写す間隔（秒）
+METRICS_SAMPLE_INTERVAL_SECONDS = float(os.getenv("METRICS_SAMPLE_INTERVAL_SECONDS", "5"))
+# 複数ワーカーの値を合計するためのディレクトリ（prometheus_clientが読む）
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# 依存先の処理は1ms未満のものも多いので、リクエスト全体より細かく分ける
+_DEPENDENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route"]
+)
+DEPENDENCY_DURATION = Histogram(
+    "app_dependency_duration_seconds",
+    "Latency of calls to the database, Redis, bcrypt, JWT and Google",
+    ["phase", "operation"],
+    buckets=_DEPENDENCY_BUCKETS,
+)
+BCRYPT_QUEUE_DEPTH = Gauge(
+    "app_bcrypt_queue_depth", "Password hashing jobs running or waiting", multiprocess_mode="livesum"
+)
+BCRYPT_REJECTED = Counter(
+    "app_bcrypt_rejected_total", "Password hashing jobs rejected because the queue was full"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "app_db_pool_checked_out", "Database connections in use", ["pool"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("app_db_pool_checkouts_total", "Database connection checkouts", ["pool"])
+DB_POOL_WAIT = Counter(
+    "app_db_pool_wait_seconds_total", "Time spent waiting for a database connection", ["pool"]
+)
+DB_POOL_TIMEOUTS = Counter(
+    "app_db_pool_timeouts_total", "Database connection checkouts that timed out", ["pool"]
+)
+CACHE_REQUESTS = Counter("app_cache_requests_total", "Cache lookups by result", ["cache", "result"])
+TOKEN_DENYLIST_CHECKS = Counter(
+    "app_token_denylist_checks_total", "Access token denylist checks by result", ["result"]
+)
+
+
+class _LabelCache:
+    """labels()の結果を覚えておく（毎回ラベルの組を探さないように）"""
+
+    def __init__(self, metric: Any):
+        self._metric = metric
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def get(self, *labels: str) -> Any:
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = self._metric.labels(*labels)
+        return child
+
+
+_request_counts = _LabelCache(REQUESTS)
+_request_durations = _LabelCache(REQUEST_DURATION)
+_dependency_durations = _LabelCache(DEPENDENCY_DURATION)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """1リクエストの結果を記録する（MetricsMiddlewareから呼ぶ）"""
+    _request_counts.get(method, route, str(status)).inc()
+    _request_durations.get(method, route).observe(seconds)
+
+
+def observe_dependency(phase: str, operation: str, seconds: float) -> None:
+    """依存先の処理時間を記録する（request_timingのオブザーバー）"""
+    _dependency_durations.get(phase, operation).observe(seconds)
+
+
+class StatsSampler:
+    """各クラスが数えている統計を、一定間隔でメトリクスに写す
+
+    【なぜ一定間隔？】
+    待ち行列の長さなどを変わるたびに書くと、ハッシュ化やキャッシュの処理のたびに
+    メトリクスのロック（複数ワーカー時はファイルへの書き込み）が入るためです。
+    累積の数（ヒット数など）は、前回からの差分をカウンターに足します。
+    """
+
+    def __init__(self, interval_seconds: float = METRICS_SAMPLE_INTERVAL_SECONDS):
+        self._interval_seconds = interval_seconds
+        self._sources: List[Callable[[], None]] = []
+        # カウンター -> 前回写したときの累積の数
+        self._last: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_source(self, source: Callable[["StatsSampler"], None]) -> None:
+        """統計を読んでメトリクスに写す関数を登録する"""
+        self._sources.append(lambda: source(self))
+
+    def advance(self, counter: Any, total: float) -> None:
+        """累積の数totalを、前回からの差分だけカウンターに足す
+
+        元の数がリセットされて減っていたら（reset()など）、新しい値をそのまま足します。
+        """
+        previous = self._last.get(counter, 0.0)
+        delta = total - previous if total >= previous else total
+        self._last[counter] = total
+        if delta > 0:
+            counter.inc(delta)
+
+    def sample(self) -> None:
+        """登録した関数をすべて実行する（1つが失敗しても残りは続ける）"""
+        with self._lock:
+            for source in self._sources:
+                try:
+                    source()
+                except Exception as e:
+                    logger.warning("Failed to sample metrics: %s", e)
+
+    def start(self) -> None:
+        """一定間隔で写すスレッドを始める"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """スレッドを止める（最後に1回写してから）"""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopped.set()
+            thread.join(timeout=5)
+        self.sample()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval_seconds):
+            self.sample()
+
+
+def sample_password_executor(executor: Any) -> Callable[[StatsSampler], None]:
+    """PasswordHashingExecutorの待ち行列の長さと、断った数"""
+
+    def sample(sampler: StatsSampler) -> None:
+        BCRYPT_QUEUE_DEPTH.set(executor.queue_depth)
+        sampler.advance(BCRYPT_REJECTED, executor.rejected_count)
+
+    return sample
+
+
+def sample_db_pool(name: str, get_stats: Callable[[], Dict[str, Any]]) -> Callable[[StatsSampler], None]:
+    """DBのコネクションプールの状態（database.get_pool_statsの値）"""
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    checkouts = DB_POOL_CHECKOUTS.labels(name)
+    wait = DB_POOL_WAIT.labels(name)
+    timeouts = DB_POOL_TIMEOUTS.labels(name)
+
+    def sample(sampler: StatsSampler) -> None:
+        stats = get_stats()
+        checked_out.set(stats.get("checked_out", 0))
+        sampler.advance(checkouts, stats.get("checkouts", 0))
+        sampler.advance(wait, stats.get("total_wait_seconds", 0.0))
+        sampler.advance(timeouts, stats.get("timeouts", 0))
+
+    return sample
+
+
+def sample_cache(name: str, get_stats: Callable[[], Optional[Dict[str, Any]]]) -> Callable[[StatsSampler], None]:
+    """キャッシュのヒット数・ミス数（stats()がhits・missesを返すもの。Noneなら何もしない）"""
+    hits = CACHE_REQUESTS.labels(name, "hit")
+    misses = CACHE_REQUESTS.labels(name, "miss")
+
+    def sample(sampler: StatsSampler) -> None:
+        stats = get_stats()
+        if stats is None:
+            return
+        sampler.advance(hits, stats["hits"])
+        sampler.advance(misses, stats["misses"])
+
+    return sample
+
+
+def sample_token_denylist(get_stats: Callable[[], Optional[Dict[str, Any]]]) -> Callable[[StatsSampler], None]:
+    """失効リストの確認の内訳（フィルターだけで通した・Redisで確認した・失効していた）"""
+    counters = {
+        "filter_passes": TOKEN_DENYLIST_CHECKS.labels("filter_pass"),
+        "redis_checks": TOKEN_DENYLIST_CHECKS.labels("redis_check"),
+        "revoked_hits": TOKEN_DENYLIST_CHECKS.labels("revoked"),
+    }
+
+    def sample(sampler: StatsSampler) -> None:
+        stats = get_stats()
+        if stats is None:
+            return
+        for field, counter in counters.items():
+            sampler.advance(counter, stats[field])
+
+    return sample
+
+
+def start_dependency_metrics() -> None:
+    """依存先の処理時間の記録を始める"""
+    add_observer(observe_dependency)
+
+
+def stop_dependency_metrics() -> None:
+    """依存先の処理時間の記録を止め、複数ワーカー時はこのプロセスの値を片付ける"""
+    remove_observer(observe_dependency)
+    if PROMETHEUS_MULTIPROC_DIR:
+        # livesumのゲージ（待ち行列の長さなど）から、終了したワーカーの分を外す
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """/metricsの本文とContent-Typeを返す（複数ワーカー時は全ワーカー分を合計する）"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,353 @@
+"""ニアキャッシュ付き Redis SessionStore実装
+
+【なぜこのファイルが必要？】
+RedisSessionStore.getは毎回Redisとの往復（ネットワーク）が必要です。
+同じワーカーが同じセッションを1秒に何十回も読むなら、
+プロセス内（ニア）にコピーを置いておけばネットワークを使わずに返せます。
+
+【一番怖いのは「ログアウトしたのに使えてしまう」こと】
+別のワーカーでdelete（ログアウト）されたら、全ワーカーのコピーを
+すぐに捨てなければなりません。そこでRedisのpub/subを使います。
+
+    ワーカーA: delete("s1") ──> Redis: DEL s1 + PUBLISH session-invalidation ["s1"]
+                                         |
+               ワーカーB, C, ... <────────+ （購読しているワーカー全員に届く）
+                                         → ローカルのs1を捨てる
+
+【安全のための決まりごと】
+1. 購読が確立していない間（起動直後・Redisとの接続が切れた後）はニアキャッシュを使わない
+   （通知を取りこぼしている可能性があるため。再購読したら全部捨ててやり直す）
+2. Redisから読んでいる途中に無効化が届いたら、読んだ値はキャッシュしない
+   （「読む → 別ワーカーが削除 → 古い値をキャッシュ」を防ぐ）
+3. Redisに残っているTTLより長くは持たない。さらに最長保持時間で上限をかける
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+from app.domain.request_timing import span
+from app.infrastructure.session_serializer import SessionSerializer
+from app.infrastructure.session_store import SESSION_KEY_PREFIX, RedisSessionStore
+
+logger = logging.getLogger(__name__)
+
+# 最大件数
+SESSION_NEAR_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_NEAR_CACHE_MAX_ENTRIES", "10000"))
+# 最大バイト数（Redisに保存されているバイト列の大きさで数える）
+SESSION_NEAR_CACHE_MAX_BYTES = int(os.getenv("SESSION_NEAR_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# 1件あたりの最長保持秒数（Redisに残っているTTLのほうが短ければそちら）
+SESSION_NEAR_CACHE_TTL_SECONDS = float(os.getenv("SESSION_NEAR_CACHE_TTL_SECONDS", "30"))
+# 無効化を通知するpub/subのチャンネル名
+SESSION_INVALIDATION_CHANNEL = os.getenv("SESSION_INVALIDATION_CHANNEL", "session-invalidation")
+
+
+class SessionNearCache:
+    """プロセス内のセッションキャッシュ（件数とバイト数の両方で上限をかけるLRU）"""
+
+    def __init__(
+        self,
+        max_entries: int = SESSION_NEAR_CACHE_MAX_ENTRIES,
+        max_bytes: int = SESSION_NEAR_CACHE_MAX_BYTES,
+        ttl_seconds: float = SESSION_NEAR_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """キャッシュを初期化する
+
+        Args:
+            max_entries: 最大件数
+            max_bytes: 最大バイト数
+            ttl_seconds: 1件あたりの最長保持秒数
+            clock: 現在時刻を返す関数（テスト用に注入可能）
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def epoch(self) -> int:
+        """無効化が起きるたびに増える番号（読み込み中に無効化があったかの判定に使う）"""
+        return self._epoch
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """セッションを取り出す（見つからない・期限切れならNone）"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(session_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            # 【なぜコピー？】呼び出し側が書き換えてもキャッシュが汚れないように
+            return dict(entry[2])
+
+    def put(
+        self,
+        session_id: str,
+        data: Dict[str, Any],
+        size: int,
+        remaining_ttl_seconds: Optional[float],
+        epoch: int,
+    ) -> bool:
+        """Redisから読んだセッションを入れる
+
+        Args:
+            session_id: セッションID
+            data: セッションデータ
+            size: Redisに保存されているバイト数
+            remaining_ttl_seconds: Redisに残っているTTL（無期限ならNone）
+            epoch: Redisから読む直前のepoch（その後に無効化があれば入れない）
+
+        Returns:
+            キャッシュに入れたか
+        """
+        ttl = self._ttl_seconds
+        if remaining_ttl_seconds is not None:
+            ttl = min(ttl, remaining_ttl_seconds)
+        if ttl <= 0 or size > self._max_bytes:
+            return False
+
+        expires_at = self._clock() + ttl
+        with self._lock:
+            if epoch != self._epoch:
+                return False
+            if session_id in self._entries:
+                self._remove(session_id)
+            self._entries[session_id] = (expires_at, size, dict(data))
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+            return True
+
+    def invalidate(self, session_ids: Iterable[str]) -> None:
+        """指定したセッションを捨てる"""
+        with self._lock:
+            self._epoch += 1
+            for session_id in session_ids:
+                if session_id in self._entries:
+                    self._remove(session_id)
+
+    def clear(self) -> None:
+        """すべて捨てる"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """今入っているバイト数の合計"""
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット数・ミス数・ヒット率・件数・バイト数を返す"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _remove(self, session_id: str) -> None:
+        """1件捨てる（ロックを取ってから呼ぶ）"""
+        _, size, _ = self._entries.pop(session_id)
+        self._bytes -= size
+
+
+class NearCachedRedisSessionStore(RedisSessionStore):
+    """ニアキャッシュ付きのRedisSessionStore
+
+    【書き込み】
+    Redisへの書き込みと無効化の通知（PUBLISH）を1つのパイプラインで送るので、
+    往復回数はRedisSessionStoreと変わりません。
+
+    【読み込み】
+    ヒットすればネットワークを使わずに返します。
+    ミスしたら GET と PTTL（残りTTL）を1往復で読み、キャッシュに入れます。
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        serializer: Optional[SessionSerializer] = None,
+        near_cache: Optional[SessionNearCache] = None,
+        channel: str = SESSION_INVALIDATION_CHANNEL,
+        listen: bool = True,
+        key_prefix: str = SESSION_KEY_PREFIX,
+    ):
+        """SessionStoreを初期化
+
+        Args:
+            redis_client: Redisクライアント（テスト用に注入可能）
+            serializer: セッションデータの変換方法
+            near_cache: プロセス内キャッシュ（省略時は環境変数の設定で作る）
+            channel: 無効化を通知するpub/subのチャンネル名
+            listen: 無効化の通知を購読するか
+                （Falseは1プロセスだけで使う場合やテスト用。購読せずにキャッシュを使う）
+            key_prefix: Redisキーの接頭辞（無効化の通知にはセッションIDをそのまま載せる）
+        """
+        super().__init__(redis_client=redis_client, serializer=serializer, key_prefix=key_prefix)
+        self._near = near_cache or SessionNearCache()
+        self._channel = channel
+        self._stopped = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        # 購読していない構成では、最初からキャッシュを使ってよい
+        self._cache_usable = not listen
+        if listen:
+            self._listener = threading.Thread(
+                target=self._listen, name="session-invalidation", daemon=True
+            )
+            self._listener.start()
+
+    @property
+    def near_cache(self) -> SessionNearCache:
+        return self._near
+
+    @property
+    def is_cache_usable(self) -> bool:
+        """ニアキャッシュを使える状態か（購読が確立しているか）"""
+        return self._cache_usable
+
+    def save(self, session_id: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        self.save_many({session_id: data}, ttl=ttl)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if self._cache_usable:
+            cached = self._near.get(session_id)
+            if cached is not None:
+                return cached
+
+        epoch = self._near.epoch
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.get(self._key(session_id))
+        pipeline.pttl(self._key(session_id))
+        with span("redis", "get"):
+            payload, pttl = pipeline.execute()
+        if payload is None:
+            return None
+
+        data = self._serializer.loads(payload)
+        # PTTL: -1は無期限、-2は読んでいる間に消えた
+        if self._cache_usable and pttl != -2:
+            remaining = None if pttl < 0 else pttl / 1000
+            self._near.put(session_id, data, len(payload), remaining, epoch)
+        return data
+
+    def delete(self, session_id: str) -> None:
+        self.delete_many([session_id])
+
+    def save_many(self, sessions: Dict[str, Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """保存と無効化の通知を1往復で送る"""
+        if not sessions:
+            return
+        pipeline = self._redis.pipeline(transaction=False)
+        for session_id, data in sessions.items():
+            payload = self._serializer.dumps(data)
+            if ttl is not None:
+                pipeline.setex(self._key(session_id), ttl, payload)
+            else:
+                pipeline.set(self._key(session_id), payload)
+        pipeline.publish(self._channel, json.dumps(list(sessions)))
+        with span("redis", "save_many"):
+            pipeline.execute()
+        self._near.invalidate(sessions)
+
+    def get_many(self, session_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """ニアキャッシュにあるものはそこから、ないものだけMGETでまとめて読む"""
+        session_ids = list(session_ids)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(session_ids)
+        missing = []
+        for index, session_id in enumerate(session_ids):
+            cached = self._near.get(session_id) if self._cache_usable else None
+            if cached is None:
+                missing.append(index)
+            else:
+                results[index] = cached
+        if missing:
+            loaded = super().get_many([session_ids[index] for index in missing])
+            for index, data in zip(missing, loaded):
+                results[index] = data
+        return results
+
+    def delete_many(self, session_ids: Iterable[str]) -> None:
+        """削除と無効化の通知を1往復で送る"""
+        session_ids = list(session_ids)
+        if not session_ids:
+            return
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.delete(*(self._key(session_id) for session_id in session_ids))
+        pipeline.publish(self._channel, json.dumps(session_ids))
+        with span("redis", "delete_many"):
+            pipeline.execute()
+        self._near.invalidate(session_ids)
+
+    def close(self) -> None:
+        """購読を止める（アプリケーション終了時に呼ぶ）"""
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+
+    def handle_invalidation(self, message: Any) -> None:
+        """無効化の通知を受け取ってローカルのコピーを捨てる"""
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        try:
+            session_ids = json.loads(message)
+        except (TypeError, ValueError):
+            # 読めない通知が来たら、安全側に倒して全部捨てる
+            self._near.clear()
+            return
+        self._near.invalidate(session_ids)
+
+    def _listen(self) -> None:
+        """無効化の通知を購読し続ける（専用スレッドで動く）
+
+        【接続が切れたら？】
+        切れている間の通知は届かないので、キャッシュを使うのをやめて全部捨てます。
+        1秒待って購読し直し、確立したら再びキャッシュを使い始めます。
+        """
+        while not self._stopped.is_set():
+            pubsub = self._redis.pubsub()
+            try:
+                pubsub.subscribe(self._channel)
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        self._near.clear()
+                        self._cache_usable = True
+                    elif message["type"] == "message":
+                        self.handle_invalidation(message["data"])
+            except redis.RedisError as e:
+                logger.warning("Session invalidation subscription lost: %s", e)
+            finally:
+                self._cache_usable = False
+                self._near.clear()
+                try:
+                    pubsub.close()
+                except redis.RedisError:
+                    pass
+            self._stopped.wait(1.0)
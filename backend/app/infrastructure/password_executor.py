@@ -0,0 +1,231 @@
+"""パスワードハッシュ化エグゼキューター
+
+【なぜこのファイルが必要？】
+bcryptは「わざと遅い」処理です（1回0.1秒くらい、CPUを使い切る）。
+リクエストを処理しているスレッドでそのまま実行すると：
+- そのスレッドが0.1秒間ずっと塞がる
+- PythonのGIL（同時に1スレッドしかPythonコードを実行できない仕組み）のせいで、
+  CPUコアが何個あってもログインの処理速度が伸びない
+
+そこで、ハッシュ化と検証を「別プロセス」（ProcessPoolExecutor）で実行します。
+プロセスならGILを共有しないので、コア数に比例して処理できます。
+
+【バックプレッシャーとは？】
+ログインが殺到したとき、待ち行列を無限に伸ばすと
+全員が長時間待たされたうえにメモリも食いつぶします。
+待ち行列の上限（max_queue_depth）を超えたら、すぐに
+ServiceUnavailableError（503）を返して「後でもう一度」と伝えます。
+
+【使い方】
+RegistrationService / LoginService の hasher / verifier に
+このクラスのメソッドを渡すだけです（依存性注入）。
+
+    executor = PasswordHashingExecutor(max_workers=4)
+    service = LoginService(repository, verifier=executor.verify_password)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.domain.password import hash_password, verify_password
+from app.domain.request_timing import timed
+
+# ワーカープロセス数（0または未設定ならCPUコア数）
+PASSWORD_HASHER_WORKERS = int(os.getenv("PASSWORD_HASHER_WORKERS", "0"))
+# 同時に受け付ける（実行中＋待機中の）ハッシュ処理の上限
+PASSWORD_HASHER_MAX_QUEUE = int(os.getenv("PASSWORD_HASHER_MAX_QUEUE", "64"))
+
+
+class PasswordHashingExecutor:
+    """bcryptの処理をプロセスプールで実行するエグゼキューター
+
+    【なぜプロセスプールを遅延生成する？】
+    プロセスの起動は重いので、実際に使われるまで作りません。
+    テストでimportしただけのときに無駄なプロセスが立ち上がらないようにするためです。
+
+    【なぜspawnを使う？】
+    uvicornのようにスレッドを持つプロセスをforkすると、
+    ロックの状態ごとコピーされてデッドロックすることがあるためです。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue_depth: int = PASSWORD_HASHER_MAX_QUEUE,
+        executor: Optional[Executor] = None,
+    ):
+        """エグゼキューターを初期化する
+
+        Args:
+            max_workers: ワーカープロセス数（Noneの場合はCPUコア数）
+            max_queue_depth: 実行中＋待機中の処理数の上限
+            executor: 使用するExecutor（テスト用に注入可能）
+        """
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._max_queue_depth = max_queue_depth
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._shut_down = False
+        self._broken = False
+
+    @property
+    def max_workers(self) -> int:
+        """ワーカープロセス数"""
+        return self._max_workers
+
+    @property
+    def max_queue_depth(self) -> int:
+        """待ち行列の上限"""
+        return self._max_queue_depth
+
+    @property
+    def queue_depth(self) -> int:
+        """現在の実行中＋待機中の処理数"""
+        return self._pending
+
+    @property
+    def rejected_count(self) -> int:
+        """待ち行列が満杯で拒否した回数"""
+        return self._rejected
+
+    @property
+    def is_running(self) -> bool:
+        """処理を受け付けられるか
+
+        shutdown後（次に使われるまで）と、プールが壊れて作り直せなかった場合はFalseです。
+        待ち行列が満杯なだけならTrueです（空けば受け付けるため）。
+        """
+        with self._lock:
+            return not self._shut_down and not self._broken
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """処理をプロセスプールに投入する
+
+        【処理の流れ】
+        1. 待ち行列に空きがあるか確認（なければ即座にエラー）
+        2. プロセスプールに投入
+        3. 処理が終わったら待ち行列の枠を返す
+
+        Raises:
+            ServiceUnavailableError: 待ち行列が満杯の場合
+        """
+        with self._lock:
+            if self._pending >= self._max_queue_depth:
+                self._rejected += 1
+                raise ServiceUnavailableError("Password hashing queue is full")
+            self._pending += 1
+
+        try:
+            future = self._submit_to_executor(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    @timed("bcrypt")
+    def hash_password(self, password: str) -> str:
+        """パスワードをハッシュ化する（結果が出るまで待つ）
+
+        RegistrationServiceのhasherとしてそのまま渡せます。
+        待っている間もbcryptの計算は別プロセスで行われるため、GILを占有しません。
+        """
+        return self.submit(hash_password, password).result()
+
+    @timed("bcrypt")
+    def verify_password(self, password: str, hashed: str) -> bool:
+        """パスワードを検証する（結果が出るまで待つ）
+
+        LoginServiceのverifierとしてそのまま渡せます。
+        """
+        return self.submit(verify_password, password, hashed).result()
+
+    @timed("bcrypt")
+    async def hash_password_async(self, password: str) -> str:
+        """パスワードをハッシュ化する（非同期版）
+
+        【なぜ非同期版が必要？】
+        async defのエンドポイントで同期版を呼ぶと、
+        結果を待つ間イベントループ全体が止まってしまうためです。
+        """
+        return await asyncio.wrap_future(self.submit(hash_password, password))
+
+    @timed("bcrypt")
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        """パスワードを検証する（非同期版）"""
+        return await asyncio.wrap_future(self.submit(verify_password, password, hashed))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """プロセスプールを停止する
+
+        アプリケーション終了時（lifespan）に呼び出します。
+        """
+        with self._lock:
+            executor = self._executor
+            self._shut_down = True
+            if self._owns_executor:
+                self._executor = None
+        if executor is not None and self._owns_executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _submit_to_executor(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """プロセスプールに投入する（壊れていたら作り直して1回だけ再試行）
+
+        【BrokenProcessPoolとは？】
+        ワーカープロセスが異常終了すると、プール全体が使えなくなります。
+        その場合は新しいプールを作り直します。
+        """
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            if not self._owns_executor:
+                self._mark_broken(True)
+                raise
+            with self._lock:
+                self._executor = None
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                self._mark_broken(True)
+                raise
+        self._mark_broken(False)
+        return future
+
+    def _get_executor(self) -> Executor:
+        """プロセスプールを取得する（なければ作成する）"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            # shutdown後に使われたら、プールを作り直して再び動き出す
+            self._shut_down = False
+            return self._executor
+
+    def _mark_broken(self, broken: bool) -> None:
+        """プールが壊れたまま使えないかを記録する（is_runningで返す）"""
+        with self._lock:
+            self._broken = broken
+
+    def _release(self, _future: Optional[Future] = None) -> None:
+        """待ち行列の枠を1つ返す"""
+        with self._lock:
+            self._pending -= 1
+
+
+# アプリケーション全体で共有するエグゼキューター
+password_hashing_executor = PasswordHashingExecutor(
+    max_workers=PASSWORD_HASHER_WORKERS or None,
+    max_queue_depth=PASSWORD_HASHER_MAX_QUEUE,
+)
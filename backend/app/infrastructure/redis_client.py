@@ -12,21 +12,125 @@ Redis接続を管理するための設定ファイルです。
 """
 
 import os
+from typing import Dict, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
 import redis
+import redis.asyncio
 
 # Redis接続URL（環境変数から読み込み）
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+# コネクションプールの最大接続数
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# 接続を張るときのタイムアウト（秒）
+REDIS_CONNECT_TIMEOUT_SECONDS = float(os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", "1.0"))
+# コマンドの応答を待つタイムアウト（秒）
+# 【なぜ短めにする？】
+# Redisが詰まったときに、リクエスト全体がRedisの応答待ちで止まらないようにするため。
+REDIS_SOCKET_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "0.5"))
+
+_pools: Dict[bool, redis.ConnectionPool] = {}
+
+
+def get_connection_pool(decode_responses: bool = True) -> redis.ConnectionPool:
+    """プロセス全体で共有するコネクションプールを取得する
+
+    【なぜ共有する？】
+    redis.from_urlはそのたびに新しいコネクションプールを作ります。
+    RedisSessionStoreを作るたびに呼ぶと、使い終わった接続が再利用されず、
+    毎回TCP接続からやり直しになってしまいます。
+
+    Args:
+        decode_responses: 値をstrで受け取るか（Falseならbytes。バイナリを保存する場合に使う）
+    """
+    pool = _pools.get(decode_responses)
+    if pool is None:
+        pool = _pools[decode_responses] = redis.ConnectionPool.from_url(
+            REDIS_URL,
+            decode_responses=decode_responses,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return pool
 
 
-def get_redis_client() -> redis.Redis:
+def get_redis_client(decode_responses: bool = True) -> redis.Redis:
     """Redisクライアントを取得する
 
     Returns:
-        Redisクライアントインスタンス
+        Redisクライアントインスタンス（共有のコネクションプールを使う）
 
     【なぜ関数で返す？】
     テスト時にモックや別のRedisインスタンスを返せるようにするため。
     依存性注入のパターンです。
     """
-    return redis.from_url(REDIS_URL, decode_responses=True)
+    return redis.Redis(connection_pool=get_connection_pool(decode_responses))
+
+
+_url_pools: Dict[Tuple[str, bool], redis.ConnectionPool] = {}
+
+
+def get_redis_client_for_url(url: str, decode_responses: bool = True) -> redis.Redis:
+    """REDIS_URL以外のRedisのクライアントを取得する（URLごとにプールを共有する）
+
+    セッションを複数のRedisに分けて保存する場合（ShardedRedisSessionStore）に使います。
+    """
+    key = (url, decode_responses)
+    pool = _url_pools.get(key)
+    if pool is None:
+        pool = _url_pools[key] = redis.ConnectionPool.from_url(
+            url,
+            decode_responses=decode_responses,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return redis.Redis(connection_pool=pool)
+
+
+def redis_node_name(url: str) -> str:
+    """RedisのURLから認証情報を除いた名前を返す（ログやハッシュリングのノード名に使う）
+
+    【なぜ認証情報を除く？】
+    パスワードをログに出さないためと、パスワードを変えただけで
+    ハッシュリング上の位置（＝セッションの置き場所）が変わらないようにするためです。
+    """
+    parts = urlsplit(url)
+    netloc = parts.netloc.rsplit("@", 1)[-1]
+    return urlunsplit((parts.scheme, netloc, parts.path, "", ""))
+
+
+_async_pools: Dict[bool, redis.asyncio.ConnectionPool] = {}
+
+
+def get_async_connection_pool(decode_responses: bool = True) -> redis.asyncio.ConnectionPool:
+    """非同期版の共有コネクションプールを取得する
+
+    【なぜ同期版と別のプール？】
+    redis.asyncioの接続はイベントループに紐づくため、同期版の接続とは共有できません。
+    アプリケーション終了時（lifespan）にclose_async_connection_poolで閉じます。
+    """
+    pool = _async_pools.get(decode_responses)
+    if pool is None:
+        pool = _async_pools[decode_responses] = redis.asyncio.ConnectionPool.from_url(
+            REDIS_URL,
+            decode_responses=decode_responses,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return pool
+
+
+def get_async_redis_client(decode_responses: bool = True) -> redis.asyncio.Redis:
+    """非同期版のRedisクライアントを取得する（共有のコネクションプールを使う）"""
+    return redis.asyncio.Redis(connection_pool=get_async_connection_pool(decode_responses))
+
 
+async def close_async_connection_pool() -> None:
+    """非同期版のコネクションプールを閉じる（アプリケーション終了時に呼ぶ）"""
+    pools = list(_async_pools.values())
+    _async_pools.clear()
+    for pool in pools:
+        await pool.disconnect()
@@ -0,0 +1,96 @@
+"""Redis RefreshTokenStore実装
+
+【このファイルの目的】
+リフレッシュトークンのファミリーをRedisに保存します。
+/auth/refreshのたびに呼ばれるので、確認と入れ替えを1往復で済ませます。
+
+【なぜLuaスクリプト？】
+「今のjtiと同じか確認 → 新しいjtiに入れ替え」をGETとSETに分けると、
+- 往復が2回になる
+- 同じトークンで同時に2回更新されたとき、両方とも成功してしまう
+Luaスクリプトは Redis の中で1つのコマンドとして実行される（途中で割り込まれない）ので、
+1往復で、しかも確実に1回だけ成功します。
+スクリプト本体は最初の1回だけ送り、あとはSHA1（EVALSHA）で呼び出します。
+"""
+
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.domain.refresh_token_store import (
+    FAMILY_KEY_PREFIX,
+    LEGACY_KEY_PREFIX,
+    REUSED,
+    ROTATED,
+    UNKNOWN,
+    RefreshTokenStore,
+)
+from app.domain.request_timing import timed
+from app.infrastructure.redis_client import get_async_redis_client
+
+# KEYS[1]: ファミリーのキー / ARGV: 提示されたjti, 新しいjti, 有効期限（秒）
+# 戻り値: 1=ローテーションした / -1=使い回し（ファミリーを削除した）/ 0=ファミリーがない
+_ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+_RESULTS = {1: ROTATED, -1: REUSED, 0: UNKNOWN}
+
+
+class RedisRefreshTokenStore(RefreshTokenStore):
+    """redis.asyncioを使ったRefreshTokenStore実装
+
+    【データ形式】
+    キー: refresh_family:{ファミリーID}　値: 今有効なjti（文字列）　有効期限: リフレッシュトークンと同じ
+    キー: refresh_legacy:{トークンのSHA-256}　値: 1　有効期限: 使用済みの古いトークンの残りの有効期限
+    """
+
+    def __init__(self, redis_client: Optional[redis.asyncio.Redis] = None):
+        """RefreshTokenStoreを初期化
+
+        Args:
+            redis_client: 非同期Redisクライアント（テスト用に注入可能）
+        """
+        self._redis = redis_client or get_async_redis_client()
+        self._rotate = self._redis.register_script(_ROTATE_SCRIPT)
+
+    @timed("redis")
+    async def start_family(self, family_id: str, jti: str, ttl: int) -> None:
+        try:
+            await self._redis.set(FAMILY_KEY_PREFIX + family_id, jti, ex=ttl)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            raise ServiceUnavailableError(f"Refresh token store is unavailable: {e}") from e
+
+    @timed("redis")
+    async def rotate(self, family_id: str, jti: str, new_jti: str, ttl: int) -> str:
+        try:
+            result = await self._rotate(keys=[FAMILY_KEY_PREFIX + family_id], args=[jti, new_jti, ttl])
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            raise ServiceUnavailableError(f"Refresh token store is unavailable: {e}") from e
+        return _RESULTS[int(result)]
+
+    @timed("redis")
+    async def revoke_family(self, family_id: str) -> None:
+        try:
+            await self._redis.delete(FAMILY_KEY_PREFIX + family_id)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            raise ServiceUnavailableError(f"Refresh token store is unavailable: {e}") from e
+
+    @timed("redis")
+    async def consume_legacy(self, token_hash: str, ttl: int) -> bool:
+        # SET NXは「なければ書く」を1コマンドで行うので、同時に使われても成功は1回だけ
+        try:
+            return bool(await self._redis.set(LEGACY_KEY_PREFIX + token_hash, 1, nx=True, ex=ttl))
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            raise ServiceUnavailableError(f"Refresh token store is unavailable: {e}") from e
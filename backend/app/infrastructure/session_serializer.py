@@ -0,0 +1,168 @@
+"""セッションデータのシリアライザー
+
+【なぜこのファイルが必要？】
+RedisSessionStoreはセッションをjson.dumpsした文字列で保存していました。
+セッションが数百万件になると、
+- JSONの変換（dumps / loads）にかかるCPU
+- キー名や引用符も毎回保存されるRedisのメモリ
+が無視できなくなります。
+
+【何ができる？】
+- 形式を選べる: JSON / msgpack（バイナリで小さく速い）
+- 大きい値だけ圧縮できる: zlib / lz4（しきい値を超えたときだけ）
+- 保存する値の先頭1バイトに「形式のバージョン」を付ける
+
+【なぜバージョンを付ける？】
+ローリングデプロイ中は、新旧のサーバーが同じRedisを読み書きします。
+先頭1バイトを見ればどの形式で書かれたかわかるので、
+書き込みの形式を切り替えても、どちらの形式の値も読めます。
+
+    先頭1バイト = 形式（下位4ビット） | 圧縮方式（上位4ビット）
+        0x01: JSON          0x02: msgpack
+        0x10: zlib圧縮      0x20: lz4圧縮
+    例: 0x12 = zlibで圧縮したmsgpack
+
+バージョンを付ける前の値（"{"で始まるJSON文字列）もそのまま読めます。
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Dict, Optional, Union
+
+import msgpack
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4は任意（使うときだけpip install lz4）
+    lz4_frame = None
+
+# 書き込みに使う形式（json / msgpack / legacy）
+# legacy: バージョンなしのJSON（旧バージョンのサーバーが残っている間だけ使う）
+SESSION_FORMAT = os.getenv("SESSION_FORMAT", "json")
+# 圧縮方式（none / zlib / lz4）
+SESSION_COMPRESSION = os.getenv("SESSION_COMPRESSION", "none")
+# このバイト数を超えた値だけ圧縮する（小さい値は圧縮しても縮まず、CPUの無駄になる）
+SESSION_COMPRESS_THRESHOLD = int(os.getenv("SESSION_COMPRESS_THRESHOLD", "512"))
+
+FORMAT_JSON = 0x01
+FORMAT_MSGPACK = 0x02
+COMPRESSION_ZLIB = 0x10
+COMPRESSION_LZ4 = 0x20
+
+_FORMAT_MASK = 0x0F
+_COMPRESSION_MASK = 0xF0
+_LEGACY_JSON_PREFIX = ord("{")
+
+_FORMATS = {"json": FORMAT_JSON, "msgpack": FORMAT_MSGPACK}
+_COMPRESSIONS = {"none": 0, "zlib": COMPRESSION_ZLIB, "lz4": COMPRESSION_LZ4}
+
+
+def _encode_body(format: int, data: Dict[str, Any]) -> bytes:
+    if format == FORMAT_JSON:
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def _decode_body(format: int, body: bytes) -> Dict[str, Any]:
+    if format == FORMAT_JSON:
+        return json.loads(body)
+    if format == FORMAT_MSGPACK:
+        return msgpack.unpackb(body, raw=False)
+    raise ValueError(f"Unknown session format: {format:#04x}")
+
+
+def _compress(compression: int, body: bytes) -> bytes:
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(body)
+    return lz4_frame.compress(body)
+
+
+def _decompress(compression: int, body: bytes) -> bytes:
+    if compression == 0:
+        return body
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(body)
+    if compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError("lz4 is required to read this session")
+        return lz4_frame.decompress(body)
+    raise ValueError(f"Unknown session compression: {compression:#04x}")
+
+
+class SessionSerializer:
+    """セッションデータ ⇔ Redisに保存するバイト列 の変換
+
+    【読み込みについて】
+    loadsは設定に関係なく、どの形式・圧縮方式で書かれた値も読めます。
+    設定（format / compression）が影響するのは書き込み（dumps）だけです。
+    """
+
+    def __init__(
+        self,
+        format: str = SESSION_FORMAT,
+        compression: str = SESSION_COMPRESSION,
+        compress_threshold: int = SESSION_COMPRESS_THRESHOLD,
+    ):
+        """シリアライザーを初期化する
+
+        Args:
+            format: 書き込みに使う形式（json / msgpack / legacy）
+            compression: 圧縮方式（none / zlib / lz4）
+            compress_threshold: このバイト数を超えた値だけ圧縮する
+
+        Raises:
+            ValueError: 未対応の形式・圧縮方式、または必要なライブラリがない場合
+        """
+        if format != "legacy" and format not in _FORMATS:
+            raise ValueError(f"Unsupported session format: {format}")
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unsupported session compression: {compression}")
+        if compression == "lz4" and lz4_frame is None:
+            raise ValueError("SESSION_COMPRESSION=lz4 requires the lz4 package")
+        if format == "legacy" and compression != "none":
+            raise ValueError("Legacy JSON sessions cannot be compressed")
+
+        self._legacy = format == "legacy"
+        self._format = _FORMATS.get(format, FORMAT_JSON)
+        self._compression = _COMPRESSIONS[compression]
+        self._compress_threshold = compress_threshold
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        """セッションデータを保存用のバイト列にする"""
+        body = _encode_body(self._format, data)
+        if self._legacy:
+            return body
+        header = self._format
+        if self._compression and len(body) > self._compress_threshold:
+            body = _compress(self._compression, body)
+            header |= self._compression
+        return bytes((header,)) + body
+
+    def loads(self, raw: Union[bytes, str]) -> Dict[str, Any]:
+        """Redisから読んだ値をセッションデータに戻す
+
+        【strが来る場合】
+        decode_responses=TrueのRedisクライアントから読んだ値です。
+        圧縮していないJSONならそのまま読めます。
+        """
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        if not raw:
+            raise ValueError("Empty session value")
+        header = raw[0]
+        if header == _LEGACY_JSON_PREFIX:
+            return json.loads(raw)
+        body = _decompress(header & _COMPRESSION_MASK, raw[1:])
+        return _decode_body(header & _FORMAT_MASK, body)
+
+
+_default_serializer: Optional[SessionSerializer] = None
+
+
+def get_default_serializer() -> SessionSerializer:
+    """環境変数の設定で作ったシリアライザーを返す（全SessionStoreで共有）"""
+    global _default_serializer
+    if _default_serializer is None:
+        _default_serializer = SessionSerializer()
+    return _default_serializer
@@ -8,14 +8,29 @@ SessionStoreインターフェースをRedisで実装します。
 2. JSON形式でのデータ保存・取得
 3. TTL（有効期限）の設定
 4. エラーハンドリング
+5. パイプラインによるまとめ処理（N件を1往復で）
+
+【キーの形】
+セッションIDの前にSESSION_KEY_PREFIXを付けたものをRedisのキーにします。
+既定は空（セッションIDがそのままキー）で、これまでと同じキーを使います。
+同じRedisにはリフレッシュトークンや失効リストのキーも置かれるので、
+新しく構築する環境では SESSION_KEY_PREFIX=session: のように指定すると
+セッションのキーだけを見分けられます（例: session:abc123。
+app/services/session_rebalance.pyはこの接頭辞のキーだけを移動します）。
+既に動いている環境で後から指定すると、既存のセッションは見つからなくなります（再ログインが必要）。
 """
 
-import json
-from typing import Optional, Dict, Any
+import os
+from typing import Optional, Dict, Any, Iterable, List
 import redis
 
+from app.domain.request_timing import timed
 from app.domain.session_store import SessionStore
 from app.infrastructure.redis_client import get_redis_client
+from app.infrastructure.session_serializer import SessionSerializer, get_default_serializer
+
+# セッションのRedisキーの接頭辞（既定は空で接頭辞なし。全サーバーで同じ値にする）
+SESSION_KEY_PREFIX = os.getenv("SESSION_KEY_PREFIX", "")
 
 
 class RedisSessionStore(SessionStore):
@@ -27,18 +42,34 @@ class RedisSessionStore(SessionStore):
     - スケーラブル（複数のサーバーで共有可能）
 
     【データ形式】
-    RedisにはJSON文字列として保存します。
-    例: {"user_id": "123", "email": "test@example.com"}
+    SessionSerializerで変換したバイト列として保存します（既定は先頭1バイト＋JSON）。
+    形式は環境変数SESSION_FORMAT / SESSION_COMPRESSIONで切り替えられます。
+    詳しくはsession_serializer.pyを参照。
     """
 
-    def __init__(self, redis_client: Optional[redis.Redis] = None):
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        serializer: Optional[SessionSerializer] = None,
+        key_prefix: str = SESSION_KEY_PREFIX,
+    ):
         """SessionStoreを初期化
 
         Args:
             redis_client: Redisクライアント（テスト用に注入可能）
+                msgpackや圧縮を使う場合は decode_responses=False のものを渡す
+            serializer: セッションデータの変換方法（省略時は環境変数の設定）
+            key_prefix: Redisキーの接頭辞（セッションIDの前に付ける）
         """
-        self._redis = redis_client or get_redis_client()
+        self._redis = redis_client or get_redis_client(decode_responses=False)
+        self._serializer = serializer or get_default_serializer()
+        self._key_prefix = key_prefix
+
+    def _key(self, session_id: str) -> str:
+        """セッションIDのRedisキー"""
+        return self._key_prefix + session_id
 
+    @timed("redis")
     def save(self, session_id: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
         """セッションをRedisに保存する
 
@@ -48,16 +79,17 @@ class RedisSessionStore(SessionStore):
             ttl: 有効期限（秒単位）。Noneの場合は無期限
 
         【処理の流れ】
-        1. データをJSON文字列に変換
+        1. データをバイト列に変換（SessionSerializer）
         2. Redisに保存
         3. TTLが指定されていれば設定
         """
-        json_data = json.dumps(data)
+        payload = self._serializer.dumps(data)
         if ttl is not None:
-            self._redis.setex(session_id, ttl, json_data)
+            self._redis.setex(self._key(session_id), ttl, payload)
         else:
-            self._redis.set(session_id, json_data)
+            self._redis.set(self._key(session_id), payload)
 
+    @timed("redis")
     def get(self, session_id: str) -> Optional[Dict[str, Any]]:
         """セッションをRedisから取得する
 
@@ -69,19 +101,76 @@ class RedisSessionStore(SessionStore):
 
         【処理の流れ】
         1. Redisからデータを取得
-        2. JSON文字列を辞書に変換
+        2. バイト列を辞書に変換（SessionSerializer）
         3. 見つからなければNoneを返す
         """
-        json_data = self._redis.get(session_id)
-        if json_data is None:
+        payload = self._redis.get(self._key(session_id))
+        if payload is None:
             return None
-        return json.loads(json_data)
+        return self._serializer.loads(payload)
 
+    @timed("redis")
     def delete(self, session_id: str) -> None:
         """セッションをRedisから削除する
 
         Args:
             session_id: セッションID
         """
-        self._redis.delete(session_id)
+        self._redis.delete(self._key(session_id))
+
+
+    @timed("redis")
+    def save_many(self, sessions: Dict[str, Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """複数のセッションを1往復でまとめて保存する
 
+        【パイプラインとは？】
+        複数のコマンドをまとめて送り、まとめて返事を受け取る仕組み。
+        N件のSET/SETEXでも、Redisとの往復は1回で済みます。
+        transaction=FalseにしてMULTI/EXECを付けない（原子性は不要で、その分速い）。
+        """
+        if not sessions:
+            return
+        pipeline = self._redis.pipeline(transaction=False)
+        for session_id, data in sessions.items():
+            payload = self._serializer.dumps(data)
+            if ttl is not None:
+                pipeline.setex(self._key(session_id), ttl, payload)
+            else:
+                pipeline.set(self._key(session_id), payload)
+        pipeline.execute()
+
+    @timed("redis")
+    def get_many(self, session_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """複数のセッションをMGETで1往復でまとめて取得する"""
+        session_ids = list(session_ids)
+        if not session_ids:
+            return []
+        return [
+            self._serializer.loads(payload) if payload is not None else None
+            for payload in self._redis.mget([self._key(session_id) for session_id in session_ids])
+        ]
+
+    @timed("redis")
+    def delete_many(self, session_ids: Iterable[str]) -> None:
+        """複数のセッションを1回のDELでまとめて削除する"""
+        session_ids = list(session_ids)
+        if session_ids:
+            self._redis.delete(*(self._key(session_id) for session_id in session_ids))
+
+    @timed("redis")
+    def touch(self, session_id: str, ttl: int) -> bool:
+        """EXPIREで有効期限だけを延ばす（値は読み書きしないので1往復で済む）"""
+        return bool(self._redis.expire(self._key(session_id), ttl))
+
+    @timed("redis")
+    def get_and_touch(self, session_id: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """GETEXで取得と有効期限の延長を1往復で行う
+
+        【GETEXとは？】
+        Redis 6.2で追加された「値を取得しつつ有効期限を設定する」コマンド。
+        GETしてからSETし直す必要がないので、往復も再シリアライズも1回分減ります。
+        """
+        payload = self._redis.getex(self._key(session_id), ex=ttl)
+        if payload is None:
+            return None
+        return self._serializer.loads(payload)
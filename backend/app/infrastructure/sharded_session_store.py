@@ -0,0 +1,187 @@
+"""複数のRedisに分けて保存するSessionStore実装
+
+【なぜこのファイルが必要？】
+RedisSessionStoreは1台のRedis（REDIS_URL）にすべてのセッションを保存します。
+セッションの数とリクエスト数が増えると、1台のメモリと処理能力が上限になります。
+
+【仕組み】
+SESSION_REDIS_URLSに複数のRedisを並べると、セッションIDのハッシュで
+どのRedisに置くかを決めます（コンシステントハッシュ。hash_ring.pyを参照）。
+
+    SESSION_REDIS_URLS=redis://redis-1:6379,redis://redis-2:6379,redis://redis-3:6379
+
+【まとめ処理（save_many / get_many / delete_many）】
+セッションIDをRedisごとに分け、Redisごとにパイプラインで1往復にまとめ、
+それぞれのRedisへは並行して送ります。
+3台なら、全体の待ち時間は「一番遅いRedisの1往復」になります。
+1台分は呼び出したスレッドで送り、残りだけをスレッドプールに渡します。
+スレッドプールは全リクエストで共有するので、同時に処理するリクエストの数
+（SESSION_SHARD_CONCURRENCY）× (台数 - 1) のスレッドを用意します。
+
+【Redisを増やすとき】
+app/services/session_rebalance.py で、置き場所が変わるセッションを移動します。
+"""
+
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import redis
+
+from app.domain.session_store import SessionStore
+from app.infrastructure.hash_ring import DEFAULT_VNODES, HashRing
+from app.infrastructure.redis_client import get_redis_client_for_url, redis_node_name
+from app.infrastructure.session_serializer import SessionSerializer
+from app.infrastructure.session_store import SESSION_KEY_PREFIX, RedisSessionStore
+
+T = TypeVar("T")
+
+# セッションを分けて保存するRedisのURL（カンマ区切り）。空ならREDIS_URLの1台だけを使う
+SESSION_REDIS_URLS = [url.strip() for url in os.getenv("SESSION_REDIS_URLS", "").split(",") if url.strip()]
+# 1台あたりの仮想ノード数（全サーバーで同じ値にする。変えると置き場所が変わる）
+SESSION_HASH_RING_VNODES = int(os.getenv("SESSION_HASH_RING_VNODES", str(DEFAULT_VNODES)))
+# まとめ処理を同時に呼ぶ数の想定（同期のエンドポイントを動かすスレッド数。anyioの既定値は40）
+SESSION_SHARD_CONCURRENCY = int(os.getenv("SESSION_SHARD_CONCURRENCY", "40"))
+
+
+def session_redis_clients(urls: Iterable[str]) -> Dict[str, redis.Redis]:
+    """URLの一覧から {ノード名: Redisクライアント} を作る"""
+    return {redis_node_name(url): get_redis_client_for_url(url, decode_responses=False) for url in urls}
+
+
+class ShardedRedisSessionStore(SessionStore):
+    """コンシステントハッシュで複数のRedisに分けて保存するSessionStore実装
+
+    1件ずつの操作は、担当のRedisに対するRedisSessionStoreの操作そのものです
+    （GETEXによるget_and_touchなども、1往復のまま使えます）。
+    """
+
+    def __init__(
+        self,
+        clients: Optional[Dict[str, redis.Redis]] = None,
+        serializer: Optional[SessionSerializer] = None,
+        vnodes: int = SESSION_HASH_RING_VNODES,
+        key_prefix: str = SESSION_KEY_PREFIX,
+        concurrency: int = SESSION_SHARD_CONCURRENCY,
+    ):
+        """SessionStoreを初期化
+
+        Args:
+            clients: {ノード名: Redisクライアント}（省略時はSESSION_REDIS_URLSから作る）
+                ノード名がハッシュリング上の位置を決めるので、全サーバーで同じ名前にする
+            serializer: セッションデータの変換方法（省略時は環境変数の設定）
+            vnodes: 1台あたりの仮想ノード数
+            key_prefix: Redisキーの接頭辞（置き場所は接頭辞を付ける前のセッションIDで決める）
+            concurrency: まとめ処理を同時に呼ぶ数の想定（スレッドプールの大きさを決める）
+
+        Raises:
+            ValueError: Redisが1台も指定されていない場合
+        """
+        if clients is None:
+            clients = session_redis_clients(SESSION_REDIS_URLS)
+        self._ring = HashRing(clients.keys(), vnodes=vnodes)
+        self._key_prefix = key_prefix
+        self._stores = {
+            node: RedisSessionStore(redis_client=client, serializer=serializer, key_prefix=key_prefix)
+            for node, client in clients.items()
+        }
+        # Redisごとの並行送信用（1回のまとめ処理で使うのは「台数 - 1」スレッド）
+        # スレッドは必要になってから作られるので、大きめにしても待機中の負担はない
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, (len(self._stores) - 1) * concurrency),
+            thread_name_prefix="session-shard",
+        )
+
+    @property
+    def ring(self) -> HashRing:
+        """セッションの置き場所を決めるハッシュリング"""
+        return self._ring
+
+    @property
+    def key_prefix(self) -> str:
+        """Redisキーの接頭辞（session_rebalanceで移動するキーを見分ける）"""
+        return self._key_prefix
+
+    def node_for(self, session_id: str) -> str:
+        """セッションを置くRedisのノード名を返す"""
+        return self._ring.get_node(session_id)
+
+    def save(self, session_id: str, data: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """セッションを担当のRedisに保存する"""
+        self._store_for(session_id).save(session_id, data, ttl=ttl)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """セッションを担当のRedisから取得する"""
+        return self._store_for(session_id).get(session_id)
+
+    def delete(self, session_id: str) -> None:
+        """セッションを担当のRedisから削除する"""
+        self._store_for(session_id).delete(session_id)
+
+    def touch(self, session_id: str, ttl: int) -> bool:
+        """担当のRedisで有効期限を延ばす"""
+        return self._store_for(session_id).touch(session_id, ttl)
+
+    def get_and_touch(self, session_id: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """担当のRedisで取得と有効期限の延長を1往復で行う"""
+        return self._store_for(session_id).get_and_touch(session_id, ttl)
+
+    def save_many(self, sessions: Dict[str, Dict[str, Any]], ttl: Optional[int] = None) -> None:
+        """Redisごとにパイプラインでまとめ、並行して保存する"""
+        groups = self._ring.group(sessions)
+        self._run_per_node(
+            groups,
+            lambda node, ids: self._stores[node].save_many({i: sessions[i] for i in ids}, ttl=ttl),
+        )
+
+    def get_many(self, session_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """Redisごとに1回のMGETにまとめ、並行して取得する（結果は入力の順番）"""
+        session_ids = list(session_ids)
+        groups = self._ring.group(dict.fromkeys(session_ids))
+        results = self._run_per_node(groups, lambda node, ids: self._stores[node].get_many(ids))
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        for node, ids in groups.items():
+            found.update(zip(ids, results[node]))
+        return [found[session_id] for session_id in session_ids]
+
+    def delete_many(self, session_ids: Iterable[str]) -> None:
+        """Redisごとに1回のDELにまとめ、並行して削除する"""
+        groups = self._ring.group(dict.fromkeys(session_ids))
+        self._run_per_node(groups, lambda node, ids: self._stores[node].delete_many(ids))
+
+    def close(self) -> None:
+        """並行送信用のスレッドを止める（アプリケーション終了時に呼ぶ）"""
+        self._executor.shutdown(wait=True)
+
+    def _store_for(self, session_id: str) -> RedisSessionStore:
+        return self._stores[self._ring.get_node(session_id)]
+
+    def _run_per_node(
+        self,
+        groups: Dict[str, List[str]],
+        operation: Callable[[str, List[str]], T],
+    ) -> Dict[str, T]:
+        """ノードごとの処理を並行して実行し、{ノード名: 結果} を返す
+
+        【なぜ1台分は呼び出したスレッドで実行する？】
+        スレッドに渡して結果を待つだけで数十マイクロ秒かかるうえ、
+        呼び出したスレッドは結果を待つ間なにもしないためです。
+        1台だけのときはスレッドプールを使わず、2台以上でも「台数 - 1」件だけを渡します。
+        """
+        items = list(groups.items())
+        if not items:
+            return {}
+        (first_node, first_ids), rest = items[0], items[1:]
+        # contextvars（リクエストの処理時間の記録など）をワーカースレッドにも引き継ぐ
+        futures = {
+            node: self._executor.submit(contextvars.copy_context().run, operation, node, ids)
+            for node, ids in rest
+        }
+        try:
+            results = {first_node: operation(first_node, first_ids)}
+        finally:
+            # 1台でも失敗したら例外をそのまま伝える（ほかのRedisへの送信は完了させてから）
+            wait(futures.values())
+        results.update((node, future.result()) for node, future in futures.items())
+        return results
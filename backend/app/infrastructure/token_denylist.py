@@ -0,0 +1,215 @@
+"""Redis TokenDenylist実装（プロセス内ブルームフィルター付き）
+
+【このファイルの目的】
+失効させたアクセストークンのjtiをRedisに記録し、各ワーカーのブルームフィルターに配ります。
+
+    失効: ZADD revoked_access_tokens {jti: exp} + PUBLISH（1往復）
+                     |
+    ワーカーA, B, ... <+ （購読しているワーカーがフィルターに追加する）
+
+    確認: フィルターに「入っていない」→ 失効していない（Redisに聞かない）
+          フィルターに「入っているかも」→ ZSCOREで本当に失効しているか確認する
+
+【安全のための決まりごと】
+1. 購読が確立したら、Redisに記録済みのjtiを全部読み直してからフィルターを使う
+   （購読前に失効したものも取りこぼさない。購読してから読むので、その間の失効も届く）
+2. 購読が確立していない間は、毎回Redisで確認する
+   Redisにもつながらない場合は、つながっていた時点までのフィルターで判断する
+   （そのワーカーからRedisが見えない間は、ほかのワーカーの失効も記録されていない可能性が高い）
+   失敗が続いたらサーキットブレーカーで問い合わせを止め、タイムアウトを待たずにフィルターで答える
+3. フィルターに「入っているかも」と言われてRedisにつながらない場合は、失効扱いにする
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import redis
+import redis.asyncio
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.domain.jwt import DEFAULT_EXPIRE_MINUTES
+from app.domain.request_timing import span, timed
+from app.domain.token_denylist import RollingBloomFilter, TokenDenylist
+from app.infrastructure.circuit_breaker import CircuitBreaker
+from app.infrastructure.redis_client import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# アクセストークンの失効を確認するか
+TOKEN_DENYLIST_ENABLED = os.getenv("TOKEN_DENYLIST_ENABLED", "true").lower() == "true"
+# ブルームフィルター1世代あたりの件数（15分間に失効させる件数の目安）
+TOKEN_DENYLIST_CAPACITY = int(os.getenv("TOKEN_DENYLIST_CAPACITY", "100000"))
+# ブルームフィルターの誤検知の確率（誤検知したときだけRedisに問い合わせる）
+TOKEN_DENYLIST_ERROR_RATE = float(os.getenv("TOKEN_DENYLIST_ERROR_RATE", "0.001"))
+# 失効させたjtiを記録するキー（ソート済みセット。スコアはトークンのexp）
+TOKEN_DENYLIST_KEY = os.getenv("TOKEN_DENYLIST_KEY", "revoked_access_tokens")
+# 失効を通知するpub/subのチャンネル名
+TOKEN_DENYLIST_CHANNEL = os.getenv("TOKEN_DENYLIST_CHANNEL", "revoked_access_tokens")
+
+
+class RedisTokenDenylist(TokenDenylist):
+    """Redisに記録し、各ワーカーのブルームフィルターで確認するTokenDenylist実装"""
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.asyncio.Redis] = None,
+        subscriber_client: Optional[redis.Redis] = None,
+        bloom_filter: Optional[RollingBloomFilter] = None,
+        key: str = TOKEN_DENYLIST_KEY,
+        channel: str = TOKEN_DENYLIST_CHANNEL,
+        listen: bool = True,
+        clock: Callable[[], float] = time.time,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """TokenDenylistを初期化
+
+        Args:
+            redis_client: 失効の記録と確認に使う非同期Redisクライアント
+            subscriber_client: 通知の購読と読み直しに使うRedisクライアント（専用スレッドで使う）
+            bloom_filter: プロセス内のフィルター（省略時は環境変数の設定で作る）
+            key: 失効させたjtiを記録するキー
+            channel: 失効を通知するpub/subのチャンネル名
+            listen: 通知を購読するか（Falseなら毎回Redisで確認する）
+            clock: 現在時刻（UNIX秒）を返す関数（テスト用に注入可能）
+            circuit_breaker: 失効の確認に使うサーキットブレーカー（テスト用に注入可能）
+        """
+        self._redis = redis_client or get_async_redis_client()
+        self._subscriber = subscriber_client or get_redis_client()
+        self._filter = bloom_filter or RollingBloomFilter(
+            TOKEN_DENYLIST_CAPACITY,
+            TOKEN_DENYLIST_ERROR_RATE,
+            window_seconds=DEFAULT_EXPIRE_MINUTES * 60,
+            clock=clock,
+        )
+        self._key = key
+        self._channel = channel
+        self._clock = clock
+        self._breaker = circuit_breaker or CircuitBreaker("token denylist")
+        self._stopped = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._filter_usable = False
+        self.filter_passes = 0
+        self.redis_checks = 0
+        self.revoked_hits = 0
+        if listen:
+            self._listener = threading.Thread(
+                target=self._listen, name="token-denylist", daemon=True
+            )
+            self._listener.start()
+
+    @property
+    def is_filter_usable(self) -> bool:
+        """フィルターだけで判断してよい状態か（購読と読み直しが済んでいるか）"""
+        return self._filter_usable
+
+    @timed("redis")
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """失効を記録して全ワーカーに通知する（1往復）"""
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.zadd(self._key, {jti: expires_at})
+        # 期限切れの記録はついでに捨てる（ソート済みセットが大きくならないように）
+        pipeline.zremrangebyscore(self._key, "-inf", self._clock())
+        pipeline.publish(self._channel, json.dumps({"jti": jti, "exp": expires_at}))
+        try:
+            await pipeline.execute()
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            raise ServiceUnavailableError(f"Token denylist is unavailable: {e}") from e
+        self._filter.add(jti, expires_at)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """失効しているか（ほとんどの場合はフィルターだけで答える）"""
+        maybe_revoked = jti in self._filter
+        if self._filter_usable and not maybe_revoked:
+            self.filter_passes += 1
+            return False
+
+        try:
+            # Redisが応答しない間は問い合わせずにフィルターで答える（毎回タイムアウトを待たない）
+            self._breaker.before_call()
+        except ServiceUnavailableError:
+            return maybe_revoked
+
+        self.redis_checks += 1
+        try:
+            # フィルターだけで答えた分は計らない（Redisに聞いた分だけを記録する）
+            with span("redis", "is_revoked"):
+                expires_at = await self._redis.zscore(self._key, jti)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self._breaker.record_failure()
+            logger.warning("Token denylist check failed, using the local filter: %s", e)
+            return maybe_revoked
+        except BaseException:
+            # キャンセルなど。Redisの状態はわからないので、試しの枠だけ返す
+            self._breaker.release_trial()
+            raise
+        self._breaker.record_success()
+        revoked = expires_at is not None and expires_at > self._clock()
+        if revoked:
+            self.revoked_hits += 1
+        return revoked
+
+    def stats(self) -> Dict[str, Any]:
+        """フィルターだけで通した数・Redisで確認した数・失効していた数"""
+        return {
+            "filter_usable": self._filter_usable,
+            "filter_size": len(self._filter),
+            "filter_passes": self.filter_passes,
+            "redis_checks": self.redis_checks,
+            "revoked_hits": self.revoked_hits,
+        }
+
+    def close(self) -> None:
+        """購読を止める（アプリケーション終了時に呼ぶ）"""
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+
+    def handle_revocation(self, message: Any) -> None:
+        """失効の通知を受け取ってフィルターに追加する"""
+        try:
+            revocation = json.loads(message)
+            self._filter.add(revocation["jti"], float(revocation["exp"]))
+        except (TypeError, ValueError, KeyError):
+            logger.warning("Ignoring malformed token revocation message: %r", message)
+
+    def reload(self) -> None:
+        """Redisに記録されている（期限切れでない）jtiでフィルターを作り直す"""
+        # 先に捨ててから読む（読んだ後に捨てると、その間にrevokeで足したものが消える）
+        self._filter.clear()
+        revoked = self._subscriber.zrangebyscore(self._key, self._clock(), "+inf", withscores=True)
+        for jti, expires_at in revoked:
+            self._filter.add(jti.decode("utf-8") if isinstance(jti, bytes) else jti, expires_at)
+
+    def _listen(self) -> None:
+        """失効の通知を購読し続ける（専用スレッドで動く）
+
+        【接続が切れたら？】
+        切れている間の通知は届かないので、フィルターだけで判断するのをやめます。
+        1秒待って購読し直し、Redisから読み直してから再びフィルターを使います。
+        """
+        while not self._stopped.is_set():
+            pubsub = self._subscriber.pubsub()
+            try:
+                pubsub.subscribe(self._channel)
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        self.reload()
+                        self._filter_usable = True
+                    elif message["type"] == "message":
+                        self.handle_revocation(message["data"])
+            except redis.RedisError as e:
+                logger.warning("Token revocation subscription lost: %s", e)
+            finally:
+                self._filter_usable = False
+                try:
+                    pubsub.close()
+                except redis.RedisError:
+                    pass
+            self._stopped.wait(1.0)
@@ -9,15 +9,80 @@ UserRepositoryインターフェースをSQLAlchemyで実装します。
 3. エラーハンドリング
 """
 
+import os
 from uuid import UUID, uuid4
-from typing import Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar, Union
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from app.domain.request_timing import timed
 from app.domain.user import User
 from app.domain.user_repository import UserRepository
 from app.infrastructure.database import UserModel
 
+# まとめて検索するときの、IN (...) 1回あたりの最大件数
+# 【なぜ上限がある？】
+# IN句が長すぎると、DBのバインド変数の上限（SQLiteは32766個など）を超えたり、
+# クエリの解析に時間がかかったりするため。
+USER_LOOKUP_CHUNK_SIZE = int(os.getenv("USER_LOOKUP_CHUNK_SIZE", "500"))
+
+T = TypeVar("T")
+
+
+def chunked(values: Iterable[T], size: Optional[int] = None) -> Iterator[List[T]]:
+    """重複を除いて、size件（省略時はUSER_LOOKUP_CHUNK_SIZE件）ずつのリストに区切る"""
+    size = size or USER_LOOKUP_CHUNK_SIZE
+    chunk: List[T] = []
+    for value in dict.fromkeys(values):
+        chunk.append(value)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def to_user_row(user: User) -> Dict[str, Any]:
+    """ドメインUserをINSERT用の辞書に変換する"""
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "hashed_password": user.hashed_password,
+        "created_at": user.created_at,
+        "is_active": user.is_active,
+    }
+
+
+def insert_ignoring_duplicate_email(dialect_name: str, rows: List[Dict[str, Any]]):
+    """「同じメールアドレスがなければ入れる」INSERT文を作る
+
+    【生成されるSQL（PostgreSQL）】
+        INSERT INTO users (...) VALUES (...), (...)
+        ON CONFLICT (email) DO NOTHING
+        RETURNING users.email
+
+    RETURNINGで「実際に入った行」だけが返るので、
+    1回の問い合わせで「保存できたか／重複だったか」がわかります。
+    SQLite（テスト用）も同じ構文に対応しています。
+
+    Raises:
+        NotImplementedError: ON CONFLICTに対応していないDBの場合
+    """
+    if dialect_name == "postgresql":
+        insert = postgresql.insert
+    elif dialect_name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect_name}")
+
+    return (
+        insert(UserModel)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[UserModel.email])
+        .returning(UserModel.email)
+    )
+
 
 class SqlAlchemyUserRepository(UserRepository):
     """SQLAlchemyを使ったUserRepository実装
@@ -35,6 +100,7 @@ class SqlAlchemyUserRepository(UserRepository):
     def __init__(self, session: Session):
         self._session = session
 
+    @timed("db")
     def save(self, user: User) -> User:
         """ユーザーをデータベースに保存
 
@@ -66,6 +132,62 @@ class SqlAlchemyUserRepository(UserRepository):
             self._session.rollback()
             raise
 
+    @timed("db")
+    def create_if_absent(self, user: User) -> Union[User, None]:
+        """同じメールアドレスのユーザーがいなければ保存する
+
+        【なぜsaveより速い？】
+        saveは「add → commit → refresh（SELECT）」ですが、
+        こちらは INSERT ... ON CONFLICT DO NOTHING RETURNING の1文だけです。
+        重複チェックもDBの一意制約に任せるので、同時登録の競合も起きません。
+        """
+        statement = insert_ignoring_duplicate_email(
+            self._session.get_bind().dialect.name, [to_user_row(user)]
+        )
+        try:
+            inserted = self._session.execute(statement).first()
+            self._session.commit()
+        except SQLAlchemyError:
+            # 制約違反に限らず（長すぎる値のDataErrorなど）、失敗したトランザクションは
+            # ロールバックしないと、同じセッションでの以降の問い合わせがすべて失敗する
+            self._session.rollback()
+            raise
+
+        return user if inserted is not None else None
+
+    @timed("db")
+    def bulk_create_if_absent(self, users: List[User]) -> List[User]:
+        """複数のユーザーを1文のINSERTでまとめて保存する
+
+        【生成されるSQL】
+            INSERT INTO users (...) VALUES (...), (...), ...
+            ON CONFLICT (email) DO NOTHING RETURNING users.email
+
+        RETURNINGで返ってきたメールアドレスのものだけが「保存できた」ユーザーです。
+        """
+        if not users:
+            return []
+
+        statement = insert_ignoring_duplicate_email(
+            self._session.get_bind().dialect.name, [to_user_row(user) for user in users]
+        )
+        try:
+            inserted_emails = set(self._session.execute(statement).scalars().all())
+            self._session.commit()
+        except SQLAlchemyError:
+            # 1行の失敗でバッチ全体が失敗した場合も、呼び出し側が1件ずつやり直せるようにする
+            self._session.rollback()
+            raise
+
+        created = []
+        for user in users:
+            # 同じメールが1つのバッチに2回出てきた場合は、先に出てきたほうが保存されている
+            if user.email in inserted_emails:
+                created.append(user)
+                inserted_emails.discard(user.email)
+        return created
+
+    @timed("db")
     def find_by_id(self, id: UUID) -> Union[User, None]:
         """IDでユーザーを検索
 
@@ -81,6 +203,7 @@ class SqlAlchemyUserRepository(UserRepository):
 
         return self._to_domain_user(user_model)
 
+    @timed("db")
     def find_by_email(self, email: str) -> Union[User, None]:
         """メールアドレスでユーザーを検索
 
@@ -95,6 +218,31 @@ class SqlAlchemyUserRepository(UserRepository):
 
         return self._to_domain_user(user_model)
 
+    @timed("db")
+    def find_by_ids(self, ids: Iterable[UUID]) -> Dict[UUID, User]:
+        """複数のIDでまとめて検索
+
+        【生成されるSQL】
+            SELECT ... FROM users WHERE id IN (...)
+        USER_LOOKUP_CHUNK_SIZE件ごとに1回の問い合わせになります。
+        """
+        found = {}
+        for chunk in chunked(str(id) for id in ids):
+            for user_model in self._session.query(UserModel).filter(UserModel.id.in_(chunk)):
+                user = self._to_domain_user(user_model)
+                found[user.id] = user
+        return found
+
+    @timed("db")
+    def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        """複数のメールアドレスでまとめて検索（WHERE email IN (...)）"""
+        found = {}
+        for chunk in chunked(emails):
+            for user_model in self._session.query(UserModel).filter(UserModel.email.in_(chunk)):
+                user = self._to_domain_user(user_model)
+                found[user.email] = user
+        return found
+
     def _to_domain_user(self, user_model: UserModel) -> User:
         """SQLAlchemyモデルをドメインモデルに変換
 
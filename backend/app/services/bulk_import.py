@@ -0,0 +1,401 @@
+"""ユーザーの一括インポート
+
+【なぜこのファイルが必要？】
+テナントの移行では、数十万人分のアカウントをまとめて登録します。
+POST /api/register を1人ずつ呼ぶと、1人あたり
+- bcryptのハッシュ化（0.1秒くらい）
+- DBへの問い合わせ
+が必要になり、移行だけで何時間もかかってしまいます。
+
+【高速化のポイント】
+1. ファイルを1行ずつ読む（ストリーミング）
+   ファイル全体をメモリに載せないので、巨大なファイルでもメモリ使用量は一定です。
+2. 移行元のbcryptハッシュをそのまま使える
+   すでにハッシュ化済みなら、計算し直す必要はありません。
+   平文パスワードの場合だけ、プロセスプールで並列にハッシュ化します。
+3. batch_size件ずつ、複数行のINSERT ... ON CONFLICT DO NOTHING でまとめて保存
+   1000件なら問い合わせは1回です。
+
+【入力形式】
+CSV（1行目はヘッダー）:
+    email,password,hashed_password
+    alice@example.com,password123,
+    bob@example.com,,$2b$12$...
+
+NDJSON（1行に1つのJSON）:
+    {"email": "alice@example.com", "password": "password123"}
+    {"email": "bob@example.com", "hashed_password": "$2b$12$..."}
+
+【使い方（CLI）】
+    python -m app.services.bulk_import users.csv --format csv --batch-size 1000
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+from collections import deque
+from concurrent.futures import Future
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from pydantic import EmailStr, TypeAdapter, ValidationError
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.domain.password import hash_password
+from app.domain.user import User
+from app.domain.user_repository import UserRepository
+from app.infrastructure.password_executor import PasswordHashingExecutor
+
+# 1回のINSERTでまとめて保存する件数
+DEFAULT_BATCH_SIZE = 1000
+# レポートに残すエラーの最大件数（全件エラーでもメモリを食いつぶさないように）
+DEFAULT_MAX_ERRORS = 1000
+# 平文パスワードの最小文字数（POST /api/register と同じ）
+MIN_PASSWORD_LENGTH = 8
+# 対応している入力形式
+FORMATS = ("csv", "ndjson")
+
+# bcryptハッシュの形式（$2a$ / $2b$ / $2y$ + コスト2桁 + ソルトとハッシュ53文字）
+_BCRYPT_HASH = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+# メールアドレスの形式チェック（Userエンティティと同じEmailStr）
+_EMAIL_ADAPTER = TypeAdapter(EmailStr)
+
+
+class ImportRow(NamedTuple):
+    """入力ファイルの1行分"""
+
+    line: int
+    email: Optional[str] = None
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ImportReport:
+    """インポート結果の集計"""
+
+    def __init__(self, max_errors: int = DEFAULT_MAX_ERRORS):
+        self.total = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._max_errors = max_errors
+
+    def add_error(self, line: int, email: Optional[str], error: str) -> None:
+        """1行分のエラーを記録する（上限を超えた分は件数だけ数える）"""
+        self.failed += 1
+        if len(self.errors) < self._max_errors:
+            self.errors.append({"line": line, "email": email, "error": error})
+
+    @property
+    def errors_truncated(self) -> bool:
+        """上限を超えてエラーの詳細を捨てたか"""
+        return self.failed > len(self.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+def _blank_to_none(value: Optional[str]) -> Optional[str]:
+    """CSVの空欄をNoneにそろえる"""
+    if value is None:
+        return None
+    value = value.strip()
+    return value or None
+
+
+def iter_csv_rows(stream: IO[str]) -> Iterator[ImportRow]:
+    """CSVを1行ずつ読み込む
+
+    csv.DictReaderはファイルを少しずつ読むので、ファイル全体はメモリに載りません。
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None or "email" not in reader.fieldnames:
+        raise ValueError("CSV header must contain an 'email' column")
+    for record in reader:
+        yield ImportRow(
+            line=reader.line_num,
+            email=_blank_to_none(record.get("email")),
+            password=record.get("password") or None,
+            hashed_password=_blank_to_none(record.get("hashed_password")),
+        )
+
+
+def iter_ndjson_rows(stream: IO[str]) -> Iterator[ImportRow]:
+    """NDJSON（1行1JSON）を1行ずつ読み込む
+
+    JSONとして壊れている行は、エラー付きのImportRowとして返します。
+    1行壊れていても、残りの行のインポートは続けます。
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ImportRow(line=line_number, error=f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(record, dict):
+            yield ImportRow(line=line_number, error="Each line must be a JSON object")
+            continue
+        yield ImportRow(
+            line=line_number,
+            email=_blank_to_none(record.get("email")),
+            password=record.get("password") or None,
+            hashed_password=_blank_to_none(record.get("hashed_password")),
+        )
+
+
+def iter_rows(stream: IO[bytes], format: str) -> Iterator[ImportRow]:
+    """バイト列のストリームを、形式に合わせて1行ずつ読み込む
+
+    【なぜutf-8-sig？】
+    Excelで保存したCSVは先頭にBOMが付くことがあるため。
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported format: {format}")
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        return iter_csv_rows(text)
+    return iter_ndjson_rows(text)
+
+
+def _batched(rows: Iterable[ImportRow], size: int) -> Iterator[List[ImportRow]]:
+    """size件ずつのリストに区切る"""
+    batch: List[ImportRow] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkUserImporter:
+    """ユーザーを一括でインポートする
+
+    【処理の流れ（batch_size件ごと）】
+    1. 各行をチェック（メールアドレスの形式、パスワードの有無など）
+    2. 平文パスワードの行だけプロセスプールでハッシュ化
+    3. repository.bulk_create_if_absent で1回のINSERTにまとめて保存
+    4. on_progressで進捗を通知
+    """
+
+    def __init__(
+        self,
+        repository: UserRepository,
+        hasher: Optional[PasswordHashingExecutor] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_errors: int = DEFAULT_MAX_ERRORS,
+        on_progress: Optional[Callable[[ImportReport], None]] = None,
+    ):
+        """インポーターを初期化する
+
+        Args:
+            repository: ユーザーの保存先
+            hasher: 平文パスワードのハッシュ化に使うエグゼキューター
+                （Noneの場合は、平文パスワードが出てきたときに専用のものを作る）
+            batch_size: 1回のINSERTでまとめて保存する件数
+            max_errors: レポートに残すエラーの最大件数
+            on_progress: バッチを1つ保存するたびに呼ばれる関数
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self._repository = repository
+        self._hasher = hasher
+        self._owns_hasher = hasher is None
+        self._batch_size = batch_size
+        self._max_errors = max_errors
+        self._on_progress = on_progress
+
+    def run(self, rows: Iterable[ImportRow]) -> ImportReport:
+        """インポートを実行して結果を返す"""
+        report = ImportReport(max_errors=self._max_errors)
+        try:
+            for batch in _batched(rows, self._batch_size):
+                self._import_batch(batch, report)
+                if self._on_progress is not None:
+                    self._on_progress(report)
+        finally:
+            if self._owns_hasher and self._hasher is not None:
+                self._hasher.shutdown()
+                self._hasher = None
+        return report
+
+    def _import_batch(self, batch: List[ImportRow], report: ImportReport) -> None:
+        """1バッチ分をチェック・ハッシュ化・保存する"""
+        report.total += len(batch)
+
+        valid: List[ImportRow] = []
+        for row in batch:
+            error = self._validate(row)
+            if error is not None:
+                report.add_error(row.line, row.email, error)
+            else:
+                valid.append(row)
+
+        users: List[Tuple[ImportRow, User]] = [
+            (row, User(email=row.email, hashed_password=hashed))
+            for row, hashed in self._hash_passwords(valid, report)
+        ]
+
+        if not users:
+            return
+
+        try:
+            created = self._repository.bulk_create_if_absent([user for _, user in users])
+        except Exception:
+            # 【なぜ1件ずつやり直す？】
+            # バッチの中の1行が原因で全体が失敗した場合に、
+            # どの行が悪いのかをレポートに残すため。
+            self._save_one_by_one(users, report)
+            return
+
+        created_ids = {user.id for user in created}
+        for row, user in users:
+            if user.id in created_ids:
+                report.inserted += 1
+            else:
+                report.duplicates += 1
+
+    def _save_one_by_one(self, users: List[Tuple[ImportRow, User]], report: ImportReport) -> None:
+        """バッチ保存に失敗したときに、1件ずつ保存して原因の行を特定する"""
+        for row, user in users:
+            try:
+                if self._repository.create_if_absent(user) is None:
+                    report.duplicates += 1
+                else:
+                    report.inserted += 1
+            except Exception as e:
+                report.add_error(row.line, row.email, f"Failed to save: {e}")
+
+    def _validate(self, row: ImportRow) -> Optional[str]:
+        """1行をチェックして、問題があればエラーメッセージを返す"""
+        if row.error is not None:
+            return row.error
+        if row.email is None:
+            return "email is required"
+        # 【なぜハッシュ化の前にチェックする？】
+        # 不正な行のためにbcryptを計算するのは無駄なため
+        try:
+            _EMAIL_ADAPTER.validate_python(row.email)
+        except ValidationError:
+            return "Invalid email address"
+        if row.hashed_password is not None:
+            if not _BCRYPT_HASH.match(row.hashed_password):
+                return "hashed_password is not a bcrypt hash"
+            return None
+        if row.password is None:
+            return "password or hashed_password is required"
+        if len(row.password) < MIN_PASSWORD_LENGTH:
+            return f"Password must be at least {MIN_PASSWORD_LENGTH} characters long"
+        return None
+
+    def _hash_passwords(
+        self, rows: List[ImportRow], report: ImportReport
+    ) -> Iterator[Tuple[ImportRow, str]]:
+        """各行のハッシュ済みパスワードを返す（平文はプロセスプールでハッシュ化）
+
+        【同時に投入する数】
+        エグゼキューターの待ち行列の上限（max_queue_depth）までにとどめ、
+        あふれそうになったら一番古い結果を待ってから次を投入します。
+        これでServiceUnavailableErrorにならずに、ワーカーを休ませず使い続けられます。
+        """
+        pending: Deque[Tuple[ImportRow, Future]] = deque()
+        for row in rows:
+            if row.hashed_password is not None:
+                yield row, row.hashed_password
+                continue
+            hasher = self._get_hasher()
+            while len(pending) >= hasher.max_queue_depth:
+                yield from self._collect(pending.popleft(), report)
+            try:
+                pending.append((row, hasher.submit(hash_password, row.password)))
+            except ServiceUnavailableError:
+                # 同じエグゼキューターを他の処理と共有していて満杯の場合は、
+                # 手元の結果を待ってから1回だけ再投入する
+                while pending:
+                    yield from self._collect(pending.popleft(), report)
+                pending.append((row, hasher.submit(hash_password, row.password)))
+        while pending:
+            yield from self._collect(pending.popleft(), report)
+
+    def _collect(
+        self, item: Tuple[ImportRow, Future], report: ImportReport
+    ) -> Iterator[Tuple[ImportRow, str]]:
+        """ハッシュ化の結果を待つ（失敗したらエラーとして記録）"""
+        row, future = item
+        try:
+            yield row, future.result()
+        except Exception as e:
+            report.add_error(row.line, row.email, f"Failed to hash password: {e}")
+
+    def _get_hasher(self) -> PasswordHashingExecutor:
+        """ハッシュ化に使うエグゼキューターを取得する（なければ専用のものを作る）
+
+        【なぜ専用のものを作る？】
+        APIと共有のエグゼキューターを使うと、インポート中に
+        ログインや会員登録が503で弾かれてしまうためです。
+        """
+        if self._hasher is None:
+            self._hasher = PasswordHashingExecutor()
+        return self._hasher
+
+
+def _print_progress(report: ImportReport) -> None:
+    """進捗を標準エラー出力に表示する"""
+    print(
+        f"processed={report.total} inserted={report.inserted} "
+        f"duplicates={report.duplicates} failed={report.failed}",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLIのエントリーポイント"""
+    parser = argparse.ArgumentParser(description="Import users from a CSV or NDJSON file")
+    parser.add_argument("file", help="input file ('-' for stdin)")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="password hashing processes")
+    args = parser.parse_args(argv)
+
+    # DB接続はCLIとして実行したときだけ作る
+    from app.infrastructure.database import SessionLocal
+    from app.infrastructure.user_repository import SqlAlchemyUserRepository
+
+    hasher = PasswordHashingExecutor(max_workers=args.workers)
+    session = SessionLocal()
+    stream = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+    try:
+        importer = BulkUserImporter(
+            SqlAlchemyUserRepository(session),
+            hasher=hasher,
+            batch_size=args.batch_size,
+            on_progress=_print_progress,
+        )
+        report = importer.run(iter_rows(stream, args.format))
+    finally:
+        hasher.shutdown()
+        session.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    json.dump(report.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0 if report.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""セッションの再配置（Redisを増やした・減らしたとき）
+
+【なぜこのファイルが必要？】
+ShardedRedisSessionStoreは、セッションIDのハッシュで置き場所のRedisを決めます。
+Redisを増やすと、約1/(N+1)のセッションは置き場所が新しいRedisに変わります。
+そのままでは、移動したセッションが見つからず、そのユーザーはログアウト扱いになります。
+
+【何をする？】
+各Redisのキーを少しずつ（SCAN）見て、新しい構成での置き場所が
+今いるRedisと違うものだけを移動します。
+- 移動元: DUMP（値をそのままのバイト列で取り出す）＋ PTTL（残りの有効期限）
+- 移動先: RESTORE（有効期限ごと復元する）
+- 移動元: DEL
+どれもbatch_size件ずつパイプラインでまとめるので、往復はbatch_size件につき数回です。
+
+【手順】
+1. SESSION_REDIS_URLSに新しいRedisを加えて、アプリをデプロイする
+2. このツールを実行する（新しい構成のURLと、外すRedisがあれば--drainで指定）
+
+    python -m app.services.session_rebalance \\
+        --urls redis://redis-1:6379,redis://redis-2:6379,redis://redis-3:6379
+
+【対象にするキー】
+同じRedisにはリフレッシュトークンや失効リストなど、セッション以外のキーも置かれます。
+それらを動かしたり消したりしないように、SESSION_KEY_PREFIXで始まるキーだけを移動します。
+SESSION_KEY_PREFIXが空（既定）の環境では、キーを見分けられないので--matchの指定が必須です。
+
+手順1と2の間に新しい置き場所へ書き込まれたセッションは、
+移動元の古い値で上書きしません（RESTOREにREPLACEを付けない）。
+何度実行しても同じ結果になるので、途中で止まったらもう一度実行すれば続きから移動します。
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.infrastructure.hash_ring import HashRing
+from app.infrastructure.session_store import SESSION_KEY_PREFIX
+from app.infrastructure.sharded_session_store import (
+    SESSION_HASH_RING_VNODES,
+    SESSION_REDIS_URLS,
+    session_redis_clients,
+)
+
+# 1回のSCANとパイプラインで扱うキーの数
+DEFAULT_BATCH_SIZE = 500
+
+
+class RebalanceReport:
+    """再配置の結果の集計"""
+
+    def __init__(self):
+        self.scanned = 0
+        self.moved = 0
+        # 移動先にすでに新しい値があったので、移動元を消すだけにした件数
+        self.skipped = 0
+        # 移動中に有効期限が切れていた件数
+        self.expired = 0
+        # {移動元: {移動先: 件数}}
+        self.moves: Dict[str, Dict[str, int]] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scanned": self.scanned,
+            "moved": self.moved,
+            "skipped": self.skipped,
+            "expired": self.expired,
+            "moves": self.moves,
+        }
+
+
+def rebalance_sessions(
+    clients: Dict[str, redis.Redis],
+    ring: HashRing,
+    match: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    key_prefix: str = SESSION_KEY_PREFIX,
+) -> RebalanceReport:
+    """置き場所が変わったセッションを新しい置き場所に移動する
+
+    Args:
+        clients: {ノード名: Redisクライアント}。ringのノードと、外すノードのすべて
+            DUMPの値はバイナリなので decode_responses=False のクライアントを渡す
+        ring: 新しい構成のハッシュリング
+        match: 対象にするキーのパターン（省略時はkey_prefixで始まるキー）
+        batch_size: 1回のSCANとパイプラインで扱うキーの数
+        dry_run: Trueなら移動せず、移動する件数だけを数える
+        key_prefix: セッションのRedisキーの接頭辞（置き場所は外した後のセッションIDで決める）
+
+    Returns:
+        再配置の結果
+
+    Raises:
+        ValueError: ringのノードのクライアントがない場合、
+            またはkey_prefixが空なのにmatchが指定されていない場合（全キーが対象になるため）
+    """
+    missing = set(ring.nodes) - set(clients)
+    if missing:
+        raise ValueError(f"No Redis client for nodes: {sorted(missing)}")
+    if match is None:
+        if not key_prefix:
+            raise ValueError("match is required when the session key prefix is empty")
+        match = _escape_glob(key_prefix) + "*"
+    prefix = key_prefix.encode()
+
+    report = RebalanceReport()
+    for source, client in clients.items():
+        for keys in _scan_batches(client, match, batch_size):
+            report.scanned += len(keys)
+            targets: Dict[str, List[bytes]] = {}
+            for key in keys:
+                target = ring.get_node(key[len(prefix):] if key.startswith(prefix) else key)
+                if target != source:
+                    targets.setdefault(target, []).append(key)
+            for target, moving in targets.items():
+                if dry_run:
+                    _count_move(report, source, target, len(moving))
+                    continue
+                _move(client, clients[target], moving, report, source, target)
+    return report
+
+
+def _escape_glob(text: str) -> str:
+    """SCANのMATCHで特別な意味を持つ文字を、その文字そのものとして扱うようにする"""
+    return "".join("\\" + char if char in "*?[]\\" else char for char in text)
+
+
+def _scan_batches(client: redis.Redis, match: str, batch_size: int):
+    """SCANでキーをbatch_size件くらいずつ返す
+
+    【なぜKEYSではなくSCAN？】
+    KEYSは全キーを1回で返すまでRedisを止めてしまいます。
+    SCANなら少しずつ返すので、移動中もアプリからの読み書きを止めません。
+    """
+    batch: List[bytes] = []
+    for key in client.scan_iter(match=match, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _move(
+    source_client: redis.Redis,
+    target_client: redis.Redis,
+    keys: List[bytes],
+    report: RebalanceReport,
+    source: str,
+    target: str,
+) -> None:
+    """キーを移動元から移動先へ移す（往復は3回: DUMP+PTTL / RESTORE / DEL）"""
+    pipeline = source_client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.dump(key)
+        pipeline.pttl(key)
+    values = pipeline.execute()
+
+    restoring = []
+    pipeline = target_client.pipeline(transaction=False)
+    for key, payload, pttl in zip(keys, values[0::2], values[1::2]):
+        if payload is None or pttl == -2:
+            # SCANの後に有効期限が切れた（または削除された）
+            report.expired += 1
+            continue
+        # PTTLが-1なら有効期限なし（RESTOREでは0を指定する）
+        pipeline.restore(key, max(pttl, 0), payload)
+        restoring.append(key)
+    results = pipeline.execute(raise_on_error=False) if restoring else []
+
+    moved = 0
+    for result in results:
+        if isinstance(result, redis.ResponseError):
+            if "BUSYKEY" not in str(result):
+                raise result
+            # 移動先にすでに新しい構成で書かれた値がある（そちらが新しいので残す）
+            report.skipped += 1
+        else:
+            moved += 1
+    report.moved += moved
+    _count_move(report, source, target, moved)
+
+    if restoring:
+        source_client.delete(*restoring)
+
+
+def _count_move(report: RebalanceReport, source: str, target: str, count: int) -> None:
+    if count:
+        moves = report.moves.setdefault(source, {})
+        moves[target] = moves.get(target, 0) + count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLIのエントリーポイント"""
+    parser = argparse.ArgumentParser(description="Move sessions to their owner after changing SESSION_REDIS_URLS")
+    parser.add_argument(
+        "--urls",
+        default=",".join(SESSION_REDIS_URLS),
+        help="comma-separated Redis URLs of the new layout (default: SESSION_REDIS_URLS)",
+    )
+    parser.add_argument("--drain", default="", help="comma-separated Redis URLs being removed")
+    parser.add_argument(
+        "--match",
+        default=None,
+        help="only move keys matching this pattern (default: keys starting with --key-prefix)",
+    )
+    parser.add_argument(
+        "--key-prefix",
+        default=SESSION_KEY_PREFIX,
+        help="Redis key prefix of sessions (default: SESSION_KEY_PREFIX)",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--vnodes", type=int, default=SESSION_HASH_RING_VNODES)
+    parser.add_argument("--dry-run", action="store_true", help="only count the keys that would move")
+    args = parser.parse_args(argv)
+
+    urls = [url.strip() for url in args.urls.split(",") if url.strip()]
+    drain = [url.strip() for url in args.drain.split(",") if url.strip()]
+    if not urls:
+        parser.error("--urls (or SESSION_REDIS_URLS) is required")
+    if args.match is None and not args.key_prefix:
+        # 接頭辞がないと、リフレッシュトークンなどセッション以外のキーまで移動・削除してしまう
+        parser.error("--match is required when --key-prefix (SESSION_KEY_PREFIX) is empty")
+
+    clients = session_redis_clients(urls)
+    ring = HashRing(clients.keys(), vnodes=args.vnodes)
+    clients.update(session_redis_clients(drain))
+    report = rebalance_sessions(
+        clients,
+        ring,
+        match=args.match,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        key_prefix=args.key_prefix,
+    )
+
+    json.dump(report.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""セッションシリアライザーのベンチマーク
+
+【何を測る？】
+形式（JSON / msgpack）と圧縮（なし / zlib / lz4）の組み合わせごとに、
+- 1セッションあたりのバイト数（Redisのメモリ使用量の目安）
+- dumps / loads 1回あたりの時間（ナノ秒）
+
+【使い方】
+    cd backend
+    python -m benchmarks.session_serializer
+"""
+
+import json
+import timeit
+
+from app.infrastructure.session_serializer import SessionSerializer, lz4_frame
+
+# 典型的なセッション（ログイン直後の小さいもの）と、権限情報などを持つ大きいもの
+SESSIONS = {
+    "small": {
+        "user_id": "6f1c1d9e-2a5b-4f3c-9f0e-8e7d6c5b4a39",
+        "email": "someone@example.com",
+        "created_at": 1760000000,
+        "ip": "203.0.113.10",
+    },
+    "large": {
+        "user_id": "6f1c1d9e-2a5b-4f3c-9f0e-8e7d6c5b4a39",
+        "email": "someone@example.com",
+        "created_at": 1760000000,
+        "roles": ["admin", "billing", "support"],
+        "permissions": [f"resource:{i}:read" for i in range(60)],
+        "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) AppleWebKit/605.1.15",
+    },
+}
+
+NUMBER = 20000
+
+
+def _candidates():
+    yield "legacy json", SessionSerializer(format="legacy")
+    for format in ("json", "msgpack"):
+        for compression in ("none", "zlib", "lz4"):
+            if compression == "lz4" and lz4_frame is None:
+                continue
+            yield f"{format}+{compression}", SessionSerializer(
+                format=format, compression=compression, compress_threshold=256
+            )
+
+
+def main() -> None:
+    print(f"{'session':<8} {'serializer':<16} {'bytes':>7} {'dumps ns':>10} {'loads ns':>10}")
+    for session_name, session in SESSIONS.items():
+        for name, serializer in _candidates():
+            payload = serializer.dumps(session)
+            dumps_ns = timeit.timeit(lambda: serializer.dumps(session), number=NUMBER) / NUMBER * 1e9
+            loads_ns = timeit.timeit(lambda: serializer.loads(payload), number=NUMBER) / NUMBER * 1e9
+            print(f"{session_name:<8} {name:<16} {len(payload):>7} {dumps_ns:>10.0f} {loads_ns:>10.0f}")
+    if lz4_frame is None:
+        print("(lz4 is not installed; pip install lz4 to include it)")
+
+
+if __name__ == "__main__":
+    main()
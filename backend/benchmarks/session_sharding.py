@@ -0,0 +1,164 @@
+"""ShardedRedisSessionStoreの負荷テスト
+
+【何を測る？】
+ローカルにredis-serverを何台か起動して（本番のRedisの代わり）、
+1. セッションの偏り: 各Redisに置かれたセッションの数
+2. スループット: 1台のRedisSessionStoreと、N台のShardedRedisSessionStoreで
+   複数スレッドから get_and_touch / save を繰り返したときの1秒あたりの処理数
+3. まとめ取得: get_many（100件）1回あたりの時間
+4. 再配置: Redisを1台増やしたときに移動したセッションの割合と時間
+
+【使い方】
+redis-server がPATHにあること。
+
+    cd backend
+    python -m benchmarks.session_sharding --nodes 3 --threads 16 --duration 5
+"""
+
+import argparse
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import redis
+
+from app.domain.session_store import SessionStore
+from app.infrastructure.session_store import RedisSessionStore
+from app.infrastructure.sharded_session_store import ShardedRedisSessionStore
+from app.services.session_rebalance import rebalance_sessions
+
+SESSION = {"user_id": "6f1c1d9e-2a5b-4f3c-9f0e-8e7d6c5b4a39", "email": "someone@example.com"}
+TTL = 3600
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def redis_servers(count: int) -> Iterator[Dict[str, redis.Redis]]:
+    """redis-serverをcount台起動して {ノード名: クライアント} を返す（終わったら止める）"""
+    processes: List[subprocess.Popen] = []
+    clients: Dict[str, redis.Redis] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            for _ in range(count):
+                port = _free_port()
+                processes.append(subprocess.Popen(
+                    ["redis-server", "--port", str(port), "--save", "", "--appendonly", "no", "--dir", workdir],
+                    stdout=subprocess.DEVNULL,
+                ))
+                clients[f"redis://127.0.0.1:{port}"] = redis.Redis(port=port, max_connections=256)
+            for client in clients.values():
+                _wait_until_ready(client)
+            yield clients
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+
+def _wait_until_ready(client: redis.Redis, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client.ping()
+            return
+        except redis.ConnectionError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def run_load(store: SessionStore, session_ids: List[str], threads: int, duration: float) -> float:
+    """threads本のスレッドで duration秒間 get_and_touch と save（9:1）を繰り返し、1秒あたりの処理数を返す"""
+    counts = [0] * threads
+    deadline = time.monotonic() + duration
+
+    def worker(index: int) -> None:
+        count = 0
+        n = len(session_ids)
+        i = index
+        while time.monotonic() < deadline:
+            session_id = session_ids[i % n]
+            if count % 10 == 0:
+                store.save(session_id, SESSION, ttl=TTL)
+            else:
+                store.get_and_touch(session_id, TTL)
+            count += 1
+            i += threads
+        counts[index] = count
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / duration
+
+
+def time_get_many(store: SessionStore, session_ids: List[str], batch: int = 100, rounds: int = 200) -> float:
+    """get_many（batch件）1回あたりの時間（マイクロ秒）"""
+    started = time.perf_counter()
+    for i in range(rounds):
+        start = (i * batch) % (len(session_ids) - batch)
+        store.get_many(session_ids[start:start + batch])
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test for ShardedRedisSessionStore")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--sessions", type=int, default=100000)
+    args = parser.parse_args()
+
+    if shutil.which("redis-server") is None:
+        raise SystemExit("redis-server is not on PATH")
+
+    session_ids = [f"session-{i:08d}" for i in range(args.sessions)]
+    with redis_servers(args.nodes + 1) as all_clients:
+        nodes = list(all_clients)
+        clients = {node: all_clients[node] for node in nodes[:args.nodes]}
+
+        single = RedisSessionStore(redis_client=clients[nodes[0]])
+        single.save_many({session_id: SESSION for session_id in session_ids}, ttl=TTL)
+        single_ops = run_load(single, session_ids, args.threads, args.duration)
+        single_get_many = time_get_many(single, session_ids)
+        clients[nodes[0]].flushall()
+
+        sharded = ShardedRedisSessionStore(clients=clients)
+        sharded.save_many({session_id: SESSION for session_id in session_ids}, ttl=TTL)
+        counts = [client.dbsize() for client in clients.values()]
+        sharded_ops = run_load(sharded, session_ids, args.threads, args.duration)
+        sharded_get_many = time_get_many(sharded, session_ids)
+        sharded.close()
+
+        mean = sum(counts) / len(counts)
+        print(f"sessions per node: {counts} (max {max(counts) / mean - 1:+.1%} from mean)")
+        print(f"{'store':<22} {'ops/sec':>10} {'get_many(100) us':>18}")
+        print(f"{'single node':<22} {single_ops:>10.0f} {single_get_many:>18.0f}")
+        print(f"{f'sharded x{args.nodes}':<22} {sharded_ops:>10.0f} {sharded_get_many:>18.0f}")
+
+        grown = ShardedRedisSessionStore(clients=all_clients)
+        started = time.perf_counter()
+        report = rebalance_sessions(all_clients, grown.ring)
+        elapsed = time.perf_counter() - started
+        grown.close()
+        print(
+            f"rebalance to {args.nodes + 1} nodes: moved {report.moved}/{args.sessions} "
+            f"({report.moved / args.sessions:.1%}, ideal {1 / (args.nodes + 1):.1%}) in {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,116 @@
-from fastapi import FastAPI, HTTPException, Depends, Header, Query
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
-import httpx
-from app.domain.registration_service import RegistrationService
-from app.domain.login_service import LoginService
-from app.domain.jwt import verify_token, create_access_token, create_refresh_token
-from app.domain.oauth_service import GoogleOAuthService
+import anyio
+from sqlalchemy.orm import Session
+from app.domain.registration_service import AsyncRegistrationService
+from app.domain.login_service import AsyncLoginService
+from app.domain.jwt import DEFAULT_EXPIRE_MINUTES, verify_token, create_access_token, get_key_set
+from app.domain.oauth_service import AsyncGoogleOAuthService
+from app.domain.token_cache import verified_token_cache
 from app.domain import oauth_config
-from app.domain.exceptions import BusinessError
+from app.domain.logger import bind_user_id, configure_logging, stop_logging
+from app.domain.request_timing import REQUEST_TIMING_ENABLED
+from app.domain.google_id_token import GoogleIdTokenVerifier
+from app.domain.google_oauth_client import GoogleOAuthClient
+from app.domain.exceptions import AuthenticationError, BusinessError, ServiceUnavailableError
+from app.domain.refresh_token_service import RefreshTokenService
+from app.domain.refresh_token_store import RefreshTokenStore
+from app.domain.token_denylist import TokenDenylist
+from app.domain.user_repository import AsyncUserRepository
+from app.api.metrics import MetricsMiddleware
+from app.api.request_context import RequestContextMiddleware
+from app.api.request_timing import RequestTimingMiddleware
+from app.api.dependencies import (
+    close_google_oauth_client,
+    close_health_checker,
+    close_import_password_executor,
+    close_stats_sampler,
+    close_token_denylist,
+    get_db,
+    get_google_id_token_verifier,
+    get_google_oauth_client,
+    get_health_checker,
+    get_import_password_executor,
+    get_refresh_token_store,
+    get_stats_sampler,
+    get_token_denylist,
+    get_user_repository,
+    user_import_lock,
+)
+from app.infrastructure.database import async_engine, engine
+from app.infrastructure.health import HealthChecker
+from app.infrastructure.metrics import (
+    METRICS_ENABLED,
+    render_metrics,
+    start_dependency_metrics,
+    stop_dependency_metrics,
+)
+from app.infrastructure.password_executor import password_hashing_executor
+from app.infrastructure.redis_client import close_async_connection_pool
 from app.infrastructure.user_repository import SqlAlchemyUserRepository
-from app.infrastructure.database import SessionLocal
+from app.services.bulk_import import DEFAULT_BATCH_SIZE, FORMATS, BulkUserImporter, iter_rows
+
+
+# JWKSをキャッシュしてよい秒数（検証側・プロキシ向けのCache-Control）
+JWKS_MAX_AGE_SECONDS = int(os.getenv("JWKS_MAX_AGE_SECONDS", "300"))
+# 管理者用APIのトークン（未設定なら管理者用APIは使えない）
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+# 一括インポートで受け取ったファイルを、この大きさまではメモリに置く（超えたら一時ファイル）
+IMPORT_SPOOL_MAX_BYTES = int(os.getenv("IMPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+# POST /api/users/batch で一度に問い合わせできる件数の上限
+USER_BATCH_MAX_KEYS = int(os.getenv("USER_BATCH_MAX_KEYS", "1000"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """アプリケーションの起動・終了処理"""
+    # 起動時: ログをキューと専用スレッドで書き出すようにする
+    configure_logging()
+    # 起動時: 依存先の処理時間と、各クラスの統計をメトリクスに集め始める
+    if METRICS_ENABLED:
+        start_dependency_metrics()
+        get_stats_sampler().start()
+    # 起動時: 依存先（DB・Redis・bcrypt）の確認を裏で始める（/readyzはその結果を返す）
+    get_health_checker().start()
+    yield
+    # 終了時: 依存先の確認を止める
+    await close_health_checker()
+    # 終了時: メトリクスの収集を止める（ほかを閉じる前に）
+    if METRICS_ENABLED:
+        close_stats_sampler()
+        stop_dependency_metrics()
+    # 終了時: bcrypt用のプロセスプールを停止
+    password_hashing_executor.shutdown()
+    close_import_password_executor()
+    # 終了時: DBのコネクションプールを閉じる
+    await async_engine.dispose()
+    engine.dispose()
+    # 終了時: アクセストークンの失効リストの購読を止める
+    close_token_denylist()
+    # 終了時: Google APIへの接続（keep-alive）を閉じる
+    await close_google_oauth_client()
+    # 終了時: Redis（非同期版）のコネクションプールを閉じる
+    await close_async_connection_pool()
+    # 終了時: キューに残ったログを書き出してから、ログの専用スレッドを止める
+    stop_logging()
+
 
 app = FastAPI(
     title="Auth TDD Learning",
     description="JWT認証をTDDで学ぶプロジェクト",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -28,6 +122,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ルートごとのリクエスト数・エラー数・処理時間をPrometheusのメトリクスに記録する
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# フェーズ（DB・Redis・bcrypt・JWT・Google）ごとの処理時間をServer-Timingヘッダーとログに出す
+# （RequestContextMiddlewareより内側に置き、ログにリクエストIDが付くようにする）
+if REQUEST_TIMING_ENABLED:
+    app.add_middleware(RequestTimingMiddleware)
+
+# リクエストIDをすべてのログに付け、処理時間付きのアクセスログを出す
+app.add_middleware(RequestContextMiddleware)
+
 
 class UserRegistrationRequest(BaseModel):
     email: EmailStr
@@ -64,77 +170,174 @@ class RefreshTokenRequest(BaseModel):
 
 class RefreshTokenResponse(BaseModel):
     access_token: str
+    refresh_token: str
+
+
+class TokenRevokeRequest(BaseModel):
+    jti: str
+    expires_at: Optional[int] = None
+
+
+class UserBatchRequest(BaseModel):
+    ids: Optional[List[UUID]] = None
+    emails: Optional[List[str]] = None
+
+
+class UserBatchItem(BaseModel):
+    key: str
+    found: bool
+    user: Optional[CurrentUserResponse] = None
+
+
+class UserBatchResponse(BaseModel):
+    results: List[UserBatchItem]
 
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "Auth API is running"}
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/livez")
+async def liveness_check():
+    """プロセスが応答できるか（依存先は確認しない。app/infrastructure/health.pyを参照）"""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness_check(checker: HealthChecker = Depends(get_health_checker)):
+    """依存先（DB・Redis・bcrypt）が使えるか（使えなければ503）
+
+    【なぜ毎回確認しない？】
+    プローブのたびにDBやRedisに問い合わせると、それ自体が負荷になるため、
+    裏で定期的に確認した結果（HEALTH_CHECK_INTERVAL_SECONDSごと）を返します。
+    """
+    results = await checker.results()
+    ready = all(result.healthy for result in results.values())
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "checks": {name: result.to_dict() for name, result in results.items()},
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheusのメトリクス（app/infrastructure/metrics.pyを参照）
+
+    このワーカーの統計をその場で写してから返します。
+    複数ワーカー時はファイルを読んで合計するので、スレッドで行います。
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    def collect():
+        get_stats_sampler().sample()
+        return render_metrics()
+
+    body, content_type = await anyio.to_thread.run_sync(collect)
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks(request: Request):
+    """JWTの検証用公開鍵をJWKS形式で公開する
+
+    【なぜ公開する？】
+    他のサービスやエッジプロキシがこの公開鍵を取得しておけば、
+    認証APIに問い合わせずに手元でトークンを検証できます。
+
+    【キャッシュ】
+    Cache-ControlとETagを付けるので、検証側は鍵が変わるまで再取得しません。
+    """
+    body = json.dumps(get_key_set().jwks(), separators=(",", ":"), sort_keys=True)
+    etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+    headers = {
+        "Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}",
+        "ETag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.post("/api/register", status_code=201, response_model=UserRegistrationResponse)
-def register_user(request: UserRegistrationRequest):
+async def register_user(
+    request: UserRegistrationRequest,
+    repository: AsyncUserRepository = Depends(get_user_repository)
+):
     # パスワードの長さをチェック
     if len(request.password) < 8:
         raise HTTPException(status_code=400, detail={"error": "Password must be at least 8 characters long"})
 
     try:
-        # データベースセッション作成
-        db = SessionLocal()
-        try:
-            repository = SqlAlchemyUserRepository(db)
-            service = RegistrationService(repository)
-
-            # ユーザー登録
-            user = service.register(request.email, request.password)
-
-            return UserRegistrationResponse(
-                id=str(user.id),
-                email=user.email
-            )
-        finally:
-            db.close()
+        service = AsyncRegistrationService(
+            repository,
+            hasher=password_hashing_executor.hash_password_async
+        )
+
+        # ユーザー登録
+        user = await service.register(request.email, request.password)
+
+        return UserRegistrationResponse(
+            id=str(user.id),
+            email=user.email
+        )
 
     except BusinessError as e:
         # 重複メールアドレスエラー
         raise HTTPException(status_code=409, detail={"error": str(e)})
+    except ServiceUnavailableError as e:
+        # bcryptの待ち行列が満杯（過負荷）
+        raise HTTPException(status_code=503, detail={"error": str(e)})
     except Exception as e:
         # その他のエラー
         raise HTTPException(status_code=400, detail={"error": str(e)})
 
 
 @app.post("/api/login", status_code=200, response_model=UserLoginResponse)
-def login_user(request: UserLoginRequest):
+async def login_user(
+    request: UserLoginRequest,
+    repository: AsyncUserRepository = Depends(get_user_repository)
+):
     try:
-        # データベースセッション作成
-        db = SessionLocal()
-        try:
-            repository = SqlAlchemyUserRepository(db)
-            service = LoginService(repository)
+        service = AsyncLoginService(
+            repository,
+            verifier=password_hashing_executor.verify_password_async
+        )
 
-            # ログイン処理
-            token = service.login(request.email, request.password)
+        # ログイン処理
+        token = await service.login(request.email, request.password)
 
-            return UserLoginResponse(
-                access_token=token
-            )
-        finally:
-            db.close()
+        return UserLoginResponse(
+            access_token=token
+        )
 
     except ValueError as e:
         # 認証エラー（メールアドレスまたはパスワードが間違っている）
         raise HTTPException(status_code=401, detail={"error": "Invalid email or password"})
+    except ServiceUnavailableError as e:
+        # bcryptの待ち行列が満杯（過負荷）
+        raise HTTPException(status_code=503, detail={"error": str(e)})
     except Exception as e:
         # その他のエラー
         raise HTTPException(status_code=400, detail={"error": str(e)})
 
 
-def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
-    """Authorizationヘッダーからトークンを取得して検証し、ユーザーIDを返す"""
+async def get_current_user_id(
+    authorization: Optional[str] = Header(None),
+    denylist: Optional[TokenDenylist] = Depends(get_token_denylist)
+) -> str:
+    """Authorizationヘッダーからトークンを取得して検証し、ユーザーIDを返す
+
+    失効させたトークン（jtiが失効リストにあるもの）は401にする。
+    ほとんどのトークンはプロセス内のフィルターだけで確認できる（token_denylist.py）。
+    """
     if not authorization:
         raise HTTPException(status_code=401, detail={"error": "Authorization header is missing"})
     
@@ -146,36 +349,38 @@ def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
     token = parts[1]
     
     try:
-        # トークンを検証
-        payload = verify_token(token)
+        # トークンを検証（同じトークンの2回目以降はキャッシュから）
+        payload = verify_token(token, cache=verified_token_cache)
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail={"error": "Invalid token payload"})
-        return user_id
+        jti = payload.get("jti")
     except Exception:
         raise HTTPException(status_code=401, detail={"error": "Invalid or expired token"})
 
+    if denylist is not None and jti and await denylist.is_revoked(jti):
+        raise HTTPException(status_code=401, detail={"error": "Token has been revoked"})
+    # このリクエストのログにユーザーIDを付ける
+    bind_user_id(user_id)
+    return user_id
+
 
 @app.get("/api/users/me", response_model=CurrentUserResponse)
-def get_current_user(user_id: str = Depends(get_current_user_id)):
+async def get_current_user(
+    user_id: str = Depends(get_current_user_id),
+    repository: AsyncUserRepository = Depends(get_user_repository)
+):
     """現在ログインしているユーザーの情報を取得"""
     try:
-        # データベースセッション作成
-        db = SessionLocal()
-        try:
-            repository = SqlAlchemyUserRepository(db)
-            
-            # ユーザーIDでユーザーを検索
-            user = repository.find_by_id(UUID(user_id))
-            if not user:
-                raise HTTPException(status_code=404, detail={"error": "User not found"})
-            
-            return CurrentUserResponse(
-                id=str(user.id),
-                email=user.email
-            )
-        finally:
-            db.close()
+        # ユーザーIDでユーザーを検索
+        user = await repository.find_by_id(UUID(user_id))
+        if not user:
+            raise HTTPException(status_code=404, detail={"error": "User not found"})
+        
+        return CurrentUserResponse(
+            id=str(user.id),
+            email=user.email
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -183,110 +388,234 @@ def get_current_user(user_id: str = Depends(get_current_user_id)):
 
 
 @app.get("/auth/google/callback", response_model=OAuthCallbackResponse)
-def google_oauth_callback(code: Optional[str] = Query(None)):
+async def google_oauth_callback(
+    code: Optional[str] = Query(None),
+    repository: AsyncUserRepository = Depends(get_user_repository),
+    refresh_token_store: RefreshTokenStore = Depends(get_refresh_token_store),
+    google_client: GoogleOAuthClient = Depends(get_google_oauth_client),
+    id_token_verifier: Optional[GoogleIdTokenVerifier] = Depends(get_google_id_token_verifier)
+):
     """Google OAuth認証コールバックエンドポイント
     
     認証コードを受け取り、Google APIでトークン交換とユーザー情報取得を行い、
     JWTトークンを返す。
+    ユーザー情報はid_tokenを確認して取り出し、確認できないときだけAPIを呼ぶ。
     """
     # 認証コードのチェック
     if not code:
         raise HTTPException(status_code=400, detail={"error": "Authorization code is required"})
     
     try:
-        # データベースセッション作成
-        db = SessionLocal()
-        try:
-            repository = SqlAlchemyUserRepository(db)
-            oauth_service = GoogleOAuthService(repository)
-            
-            # Google OAuth設定の確認
-            if not oauth_config.is_google_oauth_configured():
-                raise HTTPException(status_code=500, detail={"error": "Google OAuth is not configured"})
-            
-            # ステップ1: 認証コードをアクセストークンに交換
-            token_response = httpx.post(
-                oauth_config.GOOGLE_TOKEN_URL,
-                data={
-                    "code": code,
-                    "client_id": oauth_config.GOOGLE_CLIENT_ID,
-                    "client_secret": oauth_config.GOOGLE_CLIENT_SECRET,
-                    "redirect_uri": oauth_config.GOOGLE_REDIRECT_URI,
-                    "grant_type": "authorization_code"
-                }
-            )
-            
-            if token_response.status_code != 200:
-                error_data = token_response.json() if token_response.headers.get("content-type", "").startswith("application/json") else {}
-                raise HTTPException(status_code=401, detail={"error": error_data.get("error", "Failed to exchange authorization code")})
-            
-            token_data = token_response.json()
-            google_access_token = token_data.get("access_token")
-            
-            if not google_access_token:
-                raise HTTPException(status_code=401, detail={"error": "Failed to get access token from Google"})
-            
-            # ステップ2: Google APIでユーザー情報を取得
-            userinfo_response = httpx.get(
-                oauth_config.GOOGLE_USERINFO_URL,
-                headers={"Authorization": f"Bearer {google_access_token}"}
-            )
-            
-            if userinfo_response.status_code != 200:
-                raise HTTPException(status_code=500, detail={"error": "Failed to get user info from Google"})
-            
-            google_user_info = userinfo_response.json()
-            
-            # ステップ3: GoogleOAuthServiceでユーザーを作成または取得
-            user = oauth_service.authenticate(google_user_info)
-            
-            # ステップ4: JWTトークンを生成
-            access_token = create_access_token({"sub": str(user.id)})
-            refresh_token = create_refresh_token({"sub": str(user.id)})
-            
-            return OAuthCallbackResponse(
-                access_token=access_token,
-                refresh_token=refresh_token
-            )
-        finally:
-            db.close()
+        oauth_service = AsyncGoogleOAuthService(repository, id_token_verifier=id_token_verifier)
+        
+        # Google OAuth設定の確認
+        if not oauth_config.is_google_oauth_configured():
+            raise HTTPException(status_code=500, detail={"error": "Google OAuth is not configured"})
+        
+        # ステップ1: 認証コードをアクセストークンに交換
+        token_data = await google_client.exchange_code(code)
+        
+        # ステップ2: id_tokenを確認してユーザー情報を取り出す（できなければGoogle APIで取得）
+        google_user_info = await oauth_service.fetch_user_info(token_data, google_client)
+        
+        # ステップ3: GoogleOAuthServiceでユーザーを作成または取得
+        user = await oauth_service.authenticate(google_user_info)
+        
+        # ステップ4: JWTトークンを生成
+        access_token = create_access_token({"sub": str(user.id)})
+        refresh_token = await RefreshTokenService(refresh_token_store).issue(str(user.id))
+        
+        return OAuthCallbackResponse(
+            access_token=access_token,
+            refresh_token=refresh_token
+        )
     
     except HTTPException:
         raise
+    except AuthenticationError as e:
+        # 認証コードが無効・期限切れ・使用済み
+        raise HTTPException(status_code=401, detail={"error": e.message})
+    except ServiceUnavailableError as e:
+        # リトライしてもGoogleに接続できない
+        raise HTTPException(status_code=503, detail={"error": str(e)})
     except Exception as e:
         # Google API呼び出し失敗などの予期しないエラー
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
 @app.post("/auth/refresh", response_model=RefreshTokenResponse)
-def refresh_access_token(request: RefreshTokenRequest):
+async def refresh_access_token(
+    request: RefreshTokenRequest,
+    refresh_token_store: RefreshTokenStore = Depends(get_refresh_token_store)
+):
     """リフレッシュトークンでアクセストークンを更新するエンドポイント
     
-    有効なリフレッシュトークンを受け取り、新しいアクセストークンを返す。
+    有効なリフレッシュトークンを受け取り、新しいアクセストークンと
+    新しいリフレッシュトークンを返す（受け取ったリフレッシュトークンは使えなくなる）。
+    使用済みのリフレッシュトークンが使われたら、そのファミリーをすべて無効にする。
     """
-    refresh_token = request.refresh_token
-    
     try:
-        # ステップ1: リフレッシュトークンを検証
-        payload = verify_token(refresh_token)
-        
-        # ステップ2: トークンのtypeが"refresh"であることを確認
-        token_type = payload.get("type")
-        if token_type != "refresh":
-            raise HTTPException(status_code=401, detail={"error": "Invalid token type. Refresh token required."})
-        
-        # ステップ3: ユーザーIDを取得
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail={"error": "Invalid token payload"})
-        
-        # ステップ4: 新しいアクセストークンを生成
-        access_token = create_access_token({"sub": user_id})
-        
-        return RefreshTokenResponse(access_token=access_token)
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        # トークン検証エラー（期限切れ、無効なトークンなど）
-        raise HTTPException(status_code=401, detail={"error": "Invalid or expired refresh token"})
+        service = RefreshTokenService(refresh_token_store)
+        access_token, refresh_token = await service.refresh(request.refresh_token)
+        return RefreshTokenResponse(access_token=access_token, refresh_token=refresh_token)
+    except AuthenticationError as e:
+        # トークン検証エラー（期限切れ、無効なトークン、使用済みなど）
+        raise HTTPException(status_code=401, detail={"error": e.message})
+    except ServiceUnavailableError as e:
+        # Redisに接続できない
+        raise HTTPException(status_code=503, detail={"error": str(e)})
+
+
+@app.post("/auth/logout", status_code=204)
+async def logout(
+    request: RefreshTokenRequest,
+    authorization: Optional[str] = Header(None),
+    refresh_token_store: RefreshTokenStore = Depends(get_refresh_token_store),
+    denylist: Optional[TokenDenylist] = Depends(get_token_denylist)
+):
+    """リフレッシュトークンのファミリーを無効にするエンドポイント
+
+    Authorizationヘッダーにアクセストークンがあれば、それも失効させる。
+    無効なトークンでも204を返す（ログアウトは失敗させない）。
+    """
+    try:
+        await RefreshTokenService(refresh_token_store).revoke(request.refresh_token)
+        if denylist is not None and authorization and authorization.lower().startswith("bearer "):
+            try:
+                payload = verify_token(authorization.split(None, 1)[1])
+            except Exception:
+                payload = {}
+            if payload.get("jti") and payload.get("exp"):
+                await denylist.revoke(payload["jti"], payload["exp"])
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail={"error": str(e)})
+    return Response(status_code=204)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """X-Admin-TokenヘッダーがADMIN_API_TOKENと一致するか確認する"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail={"error": "Not found"})
+    # 【なぜcompare_digest？】
+    # 普通の==だと一致した文字数によって比較時間が変わり、トークンを推測されるため
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail={"error": "Admin token is invalid"})
+
+
+@app.post("/api/admin/users/import", dependencies=[Depends(require_admin)])
+async def import_users(
+    request: Request,
+    format: str = Query("csv"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """CSV / NDJSONのユーザー一覧を一括でインポートする
+
+    【リクエストボディ】
+    ファイルの中身をそのまま送ります（multipartではなく生のボディ）。
+        curl -X POST -H "X-Admin-Token: ..." --data-binary @users.csv \
+            "http://localhost:8000/api/admin/users/import?format=csv"
+
+    【メモリ使用量】
+    ボディは少しずつ受け取って一時ファイルに書き出し、
+    インポートも1行ずつ読みながら行うため、ファイル全体をメモリに載せません。
+
+    【同時に実行できるのは1件だけ】
+    平文パスワードのハッシュ化はインポート専用のプロセスプール1つで行うので、
+    実行中にもう1件来たら409を返します（終わってから送り直してもらう）。
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail={"error": f"Unsupported format: {format}"})
+    if not user_import_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail={"error": "Another import is already running"})
+
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_BYTES) as spool:
+            written = 0
+            async for chunk in request.stream():
+                written += len(chunk)
+                if written > IMPORT_SPOOL_MAX_BYTES:
+                    # 一時ファイルに切り替わった後はディスクへの書き込みになるので、スレッドで行う
+                    await anyio.to_thread.run_sync(spool.write, chunk)
+                else:
+                    spool.write(chunk)
+            spool.seek(0)
+
+            def run_import():
+                # 平文パスワードはAPIと共有しない、インポート専用のプロセスプールでハッシュ化される
+                importer = BulkUserImporter(
+                    SqlAlchemyUserRepository(db),
+                    hasher=get_import_password_executor(),
+                    batch_size=batch_size,
+                )
+                return importer.run(iter_rows(spool, format))
+
+            try:
+                # DB書き込みとハッシュ化の待ちでイベントループを止めないよう、スレッドで実行
+                report = await anyio.to_thread.run_sync(run_import)
+            except ValueError as e:
+                # CSVのヘッダーにemail列がないなど
+                raise HTTPException(status_code=400, detail={"error": str(e)})
+    finally:
+        user_import_lock.release()
+
+    return report.to_dict()
+
+
+@app.post("/api/admin/tokens/revoke", status_code=204, dependencies=[Depends(require_admin)])
+async def revoke_access_token(
+    request: TokenRevokeRequest,
+    denylist: Optional[TokenDenylist] = Depends(get_token_denylist)
+):
+    """アクセストークンをjtiで失効させる（管理者用）
+
+    expires_atを省略した場合は、既定の有効期限（15分）の間だけ記録する。
+    """
+    if denylist is None:
+        raise HTTPException(status_code=404, detail={"error": "Token denylist is disabled"})
+    expires_at = request.expires_at or int(time.time()) + DEFAULT_EXPIRE_MINUTES * 60
+    try:
+        await denylist.revoke(request.jti, expires_at)
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail={"error": str(e)})
+    return Response(status_code=204)
+
+
+@app.post("/api/users/batch", response_model=UserBatchResponse, dependencies=[Depends(require_admin)])
+async def get_users_batch(
+    request: UserBatchRequest,
+    repository: AsyncUserRepository = Depends(get_user_repository)
+):
+    """複数のユーザーをIDまたはメールアドレスでまとめて取得する
+
+    【レスポンスの並び順】
+    リクエストで渡した順番のまま返します。
+    見つからなかったものは found: false（userはnull）になります。
+        {"results": [{"key": "...", "found": true, "user": {"id": "...", "email": "..."}},
+                     {"key": "...", "found": false, "user": null}]}
+    """
+    if (request.ids is None) == (request.emails is None):
+        raise HTTPException(status_code=400, detail={"error": "Specify exactly one of ids or emails"})
+
+    keys = request.ids if request.ids is not None else request.emails
+    if len(keys) > USER_BATCH_MAX_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"At most {USER_BATCH_MAX_KEYS} keys can be requested at once"}
+        )
+
+    # まとめて1回（チャンクごとに1回）だけ問い合わせる
+    if request.ids is not None:
+        found = await repository.find_by_ids(request.ids)
+    else:
+        found = await repository.find_by_emails(request.emails)
+
+    results = []
+    for key in keys:
+        user = found.get(key)
+        results.append(UserBatchItem(
+            key=str(key),
+            found=user is not None,
+            user=CurrentUserResponse(id=str(user.id), email=user.email) if user is not None else None
+        ))
+    return UserBatchResponse(results=results)
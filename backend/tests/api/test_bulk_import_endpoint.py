@@ -0,0 +1,136 @@
+"""一括インポートAPIエンドポイントのテスト"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import main
+from app.api.dependencies import (
+    close_import_password_executor,
+    get_db,
+    get_import_password_executor,
+    user_import_lock,
+)
+from app.domain.password import hash_password
+from app.infrastructure.database import Base
+from app.infrastructure.user_repository import SqlAlchemyUserRepository
+
+HASHED = hash_password("password123")
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """インメモリSQLiteのセッションをget_dbに差し込む"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    monkeypatch.setattr(main, "ADMIN_API_TOKEN", "admin-secret")
+    main.app.dependency_overrides[get_db] = lambda: session
+    yield session
+    main.app.dependency_overrides.pop(get_db, None)
+    session.close()
+
+
+client = TestClient(main.app)
+
+
+def test_CSVを送るとインポート結果が返される(session):
+    body = f"email,hashed_password\nbulk@example.com,{HASHED}\nbad-email,{HASHED}\n"
+
+    response = client.post(
+        "/api/admin/users/import?format=csv",
+        content=body.encode("utf-8"),
+        headers={"X-Admin-Token": "admin-secret"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["failed"] == 1
+    assert data["errors"][0]["line"] == 3
+    assert SqlAlchemyUserRepository(session).find_by_email("bulk@example.com") is not None
+
+
+def test_一時ファイルに切り替わる大きさでもインポートできる(session, monkeypatch):
+    """切り替わった後の書き込みはスレッドで行う"""
+    monkeypatch.setattr(main, "IMPORT_SPOOL_MAX_BYTES", 16)
+    body = "email,hashed_password\n" + "".join(f"spool-{i}@example.com,{HASHED}\n" for i in range(20))
+
+    response = client.post(
+        "/api/admin/users/import?format=csv",
+        content=body.encode("utf-8"),
+        headers={"X-Admin-Token": "admin-secret"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 20
+
+
+def test_管理者トークンが違うと403(session):
+    response = client.post(
+        "/api/admin/users/import",
+        content=b"email\n",
+        headers={"X-Admin-Token": "wrong"},
+    )
+
+    assert response.status_code == 403
+
+
+def test_管理者トークンが未設定なら404(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_API_TOKEN", None)
+
+    response = client.post("/api/admin/users/import", content=b"email\n")
+
+    assert response.status_code == 404
+
+
+def test_未対応の形式は400(session):
+    response = client.post(
+        "/api/admin/users/import?format=xml",
+        content=b"<users/>",
+        headers={"X-Admin-Token": "admin-secret"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_インポート中にもう1件来たら409(session):
+    """インポート専用のプロセスプールは1つなので、同時には1件だけ実行する"""
+    with user_import_lock:
+        response = client.post(
+            "/api/admin/users/import",
+            content=f"email,hashed_password\nbusy@example.com,{HASHED}\n".encode("utf-8"),
+            headers={"X-Admin-Token": "admin-secret"},
+        )
+
+    assert response.status_code == 409
+    assert SqlAlchemyUserRepository(session).find_by_email("busy@example.com") is None
+
+
+def test_平文パスワードのハッシュ化はリクエストをまたいで同じプロセスプールで行う(session):
+    """リクエストのたびにプロセスプールを作り直さない（終わっても止めない）"""
+
+    def import_plain(email):
+        return client.post(
+            "/api/admin/users/import",
+            content=f"email,password\n{email},password123\n".encode("utf-8"),
+            headers={"X-Admin-Token": "admin-secret"},
+        )
+
+    try:
+        first = import_plain("plain-1@example.com")
+        executor = get_import_password_executor()
+        second = import_plain("plain-2@example.com")
+
+        assert first.json()["inserted"] == 1
+        assert second.json()["inserted"] == 1
+        assert get_import_password_executor() is executor
+        assert executor.submit(str, 1).result() == "1"
+    finally:
+        close_import_password_executor()
@@ -0,0 +1,67 @@
+"""/livez と /readyz のテスト"""
+
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_health_checker
+from app.infrastructure.health import HealthChecker
+
+
+async def ok():
+    return None
+
+
+async def down():
+    raise ConnectionError("Error 111 connecting to redis:6379. Connection refused.")
+
+
+def test_livezは依存先を見ずに応答する(app):
+    """DBやRedisが落ちていても200を返す（再起動の対象にしない）"""
+    client = TestClient(app)
+    app.dependency_overrides[get_health_checker] = lambda: HealthChecker({"redis": down})
+    try:
+        response = client.get("/livez")
+    finally:
+        app.dependency_overrides.pop(get_health_checker, None)
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readyzはすべて使えれば200(app):
+    """依存先ごとの結果も返す"""
+    client = TestClient(app)
+    checker = HealthChecker({"database": ok, "redis": ok})
+    app.dependency_overrides[get_health_checker] = lambda: checker
+    try:
+        response = client.get("/readyz")
+    finally:
+        app.dependency_overrides.pop(get_health_checker, None)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["database"]["status"] == "ok"
+    assert body["checks"]["redis"]["status"] == "ok"
+
+
+def test_readyzは使えない依存先があれば503(app):
+    """ロードバランサーがこのPodを外せるように503を返す"""
+    client = TestClient(app)
+    checker = HealthChecker({"database": ok, "redis": down})
+    app.dependency_overrides[get_health_checker] = lambda: checker
+    try:
+        response = client.get("/readyz")
+        client.get("/readyz")
+    finally:
+        app.dependency_overrides.pop(get_health_checker, None)
+
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "not_ready"
+    assert body["checks"]["redis"] == {
+        "status": "error",
+        "latency_ms": body["checks"]["redis"]["latency_ms"],
+        "error": "ConnectionError",
+    }
+    # 2回目はキャッシュした結果を返す
+    assert checker.runs == 1
@@ -0,0 +1,51 @@
+"""JWKSエンドポイントのテスト"""
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from fastapi.testclient import TestClient
+
+import app.domain.jwt as jwt_module
+from app.domain.jwt import create_access_token
+from app.domain.jwt_keys import KeySet, SigningKey
+
+
+@pytest.fixture
+def ed25519_key_set():
+    """テスト中だけEdDSAの鍵セットに差し替える"""
+    original = jwt_module.get_key_set()
+    jwt_module.set_key_set(KeySet([
+        SigningKey("ed-1", "EdDSA", private_key=ed25519.Ed25519PrivateKey.generate())
+    ]))
+    yield
+    jwt_module.set_key_set(original)
+
+
+def test_JWKSで取得した公開鍵でトークンを検証できる(app, ed25519_key_set):
+    client = TestClient(app)
+    token = create_access_token({"sub": "user-123"})
+
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    jwk = jwt.PyJWK(response.json()["keys"][0])
+    assert jwt.decode(token, jwk.key, algorithms=["EdDSA"])["sub"] == "user-123"
+
+
+def test_ETagが一致すれば304が返る(app, ed25519_key_set):
+    client = TestClient(app)
+    etag = client.get("/.well-known/jwks.json").headers["etag"]
+
+    response = client.get("/.well-known/jwks.json", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+def test_共通鍵だけの場合は空のJWKSが返る(app):
+    client = TestClient(app)
+
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
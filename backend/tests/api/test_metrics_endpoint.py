@@ -0,0 +1,43 @@
+"""/metrics のテスト"""
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+def value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_ルートのテンプレートごとに数える(app):
+    """パスのIDではなく、マッチしたルート（/api/users/{user_id}など）をラベルにする"""
+    client = TestClient(app)
+    before = value("http_requests_total", method="GET", route="/health", status="200")
+    unmatched_before = value("http_requests_total", method="GET", route="unmatched", status="404")
+
+    client.get("/health")
+    client.get("/health")
+    client.get("/no-such-path/123")
+
+    assert value("http_requests_total", method="GET", route="/health", status="200") - before == 2
+    assert value("http_requests_total", method="GET", route="unmatched", status="404") - unmatched_before == 1
+    assert value("http_request_duration_seconds_count", method="GET", route="/health") >= 2
+
+
+def test_Prometheusの形式で返す(app):
+    """リクエスト・依存先・bcrypt・DBプール・キャッシュのメトリクスが並ぶ"""
+    client = TestClient(app)
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for name in (
+        "http_requests_total",
+        "http_request_duration_seconds_bucket",
+        "app_bcrypt_queue_depth",
+        "app_db_pool_checked_out",
+        "app_cache_requests_total",
+    ):
+        assert name in body
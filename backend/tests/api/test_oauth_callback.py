@@ -1,10 +1,18 @@
 """OAuthコールバックAPIエンドポイントのテスト"""
 
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from fastapi.testclient import TestClient
+import json
 import os
+import time
 
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from app.api.dependencies import get_google_id_token_verifier
+from app.domain.google_id_token import GoogleIdTokenVerifier, GoogleJWKSCache
 from app.domain.user import User
 from app.domain.user_repository import UserRepository
 from app.domain.oauth_service import GoogleOAuthService
@@ -46,8 +54,8 @@ def test_有効な認証コードでJWTトークンを取得できる(app):
     with patch.object(oauth_config, 'GOOGLE_CLIENT_ID', 'test_client_id'), \
          patch.object(oauth_config, 'GOOGLE_CLIENT_SECRET', 'test_client_secret'), \
          patch.object(oauth_config, 'GOOGLE_REDIRECT_URI', 'http://localhost:3000/auth/google/callback'), \
-         patch('httpx.post') as mock_post, \
-         patch('httpx.get') as mock_get:
+         patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post, \
+         patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
         
         # Google API呼び出しをモック化
         mock_token_response = {
@@ -102,7 +110,7 @@ def test_無効な認証コードでエラーが返る(app):
     with patch.object(oauth_config, 'GOOGLE_CLIENT_ID', 'test_client_id'), \
          patch.object(oauth_config, 'GOOGLE_CLIENT_SECRET', 'test_client_secret'), \
          patch.object(oauth_config, 'GOOGLE_REDIRECT_URI', 'http://localhost:3000/auth/google/callback'), \
-         patch('httpx.post') as mock_post:
+         patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
         mock_error_response = Mock()
         mock_error_response.status_code = 400
         mock_error_response.json.return_value = {"error": "invalid_grant"}
@@ -145,7 +153,7 @@ def test_GoogleAPI呼び出し失敗時にエラーが返る(app):
     main._repository = repository
     
     # Google API呼び出しが例外を発生することをモック
-    with patch('httpx.post') as mock_post:
+    with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
         mock_post.side_effect = Exception("Network error")
         
         # Act
@@ -174,8 +182,8 @@ def test_新規ユーザーの場合にユーザーが作成される(app):
     with patch.object(oauth_config, 'GOOGLE_CLIENT_ID', 'test_client_id'), \
          patch.object(oauth_config, 'GOOGLE_CLIENT_SECRET', 'test_client_secret'), \
          patch.object(oauth_config, 'GOOGLE_REDIRECT_URI', 'http://localhost:3000/auth/google/callback'), \
-         patch('httpx.post') as mock_post, \
-         patch('httpx.get') as mock_get:
+         patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post, \
+         patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
         
         mock_token_response = {
             "access_token": "google_access_token",
@@ -210,3 +218,53 @@ def test_新規ユーザーの場合にユーザーが作成される(app):
     assert "access_token" in data
     assert "refresh_token" in data
 
+
+
+def test_id_tokenがあればユーザー情報のAPIを呼ばない(app):
+    """トークン交換の応答のid_tokenを確認できれば、ユーザー情報のAPIは呼ばない"""
+    client = TestClient(app)
+    client_id = "test-client-id.apps.googleusercontent.com"
+    google_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(google_key.public_key()))
+    jwk.update({"kid": "google-key", "alg": "RS256"})
+
+    async def fetch_jwks():
+        return {"keys": [jwk]}, 3600
+
+    now = int(time.time())
+    google_id_token = jwt.encode(
+        {
+            "iss": "https://accounts.google.com",
+            "aud": client_id,
+            "sub": "google-user-id-789",
+            "email": "idtoken@gmail.com",
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 3600,
+        },
+        google_key,
+        algorithm="RS256",
+        headers={"kid": "google-key"},
+    )
+    verifier = GoogleIdTokenVerifier(GoogleJWKSCache(fetch_jwks))
+    app.dependency_overrides[get_google_id_token_verifier] = lambda: verifier
+    try:
+        with patch.object(oauth_config, 'GOOGLE_CLIENT_ID', client_id), \
+             patch.object(oauth_config, 'GOOGLE_CLIENT_SECRET', 'test_client_secret'), \
+             patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post, \
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+            mock_token_request = Mock()
+            mock_token_request.json.return_value = {
+                "access_token": "google_access_token",
+                "id_token": google_id_token,
+            }
+            mock_token_request.status_code = 200
+            mock_post.return_value = mock_token_request
+
+            response = client.get("/auth/google/callback", params={"code": "valid_auth_code_789"})
+    finally:
+        app.dependency_overrides.pop(get_google_id_token_verifier, None)
+
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+    mock_get.assert_not_called()
@@ -164,3 +164,60 @@ def test_get_current_user_with_various_invalid_tokens(invalid_token: str):
     assert response.status_code == 401
     assert "detail" in response.json()
 
+
+
+def _register_and_login():
+    email = f"test_{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/register", json={"email": email, "password": "password123"})
+    response = client.post("/api/login", json={"email": email, "password": "password123"})
+    return response.json()["access_token"]
+
+
+def test_失効させたアクセストークンでは401になる(token_denylist):
+    """jtiが失効リストにあるトークンは、有効期限内でも使えない"""
+    import asyncio
+    import jwt as pyjwt
+
+    token = _register_and_login()
+    payload = pyjwt.decode(token, options={"verify_signature": False})
+    asyncio.run(token_denylist.revoke(payload["jti"], payload["exp"]))
+
+    response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+    assert response.json()["detail"]["error"] == "Token has been revoked"
+
+
+def test_ログアウトするとそのアクセストークンも失効する():
+    """ログアウトでAuthorizationヘッダーのアクセストークンを失効させる"""
+    token = _register_and_login()
+    other_token = _register_and_login()
+
+    response = client.post(
+        "/auth/logout",
+        json={"refresh_token": "not-a-token"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 204
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {other_token}"}).status_code == 200
+
+
+def test_管理者はjtiを指定してアクセストークンを失効させられる(monkeypatch):
+    """POST /api/admin/tokens/revoke でjtiを失効させる"""
+    import jwt as pyjwt
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_API_TOKEN", "admin-secret")
+    token = _register_and_login()
+    jti = pyjwt.decode(token, options={"verify_signature": False})["jti"]
+
+    response = client.post(
+        "/api/admin/tokens/revoke",
+        json={"jti": jti},
+        headers={"X-Admin-Token": "admin-secret"},
+    )
+
+    assert response.status_code == 204
+    assert client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
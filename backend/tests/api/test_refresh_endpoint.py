@@ -5,8 +5,16 @@ from datetime import timedelta
 import jwt
 import pytest
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
 
+from app.api.dependencies import get_refresh_token_store
 from app.domain.jwt import create_refresh_token, create_access_token, SECRET_KEY, ALGORITHM
+from app.infrastructure.metrics import start_dependency_metrics, stop_dependency_metrics
+from app.infrastructure.refresh_token_store import RedisRefreshTokenStore
+
+
+def value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
 
 
 def test_有効なリフレッシュトークンでアクセストークンを更新できる(app):
@@ -113,3 +121,109 @@ def test_新しいアクセストークンに正しいユーザーIDが含まれ
     assert payload["sub"] == user_id
     assert "exp" in payload  # 有効期限が含まれる
 
+
+
+def test_更新するとリフレッシュトークンも新しくなり古いものは使えない(app, refresh_token_store):
+    """リフレッシュトークンは1回使うと新しいものに入れ替わる（ローテーション）"""
+    # Arrange
+    client = TestClient(app)
+    legacy_token = create_refresh_token({"sub": "user-123"})
+    first = client.post("/auth/refresh", json={"refresh_token": legacy_token}).json()["refresh_token"]
+
+    # Act
+    response = client.post("/auth/refresh", json={"refresh_token": first})
+
+    # Assert
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert jwt.decode(second, SECRET_KEY, algorithms=[ALGORITHM])["sub"] == "user-123"
+
+
+def test_使用済みのリフレッシュトークンを使うとファミリーごと無効になる(app):
+    """使い回しを検知したら、最新のリフレッシュトークンも使えなくなる"""
+    # Arrange
+    client = TestClient(app)
+    legacy_token = create_refresh_token({"sub": "user-123"})
+    first = client.post("/auth/refresh", json={"refresh_token": legacy_token}).json()["refresh_token"]
+    second = client.post("/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+    # Act
+    reused = client.post("/auth/refresh", json={"refresh_token": first})
+    latest = client.post("/auth/refresh", json={"refresh_token": second})
+
+    # Assert
+    assert reused.status_code == 401
+    assert reused.json()["detail"]["error"] == "Refresh token reuse detected"
+    assert latest.status_code == 401
+
+
+def test_ログアウトするとリフレッシュトークンが使えなくなる(app):
+    """ログアウトでファミリーを無効にできる"""
+    # Arrange
+    client = TestClient(app)
+    legacy_token = create_refresh_token({"sub": "user-123"})
+    refresh_token = client.post("/auth/refresh", json={"refresh_token": legacy_token}).json()["refresh_token"]
+
+    # Act
+    logout = client.post("/auth/logout", json={"refresh_token": refresh_token})
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+
+    # Assert
+    assert logout.status_code == 204
+    assert response.status_code == 401
+
+
+class FakeAsyncRedis:
+    """RedisRefreshTokenStoreが使うコマンドだけを持つ非同期Redisの代わり"""
+
+    def __init__(self):
+        self.values = {}
+
+    def register_script(self, script):
+        async def rotate(keys, args):
+            current = self.values.get(keys[0])
+            if current is None:
+                return 0
+            if current != args[0]:
+                del self.values[keys[0]]
+                return -1
+            self.values[keys[0]] = args[1]
+            return 1
+
+        return rotate
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+def test_Redisへの問い合わせ時間がメトリクスに記録される(app):
+    """更新のたびに、リフレッシュトークンのRedis操作がphase="redis"で記録される"""
+    # Arrange
+    client = TestClient(app)
+    store = RedisRefreshTokenStore(FakeAsyncRedis())
+    app.dependency_overrides[get_refresh_token_store] = lambda: store
+    legacy_token = create_refresh_token({"sub": "user-123"})
+    before = {
+        operation: value("app_dependency_duration_seconds_count", phase="redis", operation=operation)
+        for operation in ("consume_legacy", "start_family", "rotate")
+    }
+    start_dependency_metrics()
+    try:
+        # Act
+        first = client.post("/auth/refresh", json={"refresh_token": legacy_token})
+        second = client.post("/auth/refresh", json={"refresh_token": first.json()["refresh_token"]})
+    finally:
+        stop_dependency_metrics()
+
+    # Assert
+    assert second.status_code == 200
+    for operation, count in before.items():
+        assert value("app_dependency_duration_seconds_count", phase="redis", operation=operation) - count == 1
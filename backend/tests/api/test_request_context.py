@@ -0,0 +1,75 @@
+"""リクエストIDとアクセスログのミドルウェアのテスト"""
+
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_user_repository
+from app.domain.jwt import create_access_token
+from app.domain.logger import ContextQueueHandler
+
+
+class EmptyUserRepository:
+    """だれもいないリポジトリ"""
+
+    async def find_by_id(self, user_id):
+        return None
+
+
+def capture_access_log():
+    """アクセスログをキューに取り出す（ContextQueueHandlerが付ける項目も確認できる）"""
+    log_queue = queue.Queue()
+    handler = ContextQueueHandler(log_queue)
+    access_logger = logging.getLogger("app.access")
+    access_logger.addHandler(handler)
+    access_logger.setLevel(logging.INFO)
+    return log_queue, lambda: access_logger.removeHandler(handler)
+
+
+def test_リクエストIDを作ってレスポンスに付ける(app):
+    """X-Request-IDがなければ作り、レスポンスとアクセスログに付ける"""
+    client = TestClient(app)
+    log_queue, remove = capture_access_log()
+    try:
+        response = client.get("/api/users/me")
+    finally:
+        remove()
+
+    request_id = response.headers["x-request-id"]
+    assert len(request_id) == 32
+    record = log_queue.get_nowait()
+    assert record.request_id == request_id
+    assert record.status == 401
+    assert record.latency_ms >= 0
+    assert record.getMessage() == "GET /api/users/me 401"
+
+
+def test_受け取ったリクエストIDを使う(app):
+    """正しい形のX-Request-IDはそのまま使い、空白や記号を含むものは使わない"""
+    client = TestClient(app)
+
+    kept = client.get("/api/users/me", headers={"X-Request-ID": "lb-abc.123"})
+    replaced = client.get("/api/users/me", headers={"X-Request-ID": "bad id;forged"})
+
+    assert kept.headers["x-request-id"] == "lb-abc.123"
+    assert replaced.headers["x-request-id"] != "bad id;forged"
+
+
+def test_認証したユーザーのIDがアクセスログに付く(app):
+    """認証（Depends）で分かったユーザーIDが、同じリクエストのログに付く"""
+    client = TestClient(app)
+    app.dependency_overrides[get_user_repository] = lambda: EmptyUserRepository()
+    log_queue, remove = capture_access_log()
+    try:
+        user_id = "6f1c1d9e-2a5b-4f3c-9f0e-8e7d6c5b4a39"
+        response = client.get(
+            "/api/users/me",
+            headers={"Authorization": f"Bearer {create_access_token({'sub': user_id})}"},
+        )
+    finally:
+        remove()
+        app.dependency_overrides.pop(get_user_repository, None)
+
+    assert response.status_code == 404
+    assert log_queue.get_nowait().user_id == user_id
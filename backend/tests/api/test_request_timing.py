@@ -0,0 +1,62 @@
+"""Server-Timingヘッダーのミドルウェアのテスト"""
+
+import logging
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.request_timing import RequestTimingMiddleware
+from app.domain.jwt import create_access_token, verify_token
+from app.domain.logger import ContextQueueHandler
+
+
+def timing_app():
+    """JWTを作って確認するだけのアプリ"""
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware)
+
+    @app.get("/token")
+    async def token():
+        return verify_token(create_access_token({"sub": "user-1"}))
+
+    @app.get("/sync")
+    def sync_token():
+        # def のエンドポイントはスレッドプールで動く
+        return verify_token(create_access_token({"sub": "user-1"}))
+
+    return app
+
+
+def test_フェーズごとの時間をServer_Timingヘッダーとログに出す():
+    """JWTの作成と確認の2回分が、ヘッダーとapp.timingのログに入る"""
+    client = TestClient(timing_app())
+    log_queue = queue.Queue()
+    handler = ContextQueueHandler(log_queue)
+    timing_logger = logging.getLogger("app.timing")
+    timing_logger.addHandler(handler)
+    timing_logger.setLevel(logging.INFO)
+    try:
+        response = client.get("/token")
+    finally:
+        timing_logger.removeHandler(handler)
+
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("jwt;dur=")
+    assert 'desc="2 calls"' in server_timing
+    assert "total;dur=" in server_timing
+    record = log_queue.get_nowait()
+    assert record.phases["jwt"]["count"] == 2
+    assert record.latency_ms >= 0
+    assert record.getMessage().startswith("GET /token jwt=")
+
+
+def test_スレッドプールで動くエンドポイントの分も記録する():
+    """def のエンドポイント（別スレッド）で計った時間も、同じリクエストに入る"""
+    client = TestClient(timing_app())
+
+    response = client.get("/sync")
+
+    assert 'jwt;dur=' in response.headers["server-timing"]
+    assert 'desc="2 calls"' in response.headers["server-timing"]
@@ -0,0 +1,113 @@
+"""ユーザー一括取得APIエンドポイントのテスト"""
+
+import uuid
+from typing import Union
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api.dependencies import get_user_repository
+from app.domain.user import User
+from app.domain.user_repository import AsyncUserRepository
+
+
+class InMemoryAsyncUserRepository(AsyncUserRepository):
+    """テスト用のメモリ上のリポジトリ（find_by_ids / find_by_emailsの呼び出しを記録）"""
+
+    def __init__(self):
+        self.users = {}
+        self.batch_calls = 0
+
+    async def save(self, user: User) -> User:
+        self.users[user.id] = user
+        return user
+
+    async def find_by_email(self, email: str) -> Union[User, None]:
+        return next((u for u in self.users.values() if u.email == email), None)
+
+    async def find_by_id(self, id: uuid.UUID) -> Union[User, None]:
+        return self.users.get(id)
+
+    async def find_by_ids(self, ids):
+        self.batch_calls += 1
+        return await super().find_by_ids(ids)
+
+    async def find_by_emails(self, emails):
+        self.batch_calls += 1
+        return await super().find_by_emails(emails)
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    repository = InMemoryAsyncUserRepository()
+    for email in ["alice@example.com", "bob@example.com"]:
+        user = User(email=email, hashed_password="hashed")
+        repository.users[user.id] = user
+    monkeypatch.setattr(main, "ADMIN_API_TOKEN", "admin-secret")
+    main.app.dependency_overrides[get_user_repository] = lambda: repository
+    yield repository
+    main.app.dependency_overrides.pop(get_user_repository, None)
+
+
+client = TestClient(main.app)
+HEADERS = {"X-Admin-Token": "admin-secret"}
+
+
+def test_IDで一括取得するとリクエストの順番で返される(repository):
+    alice, bob = sorted(repository.users.values(), key=lambda u: u.email)
+    missing = uuid.uuid4()
+
+    response = client.post(
+        "/api/users/batch",
+        json={"ids": [str(bob.id), str(missing), str(alice.id)]},
+        headers=HEADERS,
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["key"] for r in results] == [str(bob.id), str(missing), str(alice.id)]
+    assert [r["found"] for r in results] == [True, False, True]
+    assert results[0]["user"]["email"] == "bob@example.com"
+    assert results[1]["user"] is None
+    assert repository.batch_calls == 1
+
+
+def test_メールアドレスで一括取得できる(repository):
+    response = client.post(
+        "/api/users/batch",
+        json={"emails": ["nobody@example.com", "alice@example.com"]},
+        headers=HEADERS,
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["found"] for r in results] == [False, True]
+
+
+def test_idsとemailsの両方を指定すると400(repository):
+    response = client.post(
+        "/api/users/batch",
+        json={"ids": [], "emails": []},
+        headers=HEADERS,
+    )
+
+    assert response.status_code == 400
+
+
+def test_上限を超える件数は400(repository, monkeypatch):
+    monkeypatch.setattr(main, "USER_BATCH_MAX_KEYS", 2)
+
+    response = client.post(
+        "/api/users/batch",
+        json={"emails": ["a@example.com", "b@example.com", "c@example.com"]},
+        headers=HEADERS,
+    )
+
+    assert response.status_code == 400
+
+
+def test_管理者トークンがなければ403(repository):
+    response = client.post("/api/users/batch", json={"emails": ["alice@example.com"]})
+
+    assert response.status_code == 403
@@ -4,6 +4,10 @@ import pytest
 from fastapi import FastAPI
 
 from main import app as main_app
+from app.api.dependencies import get_refresh_token_store, get_token_denylist
+from app.domain.refresh_token_store import SessionRefreshTokenStore
+from app.domain.token_denylist import MemoryTokenDenylist
+from app.infrastructure.memory_session_store import MemorySessionStore
 
 
 @pytest.fixture
@@ -11,3 +15,20 @@ def app():
     """FastAPIアプリケーションインスタンスを返す"""
     return main_app
 
+
+@pytest.fixture(autouse=True)
+def refresh_token_store():
+    """リフレッシュトークンのファミリーをメモリに保存する（テストでRedisを使わない）"""
+    store = SessionRefreshTokenStore(MemorySessionStore())
+    main_app.dependency_overrides[get_refresh_token_store] = lambda: store
+    yield store
+    main_app.dependency_overrides.pop(get_refresh_token_store, None)
+
+
+@pytest.fixture(autouse=True)
+def token_denylist():
+    """アクセストークンの失効リストをメモリに置く（テストでRedisを使わない）"""
+    denylist = MemoryTokenDenylist()
+    main_app.dependency_overrides[get_token_denylist] = lambda: denylist
+    yield denylist
+    main_app.dependency_overrides.pop(get_token_denylist, None)
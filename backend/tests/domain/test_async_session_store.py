@@ -0,0 +1,136 @@
+"""AsyncRedisSessionStoreのテスト"""
+
+import asyncio
+
+import pytest
+import redis
+import redis.asyncio
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.infrastructure.async_session_store import AsyncRedisSessionStore
+from app.infrastructure.circuit_breaker import OPEN, CircuitBreaker
+from app.infrastructure.session_store import SESSION_KEY_PREFIX
+
+
+def run_with_store(scenario):
+    """テスト用のRedis（redis://redis:6379）でシナリオを実行する（Redisが動いていなければスキップ）"""
+    async def run():
+        client = redis.asyncio.from_url("redis://redis:6379", decode_responses=True)
+        try:
+            await client.flushdb()
+        except redis.ConnectionError:
+            await client.aclose()
+            pytest.skip("Redis is not available")
+        try:
+            return await scenario(AsyncRedisSessionStore(redis_client=client), client)
+        finally:
+            await client.flushdb()
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_redis_save_get_and_delete_session():
+    """非同期版でセッションを保存・取得・削除できる"""
+    async def scenario(store, client):
+        await store.save("async-session-123", {"user_id": "user-456"}, ttl=5)
+        saved = await store.get("async-session-123")
+        ttl = await client.ttl(SESSION_KEY_PREFIX + "async-session-123")
+        await store.delete("async-session-123")
+        return saved, ttl, await store.get("async-session-123")
+
+    saved, ttl, deleted = run_with_store(scenario)
+
+    assert saved == {"user_id": "user-456"}
+    assert 0 < ttl <= 5
+    assert deleted is None
+
+
+def test_redis_batch_operations():
+    """非同期版で複数のセッションをまとめて扱える"""
+    async def scenario(store, client):
+        await store.save_many({"device-1": {"n": 1}, "device-2": {"n": 2}})
+        retrieved = await store.get_many(["device-2", "missing", "device-1"])
+        await store.delete_many(["device-1", "device-2"])
+        return retrieved, await store.get_many(["device-1", "device-2"])
+
+    retrieved, deleted = run_with_store(scenario)
+
+    assert retrieved == [{"n": 2}, None, {"n": 1}]
+    assert deleted == [None, None]
+
+
+def test_redis_get_and_touch():
+    """非同期版でセッションの取得と有効期限の延長を1回で行える"""
+    async def scenario(store, client):
+        await store.save("async-sliding-123", {"user_id": "user-456"}, ttl=5)
+        retrieved = await store.get_and_touch("async-sliding-123", ttl=60)
+        ttl = await client.ttl(SESSION_KEY_PREFIX + "async-sliding-123")
+        return retrieved, ttl, await store.touch("missing", ttl=60)
+
+    retrieved, ttl, touched = run_with_store(scenario)
+
+    assert retrieved == {"user_id": "user-456"}
+    assert 5 < ttl <= 60
+    assert touched is False
+
+
+class UnreachableRedis:
+    """常に接続エラーになるRedisクライアント"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        raise redis.ConnectionError("connection refused")
+
+
+def test_接続できないと503になり続くと問い合わせ自体をやめる():
+    client = UnreachableRedis()
+    breaker = CircuitBreaker("redis", failure_threshold=2, reset_timeout_seconds=60)
+    store = AsyncRedisSessionStore(redis_client=client, circuit_breaker=breaker)
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(ServiceUnavailableError):
+                await store.get("session")
+
+    asyncio.run(scenario())
+
+    assert breaker.state == OPEN
+    assert client.calls == 2
+
+
+class SlowRedis:
+    """応答が返るまで待たせるRedisクライアント（releaseで応答する）"""
+
+    def __init__(self):
+        self.release = None
+
+    async def get(self, key):
+        await self.release.wait()
+        return None
+
+
+def test_試しの1回がキャンセルされても回路が詰まらない():
+    """クライアントの切断などで試しの呼び出しがキャンセルされても、Redisが戻れば再び使える"""
+    clock = [0.0]
+    breaker = CircuitBreaker("redis", failure_threshold=1, reset_timeout_seconds=10, clock=lambda: clock[0])
+    client = SlowRedis()
+    store = AsyncRedisSessionStore(redis_client=client, circuit_breaker=breaker)
+    breaker.record_failure()
+    clock[0] = 10
+
+    async def scenario():
+        client.release = asyncio.Event()
+        trial = asyncio.ensure_future(store.get("session"))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        client.release.set()
+        return await store.get("session")
+
+    assert asyncio.run(scenario()) is None
+    assert breaker.state == "closed"
@@ -0,0 +1,192 @@
+"""非同期UserRepository実装と非同期サービスのテスト
+
+【なぜaiosqliteを使う？】
+test_user_repository.pyと同じく、PostgreSQLを起動せずに高速にテストするため。
+非同期ドライバ版のSQLiteでインメモリDBを作ります。
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.domain.exceptions import BusinessError
+from app.domain.login_service import AsyncLoginService
+from app.domain.oauth_service import AsyncGoogleOAuthService
+from app.domain.registration_service import AsyncRegistrationService
+from app.domain.user import User
+from app.infrastructure.async_user_repository import (
+    AsyncSqlAlchemyUserRepository,
+    ThreadedUserRepository,
+)
+from app.infrastructure.database import Base
+from app.infrastructure.user_repository import SqlAlchemyUserRepository
+
+
+async def fast_hash(password: str) -> str:
+    """テスト用の高速ハッシュ関数"""
+    return f"hashed_{password}"
+
+
+async def fast_verify(password: str, hashed: str) -> bool:
+    """テスト用の高速検証関数"""
+    return hashed == f"hashed_{password}"
+
+
+def run_with_repository(scenario):
+    """インメモリDBのAsyncSqlAlchemyUserRepositoryでシナリオを実行する"""
+    async def run():
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            poolclass=StaticPool,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with Session() as session:
+                return await scenario(AsyncSqlAlchemyUserRepository(session))
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+class TestAsyncSqlAlchemyUserRepository:
+    """AsyncSqlAlchemyUserRepositoryのテスト"""
+
+    def test_保存したユーザーをIDとメールで検索できる(self):
+        user = User(email="async@example.com", hashed_password="hashed_password_123")
+
+        async def scenario(repository):
+            saved = await repository.save(user)
+            by_id = await repository.find_by_id(user.id)
+            by_email = await repository.find_by_email("async@example.com")
+            return saved, by_id, by_email
+
+        saved, by_id, by_email = run_with_repository(scenario)
+
+        assert saved.id == user.id
+        assert by_id.email == "async@example.com"
+        assert by_email.id == user.id
+
+    def test_存在しないユーザーはNoneになる(self):
+        async def scenario(repository):
+            return (
+                await repository.find_by_id(uuid.uuid4()),
+                await repository.find_by_email("nonexistent@example.com"),
+            )
+
+        assert run_with_repository(scenario) == (None, None)
+
+    def test_同じメールがなければ保存し重複ならNoneを返す(self):
+        first = User(email="absent@example.com", hashed_password="hashed_1")
+        second = User(email="absent@example.com", hashed_password="hashed_2")
+
+        async def scenario(repository):
+            return (
+                await repository.create_if_absent(first),
+                await repository.create_if_absent(second),
+                await repository.find_by_email("absent@example.com"),
+            )
+
+        created, duplicate, found = run_with_repository(scenario)
+
+        assert created.id == first.id
+        assert duplicate is None
+        assert found.hashed_password == "hashed_1"
+
+    def test_複数のIDとメールでまとめて検索できる(self, monkeypatch):
+        # チャンクの境界をまたぐように、1回のIN句を2件にする
+        monkeypatch.setattr("app.infrastructure.user_repository.USER_LOOKUP_CHUNK_SIZE", 2)
+        users = [User(email=f"batch{i}@example.com", hashed_password="hashed") for i in range(3)]
+        missing_id = uuid.uuid4()
+
+        async def scenario(repository):
+            for user in users:
+                await repository.save(user)
+            return (
+                await repository.find_by_ids([users[2].id, missing_id, users[0].id, users[1].id]),
+                await repository.find_by_emails(["batch1@example.com", "missing@example.com"]),
+            )
+
+        by_ids, by_emails = run_with_repository(scenario)
+
+        assert set(by_ids) == {user.id for user in users}
+        assert list(by_emails) == ["batch1@example.com"]
+
+
+class TestThreadedUserRepository:
+    """同期リポジトリをスレッドプールで実行するアダプターのテスト"""
+
+    def test_同期リポジトリを非同期インターフェースで使える(self):
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        repository = ThreadedUserRepository(SqlAlchemyUserRepository(session))
+        user = User(email="threaded@example.com", hashed_password="hashed_password_123")
+
+        async def scenario():
+            await repository.save(user)
+            return await repository.find_by_email("threaded@example.com")
+
+        found = asyncio.run(scenario())
+
+        assert found.id == user.id
+
+
+class TestAsyncServices:
+    """非同期サービスのテスト"""
+
+    def test_登録したユーザーでログインできる(self):
+        async def scenario(repository):
+            await AsyncRegistrationService(repository, hasher=fast_hash).register(
+                "service@example.com", "password123"
+            )
+            return await AsyncLoginService(repository, verifier=fast_verify).login(
+                "service@example.com", "password123"
+            )
+
+        token = run_with_repository(scenario)
+
+        assert isinstance(token, str)
+
+    def test_重複したメールアドレスではBusinessErrorになる(self):
+        async def scenario(repository):
+            service = AsyncRegistrationService(repository, hasher=fast_hash)
+            await service.register("dup@example.com", "password123")
+            await service.register("dup@example.com", "password123")
+
+        with pytest.raises(BusinessError):
+            run_with_repository(scenario)
+
+    def test_間違ったパスワードではValueErrorになる(self):
+        async def scenario(repository):
+            await AsyncRegistrationService(repository, hasher=fast_hash).register(
+                "wrong@example.com", "password123"
+            )
+            await AsyncLoginService(repository, verifier=fast_verify).login(
+                "wrong@example.com", "wrongpassword"
+            )
+
+        with pytest.raises(ValueError):
+            run_with_repository(scenario)
+
+    def test_GoogleOAuthで同じメールなら既存ユーザーが返る(self):
+        async def scenario(repository):
+            service = AsyncGoogleOAuthService(repository)
+            first = await service.authenticate({"email": "google@gmail.com"})
+            second = await service.authenticate({"email": "google@gmail.com"})
+            return first, second
+
+        first, second = run_with_repository(scenario)
+
+        assert first.id == second.id
@@ -0,0 +1,249 @@
+"""キャッシュ付きUserRepositoryのテスト"""
+
+import asyncio
+import uuid
+from typing import Union
+
+import pytest
+import redis
+
+from app.domain.user import User
+from app.domain.user_repository import AsyncUserRepository, UserRepository
+from app.infrastructure.cached_user_repository import (
+    AsyncCachedUserRepository,
+    CachedUserRepository,
+    LocalUserCache,
+    email_key,
+)
+
+
+class CountingUserRepository(UserRepository):
+    """呼び出し回数を数えるメモリ上のリポジトリ（DBの代わり）"""
+
+    def __init__(self):
+        self.users = {}
+        self.calls = 0
+
+    def save(self, user: User) -> User:
+        self.users[user.id] = user
+        return user
+
+    def find_by_email(self, email: str) -> Union[User, None]:
+        self.calls += 1
+        return next((u for u in self.users.values() if u.email == email), None)
+
+    def find_by_id(self, id: uuid.UUID) -> Union[User, None]:
+        self.calls += 1
+        return self.users.get(id)
+
+
+class AsyncCountingUserRepository(AsyncUserRepository):
+    """CountingUserRepositoryの非同期版"""
+
+    def __init__(self):
+        self.inner = CountingUserRepository()
+
+    async def save(self, user: User) -> User:
+        return self.inner.save(user)
+
+    async def find_by_email(self, email: str) -> Union[User, None]:
+        return self.inner.find_by_email(email)
+
+    async def find_by_id(self, id: uuid.UUID) -> Union[User, None]:
+        return self.inner.find_by_id(id)
+
+
+class FakeRedis:
+    """テスト用の最小限のRedis（get / set / delete / pipeline）"""
+
+    def __init__(self, fail: bool = False):
+        self.data = {}
+        self.ttls = {}
+        self.fail = fail
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def delete(self, *keys):
+        self._check()
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _check(self):
+        if self.fail:
+            raise redis.ConnectionError("redis is down")
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def set(self, key, value, ex=None):
+        self._commands.append((key, value, ex))
+
+    def execute(self):
+        for key, value, ex in self._commands:
+            self._client.set(key, value, ex=ex)
+
+
+class FakeAsyncRedis:
+    """FakeRedisをawaitできるようにしたもの"""
+
+    def __init__(self):
+        self.sync = FakeRedis()
+        self.data = self.sync.data
+
+    async def get(self, key):
+        return self.sync.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.sync.set(key, value, ex=ex)
+
+    async def delete(self, *keys):
+        self.sync.delete(*keys)
+
+    def pipeline(self, transaction=True):
+        pipeline = FakePipeline(self.sync)
+
+        async def execute():
+            FakePipeline.execute(pipeline)
+
+        pipeline.execute = execute
+        return pipeline
+
+
+@pytest.fixture
+def inner():
+    return CountingUserRepository()
+
+
+class TestLocalUserCache:
+    def test_期限切れのエントリは返さない(self):
+        now = [0.0]
+        cache = LocalUserCache(max_size=10, ttl_seconds=5, clock=lambda: now[0])
+        user = User(email="ttl@example.com", hashed_password="hashed")
+        cache.put(user)
+
+        now[0] = 4.9
+        assert cache.get(email_key("ttl@example.com")) is user
+        now[0] = 5.0
+        assert cache.get(email_key("ttl@example.com")) is None
+
+    def test_最大件数を超えたら古いものから捨てる(self):
+        cache = LocalUserCache(max_size=2, ttl_seconds=60)
+        first = User(email="first@example.com", hashed_password="hashed")
+        second = User(email="second@example.com", hashed_password="hashed")
+        cache.put(first)
+        cache.put(second)
+
+        # 1人につきIDとメールの2キーなので、2人目で1人目が押し出される
+        assert cache.get(email_key("first@example.com")) is None
+        assert cache.get(email_key("second@example.com")) is second
+
+
+class TestCachedUserRepository:
+    def test_2回目以降はローカルキャッシュから返す(self, inner):
+        user = inner.save(User(email="cached@example.com", hashed_password="hashed"))
+        repository = CachedUserRepository(inner, local_cache=LocalUserCache())
+
+        assert repository.find_by_id(user.id).email == "cached@example.com"
+        assert repository.find_by_id(user.id).email == "cached@example.com"
+        # IDで読んだ結果はメールアドレスでも引ける
+        assert repository.find_by_email("cached@example.com").id == user.id
+        assert inner.calls == 1
+
+    def test_Redisに当たればDBに問い合わせない(self, inner):
+        user = inner.save(User(email="shared@example.com", hashed_password="hashed"))
+        fake_redis = FakeRedis()
+        # 別プロセスのキャッシュ（ローカルは空）でも、Redisを共有していればDBに行かない
+        CachedUserRepository(inner, redis_client=fake_redis).find_by_id(user.id)
+        other_process = CachedUserRepository(inner, local_cache=LocalUserCache(), redis_client=fake_redis)
+
+        found = other_process.find_by_email("shared@example.com")
+
+        assert found.id == user.id
+        assert found.hashed_password == "hashed"
+        assert inner.calls == 1
+
+    def test_見つからないメールアドレスはRedisに短時間覚える(self, inner):
+        fake_redis = FakeRedis()
+        repository = CachedUserRepository(inner, redis_client=fake_redis, negative_ttl_seconds=7)
+
+        assert repository.find_by_email("nobody@example.com") is None
+        assert repository.find_by_email("nobody@example.com") is None
+
+        assert inner.calls == 1
+        assert fake_redis.ttls[email_key("nobody@example.com")] == 7
+
+    def test_保存したらネガティブキャッシュが消えて次はDBから読む(self, inner):
+        fake_redis = FakeRedis()
+        local = LocalUserCache()
+        repository = CachedUserRepository(inner, local_cache=local, redis_client=fake_redis)
+        assert repository.find_by_email("new@example.com") is None
+
+        created = repository.create_if_absent(User(email="new@example.com", hashed_password="hashed"))
+
+        assert created is not None
+        assert repository.find_by_email("new@example.com").id == created.id
+
+    def test_saveで古いキャッシュが消える(self, inner):
+        user = inner.save(User(email="update@example.com", hashed_password="old"))
+        repository = CachedUserRepository(inner, local_cache=LocalUserCache(), redis_client=FakeRedis())
+        repository.find_by_id(user.id)
+
+        repository.save(user.model_copy(update={"hashed_password": "new"}))
+
+        assert repository.find_by_id(user.id).hashed_password == "new"
+
+    def test_Redisが落ちていてもDBから読める(self, inner):
+        user = inner.save(User(email="down@example.com", hashed_password="hashed"))
+        repository = CachedUserRepository(inner, redis_client=FakeRedis(fail=True))
+
+        assert repository.find_by_id(user.id).id == user.id
+        repository.save(user)
+
+    def test_まとめて検索するときはキャッシュにないものだけDBに問い合わせる(self, inner, monkeypatch):
+        users = [inner.save(User(email=f"batch{i}@example.com", hashed_password="hashed")) for i in range(3)]
+        repository = CachedUserRepository(inner, local_cache=LocalUserCache())
+        repository.find_by_id(users[0].id)
+        requested = []
+        original = inner.find_by_ids
+        monkeypatch.setattr(inner, "find_by_ids", lambda ids: requested.extend(ids) or original(ids))
+
+        found = repository.find_by_ids([u.id for u in users])
+
+        assert set(found) == {u.id for u in users}
+        assert requested == [users[1].id, users[2].id]
+
+
+class TestAsyncCachedUserRepository:
+    def test_非同期版もキャッシュとネガティブキャッシュが効く(self):
+        inner = AsyncCountingUserRepository()
+        fake_redis = FakeAsyncRedis()
+        repository = AsyncCachedUserRepository(inner, local_cache=LocalUserCache(), redis_client=fake_redis)
+        user = User(email="async@example.com", hashed_password="hashed")
+
+        async def scenario():
+            assert await repository.find_by_email("async@example.com") is None
+            assert await repository.find_by_email("async@example.com") is None
+            await repository.create_if_absent(user)
+            first = await repository.find_by_email("async@example.com")
+            second = await repository.find_by_id(user.id)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert first.id == user.id
+        assert second.id == user.id
+        # 1回目のミス + create_if_absentの重複確認 + 保存後の1回
+        assert inner.inner.calls == 3
@@ -0,0 +1,78 @@
+"""CircuitBreakerのテスト"""
+
+import pytest
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.infrastructure.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock():
+    """テスト用の時計（now[0]を書き換えて時間を進める）"""
+    return [0.0]
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("redis", failure_threshold=3, reset_timeout_seconds=10, clock=lambda: clock[0])
+
+
+def test_連続して失敗すると回路が開いて即エラーになる(breaker):
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == OPEN
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+
+
+def test_途中で成功すると失敗回数がリセットされる(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_時間が経つと1回だけ試しに通す(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] = 10
+
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    # 試しの1回の結果が出るまで、ほかの呼び出しは通さない
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_試しの1回が失敗したら再び開く(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] = 10
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+
+
+def test_試しの1回が結果を出さずに終わったら次の試しを通す(breaker, clock):
+    """キャンセルなどで成功も失敗も記録されなくても、HALF_OPENのまま詰まらない"""
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] = 10
+    breaker.before_call()
+
+    breaker.release_trial()
+
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
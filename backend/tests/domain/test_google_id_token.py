@@ -0,0 +1,297 @@
+"""Google id_tokenの検証とJWKSキャッシュのテスト"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from app.domain.google_id_token import GoogleIdTokenVerifier, GoogleJWKSCache, IdTokenError
+from app.domain.google_oauth_client import GoogleOAuthClient
+from app.domain.oauth_service import AsyncGoogleOAuthService
+
+CLIENT_ID = "test-client-id.apps.googleusercontent.com"
+
+KEY_1 = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+KEY_2 = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def jwk_of(private_key, kid):
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return jwk
+
+
+def jwks_of(*keys):
+    return {"keys": [jwk_of(key, kid) for key, kid in keys]}
+
+
+def id_token(private_key=KEY_1, kid="key-1", **claims):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "google-user-id-123",
+        "email": "test@gmail.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    payload.update(claims)
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeFetch:
+    """JWKSを返す関数（呼ばれた回数を数える）"""
+
+    def __init__(self, jwks, max_age=None):
+        self.jwks = jwks
+        self.max_age = max_age
+        self.error = None
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.jwks, self.max_age
+
+
+def verify(verifier, *tokens):
+    async def run():
+        return [await verifier.verify(token) for token in tokens]
+
+    return asyncio.run(run())
+
+
+class JWKSStandIn:
+    """GoogleのJWKSエンドポイントの代わりをするローカルサーバー"""
+
+    def __init__(self, jwks, cache_control):
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stand_in.requests += 1
+                payload = json.dumps(jwks).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", cache_control)
+                self.send_header("Age", "100")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/certs"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def test_ローカルのJWKSでid_tokenを確認できる():
+    """JWKSを1回だけ取得し、Cache-Control（max-age - Age）を期限にする"""
+    stand_in = JWKSStandIn(jwks_of((KEY_1, "key-1")), "public, max-age=21600, must-revalidate")
+
+    async def run():
+        client = GoogleOAuthClient(jwks_url=stand_in.url)
+        try:
+            jwks, max_age = await client.fetch_jwks()
+            verifier = GoogleIdTokenVerifier(GoogleJWKSCache(client.fetch_jwks), client_id=CLIENT_ID)
+            claims = [await verifier.verify(id_token()) for _ in range(3)]
+            return max_age, claims
+        finally:
+            await client.aclose()
+
+    try:
+        max_age, claims = asyncio.run(run())
+    finally:
+        stand_in.close()
+
+    assert max_age == 21500
+    assert claims[0]["email"] == "test@gmail.com"
+    assert claims[0]["sub"] == "google-user-id-123"
+    # fetch_jwksを直接呼んだ1回と、キャッシュが最初に取得した1回だけ
+    assert stand_in.requests == 2
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        id_token(aud="another-client"),
+        id_token(iss="https://evil.example.com"),
+        id_token(exp=int(time.time()) - 3600),
+        id_token(private_key=KEY_2),
+        "not-a-jwt",
+    ],
+    ids=["aud", "iss", "exp", "signature", "malformed"],
+)
+def test_正しくないid_tokenはエラーになる(token):
+    """宛先・発行者・有効期限・署名のどれかが正しくなければIdTokenError"""
+    verifier = GoogleIdTokenVerifier(GoogleJWKSCache(FakeFetch(jwks_of((KEY_1, "key-1")))), client_id=CLIENT_ID)
+
+    with pytest.raises(IdTokenError):
+        verify(verifier, token)
+
+
+def test_共通鍵のJWKは使わない():
+    """JWKSにHS256の鍵が混ざっていても、その鍵では確認しない"""
+    jwks = {"keys": [{"kty": "oct", "kid": "hmac", "alg": "HS256", "k": "c2VjcmV0"}]}
+    verifier = GoogleIdTokenVerifier(GoogleJWKSCache(FakeFetch(jwks)), client_id=CLIENT_ID)
+    token = jwt.encode({"iss": "accounts.google.com", "aud": CLIENT_ID}, "secret", algorithm="HS256", headers={"kid": "hmac"})
+
+    with pytest.raises(IdTokenError, match="Unknown signing key"):
+        verify(verifier, token)
+
+
+def test_期限が切れたら取り直す():
+    """Cache-Controlの秒数が過ぎたら、次の確認で取り直す"""
+    clock = FakeClock()
+    fetch = FakeFetch(jwks_of((KEY_1, "key-1")), max_age=600)
+    verifier = GoogleIdTokenVerifier(
+        GoogleJWKSCache(fetch, refresh_ahead_seconds=0, clock=clock), client_id=CLIENT_ID
+    )
+
+    verify(verifier, id_token(), id_token())
+    clock.now += 601
+    verify(verifier, id_token())
+
+    assert fetch.calls == 2
+
+
+def test_期限が近づいたら裏で取り直す():
+    """REFRESH_AHEADに入ったら、確認は待たずに古い鍵で行い、取り直しは裏で行う"""
+    clock = FakeClock()
+    fetch = FakeFetch(jwks_of((KEY_1, "key-1")), max_age=600)
+    cache = GoogleJWKSCache(fetch, refresh_ahead_seconds=100, clock=clock)
+    verifier = GoogleIdTokenVerifier(cache, client_id=CLIENT_ID)
+
+    async def run():
+        await verifier.verify(id_token())
+        clock.now += 550
+        fetch.jwks = jwks_of((KEY_2, "key-2"))
+        claims = await verifier.verify(id_token())
+        calls_before_yield = fetch.calls
+        await asyncio.sleep(0)  # 裏の取り直しを進める
+        return claims, calls_before_yield
+
+    claims, calls_before_yield = asyncio.run(run())
+
+    assert claims["email"] == "test@gmail.com"
+    assert calls_before_yield == 1
+    assert fetch.calls == 2
+    assert verify(verifier, id_token(KEY_2, "key-2"))[0]["email"] == "test@gmail.com"
+
+
+def test_知らないkidなら取り直す():
+    """Googleが鍵を入れ替えた直後は、知らないkidで取り直す（MIN_REFRESH秒に1回まで）"""
+    clock = FakeClock()
+    fetch = FakeFetch(jwks_of((KEY_1, "key-1")))
+    verifier = GoogleIdTokenVerifier(
+        GoogleJWKSCache(fetch, min_refresh_seconds=60, clock=clock), client_id=CLIENT_ID
+    )
+    verify(verifier, id_token())
+
+    with pytest.raises(IdTokenError):
+        verify(verifier, id_token(KEY_2, "key-2"))  # 取得直後なので取り直さない
+    clock.now += 61
+    fetch.jwks = jwks_of((KEY_1, "key-1"), (KEY_2, "key-2"))
+
+    assert verify(verifier, id_token(KEY_2, "key-2"))[0]["email"] == "test@gmail.com"
+    assert fetch.calls == 2
+
+
+def test_取り直しに失敗しても古い鍵で確認できる():
+    """JWKSを取得できなければ、これまでの鍵を使い続ける"""
+    clock = FakeClock()
+    fetch = FakeFetch(jwks_of((KEY_1, "key-1")), max_age=600)
+    verifier = GoogleIdTokenVerifier(
+        GoogleJWKSCache(fetch, refresh_ahead_seconds=0, min_refresh_seconds=60, clock=clock), client_id=CLIENT_ID
+    )
+    verify(verifier, id_token())
+    clock.now += 601
+    fetch.error = RuntimeError("Google is down")
+
+    assert len(verify(verifier, id_token(), id_token())) == 2
+    # 失敗してからMIN_REFRESH秒は取りに行かない
+    assert fetch.calls == 2
+
+
+def test_同時に確認しても取得は1回だけ():
+    """キャッシュが空のときに同時に来た確認は、1回の取得を待ち合わせる"""
+    fetch = FakeFetch(jwks_of((KEY_1, "key-1")))
+    verifier = GoogleIdTokenVerifier(GoogleJWKSCache(fetch), client_id=CLIENT_ID)
+
+    async def run():
+        return await asyncio.gather(*(verifier.verify(id_token()) for _ in range(10)))
+
+    assert len(asyncio.run(run())) == 10
+    assert fetch.calls == 1
+
+
+class FakeGoogleClient:
+    """fetch_userinfoが呼ばれたかを記録する"""
+
+    def __init__(self):
+        self.userinfo_calls = 0
+
+    async def fetch_userinfo(self, access_token):
+        self.userinfo_calls += 1
+        return {"email": "userinfo@gmail.com"}
+
+
+def test_id_tokenを確認できればユーザー情報のAPIを呼ばない():
+    """id_tokenのクレームをそのままユーザー情報として使う"""
+    verifier = GoogleIdTokenVerifier(GoogleJWKSCache(FakeFetch(jwks_of((KEY_1, "key-1")))), client_id=CLIENT_ID)
+    service = AsyncGoogleOAuthService(repository=None, id_token_verifier=verifier)
+    client = FakeGoogleClient()
+
+    user_info = asyncio.run(service.fetch_user_info({"access_token": "a", "id_token": id_token()}, client))
+
+    assert user_info["email"] == "test@gmail.com"
+    assert client.userinfo_calls == 0
+
+
+@pytest.mark.parametrize(
+    "token_data",
+    [
+        {"access_token": "a"},
+        {"access_token": "a", "id_token": id_token(private_key=KEY_2)},
+        {"access_token": "a", "id_token": id_token(email=None)},
+        {"access_token": "a", "id_token": id_token(email_verified=False)},
+        {"access_token": "a", "id_token": id_token(email_verified=None)},
+        {"access_token": "a", "id_token": id_token(email_verified="true")},
+    ],
+    ids=["no-id-token", "invalid-id-token", "no-email", "unverified", "no-email-verified", "string-verified"],
+)
+def test_id_tokenを使えなければユーザー情報のAPIを呼ぶ(token_data):
+    """id_tokenがない・確認できない・emailがない・emailが確認済みでない場合は、APIで取得する"""
+    verifier = GoogleIdTokenVerifier(GoogleJWKSCache(FakeFetch(jwks_of((KEY_1, "key-1")))), client_id=CLIENT_ID)
+    service = AsyncGoogleOAuthService(repository=None, id_token_verifier=verifier)
+    client = FakeGoogleClient()
+
+    user_info = asyncio.run(service.fetch_user_info(token_data, client))
+
+    assert user_info == {"email": "userinfo@gmail.com"}
+    assert client.userinfo_calls == 1
@@ -0,0 +1,169 @@
+"""GoogleOAuthClientのテスト（ローカルのスタブサーバーを相手にする）"""
+
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from app.domain.exceptions import AuthenticationError, ServiceUnavailableError
+from app.domain.google_oauth_client import GoogleAPIError, GoogleOAuthClient
+
+
+class StubGoogle:
+    """トークン交換とユーザー情報取得に答えるスタブサーバー
+
+    responses[path] に (ステータス, JSON) を並べておくと、先頭から順に返す
+    （最後の1つは何度でも返す）。
+    """
+
+    def __init__(self):
+        self.responses = {
+            "/token": [(200, {"access_token": "google-access-token", "token_type": "Bearer"})],
+            "/userinfo": [(200, {"email": "test@gmail.com", "sub": "google-user-id-123"})],
+        }
+        self.requests = []
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-aliveを有効にする
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._respond(parse_qs(self.rfile.read(length).decode("utf-8")))
+
+            def do_GET(self):
+                self._respond(None)
+
+            def _respond(self, form):
+                stub.connections.add(self.client_address)
+                stub.requests.append((self.command, self.path, form, self.headers.get("Authorization")))
+                queue = stub.responses[self.path]
+                status, body = queue.pop(0) if len(queue) > 1 else queue[0]
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubGoogle()
+    yield server
+    server.close()
+
+
+def run_with_client(url, scenario, **kwargs):
+    """スタブサーバーに向けたGoogleOAuthClientでシナリオを実行する"""
+    async def run():
+        client = GoogleOAuthClient(
+            token_url=url + "/token",
+            userinfo_url=url + "/userinfo",
+            retry_backoff_seconds=0,
+            **kwargs,
+        )
+        try:
+            return await scenario(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_認証コードを交換してユーザー情報を取得できる(stub):
+    """トークン交換（フォーム送信）とユーザー情報取得（Bearer）ができる"""
+    async def scenario(client):
+        token_data = await client.exchange_code("auth-code-123")
+        return token_data, await client.fetch_userinfo(token_data["access_token"])
+
+    token_data, user_info = run_with_client(stub.url, scenario)
+
+    assert token_data["access_token"] == "google-access-token"
+    assert user_info["email"] == "test@gmail.com"
+    (_, _, form, _), (_, _, _, authorization) = stub.requests
+    assert form["code"] == ["auth-code-123"]
+    assert form["grant_type"] == ["authorization_code"]
+    assert authorization == "Bearer google-access-token"
+
+
+def test_接続を使い回す(stub):
+    """何回ログインしても、接続（keep-alive）は1本で済む"""
+    async def scenario(client):
+        for _ in range(3):
+            token_data = await client.exchange_code("auth-code")
+            await client.fetch_userinfo(token_data["access_token"])
+
+    run_with_client(stub.url, scenario)
+
+    assert len(stub.requests) == 6
+    assert len(stub.connections) == 1
+
+
+def test_無効な認証コードは認証エラーになる(stub):
+    """Googleが400を返したら、そのerrorでAuthenticationErrorになる"""
+    stub.responses["/token"] = [(400, {"error": "invalid_grant"})]
+
+    with pytest.raises(AuthenticationError, match="invalid_grant"):
+        run_with_client(stub.url, lambda client: client.exchange_code("used-code"))
+
+
+def test_トークン交換は5xxでもリトライしない(stub):
+    """認証コードは1回しか使えないので、送った後のトークン交換は繰り返さない"""
+    stub.responses["/token"] = [(503, {"error": "backend_error"}), (200, {"access_token": "x"})]
+
+    with pytest.raises(AuthenticationError):
+        run_with_client(stub.url, lambda client: client.exchange_code("auth-code"))
+
+    assert len(stub.requests) == 1
+
+
+def test_ユーザー情報の取得は5xxならリトライする(stub):
+    """一時的な503は、決めた回数までリトライして成功させる"""
+    stub.responses["/userinfo"] = [
+        (503, {}),
+        (429, {}),
+        (200, {"email": "test@gmail.com"}),
+    ]
+
+    user_info = run_with_client(stub.url, lambda client: client.fetch_userinfo("token"), max_retries=2)
+
+    assert user_info == {"email": "test@gmail.com"}
+    assert len(stub.requests) == 3
+
+
+def test_リトライ回数を超えたらエラーになる(stub):
+    """max_retriesを超えて失敗し続けたらGoogleAPIErrorになる"""
+    stub.responses["/userinfo"] = [(503, {})]
+
+    with pytest.raises(GoogleAPIError):
+        run_with_client(stub.url, lambda client: client.fetch_userinfo("token"), max_retries=1)
+
+    assert len(stub.requests) == 2
+
+
+def test_接続できなければServiceUnavailableErrorになる():
+    """だれも待ち受けていないポートには、リトライしても接続できない"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    with pytest.raises(ServiceUnavailableError):
+        run_with_client(url, lambda client: client.exchange_code("auth-code"), max_retries=1)
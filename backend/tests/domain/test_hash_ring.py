@@ -0,0 +1,62 @@
+"""HashRingのテスト"""
+
+import pytest
+
+from app.infrastructure.hash_ring import HashRing
+
+KEYS = [f"session-{i}" for i in range(20000)]
+
+
+def test_同じキーはいつも同じノードになる():
+    ring = HashRing(["a", "b", "c"])
+    other = HashRing(["c", "a", "b"])
+
+    assert [ring.get_node(key) for key in KEYS[:100]] == [other.get_node(key) for key in KEYS[:100]]
+    assert ring.get_node("session-1") == ring.get_node(b"session-1")
+
+
+def test_仮想ノードでキーがほぼ均等に分かれる():
+    ring = HashRing(["a", "b", "c", "d"])
+
+    counts = {node: len(keys) for node, keys in ring.group(KEYS).items()}
+
+    mean = len(KEYS) / 4
+    assert set(counts) == {"a", "b", "c", "d"}
+    assert all(abs(count - mean) / mean < 0.15 for count in counts.values())
+
+
+def test_ノードを増やすと新しいノードの分だけが移動する():
+    ring = HashRing(["a", "b", "c"])
+    grown = ring.add_node("d")
+
+    moved = [key for key in KEYS if ring.get_node(key) != grown.get_node(key)]
+
+    # 移動するのは新しいノードに割り当てられたキーだけで、量は約1/4
+    assert all(grown.get_node(key) == "d" for key in moved)
+    assert 0.2 < len(moved) / len(KEYS) < 0.3
+
+
+def test_ノードを減らすとそのノードのキーだけが移動する():
+    ring = HashRing(["a", "b", "c"])
+    shrunk = ring.remove_node("b")
+
+    moved = [key for key in KEYS if ring.get_node(key) != shrunk.get_node(key)]
+
+    assert all(ring.get_node(key) == "b" for key in moved)
+    assert shrunk.nodes == ["a", "c"]
+
+
+def test_groupは入力の順番を保つ():
+    ring = HashRing(["a", "b"])
+
+    groups = ring.group(KEYS[:50])
+
+    for keys in groups.values():
+        assert keys == sorted(keys, key=KEYS.index)
+
+
+def test_ノードがない_重複しているとエラー():
+    with pytest.raises(ValueError):
+        HashRing([])
+    with pytest.raises(ValueError):
+        HashRing(["a", "a"])
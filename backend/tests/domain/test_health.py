@@ -0,0 +1,136 @@
+"""依存先の状態確認（HealthChecker）のテスト"""
+
+import asyncio
+
+from app.infrastructure.health import HealthChecker, check_password_executor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingCheck:
+    """呼ばれた回数を数える確認（errorを入れると失敗する）"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.error = None
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"checked": True}
+
+
+def test_結果をキャッシュして毎回は確認しない():
+    """何回問い合わせても、MAX_AGE秒の間は最初の1回の結果を返す"""
+    check = CountingCheck()
+    clock = FakeClock()
+    checker = HealthChecker({"database": check}, max_age_seconds=30, clock=clock)
+
+    async def run():
+        for _ in range(100):
+            await checker.is_ready()
+        clock.now += 31
+        return await checker.is_ready()
+
+    assert asyncio.run(run()) is True
+    assert check.calls == 2
+
+
+def test_同時に問い合わせても確認は1回だけ():
+    """結果がまだないときに同時に来た問い合わせは、1回の確認を待ち合わせる"""
+    check = CountingCheck(delay=0.01)
+    checker = HealthChecker({"database": check})
+
+    async def run():
+        return await asyncio.gather(*(checker.is_ready() for _ in range(50)))
+
+    assert all(asyncio.run(run()))
+    assert check.calls == 1
+
+
+def test_失敗した依存先があれば準備できていない():
+    """応答には例外の型の名前だけを載せ、接続先などが入ったメッセージは載せない"""
+    healthy = CountingCheck()
+    broken = CountingCheck()
+    broken.error = ConnectionError("could not connect to postgres:5432 as postgres")
+    checker = HealthChecker({"redis": healthy, "database": broken})
+
+    async def run():
+        return await checker.is_ready(), await checker.results()
+
+    ready, results = asyncio.run(run())
+
+    assert ready is False
+    assert results["redis"].to_dict() == {"status": "ok", "latency_ms": results["redis"].to_dict()["latency_ms"], "checked": True}
+    assert results["database"].to_dict()["error"] == "ConnectionError"
+    assert "postgres" not in str(results["database"].to_dict())
+
+
+def test_時間がかかりすぎる確認は失敗とみなす():
+    """TIMEOUT秒を超えたら、待たずに"timeout"にする"""
+    checker = HealthChecker({"redis": CountingCheck(delay=1.0)}, timeout_seconds=0.01)
+
+    async def run():
+        return await checker.results()
+
+    result = asyncio.run(run())["redis"]
+
+    assert result.healthy is False
+    assert result.error == "timeout"
+    assert result.latency_ms < 500
+
+
+def test_裏で定期的に確認する():
+    """start()の後は、問い合わせがなくてもINTERVAL秒ごとに確認する"""
+    check = CountingCheck()
+    checker = HealthChecker({"database": check}, interval_seconds=0.01)
+
+    async def run():
+        checker.start()
+        await asyncio.sleep(0.1)
+        check.error = ConnectionError("down")
+        await asyncio.sleep(0.05)
+        ready = await checker.is_ready()
+        await checker.stop()
+        return ready
+
+    assert asyncio.run(run()) is False
+    assert check.calls >= 5
+
+
+class FakeExecutor:
+    queue_depth = 64
+    max_queue_depth = 64
+    is_running = True
+
+
+def test_bcryptの待ち行列が満杯でも失敗にしない():
+    """ログインが殺到しただけで全Podが一斉に外されないように、長さは詳細として返すだけにする"""
+    executor = FakeExecutor()
+    checker = HealthChecker({"password_hasher": check_password_executor(executor)})
+
+    assert asyncio.run(checker.is_ready()) is True
+    result = asyncio.run(checker.results())["password_hasher"].to_dict()
+    assert result["queue_depth"] == 64
+    assert result["max_queue_depth"] == 64
+
+
+def test_bcryptのプールが止まっていれば失敗する():
+    executor = FakeExecutor()
+    executor.is_running = False
+    checker = HealthChecker({"password_hasher": check_password_executor(executor)})
+
+    assert asyncio.run(checker.is_ready()) is False
+    executor.is_running = True
+    asyncio.run(checker.refresh())
+    assert asyncio.run(checker.is_ready()) is True
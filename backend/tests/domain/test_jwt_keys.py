@@ -0,0 +1,141 @@
+"""JWT署名鍵（鍵セット・ローテーション）のテスト"""
+
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.utils import base64url_encode
+
+import app.domain.jwt as jwt_module
+from app.domain.jwt import create_access_token, create_refresh_token, verify_token
+from app.domain.jwt_keys import KeySet, SigningKey, load_key_set
+
+NOW = datetime(2026, 10, 15, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def use_key_set():
+    """テスト中だけ鍵セットを差し替える"""
+    original = jwt_module.get_key_set()
+    yield jwt_module.set_key_set
+    jwt_module.set_key_set(original)
+
+
+def ed25519_key(kid, **kwargs):
+    return SigningKey(kid, "EdDSA", private_key=ed25519.Ed25519PrivateKey.generate(), **kwargs)
+
+
+def es256_key(kid, **kwargs):
+    return SigningKey(kid, "ES256", private_key=ec.generate_private_key(ec.SECP256R1()), **kwargs)
+
+
+class TestAsymmetricSigning:
+    """公開鍵暗号での署名・検証のテスト"""
+
+    @pytest.mark.parametrize("make_key", [ed25519_key, es256_key])
+    def test_公開鍵暗号で署名したトークンを検証できる(self, use_key_set, make_key):
+        use_key_set(KeySet([make_key("k1")]))
+
+        token = create_access_token({"sub": "user-1"})
+
+        assert jwt.get_unverified_header(token)["kid"] == "k1"
+        assert verify_token(token)["sub"] == "user-1"
+
+    def test_公開鍵だけで他のサービスが検証できる(self, use_key_set):
+        key = ed25519_key("k1")
+        use_key_set(KeySet([key]))
+        token = create_refresh_token({"sub": "user-1"})
+
+        public_jwk = jwt.PyJWK(KeySet([key]).jwks()["keys"][0])
+        payload = jwt.decode(token, public_jwk.key, algorithms=["EdDSA"])
+
+        assert payload["sub"] == "user-1"
+
+    def test_HS256で偽造したトークンは受け付けない(self, use_key_set):
+        key = ed25519_key("k1")
+        use_key_set(KeySet([key]))
+        public_pem = key.public_key.public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        # 公開鍵をHMACの共通鍵として使う「アルゴリズム混同攻撃」
+        # （PyJWTは作成を拒否するので手で組み立てる）
+        signing_input = b".".join([
+            base64url_encode(json.dumps({"alg": "HS256", "kid": "k1"}).encode()),
+            base64url_encode(json.dumps({"sub": "attacker"}).encode()),
+        ])
+        signature = hmac.new(public_pem, signing_input, hashlib.sha256).digest()
+        forged = (signing_input + b"." + base64url_encode(signature)).decode()
+
+        with pytest.raises(jwt.InvalidTokenError):
+            verify_token(forged)
+
+    def test_未知のkidのトークンは受け付けない(self, use_key_set):
+        use_key_set(KeySet([ed25519_key("k1")]))
+        token = create_access_token({"sub": "user-1"})
+        use_key_set(KeySet([ed25519_key("k2")]))
+
+        with pytest.raises(jwt.InvalidTokenError):
+            verify_token(token)
+
+
+class TestKeyRotation:
+    """鍵のローテーションのテスト"""
+
+    def test_有効期間内で一番新しい鍵で署名する(self):
+        old = ed25519_key("old", not_before=NOW - timedelta(days=30), not_after=NOW + timedelta(days=1))
+        new = ed25519_key("new", not_before=NOW - timedelta(days=1))
+        future = ed25519_key("future", not_before=NOW + timedelta(days=10))
+        key_set = KeySet([old, new, future])
+
+        assert key_set.signing_key(NOW).kid == "new"
+        assert key_set.signing_key(NOW + timedelta(days=10)).kid == "future"
+
+    def test_署名を終えた鍵も猶予期間中は検証に使える(self):
+        retired = ed25519_key("retired", not_after=NOW - timedelta(days=1))
+        current = ed25519_key("current")
+        key_set = KeySet([retired, current], verify_grace=timedelta(days=7))
+
+        assert key_set.verification_key("retired", NOW).kid == "retired"
+        with pytest.raises(jwt.InvalidTokenError):
+            key_set.verification_key("retired", NOW + timedelta(days=7))
+
+    def test_JWKSには公開鍵だけが含まれ共通鍵は含まれない(self):
+        key_set = KeySet([
+            ed25519_key("ed"),
+            es256_key("es"),
+            SigningKey.hmac("hs", "shared-secret"),
+        ])
+
+        jwks = key_set.jwks(NOW)
+
+        kids = {jwk["kid"] for jwk in jwks["keys"]}
+        assert kids == {"ed", "es"}
+        for jwk in jwks["keys"]:
+            assert "d" not in jwk  # 秘密鍵の成分が含まれていない
+            assert jwk["use"] == "sig"
+
+    def test_JSONファイルから鍵セットを読み込める(self, tmp_path):
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        (tmp_path / "current.pem").write_bytes(private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+        (tmp_path / "keys.json").write_text(json.dumps({
+            "keys": [{
+                "kid": "current",
+                "algorithm": "EdDSA",
+                "private_key_file": "current.pem",
+                "not_before": "2026-10-01T00:00:00Z",
+            }]
+        }))
+
+        key_set = load_key_set(str(tmp_path / "keys.json"))
+
+        assert key_set.signing_key(NOW).kid == "current"
+        assert key_set.jwks(NOW)["keys"][0]["kty"] == "OKP"
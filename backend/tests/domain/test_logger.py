@@ -3,6 +3,7 @@
 import logging
 
 import pytest
+from hypothesis import given, strategies as st
 
 from app.domain.logger import get_logger, configure_logging
 
@@ -116,3 +117,204 @@ class TestLoggerSecurity:
         assert token not in log_output
         assert "***" in log_output or "[REDACTED]" in log_output
 
+
+
+class TestRedaction:
+    """マスキング（sanitize_log_message・RedactingFilter）のテスト"""
+
+    @pytest.mark.parametrize(
+        "message, expected",
+        [
+            ("password=hunter2 next", "password=[REDACTED] next"),
+            ("PASSWD: hunter2", "PASSWD: [REDACTED]"),
+            ('{"refresh_token": "eyJ.abc", "api_key": "k-1"}', '{"refresh_token": "[REDACTED]", "api_key": "[REDACTED]"}'),
+            ("Authorization: Bearer eyJ.abc-_x", "Authorization: Bearer [REDACTED]"),
+            ("client_secret=abc&code=xyz", "client_secret=[REDACTED]"),
+            ("token: password=abc", "token: [REDACTED]"),
+            ("password=password: password", "password=[REDACTED] password"),
+            ("token=t", "token=[REDACTED]"),
+            ("Token revocation subscription lost", "Token revocation subscription lost"),
+            ("ログイン失敗 password: hunter2", "ログイン失敗 password: [REDACTED]"),
+        ],
+    )
+    def test_値だけがマスキングされる(self, message, expected):
+        """キーはそのまま残し、値だけを[REDACTED]にする"""
+        from app.domain.logger import sanitize_log_message
+
+        assert sanitize_log_message(message) == expected
+
+    def test_機密情報がなければ同じ文字列を返す(self):
+        """キーワードがなければ、新しい文字列を作らずにそのまま返す"""
+        from app.domain.logger import sanitize_log_message
+
+        message = "GET /api/users/me 200 12.3ms"
+
+        assert sanitize_log_message(message) is message
+
+    @given(st.lists(st.sampled_from(["password", "PwD", "token", "Secret", "api_key", "bearer", "=", ": ", '"', " ", "abc", "x-1.2"]), max_size=12))
+    def test_文字列検索と正規表現1つの結果が同じ(self, parts):
+        """ASCIIのメッセージでの結果は、大文字小文字を区別しない正規表現1つで置き換えた結果と同じ"""
+        from app.domain.logger import _SENSITIVE_PATTERN, _redact_match, sanitize_log_message
+
+        message = "".join(parts)
+
+        assert sanitize_log_message(message) == _SENSITIVE_PATTERN.sub(_redact_match, message)
+
+    def test_RedactingFilterでログが自動でマスキングされる(self):
+        """フィルターを付けたハンドラーは、引数で渡した値や例外のメッセージもマスキングする"""
+        import io
+        from app.domain.logger import RedactingFilter
+
+        log_capture = io.StringIO()
+        handler = logging.StreamHandler(log_capture)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.addFilter(RedactingFilter())
+        logger = logging.getLogger("test_redacting_filter")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            logger.info("login with password=%s", "hunter2")
+            try:
+                raise ValueError("bad api_key=k-123")
+            except ValueError:
+                logger.exception("failed")
+        finally:
+            logger.removeHandler(handler)
+
+        log_output = log_capture.getvalue()
+        assert "hunter2" not in log_output
+        assert "k-123" not in log_output
+        assert "password=[REDACTED]" in log_output
+
+    def test_configure_loggingが書き出し用のハンドラーにフィルターを付ける(self, monkeypatch, capsys):
+        """ルートのハンドラーはキューに入れるだけで、マスキングは専用スレッドで行う"""
+        import app.domain.logger as logger_module
+
+        monkeypatch.setattr(logger_module, "LOG_FORMAT", "text")
+        logging.root.handlers = []
+        configure_logging()
+        try:
+            assert all(isinstance(h, logger_module.ContextQueueHandler) for h in logging.root.handlers)
+            logging.getLogger("test_pipeline").warning("login with password=%s", "hunter2")
+        finally:
+            logger_module.stop_logging()
+
+        log_output = capsys.readouterr().err
+        assert "hunter2" not in log_output
+        assert "password=[REDACTED]" in log_output
+
+
+class TestQueueLogging:
+    """キューと専用スレッドを使うログのテスト"""
+
+    def test_リクエストの情報付きのJSONを専用スレッドで書き出す(self, monkeypatch, capsys):
+        """request_id・user_id・経過時間が付き、マスキングされた1行のJSONになる"""
+        import json
+        import threading
+        import app.domain.logger as logger_module
+        from app.domain.logger import RequestContext, bind_user_id, request_context
+
+        monkeypatch.setattr(logger_module, "LOG_FORMAT", "json")
+        logging.root.handlers = []
+        configure_logging()
+        written_by = []
+        logger_module._listener.handlers[0].addFilter(
+            lambda record: written_by.append(threading.current_thread()) or True
+        )
+        token = request_context.set(RequestContext("req-123"))
+        try:
+            bind_user_id("user-456")
+            logging.getLogger("test_json").info("refresh token=%s", "eyJ.abc")
+        finally:
+            request_context.reset(token)
+            logger_module.stop_logging()
+
+        entry = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+        assert entry["message"] == "refresh token=[REDACTED]"
+        assert entry["request_id"] == "req-123"
+        assert entry["user_id"] == "user-456"
+        assert entry["elapsed_ms"] >= 0
+        assert entry["level"] == "INFO"
+        assert written_by and written_by[0] is not threading.current_thread()
+
+    def test_キューが満杯なら捨てて後で件数を知らせる(self):
+        """dropでは待たずに捨て、次に入れられたときに捨てた件数のログを入れる"""
+        import queue
+        from app.domain.logger import ContextQueueHandler
+
+        log_queue = queue.Queue(1)
+        handler = ContextQueueHandler(log_queue)
+        logger = logging.getLogger("test_drop")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for n in range(3):
+                logger.warning("message %d", n)
+            assert handler.dropped == 2
+            assert log_queue.get_nowait().getMessage() == "message 0"
+
+            logger.warning("message 3")
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+
+        assert log_queue.get_nowait().getMessage() == "message 3"
+        # 報告のログはキューに空きがなければ入らないので、件数は次の機会に持ち越す
+        assert log_queue.empty()
+
+    def test_blockなら少し待ってから捨てる(self):
+        """blockでは、空かなければblock_timeout秒待ってから捨てる"""
+        import queue
+        import time
+        from app.domain.logger import ContextQueueHandler
+
+        log_queue = queue.Queue(1)
+        handler = ContextQueueHandler(log_queue, block=True, block_timeout=0.05)
+        record = logging.LogRecord("test_block", logging.INFO, __file__, 0, "message", None, None)
+        handler.emit(record)
+
+        started = time.perf_counter()
+        handler.emit(record)
+
+        assert time.perf_counter() - started >= 0.05
+        assert handler.dropped == 1
+
+    def test_DEBUGのログをロガーごとに間引く(self):
+        """いちばん長く一致したロガー名の割合で間引き、INFO以上は間引かない"""
+        from app.domain.logger import SamplingFilter
+
+        sampling = SamplingFilter({"sqlalchemy": 0.0, "app": 0.5, "app.audit": 1.0}, random_source=lambda: 0.7)
+
+        def record(name, level=logging.DEBUG):
+            return logging.LogRecord(name, level, __file__, 0, "message", None, None)
+
+        assert not sampling.filter(record("sqlalchemy.engine"))
+        assert sampling.filter(record("sqlalchemy.engine", logging.INFO))
+        assert not sampling.filter(record("app.infrastructure"))
+        assert sampling.filter(record("app.audit.login"))
+        assert sampling.filter(record("other"))
+
+    @pytest.mark.parametrize("spec", ["sqlalchemy", "=0.5", "app=1.5", "app=abc"])
+    def test_間引く割合の形式が正しくなければエラー(self, spec):
+        """LOG_SAMPLE_RATESの形式が正しくなければValueError"""
+        from app.domain.logger import parse_sample_rates
+
+        with pytest.raises(ValueError):
+            parse_sample_rates(spec)
+
+    def test_JSONに例外を含める(self):
+        """例外はexceptionに入り、時刻はミリ秒付きのUTCになる"""
+        import json
+        import sys
+        from app.domain.logger import JsonFormatter
+
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record = logging.LogRecord("test", logging.ERROR, __file__, 0, "failed", None, sys.exc_info())
+        record.created = 1767225600.25
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["time"] == "2026-01-01T00:00:00.250Z"
+        assert "RuntimeError: boom" in entry["exception"]
@@ -0,0 +1,132 @@
+"""MemorySessionStoreのテスト
+
+test_session.pyの基本的なテストはMemorySessionStoreでも実行しています。
+ここではRedisと同じ動きになっているか（有効期限・コピー・上限）を確認します。
+"""
+
+import threading
+
+import pytest
+
+from app.infrastructure.memory_session_store import MemorySessionStore
+
+
+@pytest.fixture
+def clock():
+    """テスト用の時計（now[0]を書き換えて時間を進める）"""
+    return [0.0]
+
+
+@pytest.fixture
+def store(clock):
+    return MemorySessionStore(max_entries=100, shards=4, clock=lambda: clock[0])
+
+
+def test_有効期限が過ぎたら取得できない(store, clock):
+    store.save("session", {"user_id": "user-456"}, ttl=5)
+
+    clock[0] = 4.9
+    assert store.get("session") == {"user_id": "user-456"}
+    assert store.ttl("session") == 1
+    clock[0] = 5.0
+    assert store.get("session") is None
+    assert store.ttl("session") == -2
+
+
+def test_ttlなしで保存し直すと有効期限が消える(store, clock):
+    store.save("session", {"n": 1}, ttl=5)
+    store.save("session", {"n": 2})
+
+    clock[0] = 100
+    assert store.get("session") == {"n": 2}
+    assert store.ttl("session") == -1
+
+
+def test_保存し直すと新しい有効期限になる(store, clock):
+    store.save("session", {"n": 1}, ttl=5)
+    clock[0] = 4
+    store.save("session", {"n": 2}, ttl=5)
+
+    clock[0] = 6
+    assert store.get("session") == {"n": 2}
+
+
+def test_get_and_touchで取得しつつ有効期限を延ばせる(store, clock):
+    store.save("session", {"n": 1}, ttl=5)
+
+    clock[0] = 4
+    assert store.get_and_touch("session", ttl=5) == {"n": 1}
+    clock[0] = 8
+    assert store.touch("session", ttl=5) is True
+    assert store.ttl("session") == 5
+
+    clock[0] = 12.9
+    assert store.get("session") == {"n": 1}
+    clock[0] = 13
+    assert store.get_and_touch("session", ttl=5) is None
+    assert store.touch("session", ttl=5) is False
+
+
+def test_保存した値は保存時点のコピー(store):
+    data = {"roles": ["user"], "pair": (1, 2)}
+    store.save("session", data)
+    data["roles"].append("admin")
+
+    retrieved = store.get("session")
+    retrieved["roles"].append("owner")
+
+    # Redisと同じくJSONとして往復する（タプルはリストになる）
+    assert store.get("session") == {"roles": ["user"], "pair": [1, 2]}
+
+
+def test_JSONにできない値は保存時にエラー(store):
+    with pytest.raises(TypeError):
+        store.save("session", {"value": object()})
+
+
+def test_0以下のttlはエラー(store):
+    with pytest.raises(ValueError):
+        store.save("session", {}, ttl=0)
+
+
+def test_期限切れのセッションは走査せずに捨てられる(store, clock):
+    for i in range(50):
+        store.save(f"expired-{i}", {"n": i}, ttl=1)
+    clock[0] = 2
+
+    store.purge_expired()
+
+    assert len(store) == 0
+
+
+def test_上限を超えたら最近使われていないものから捨てる(clock):
+    store = MemorySessionStore(max_entries=2, shards=1, clock=lambda: clock[0])
+    store.save("a", {"n": 1})
+    store.save("b", {"n": 2})
+    store.get("a")
+
+    store.save("c", {"n": 3})
+
+    assert store.get("b") is None
+    assert store.get("a") == {"n": 1}
+    assert store.get("c") == {"n": 3}
+
+
+def test_複数スレッドから同時に読み書きできる():
+    store = MemorySessionStore(max_entries=10000, shards=8)
+
+    def worker(worker_id):
+        for i in range(200):
+            session_id = f"{worker_id}-{i}"
+            store.save(session_id, {"i": i}, ttl=60)
+            assert store.get(session_id) == {"i": i}
+            if i % 2:
+                store.delete(session_id)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store) == 8 * 100
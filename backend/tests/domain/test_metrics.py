@@ -0,0 +1,117 @@
+"""Prometheusのメトリクスのテスト"""
+
+from prometheus_client import REGISTRY
+
+from app.domain.request_timing import timed
+from app.infrastructure.metrics import (
+    StatsSampler,
+    sample_cache,
+    sample_db_pool,
+    sample_password_executor,
+    sample_token_denylist,
+    start_dependency_metrics,
+    stop_dependency_metrics,
+)
+
+
+def value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class FakeCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def test_累積の数は前回からの差分だけ足す():
+    """何回写しても、元の数と同じだけカウンターが増える"""
+    cache = FakeCache()
+    sampler = StatsSampler()
+    sampler.add_source(sample_cache("test-delta", cache.stats))
+    before = value("app_cache_requests_total", cache="test-delta", result="hit")
+
+    cache.hits = 3
+    sampler.sample()
+    sampler.sample()
+    cache.hits = 5
+    sampler.sample()
+
+    assert value("app_cache_requests_total", cache="test-delta", result="hit") - before == 5
+
+
+def test_元の数がリセットされたら新しい値を足す():
+    """reset()などで元の数が減っても、カウンターは減らさない"""
+    cache = FakeCache()
+    sampler = StatsSampler()
+    sampler.add_source(sample_cache("test-reset", cache.stats))
+
+    cache.misses = 10
+    sampler.sample()
+    cache.misses = 2
+    sampler.sample()
+
+    assert value("app_cache_requests_total", cache="test-reset", result="miss") == 12
+
+
+def test_待ち行列とプールと失効リストの統計を写す():
+    """bcryptの待ち行列の長さ・DBプールの待ち時間・失効リストの内訳がメトリクスになる"""
+
+    class FakeExecutor:
+        queue_depth = 7
+        rejected_count = 2
+
+    pool_stats = {"checked_out": 3, "checkouts": 40, "total_wait_seconds": 1.5, "timeouts": 1}
+    denylist_stats = {"filter_passes": 100, "redis_checks": 4, "revoked_hits": 1}
+    sampler = StatsSampler()
+    sampler.add_source(sample_password_executor(FakeExecutor()))
+    sampler.add_source(sample_db_pool("test-pool", lambda: pool_stats))
+    sampler.add_source(sample_token_denylist(lambda: denylist_stats))
+    before = value("app_token_denylist_checks_total", result="redis_check")
+
+    sampler.sample()
+
+    assert value("app_bcrypt_queue_depth") == 7
+    assert value("app_db_pool_checked_out", pool="test-pool") == 3
+    assert value("app_db_pool_checkouts_total", pool="test-pool") == 40
+    assert value("app_db_pool_wait_seconds_total", pool="test-pool") == 1.5
+    assert value("app_db_pool_timeouts_total", pool="test-pool") == 1
+    assert value("app_token_denylist_checks_total", result="redis_check") - before == 4
+
+
+def test_統計の読み込みに失敗しても残りは写す():
+    """1つのソースの例外で、ほかのメトリクスが止まらない"""
+    cache = FakeCache()
+    cache.hits = 1
+
+    def broken(_sampler):
+        raise RuntimeError("Redis is down")
+
+    sampler = StatsSampler()
+    sampler.add_source(broken)
+    sampler.add_source(sample_cache("test-broken", cache.stats))
+
+    sampler.sample()
+
+    assert value("app_cache_requests_total", cache="test-broken", result="hit") == 1
+
+
+def test_依存先の処理時間をヒストグラムに記録する():
+    """request_timingで計った処理が、フェーズと処理名のラベルで記録される"""
+
+    @timed("redis", "test_get")
+    def get():
+        return None
+
+    start_dependency_metrics()
+    try:
+        get()
+        get()
+    finally:
+        stop_dependency_metrics()
+    get()
+
+    assert value("app_dependency_duration_seconds_count", phase="redis", operation="test_get") == 2
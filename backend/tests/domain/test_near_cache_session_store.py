@@ -0,0 +1,108 @@
+"""ニアキャッシュ付きSessionStoreのテスト"""
+
+import time
+
+import pytest
+import redis
+
+from app.infrastructure.near_cache_session_store import NearCachedRedisSessionStore, SessionNearCache
+
+
+@pytest.fixture
+def clock():
+    return [0.0]
+
+
+@pytest.fixture
+def cache(clock):
+    return SessionNearCache(max_entries=3, max_bytes=100, ttl_seconds=30, clock=lambda: clock[0])
+
+
+class TestSessionNearCache:
+    def test_Redisに残っているTTLより長くは持たない(self, cache, clock):
+        cache.put("s1", {"user_id": "u1"}, size=10, remaining_ttl_seconds=5, epoch=cache.epoch)
+
+        clock[0] = 4.9
+        assert cache.get("s1") == {"user_id": "u1"}
+        clock[0] = 5.0
+        assert cache.get("s1") is None
+
+    def test_最長保持時間で上限がかかる(self, cache, clock):
+        cache.put("s1", {"user_id": "u1"}, size=10, remaining_ttl_seconds=None, epoch=cache.epoch)
+
+        clock[0] = 30
+        assert cache.get("s1") is None
+
+    def test_件数とバイト数の上限を超えたら古いものから捨てる(self, cache):
+        for i in range(4):
+            cache.put(f"s{i}", {"n": i}, size=10, remaining_ttl_seconds=None, epoch=cache.epoch)
+        assert cache.get("s0") is None
+        assert len(cache) == 3
+
+        cache.put("big", {"n": 99}, size=80, remaining_ttl_seconds=None, epoch=cache.epoch)
+        assert cache.size_bytes <= 100
+        assert cache.get("big") == {"n": 99}
+        assert cache.get("s1") is None
+
+    def test_読んでいる間に無効化されたら入れない(self, cache):
+        epoch = cache.epoch
+        cache.invalidate(["other"])
+
+        assert cache.put("s1", {"n": 1}, size=10, remaining_ttl_seconds=None, epoch=epoch) is False
+        assert cache.get("s1") is None
+
+    def test_取り出した値を書き換えてもキャッシュは変わらない(self, cache):
+        cache.put("s1", {"n": 1}, size=10, remaining_ttl_seconds=None, epoch=cache.epoch)
+
+        cache.get("s1")["n"] = 2
+
+        assert cache.get("s1") == {"n": 1}
+
+
+# Redis実装のテスト
+@pytest.fixture
+def redis_client():
+    """テスト用のRedisクライアント（Redisが動いていなければスキップ）"""
+    client = redis.from_url("redis://redis:6379")
+    try:
+        client.flushdb()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    yield client
+    client.flushdb()
+
+
+def wait_until_usable(*stores):
+    deadline = time.monotonic() + 5
+    while not all(store.is_cache_usable for store in stores):
+        assert time.monotonic() < deadline, "subscription was not established"
+        time.sleep(0.01)
+
+
+def test_redis_2回目の読み込みはニアキャッシュから返す(redis_client):
+    store = NearCachedRedisSessionStore(redis_client=redis_client, listen=False)
+    store.save("near-session", {"user_id": "user-456"}, ttl=60)
+
+    assert store.get("near-session") == {"user_id": "user-456"}
+    assert store.get("near-session") == {"user_id": "user-456"}
+    assert store.near_cache.hits == 1
+
+
+def test_redis_別のワーカーでログアウトしたらコピーが捨てられる(redis_client):
+    worker_a = NearCachedRedisSessionStore(redis_client=redis_client)
+    worker_b = NearCachedRedisSessionStore(redis_client=redis.from_url("redis://redis:6379"))
+    try:
+        wait_until_usable(worker_a, worker_b)
+        worker_a.save("logout-session", {"user_id": "user-456"}, ttl=60)
+        assert worker_b.get("logout-session") is not None
+
+        worker_a.delete("logout-session")
+
+        deadline = time.monotonic() + 5
+        while len(worker_b.near_cache) > 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert worker_b.get("logout-session") is None
+    finally:
+        worker_a.close()
+        worker_b.close()
@@ -0,0 +1,163 @@
+"""PasswordHashingExecutorのテスト"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.domain.exceptions import ServiceUnavailableError
+from app.domain.login_service import LoginService
+from app.domain.password import hash_password, verify_password
+from app.domain.registration_service import RegistrationService
+from app.domain.user import User
+from app.domain.user_repository import UserRepository
+from app.infrastructure.password_executor import PasswordHashingExecutor
+
+
+@pytest.fixture(scope="module")
+def executor():
+    """本物のプロセスプールを使うエグゼキューター（モジュール内で共有）"""
+    executor = PasswordHashingExecutor(max_workers=2, max_queue_depth=8)
+    yield executor
+    executor.shutdown()
+
+
+class TestPasswordHashingExecutor:
+    """プロセスプール上でのハッシュ化・検証のテスト"""
+
+    def test_別プロセスでハッシュ化した値を検証できる(self, executor):
+        hashed = executor.hash_password("mysecretpassword")
+
+        assert hashed != "mysecretpassword"
+        assert verify_password("mysecretpassword", hashed) is True
+        assert executor.verify_password("mysecretpassword", hashed) is True
+        assert executor.verify_password("wrongpassword", hashed) is False
+
+    def test_非同期版でハッシュ化と検証ができる(self, executor):
+        async def run():
+            hashed = await executor.hash_password_async("mysecretpassword")
+            ok = await executor.verify_password_async("mysecretpassword", hashed)
+            ng = await executor.verify_password_async("wrongpassword", hashed)
+            return ok, ng
+
+        assert asyncio.run(run()) == (True, False)
+
+    def test_処理が終わると待ち行列が空になる(self, executor):
+        executor.hash_password("mysecretpassword")
+        _wait_until_idle(executor)
+
+        assert executor.queue_depth == 0
+
+    def test_サービスのhasherとverifierに注入できる(self, executor):
+        class Repository(UserRepository):
+            def __init__(self):
+                self.users = {}
+
+            def find_by_email(self, email):
+                return self.users.get(email)
+
+            def save(self, user: User) -> User:
+                self.users[user.email] = user
+                return user
+
+            def find_by_id(self, id):
+                return None
+
+        repository = Repository()
+        RegistrationService(repository, hasher=executor.hash_password).register(
+            "pool@example.com", "password123"
+        )
+        token = LoginService(repository, verifier=executor.verify_password).login(
+            "pool@example.com", "password123"
+        )
+
+        assert isinstance(token, str)
+
+
+def _wait_until_idle(executor, timeout=1.0):
+    """完了コールバックで枠が返されるまで待つ
+
+    【なぜ待つ？】
+    Future.result()が返るのと、完了コールバックが枠を返すのは
+    別スレッドで起きるため、わずかな時間差があるからです。
+    """
+    deadline = time.monotonic() + timeout
+    while executor.queue_depth and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestBackpressure:
+    """待ち行列の上限（バックプレッシャー）のテスト"""
+
+    def test_待ち行列が満杯なら即座にServiceUnavailableErrorになる(self):
+        release = threading.Event()
+        executor = PasswordHashingExecutor(
+            max_queue_depth=1,
+            executor=ThreadPoolExecutor(max_workers=1),
+        )
+
+        future = executor.submit(release.wait)
+        with pytest.raises(ServiceUnavailableError):
+            executor.submit(hash_password, "password123")
+
+        assert executor.queue_depth == 1
+        assert executor.rejected_count == 1
+
+        release.set()
+        future.result()
+        _wait_until_idle(executor)
+        assert executor.queue_depth == 0
+
+    def test_枠が空けば再び受け付ける(self):
+        executor = PasswordHashingExecutor(
+            max_queue_depth=1,
+            executor=ThreadPoolExecutor(max_workers=1),
+        )
+
+        executor.submit(len, "first").result()
+        _wait_until_idle(executor)
+        result = executor.submit(len, "second").result()
+
+        assert result == 6
+
+
+class TestIsRunning:
+    """ヘルスチェックに使う状態（is_running）のテスト"""
+
+    def test_待ち行列が満杯でも動いている扱い(self):
+        release = threading.Event()
+        executor = PasswordHashingExecutor(
+            max_queue_depth=1,
+            executor=ThreadPoolExecutor(max_workers=1),
+        )
+
+        future = executor.submit(release.wait)
+        try:
+            assert executor.is_running is True
+        finally:
+            release.set()
+            future.result()
+
+    def test_shutdown後は次に使われるまで止まっている扱い(self):
+        executor = PasswordHashingExecutor(executor=ThreadPoolExecutor(max_workers=1))
+
+        executor.shutdown()
+        assert executor.is_running is False
+        executor.submit(len, "again").result()
+        assert executor.is_running is True
+
+    def test_作り直せないプールが壊れていれば止まっている扱い(self):
+        class BrokenExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                raise BrokenProcessPool("A child process terminated abruptly")
+
+        executor = PasswordHashingExecutor(executor=BrokenExecutor(max_workers=1))
+
+        with pytest.raises(BrokenProcessPool):
+            executor.submit(len, "broken")
+
+        assert executor.is_running is False
+        assert executor.queue_depth == 0
@@ -0,0 +1,126 @@
+"""RefreshTokenServiceのテスト"""
+
+import asyncio
+
+import pytest
+
+from app.domain.exceptions import AuthenticationError
+from app.domain.jwt import create_access_token, create_refresh_token, verify_token
+from app.domain.refresh_token_service import RefreshTokenService
+from app.domain.refresh_token_store import REUSED, ROTATED, UNKNOWN, SessionRefreshTokenStore
+from app.infrastructure.memory_session_store import MemorySessionStore
+
+
+@pytest.fixture
+def store():
+    return SessionRefreshTokenStore(MemorySessionStore())
+
+
+def test_発行したトークンにjtiとファミリーIDが入る(store):
+    service = RefreshTokenService(store)
+
+    token = asyncio.run(service.issue("user-123"))
+
+    payload = verify_token(token)
+    assert payload["sub"] == "user-123"
+    assert payload["type"] == "refresh"
+    assert payload["jti"] and payload["fam"]
+
+
+def test_更新すると同じファミリーの新しいトークンになる(store):
+    service = RefreshTokenService(store)
+    token = asyncio.run(service.issue("user-123"))
+
+    access_token, new_token = asyncio.run(service.refresh(token))
+
+    assert verify_token(access_token)["sub"] == "user-123"
+    assert verify_token(new_token)["fam"] == verify_token(token)["fam"]
+    assert verify_token(new_token)["jti"] != verify_token(token)["jti"]
+
+
+def test_使用済みのトークンを使うとファミリーごと無効になる(store):
+    service = RefreshTokenService(store)
+    token = asyncio.run(service.issue("user-123"))
+    _, new_token = asyncio.run(service.refresh(token))
+
+    with pytest.raises(AuthenticationError, match="reuse"):
+        asyncio.run(service.refresh(token))
+    with pytest.raises(AuthenticationError):
+        asyncio.run(service.refresh(new_token))
+
+
+def test_同時に更新しても成功するのは1回だけ(store):
+    service = RefreshTokenService(store)
+    token = asyncio.run(service.issue("user-123"))
+
+    async def refresh_twice():
+        return await asyncio.gather(service.refresh(token), service.refresh(token), return_exceptions=True)
+
+    results = asyncio.run(refresh_twice())
+
+    assert sum(not isinstance(result, Exception) for result in results) == 1
+
+
+def test_jtiのない古いトークンは設定で受け付けるか決める(store):
+    legacy_token = create_refresh_token({"sub": "user-123"})
+
+    _, new_token = asyncio.run(RefreshTokenService(store, allow_legacy=True).refresh(legacy_token))
+
+    assert verify_token(new_token)["jti"]
+    with pytest.raises(AuthenticationError):
+        asyncio.run(RefreshTokenService(store, allow_legacy=False).refresh(legacy_token))
+
+
+def test_アクセストークンでは更新できない(store):
+    access_token = create_access_token({"sub": "user-123"})
+
+    with pytest.raises(AuthenticationError, match="Refresh token required"):
+        asyncio.run(RefreshTokenService(store).refresh(access_token))
+
+
+def test_SessionRefreshTokenStoreのローテーション結果(store):
+    asyncio.run(store.start_family("family", "jti-1", ttl=60))
+
+    assert asyncio.run(store.rotate("family", "jti-1", "jti-2", ttl=60)) == ROTATED
+    assert asyncio.run(store.rotate("family", "jti-1", "jti-3", ttl=60)) == REUSED
+    assert asyncio.run(store.rotate("family", "jti-2", "jti-3", ttl=60)) == UNKNOWN
+
+
+def test_jtiのない古いトークンは1回しか使えない(store):
+    """ファミリーがないので、使用済みとして記録して使い回しを防ぐ"""
+    service = RefreshTokenService(store, allow_legacy=True)
+    legacy_token = create_refresh_token({"sub": "user-123"})
+    asyncio.run(service.refresh(legacy_token))
+
+    with pytest.raises(AuthenticationError, match="reuse"):
+        asyncio.run(service.refresh(legacy_token))
+
+
+def test_jtiのない古いトークンを同時に使っても成功するのは1回だけ(store):
+    service = RefreshTokenService(store, allow_legacy=True)
+    legacy_token = create_refresh_token({"sub": "user-123"})
+
+    async def refresh_twice():
+        return await asyncio.gather(
+            service.refresh(legacy_token), service.refresh(legacy_token), return_exceptions=True
+        )
+
+    results = asyncio.run(refresh_twice())
+
+    assert sum(not isinstance(result, Exception) for result in results) == 1
+
+
+def test_ログアウトに使ったjtiのない古いトークンでは更新できない(store):
+    service = RefreshTokenService(store, allow_legacy=True)
+    legacy_token = create_refresh_token({"sub": "user-123"})
+
+    asyncio.run(service.revoke(legacy_token))
+
+    with pytest.raises(AuthenticationError):
+        asyncio.run(service.refresh(legacy_token))
+
+
+def test_SessionRefreshTokenStoreは古いトークンを1回だけ受け付ける(store):
+    assert asyncio.run(store.consume_legacy("hash", ttl=60)) is True
+    assert asyncio.run(store.consume_legacy("hash", ttl=60)) is False
+    assert asyncio.run(store.consume_legacy("other", ttl=60)) is True
@@ -0,0 +1,71 @@
+"""RedisRefreshTokenStoreのテスト（テスト用のRedis: redis://redis:6379）"""
+
+import asyncio
+
+import pytest
+import redis
+import redis.asyncio
+
+from app.domain.refresh_token_store import REUSED, ROTATED, UNKNOWN
+from app.infrastructure.refresh_token_store import RedisRefreshTokenStore
+
+
+def run_with_store(scenario):
+    """テスト用のRedisでシナリオを実行する（Redisが動いていなければスキップ）"""
+    async def run():
+        client = redis.asyncio.from_url("redis://redis:6379", decode_responses=True)
+        try:
+            await client.flushdb()
+        except redis.ConnectionError:
+            await client.aclose()
+            pytest.skip("Redis is not available")
+        try:
+            return await scenario(RedisRefreshTokenStore(redis_client=client), client)
+        finally:
+            await client.flushdb()
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_ローテーションと使い回しの検知を1回のスクリプトで行う():
+    async def scenario(store, client):
+        await store.start_family("family", "jti-1", ttl=60)
+        results = [
+            await store.rotate("family", "jti-1", "jti-2", ttl=120),
+            await client.ttl("refresh_family:family"),
+            await store.rotate("family", "jti-1", "jti-3", ttl=120),
+            await client.exists("refresh_family:family"),
+            await store.rotate("family", "jti-2", "jti-3", ttl=120),
+        ]
+        return results
+
+    rotated, ttl, reused, exists, unknown = run_with_store(scenario)
+
+    assert rotated == ROTATED
+    assert 60 < ttl <= 120
+    assert reused == REUSED
+    assert exists == 0
+    assert unknown == UNKNOWN
+
+
+def test_ファミリーを無効にできる():
+    async def scenario(store, client):
+        await store.start_family("family", "jti-1", ttl=60)
+        await store.revoke_family("family")
+        return await store.rotate("family", "jti-1", "jti-2", ttl=60)
+
+    assert run_with_store(scenario) == UNKNOWN
+
+
+def test_古いトークンはSET_NXで1回だけ受け付ける():
+    async def scenario(store, client):
+        first = await store.consume_legacy("hash", ttl=60)
+        second = await store.consume_legacy("hash", ttl=60)
+        return first, second, await client.ttl("refresh_legacy:hash")
+
+    first, second, ttl = run_with_store(scenario)
+
+    assert first is True
+    assert second is False
+    assert 0 < ttl <= 60
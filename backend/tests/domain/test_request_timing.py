@@ -0,0 +1,120 @@
+"""フェーズ別の処理時間の記録のテスト"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from app.domain.request_timing import (
+    add_observer,
+    current_timings,
+    remove_observer,
+    span,
+    start_recording,
+    stop_recording,
+    timed,
+)
+
+
+@timed("db")
+def find_user():
+    return "user"
+
+
+@timed("http", "userinfo")
+async def fetch_userinfo():
+    await asyncio.sleep(0)
+    return {"email": "test@gmail.com"}
+
+
+def test_記録していなければ何もしない():
+    """記録中でなくオブザーバーもいなければ、spanは共有の空のコンテキストを返す"""
+    assert current_timings() is None
+    assert span("db") is span("redis")
+    assert find_user() == "user"
+
+
+def test_フェーズごとに時間と回数を足す():
+    """同期・async defの関数とspanの時間が、フェーズごとにまとまる"""
+    token = start_recording()
+    try:
+        find_user()
+        find_user()
+        asyncio.run(fetch_userinfo())
+        with span("redis", "get"):
+            pass
+        timings = current_timings()
+    finally:
+        stop_recording(token)
+
+    summary = timings.summary()
+    assert {phase: summary[phase]["count"] for phase in summary} == {"db": 2, "http": 1, "redis": 1}
+    assert all(phase_summary["ms"] >= 0 for phase_summary in summary.values())
+    assert current_timings() is None
+
+
+def test_Server_Timingの形で出す():
+    """フェーズごとの時間・回数と、全体の時間を並べる"""
+    token = start_recording()
+    try:
+        find_user()
+        header = current_timings().server_timing()
+    finally:
+        stop_recording(token)
+
+    db, total = header.split(", ")
+    assert db.startswith("db;dur=") and db.endswith(';desc="1 calls"')
+    assert total.startswith("total;dur=")
+
+
+def test_例外が起きても記録する():
+    """失敗した処理の時間も数える"""
+
+    @timed("jwt")
+    def broken():
+        raise ValueError("invalid")
+
+    token = start_recording()
+    try:
+        try:
+            broken()
+        except ValueError:
+            pass
+        summary = current_timings().summary()
+    finally:
+        stop_recording(token)
+
+    assert summary["jwt"]["count"] == 1
+
+
+def test_コンテキストを引き継いだスレッドの分も記録する():
+    """copy_contextで渡したワーカースレッドの処理も、同じリクエストに足される"""
+    token = start_recording()
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, find_user) for _ in range(4)]
+            for future in futures:
+                future.result()
+        summary = current_timings().summary()
+    finally:
+        stop_recording(token)
+
+    assert summary["db"]["count"] == 4
+
+
+def test_オブザーバーはすべての計測結果を受け取る():
+    """記録中でなくても、登録した関数には (フェーズ, 処理名, 秒数) が渡る"""
+    calls = []
+
+    def observer(phase, operation, seconds):
+        calls.append((phase, operation, seconds))
+
+    add_observer(observer)
+    try:
+        find_user()
+        asyncio.run(fetch_userinfo())
+    finally:
+        remove_observer(observer)
+    find_user()
+
+    assert [(phase, operation) for phase, operation, _ in calls] == [("db", "find_user"), ("http", "userinfo")]
+    assert all(seconds >= 0 for _, _, seconds in calls)
@@ -3,32 +3,44 @@
 import pytest
 import redis
 from hypothesis import given, strategies as st
-from typing import Optional
-from app.domain.session_store import SessionStore
-from app.infrastructure.session_store import RedisSessionStore
+from app.infrastructure.memory_session_store import MemorySessionStore
+from app.infrastructure.session_store import SESSION_KEY_PREFIX, RedisSessionStore
 
 
-class InMemorySessionStore(SessionStore):
-    """テスト用のインメモリSessionStore実装"""
+@pytest.fixture
+def redis_client():
+    """テスト用のRedisクライアント（Redisが動いていなければスキップ）"""
+    client = redis.from_url("redis://redis:6379", decode_responses=True)
+    try:
+        # テスト前にデータベースをクリア
+        client.flushdb()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    yield client
+    # テスト後にデータベースをクリア
+    client.flushdb()
 
-    def __init__(self):
-        self._sessions = {}
 
-    def save(self, session_id: str, data: dict, ttl: Optional[int] = None) -> None:
-        self._sessions[session_id] = data
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    """同じテストをMemorySessionStoreとRedisSessionStoreの両方で実行する"""
+    if request.param == "memory":
+        return MemorySessionStore()
+    return RedisSessionStore(redis_client=request.getfixturevalue("redis_client"))
 
-    def get(self, session_id: str) -> Optional[dict]:
-        return self._sessions.get(session_id)
 
-    def delete(self, session_id: str) -> None:
-        if session_id in self._sessions:
-            del self._sessions[session_id]
+@pytest.fixture
+def remaining_ttl(store, request):
+    """セッションの残りの有効期限（秒）を返す関数（RedisのTTLコマンドと同じ値）"""
+    if isinstance(store, RedisSessionStore):
+        client = request.getfixturevalue("redis_client")
+        return lambda session_id: client.ttl(SESSION_KEY_PREFIX + session_id)
+    return store.ttl
 
 
-def test_save_and_get_session():
+def test_save_and_get_session(store):
     """セッションを保存して取得できる"""
     # Arrange
-    store = InMemorySessionStore()
     session_id = "test-session-123"
     session_data = {"user_id": "user-456", "email": "test@example.com"}
 
@@ -43,10 +55,9 @@ def test_save_and_get_session():
     assert retrieved_data["email"] == "test@example.com"
 
 
-def test_delete_session():
+def test_delete_session(store):
     """セッションを削除できる"""
     # Arrange
-    store = InMemorySessionStore()
     session_id = "test-session-123"
     session_data = {"user_id": "user-456"}
 
@@ -59,11 +70,8 @@ def test_delete_session():
     assert retrieved_data is None
 
 
-def test_get_nonexistent_session_returns_none():
+def test_get_nonexistent_session_returns_none(store):
     """存在しないセッションIDで取得するとNoneが返る"""
-    # Arrange
-    store = InMemorySessionStore()
-
     # Act
     retrieved_data = store.get("nonexistent-session-id")
 
@@ -71,10 +79,9 @@ def test_get_nonexistent_session_returns_none():
     assert retrieved_data is None
 
 
-def test_update_session():
+def test_update_session(store):
     """既存のセッションIDでデータを更新できる"""
     # Arrange
-    store = InMemorySessionStore()
     session_id = "test-session-123"
     initial_data = {"user_id": "user-456", "email": "old@example.com"}
     updated_data = {"user_id": "user-456", "email": "new@example.com"}
@@ -90,84 +97,65 @@ def test_update_session():
     assert retrieved_data["email"] == "new@example.com"
 
 
-# Redis実装のテスト
-@pytest.fixture
-def redis_client():
-    """テスト用のRedisクライアント"""
-    client = redis.from_url("redis://redis:6379", decode_responses=True)
-    # テスト前にデータベースをクリア
-    client.flushdb()
-    yield client
-    # テスト後にデータベースをクリア
-    client.flushdb()
-
-
-@pytest.fixture
-def redis_session_store(redis_client):
-    """RedisSessionStoreのインスタンス"""
-    return RedisSessionStore(redis_client=redis_client)
-
-
-def test_redis_save_and_get_session(redis_session_store):
-    """Redisでセッションを保存して取得できる"""
+def test_session_with_ttl(store, remaining_ttl):
+    """セッションにTTL（有効期限）を設定できる"""
     # Arrange
-    session_id = "redis-session-123"
-    session_data = {"user_id": "user-456", "email": "test@example.com"}
+    session_id = "session-ttl-123"
+    session_data = {"user_id": "user-456"}
+    ttl = 5  # 5秒
 
     # Act
-    redis_session_store.save(session_id, session_data)
-    retrieved_data = redis_session_store.get(session_id)
+    store.save(session_id, session_data, ttl=ttl)
 
-    # Assert
+    # TTLが設定されていることを確認
+    ttl_value = remaining_ttl(session_id)
+    assert ttl_value > 0
+    assert ttl_value <= ttl
+
+    # セッションが取得できることを確認
+    retrieved_data = store.get(session_id)
     assert retrieved_data is not None
     assert retrieved_data == session_data
-    assert retrieved_data["user_id"] == "user-456"
-    assert retrieved_data["email"] == "test@example.com"
 
 
-def test_redis_delete_session(redis_session_store):
-    """Redisでセッションを削除できる"""
+def test_save_many_get_many_and_delete_many(store, remaining_ttl):
+    """複数のセッションをまとめて保存・取得・削除できる"""
     # Arrange
-    session_id = "redis-session-123"
-    session_data = {"user_id": "user-456"}
-
-    # Act
-    redis_session_store.save(session_id, session_data)
-    redis_session_store.delete(session_id)
-    retrieved_data = redis_session_store.get(session_id)
-
-    # Assert
-    assert retrieved_data is None
-
+    sessions = {
+        "device-1": {"user_id": "user-456"},
+        "device-2": {"user_id": "user-456"},
+    }
 
-def test_redis_get_nonexistent_session_returns_none(redis_session_store):
-    """Redisで存在しないセッションIDで取得するとNoneが返る"""
     # Act
-    retrieved_data = redis_session_store.get("nonexistent-session-id")
+    store.save_many(sessions, ttl=60)
+    retrieved = store.get_many(["device-2", "missing", "device-1"])
+    ttl_value = remaining_ttl("device-2")
+    store.delete_many(["device-1", "device-2"])
 
     # Assert
-    assert retrieved_data is None
+    assert retrieved == [{"user_id": "user-456"}, None, {"user_id": "user-456"}]
+    assert 0 < ttl_value <= 60
+    assert store.get_many(["device-1", "device-2"]) == [None, None]
 
 
-def test_redis_session_with_ttl(redis_session_store, redis_client):
-    """RedisでセッションにTTL（有効期限）を設定できる"""
+def test_get_and_touch_extends_ttl(store, remaining_ttl):
+    """セッションの取得と有効期限の延長を1回で行える（スライディング有効期限）"""
     # Arrange
-    session_id = "redis-session-ttl-123"
-    session_data = {"user_id": "user-456"}
-    ttl = 5  # 5秒
+    store.save("sliding-123", {"user_id": "user-456"}, ttl=5)
 
     # Act
-    redis_session_store.save(session_id, session_data, ttl=ttl)
-    
-    # TTLが設定されていることを確認
-    ttl_value = redis_client.ttl(session_id)
-    assert ttl_value > 0
-    assert ttl_value <= ttl
-    
-    # セッションが取得できることを確認
-    retrieved_data = redis_session_store.get(session_id)
-    assert retrieved_data is not None
-    assert retrieved_data == session_data
+    retrieved = store.get_and_touch("sliding-123", ttl=60)
+    ttl_value = remaining_ttl("sliding-123")
+    touched = store.touch("sliding-123", ttl=120)
+    touched_ttl_value = remaining_ttl("sliding-123")
+
+    # Assert
+    assert retrieved == {"user_id": "user-456"}
+    assert 5 < ttl_value <= 60
+    assert touched is True
+    assert 60 < touched_ttl_value <= 120
+    assert store.get_and_touch("missing", ttl=60) is None
+    assert store.touch("missing", ttl=60) is False
 
 
 @given(
@@ -178,7 +166,7 @@ def test_redis_session_with_ttl(redis_session_store, redis_client):
 def test_save_and_get_session_with_various_data(session_id: str, user_id: str, email: str):
     """様々なセッションIDとデータでセッションを保存・取得できる（PBT）"""
     # Arrange
-    store = InMemorySessionStore()
+    store = MemorySessionStore()
     session_data = {"user_id": user_id, "email": email}
 
     # Act
@@ -199,7 +187,7 @@ def test_save_and_get_session_with_various_data(session_id: str, user_id: str, e
 def test_session_ttl_with_various_values(session_id: str, ttl: int):
     """様々なTTL値でセッションを保存できる（PBT）"""
     # Arrange
-    store = InMemorySessionStore()
+    store = MemorySessionStore()
     session_data = {"user_id": "user-123"}
 
     # Act
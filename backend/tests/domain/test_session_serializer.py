@@ -0,0 +1,84 @@
+"""SessionSerializerのテスト"""
+
+import json
+
+import pytest
+from hypothesis import given, strategies as st
+
+from app.infrastructure.session_serializer import (
+    COMPRESSION_ZLIB,
+    FORMAT_JSON,
+    FORMAT_MSGPACK,
+    SessionSerializer,
+)
+
+SESSION = {"user_id": "user-456", "email": "test@example.com", "roles": ["admin"], "login_at": 1700000000}
+
+
+@pytest.mark.parametrize("format", ["json", "msgpack", "legacy"])
+def test_書き込んだ形式で読み戻せる(format):
+    serializer = SessionSerializer(format=format)
+
+    assert serializer.loads(serializer.dumps(SESSION)) == SESSION
+
+
+def test_先頭1バイトに形式のバージョンが付く():
+    assert SessionSerializer(format="json").dumps(SESSION)[0] == FORMAT_JSON
+    assert SessionSerializer(format="msgpack").dumps(SESSION)[0] == FORMAT_MSGPACK
+
+
+def test_msgpackはJSONより小さい():
+    json_size = len(SessionSerializer(format="json").dumps(SESSION))
+    msgpack_size = len(SessionSerializer(format="msgpack").dumps(SESSION))
+
+    assert msgpack_size < json_size
+
+
+def test_しきい値を超えた値だけ圧縮する():
+    serializer = SessionSerializer(format="msgpack", compression="zlib", compress_threshold=100)
+    small = {"user_id": "user-456"}
+    large = {"user_id": "user-456", "permissions": ["read:reports"] * 50}
+
+    small_payload = serializer.dumps(small)
+    large_payload = serializer.dumps(large)
+
+    assert small_payload[0] == FORMAT_MSGPACK
+    assert large_payload[0] == FORMAT_MSGPACK | COMPRESSION_ZLIB
+    assert len(large_payload) < len(SessionSerializer(format="msgpack").dumps(large))
+    assert serializer.loads(large_payload) == large
+
+
+def test_書き込みの設定に関係なくどの形式でも読める():
+    """ローリングデプロイ中は新旧どちらの形式の値も読めなければならない"""
+    reader = SessionSerializer(format="json")
+    payloads = [
+        json.dumps(SESSION),  # バージョンを付ける前の値（decode_responses=Trueならstr）
+        SessionSerializer(format="msgpack").dumps(SESSION),
+        SessionSerializer(format="json", compression="zlib", compress_threshold=0).dumps(SESSION),
+    ]
+
+    for payload in payloads:
+        assert reader.loads(payload) == SESSION
+
+
+def test_未対応の形式はエラー():
+    with pytest.raises(ValueError):
+        SessionSerializer(format="xml")
+    with pytest.raises(ValueError):
+        SessionSerializer().loads(b"\x0fgarbage")
+
+
+@given(
+    data=st.dictionaries(
+        st.text(max_size=20),
+        st.one_of(st.text(max_size=50), st.integers(min_value=-2**63, max_value=2**63 - 1), st.booleans(), st.none()),
+        max_size=10,
+    ),
+    format=st.sampled_from(["json", "msgpack"]),
+    compression=st.sampled_from(["none", "zlib"]),
+)
+def test_様々なデータを読み書きできる(data, format, compression):
+    """様々なセッションデータを変換して読み戻せる（PBT）"""
+    serializer = SessionSerializer(format=format, compression=compression, compress_threshold=16)
+
+    assert serializer.loads(serializer.dumps(data)) == data
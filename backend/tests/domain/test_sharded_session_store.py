@@ -0,0 +1,104 @@
+"""ShardedRedisSessionStoreのテスト
+
+テスト用のRedis（redis://redis:6379）のDB番号1〜3を、3台のRedisの代わりに使います。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import redis
+
+from app.infrastructure.sharded_session_store import ShardedRedisSessionStore
+
+NODES = ["redis://redis:6379/1", "redis://redis:6379/2", "redis://redis:6379/3"]
+
+
+@pytest.fixture
+def redis_clients():
+    """ノード名 -> テスト用のRedisクライアント（DB番号ごと。Redisが動いていなければスキップ）"""
+    clients = {node: redis.from_url(node) for node in NODES}
+    try:
+        for client in clients.values():
+            client.flushdb()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    yield clients
+    for client in clients.values():
+        client.flushdb()
+
+
+@pytest.fixture
+def store(redis_clients):
+    store = ShardedRedisSessionStore(clients=redis_clients)
+    yield store
+    store.close()
+
+
+def test_セッションは担当のRedisだけに保存される(store, redis_clients):
+    store.save("session-123", {"user_id": "user-456"}, ttl=60)
+
+    owner = store.node_for("session-123")
+    assert store.get("session-123") == {"user_id": "user-456"}
+    assert [node for node, client in redis_clients.items() if client.exists(store.key_prefix + "session-123")] == [owner]
+
+    store.delete("session-123")
+    assert store.get("session-123") is None
+
+
+def test_まとめ処理はRedisごとに分けて入力の順番で返す(store, redis_clients):
+    sessions = {f"session-{i}": {"n": i} for i in range(30)}
+
+    store.save_many(sessions, ttl=60)
+    retrieved = store.get_many(["session-3", "missing", "session-17", "session-3"])
+
+    # 3台すべてに分かれて保存されている
+    assert all(client.dbsize() > 0 for client in redis_clients.values())
+    assert sum(client.dbsize() for client in redis_clients.values()) == 30
+    assert retrieved == [{"n": 3}, None, {"n": 17}, {"n": 3}]
+
+    store.delete_many(sessions)
+    assert sum(client.dbsize() for client in redis_clients.values()) == 0
+
+
+def test_get_and_touchは担当のRedisで有効期限を延ばす(store, redis_clients):
+    store.save("session-123", {"user_id": "user-456"}, ttl=5)
+
+    retrieved = store.get_and_touch("session-123", ttl=60)
+
+    assert retrieved == {"user_id": "user-456"}
+    assert 5 < redis_clients[store.node_for("session-123")].ttl(store.key_prefix + "session-123") <= 60
+
+
+class SlowRedis:
+    """MGETに時間がかかるRedisの代わり（threadsに実行したスレッドを記録する）"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.threads = []
+
+    def mget(self, keys):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return [None] * len(keys)
+
+
+def test_まとめ処理を同時に呼んでも互いを待たない():
+    """スレッドプールは全リクエストで共有するが、同時に呼ばれた分だけ並行して送る"""
+    clients = {node: SlowRedis(delay=0.1) for node in NODES}
+    store = ShardedRedisSessionStore(clients=clients, concurrency=8)
+    session_ids = [f"session-{i}" for i in range(30)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as callers:
+        results = list(callers.map(lambda _: store.get_many(session_ids), range(8)))
+    elapsed = time.perf_counter() - started
+    store.close()
+
+    assert results == [[None] * 30] * 8
+    # 1回あたり0.1秒。8回が順番待ちになると0.8秒以上かかる
+    assert elapsed < 0.4
+    # 1台分は呼び出したスレッドで送る
+    threads = [name for client in clients.values() for name in client.threads]
+    assert sum(not name.startswith("session-shard") for name in threads) == 8
@@ -0,0 +1,101 @@
+"""検証済みトークンキャッシュのテスト"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from app.domain.jwt import create_access_token, verify_token
+from app.domain.token_cache import VerifiedTokenCache
+
+
+class FakeClock:
+    """テスト用の時計（時刻を自由に進められる）"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestVerifiedTokenCache:
+    """VerifiedTokenCacheのテスト"""
+
+    def test_保存したペイロードを取り出せる(self):
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=60, clock=FakeClock())
+
+        cache.put("token-a", {"sub": "user-1"})
+
+        assert cache.get("token-a") == {"sub": "user-1"}
+        assert cache.stats()["hits"] == 1
+
+    def test_未登録のトークンはミスになる(self):
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=60, clock=FakeClock())
+
+        assert cache.get("unknown") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_expを過ぎたエントリは返さない(self):
+        clock = FakeClock()
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=600, clock=clock)
+        cache.put("token-a", {"sub": "user-1", "exp": clock.now + 5})
+
+        clock.now += 5
+
+        assert cache.get("token-a") is None
+        assert len(cache) == 0
+
+    def test_TTLを過ぎたエントリは返さない(self):
+        clock = FakeClock()
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=30, clock=clock)
+        cache.put("token-a", {"sub": "user-1", "exp": clock.now + 900})
+
+        clock.now += 31
+
+        assert cache.get("token-a") is None
+
+    def test_最大件数を超えると最近使われていないものから捨てる(self):
+        cache = VerifiedTokenCache(max_size=2, ttl_seconds=60, clock=FakeClock())
+        cache.put("token-a", {"sub": "a"})
+        cache.put("token-b", {"sub": "b"})
+        cache.get("token-a")  # aを最近使ったことにする
+
+        cache.put("token-c", {"sub": "c"})
+
+        assert cache.get("token-b") is None
+        assert cache.get("token-a") == {"sub": "a"}
+        assert cache.get("token-c") == {"sub": "c"}
+
+    def test_返されたペイロードを書き換えてもキャッシュは変わらない(self):
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=60, clock=FakeClock())
+        cache.put("token-a", {"sub": "user-1"})
+
+        cache.get("token-a")["sub"] = "tampered"
+
+        assert cache.get("token-a") == {"sub": "user-1"}
+
+
+class TestVerifyTokenWithCache:
+    """verify_tokenとキャッシュの組み合わせのテスト"""
+
+    def test_2回目の検証ではjwtのデコードを省略する(self):
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+        token = create_access_token({"sub": "user@example.com"})
+
+        first = verify_token(token, cache=cache)
+        with patch("app.domain.jwt.jwt.decode") as mock_decode:
+            second = verify_token(token, cache=cache)
+
+        assert first == second
+        mock_decode.assert_not_called()
+        assert cache.stats()["hits"] == 1
+
+    def test_期限切れトークンはキャッシュに入らない(self):
+        cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+        token = create_access_token({"sub": "user@example.com"}, expires_delta=timedelta(seconds=-1))
+
+        try:
+            verify_token(token, cache=cache)
+        except Exception:
+            pass
+
+        assert len(cache) == 0
@@ -0,0 +1,183 @@
+"""アクセストークンの失効リストのテスト
+
+ブルームフィルターとMemoryTokenDenylistはそのまま、
+RedisTokenDenylistはテスト用のRedis（redis://redis:6379）で確認します。
+"""
+
+import asyncio
+import time
+
+import pytest
+import redis
+import redis.asyncio
+
+from app.domain.token_denylist import BloomFilter, MemoryTokenDenylist, RollingBloomFilter
+from app.infrastructure.circuit_breaker import CircuitBreaker
+from app.infrastructure.token_denylist import RedisTokenDenylist
+
+
+def test_ブルームフィルターは追加したものを必ず含む():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+
+
+def test_ブルームフィルターの誤検知は設定した確率くらいに収まる():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+
+    assert false_positives / 10000 < 0.02
+
+
+def test_ローリングフィルターは2世代分経つと忘れる():
+    now = [0.0]
+    bloom = RollingBloomFilter(capacity=100, error_rate=0.01, window_seconds=10, clock=lambda: now[0])
+    bloom.add("jti-1", expires_at=5)
+
+    now[0] = 15
+    assert "jti-1" in bloom
+    now[0] = 25
+    assert "jti-1" not in bloom
+
+
+def test_ローリングフィルターは期限の長い要素を入れ直す():
+    now = [0.0]
+    bloom = RollingBloomFilter(capacity=100, error_rate=0.01, window_seconds=10, clock=lambda: now[0])
+    bloom.add("long", expires_at=45)
+
+    for t in (10, 20, 30, 40):
+        now[0] = t
+        assert "long" in bloom
+    now[0] = 60
+    assert "long" not in bloom
+
+
+def test_MemoryTokenDenylistは期限まで失効扱いにする():
+    now = [100.0]
+    denylist = MemoryTokenDenylist(clock=lambda: now[0])
+    asyncio.run(denylist.revoke("jti-1", expires_at=200))
+
+    assert asyncio.run(denylist.is_revoked("jti-1")) is True
+    assert asyncio.run(denylist.is_revoked("jti-2")) is False
+    now[0] = 200
+    assert asyncio.run(denylist.is_revoked("jti-1")) is False
+
+
+class HangingRedis:
+    """応答せず、ソケットのタイムアウトまで待たせるRedisの代わり"""
+
+    def __init__(self, timeout=0.2):
+        self.timeout = timeout
+        self.calls = 0
+
+    async def zscore(self, key, member):
+        self.calls += 1
+        await asyncio.sleep(self.timeout)
+        raise redis.TimeoutError("Timeout reading from socket")
+
+
+def test_Redisが応答しないなら失敗が続いた後はすぐにフィルターで答える():
+    """購読が切れている間も、1件ごとにタイムアウトまで待たされない"""
+    client = HangingRedis()
+    denylist = RedisTokenDenylist(
+        redis_client=client,
+        subscriber_client=object(),
+        listen=False,
+        circuit_breaker=CircuitBreaker("test", failure_threshold=2, reset_timeout_seconds=60),
+    )
+    denylist._filter.add("revoked-jti", time.time() + 60)
+
+    async def scenario():
+        for _ in range(2):
+            await denylist.is_revoked("jti-1")
+        started = time.monotonic()
+        answers = [await denylist.is_revoked("jti-1"), await denylist.is_revoked("revoked-jti")]
+        return answers, time.monotonic() - started
+
+    answers, elapsed = asyncio.run(scenario())
+
+    # 回路が開いた後はRedisに聞かず、フィルターの答え（入っているかも→失効扱い）を返す
+    assert answers == [False, True]
+    assert client.calls == 2
+    assert elapsed < client.timeout
+
+
+def run_with_denylists(scenario):
+    """同じRedisを使うワーカーを作る関数を渡してシナリオを実行する（Redisが動いていなければスキップ）"""
+    subscriber = redis.from_url("redis://redis:6379", decode_responses=True)
+    try:
+        subscriber.delete("test_revoked_tokens")
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+
+    async def run():
+        client = redis.asyncio.from_url("redis://redis:6379", decode_responses=True)
+        workers = []
+
+        def make_worker(listen=True):
+            worker = RedisTokenDenylist(
+                redis_client=client,
+                subscriber_client=subscriber,
+                key="test_revoked_tokens",
+                channel="test_revoked_tokens",
+                listen=listen,
+            )
+            workers.append(worker)
+            return worker
+
+        try:
+            return await scenario(make_worker)
+        finally:
+            for worker in workers:
+                worker.close()
+            await client.aclose()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        subscriber.delete("test_revoked_tokens")
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_redis_失効は購読しているワーカーのフィルターに届く():
+    async def scenario(make_worker):
+        worker_a, worker_b = make_worker(listen=False), make_worker()
+        await wait_until(lambda: worker_b.is_filter_usable)
+        not_revoked = await worker_b.is_revoked("jti-1")
+        await worker_a.revoke("jti-1", expires_at=time.time() + 60)
+        await wait_until(lambda: worker_b.stats()["filter_size"] > 0)
+        return not_revoked, await worker_b.is_revoked("jti-1"), worker_b.stats()
+
+    not_revoked, revoked, stats = run_with_denylists(scenario)
+
+    assert not_revoked is False
+    assert revoked is True
+    # 失効していないものはフィルターだけで答え、フィルターに入っていたものだけRedisで確認した
+    assert stats["filter_passes"] == 1
+    assert stats["redis_checks"] == 1
+
+
+def test_redis_購読前に失効したものも読み直して取りこぼさない():
+    async def scenario(make_worker):
+        await make_worker(listen=False).revoke("jti-early", expires_at=time.time() + 60)
+        # 失効させた後に起動したワーカー
+        worker = make_worker()
+        await wait_until(lambda: worker.is_filter_usable)
+        return await worker.is_revoked("jti-early"), worker.stats()["redis_checks"]
+
+    revoked, redis_checks = run_with_denylists(scenario)
+
+    assert revoked is True
+    assert redis_checks == 1
@@ -203,3 +203,31 @@ def test_registered_user_always_saved_to_repository(email, password):
 
     saved = repository.find_by_email(user.email)  # 正規化後のメールで検索
     assert saved is not None
+
+
+def test_registration_uses_single_create_if_absent_call():
+    """登録はcreate_if_absentの1回だけでリポジトリに問い合わせる"""
+    # Arrange
+    class CountingRepository(InMemoryUserRepository):
+        def __init__(self):
+            super().__init__()
+            self.calls = []
+
+        def find_by_email(self, email):
+            self.calls.append("find_by_email")
+            return super().find_by_email(email)
+
+        def create_if_absent(self, user):
+            self.calls.append("create_if_absent")
+            if user.email in self._users:
+                return None
+            return self.save(user)
+
+    repository = CountingRepository()
+    service = RegistrationService(repository, hasher=fast_hash)
+
+    # Act
+    service.register("single@example.com", "password123")
+
+    # Assert
+    assert repository.calls == ["create_if_absent"]
@@ -15,6 +15,8 @@ SQLiteのインメモリDB（:memory:）を使えば：
 - 他のテストと干渉しない
 """
 
+from uuid import uuid4
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -154,4 +156,78 @@ class TestSqlAlchemyUserRepository:
         found_user = repository.find_by_email("nonexistent@example.com")
 
         # Assert（検証）
-        assert found_user is None
\ No newline at end of file
+        assert found_user is None
+
+    def test_create_if_absent_should_save_new_user(self, repository):
+        """同じメールのユーザーがいなければ保存され、Userが返される
+
+        【このテストの意図】
+        - INSERT ... ON CONFLICT DO NOTHING で保存できるか
+        """
+        # Arrange（準備）
+        user = User(
+            email="absent@example.com",
+            hashed_password="hashed_password_123"
+        )
+
+        # Act（実行）
+        created = repository.create_if_absent(user)
+
+        # Assert（検証）
+        assert created is not None
+        assert created.id == user.id
+        assert repository.find_by_email("absent@example.com").id == user.id
+
+    def test_create_if_absent_should_return_none_when_email_exists(self, repository):
+        """同じメールのユーザーがいれば保存されず、Noneが返される
+
+        【このテストの意図】
+        - 重複登録がIntegrityErrorではなくNoneで表現されるか
+        - 既存ユーザーが上書きされないか
+        """
+        # Arrange（準備）
+        original = User(email="dup@example.com", hashed_password="original_hash")
+        repository.save(original)
+        duplicate = User(email="dup@example.com", hashed_password="other_hash")
+
+        # Act（実行）
+        created = repository.create_if_absent(duplicate)
+
+        # Assert（検証）
+        assert created is None
+        found = repository.find_by_email("dup@example.com")
+        assert found.id == original.id
+        assert found.hashed_password == "original_hash"
+
+    def test_find_by_ids_should_return_only_found_users(self, repository):
+        """複数のIDでまとめて検索すると、見つかったユーザーだけが返される
+
+        【このテストの意図】
+        - IN句をチャンクに分けても全件見つかるか
+        - 存在しないIDや重複したIDが混ざっても問題ないか
+        """
+        # Arrange（準備）
+        users = [
+            repository.save(User(email=f"batch{i}@example.com", hashed_password="hashed"))
+            for i in range(5)
+        ]
+        missing_id = uuid4()
+
+        # Act（実行）
+        found = repository.find_by_ids([u.id for u in users] + [missing_id, users[0].id])
+
+        # Assert（検証）
+        assert set(found) == {u.id for u in users}
+        assert found[users[3].id].email == "batch3@example.com"
+
+    def test_find_by_emails_should_return_only_found_users(self, repository):
+        """複数のメールアドレスでまとめて検索すると、見つかったユーザーだけが返される"""
+        # Arrange（準備）
+        repository.save(User(email="first@example.com", hashed_password="hashed"))
+        repository.save(User(email="second@example.com", hashed_password="hashed"))
+
+        # Act（実行）
+        found = repository.find_by_emails(["second@example.com", "missing@example.com", "first@example.com"])
+
+        # Assert（検証）
+        assert set(found) == {"first@example.com", "second@example.com"}
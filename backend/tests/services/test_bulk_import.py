@@ -0,0 +1,225 @@
+"""ユーザー一括インポートのテスト"""
+
+import io
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.password import hash_password, verify_password
+from app.domain.user import User
+from app.infrastructure.database import Base
+from app.infrastructure.password_executor import PasswordHashingExecutor
+from app.infrastructure.user_repository import SqlAlchemyUserRepository
+from app.services.bulk_import import BulkUserImporter, iter_rows, main
+
+# テストを速くするため、ハッシュ済みパスワードは1回だけ作って使い回す
+HASHED = hash_password("password123")
+
+
+@pytest.fixture
+def repository():
+    """インメモリSQLiteを使うリポジトリ"""
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield SqlAlchemyUserRepository(session)
+    session.close()
+
+
+@pytest.fixture
+def hasher():
+    """プロセスを起動しないエグゼキューター（スレッドでハッシュ化する）"""
+    executor = PasswordHashingExecutor(max_queue_depth=2, executor=ThreadPoolExecutor(max_workers=2))
+    yield executor
+    executor.shutdown()
+
+
+def csv_stream(*lines: str) -> io.BytesIO:
+    return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def ndjson_stream(*records) -> io.BytesIO:
+    lines = [r if isinstance(r, str) else json.dumps(r) for r in records]
+    return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+class TestBulkCreateIfAbsent:
+    """SqlAlchemyUserRepository.bulk_create_if_absentのテスト"""
+
+    def test_重複しないユーザーだけがまとめて保存される(self, repository):
+        repository.save(User(email="existing@example.com", hashed_password=HASHED))
+        users = [
+            User(email="a@example.com", hashed_password=HASHED),
+            User(email="existing@example.com", hashed_password=HASHED),
+            User(email="b@example.com", hashed_password=HASHED),
+            User(email="a@example.com", hashed_password=HASHED),
+        ]
+
+        created = repository.bulk_create_if_absent(users)
+
+        assert [user.id for user in created] == [users[0].id, users[2].id]
+        assert repository.find_by_email("a@example.com").id == users[0].id
+        assert repository.find_by_email("b@example.com") is not None
+
+    def test_空のリストなら何もしない(self, repository):
+        assert repository.bulk_create_if_absent([]) == []
+
+
+class TestBulkUserImporter:
+    """BulkUserImporterのテスト"""
+
+    def test_CSVのハッシュ済みパスワードをそのまま保存する(self, repository, hasher):
+        stream = csv_stream(
+            "email,password,hashed_password",
+            f"alice@example.com,,{HASHED}",
+        )
+
+        report = BulkUserImporter(repository, hasher=hasher).run(iter_rows(stream, "csv"))
+
+        assert report.inserted == 1
+        assert repository.find_by_email("alice@example.com").hashed_password == HASHED
+        assert hasher.queue_depth == 0
+
+    def test_平文パスワードはハッシュ化して保存する(self, repository, hasher):
+        # 待ち行列の上限（2）より多い件数でもServiceUnavailableErrorにならない
+        stream = ndjson_stream(*[
+            {"email": f"user{i}@example.com", "password": f"password{i:03d}"} for i in range(5)
+        ])
+
+        report = BulkUserImporter(repository, hasher=hasher).run(iter_rows(stream, "ndjson"))
+
+        assert report.inserted == 5
+        assert report.failed == 0
+        saved = repository.find_by_email("user3@example.com")
+        assert verify_password("password003", saved.hashed_password) is True
+
+    def test_不正な行は行番号付きでエラーとして記録し残りは続ける(self, repository, hasher):
+        stream = ndjson_stream(
+            {"email": "ok@example.com", "hashed_password": HASHED},
+            "{broken json",
+            {"email": "not-an-email", "hashed_password": HASHED},
+            {"email": "short@example.com", "password": "123"},
+            {"email": "plain@example.com", "hashed_password": "not-bcrypt"},
+            {"email": "nopassword@example.com"},
+        )
+
+        report = BulkUserImporter(repository, hasher=hasher).run(iter_rows(stream, "ndjson"))
+
+        assert report.total == 6
+        assert report.inserted == 1
+        assert report.failed == 5
+        assert [error["line"] for error in report.errors] == [2, 3, 4, 5, 6]
+        assert report.errors[0]["error"].startswith("Invalid JSON")
+
+    def test_長すぎる値の行があってもバッチの残りの行は保存する(self, hasher):
+        """PostgreSQLの文字数制限のある列では、長すぎる値はDataErrorになり、
+        トランザクションが失敗状態になる（ロールバックしないと以降の保存がすべて失敗する）"""
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+
+        # SQLiteには文字数制限も「失敗したトランザクション」もないので、PostgreSQLの動きを真似る
+        aborted = []
+
+        @event.listens_for(engine, "do_execute")
+        def reject_like_postgresql(cursor, statement, parameters, context):
+            if aborted:
+                raise sqlite3.InternalError("current transaction is aborted")
+            if statement.startswith("INSERT") and any(isinstance(v, str) and len(v) > 100 for v in parameters):
+                aborted.append(statement)
+                raise sqlite3.DataError("value too long for type character varying(100)")
+
+        @event.listens_for(engine, "rollback")
+        def clear_aborted(connection):
+            aborted.clear()
+
+        session = sessionmaker(bind=engine)()
+        long_email = "a" * 60 + "@" + "b" * 60 + ".example.com"
+        stream = csv_stream(
+            "email,hashed_password",
+            f"first@example.com,{HASHED}",
+            f"{long_email},{HASHED}",
+            f"third@example.com,{HASHED}",
+        )
+
+        report = BulkUserImporter(SqlAlchemyUserRepository(session), hasher=hasher).run(iter_rows(stream, "csv"))
+        session.close()
+
+        assert report.inserted == 2
+        assert report.failed == 1
+        assert report.errors[0]["line"] == 3
+
+    def test_既存ユーザーとファイル内の重複は重複として数える(self, repository, hasher):
+        repository.save(User(email="existing@example.com", hashed_password=HASHED))
+        stream = csv_stream(
+            "email,hashed_password",
+            f"existing@example.com,{HASHED}",
+            f"new@example.com,{HASHED}",
+            f"new@example.com,{HASHED}",
+        )
+
+        report = BulkUserImporter(repository, hasher=hasher).run(iter_rows(stream, "csv"))
+
+        assert report.inserted == 1
+        assert report.duplicates == 2
+        assert report.failed == 0
+
+    def test_バッチごとに進捗が通知される(self, repository, hasher):
+        progress = []
+        stream = csv_stream(
+            "email,hashed_password",
+            *[f"user{i}@example.com,{HASHED}" for i in range(5)],
+        )
+
+        importer = BulkUserImporter(
+            repository,
+            hasher=hasher,
+            batch_size=2,
+            on_progress=lambda report: progress.append(report.total),
+        )
+        report = importer.run(iter_rows(stream, "csv"))
+
+        assert progress == [2, 4, 5]
+        assert report.inserted == 5
+
+    def test_エラーの詳細は上限までしか残さない(self, repository, hasher):
+        stream = csv_stream("email,password", *[f"user{i}@example.com,short" for i in range(5)])
+
+        report = BulkUserImporter(repository, hasher=hasher, max_errors=2).run(iter_rows(stream, "csv"))
+
+        assert report.failed == 5
+        assert len(report.errors) == 2
+        assert report.to_dict()["errors_truncated"] is True
+
+    def test_CSVにemail列がなければエラー(self, repository, hasher):
+        stream = csv_stream("mail,password", "a@example.com,password123")
+
+        with pytest.raises(ValueError):
+            BulkUserImporter(repository, hasher=hasher).run(iter_rows(stream, "csv"))
+
+
+class TestCli:
+    """CLI（python -m app.services.bulk_import）のテスト"""
+
+    def test_ファイルを読み込んで結果をJSONで出力する(self, tmp_path, monkeypatch, capsys):
+        database_file = tmp_path / "users.db"
+        engine = create_engine(f"sqlite:///{database_file}")
+        Base.metadata.create_all(engine)
+        monkeypatch.setattr(
+            "app.infrastructure.database.SessionLocal", sessionmaker(bind=engine)
+        )
+        input_file = tmp_path / "users.ndjson"
+        input_file.write_text(
+            json.dumps({"email": "cli@example.com", "hashed_password": HASHED}) + "\n",
+            encoding="utf-8",
+        )
+
+        exit_code = main([str(input_file), "--format", "ndjson", "--workers", "1"])
+
+        captured = capsys.readouterr()
+        assert exit_code == 0
+        assert json.loads(captured.out)["inserted"] == 1
+        assert "processed=1" in captured.err
@@ -0,0 +1,112 @@
+"""セッションの再配置のテスト
+
+テスト用のRedis（redis://redis:6379）のDB番号1〜4を、4台のRedisの代わりに使います。
+"""
+
+import pytest
+import redis
+
+from app.infrastructure.hash_ring import HashRing
+from app.infrastructure.sharded_session_store import ShardedRedisSessionStore
+from app.services.session_rebalance import main, rebalance_sessions
+
+NODES = ["redis://redis:6379/1", "redis://redis:6379/2", "redis://redis:6379/3", "redis://redis:6379/4"]
+# セッション以外のキーと見分けるための接頭辞（SESSION_KEY_PREFIXの既定は空）
+PREFIX = "session:"
+
+
+@pytest.fixture
+def redis_clients():
+    """ノード名 -> テスト用のRedisクライアント（Redisが動いていなければスキップ）"""
+    clients = {node: redis.from_url(node) for node in NODES}
+    try:
+        for client in clients.values():
+            client.flushdb()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    yield clients
+    for client in clients.values():
+        client.flushdb()
+
+
+def test_Redisを増やすと新しい置き場所にセッションが移動する(redis_clients):
+    before = ShardedRedisSessionStore(clients={node: redis_clients[node] for node in NODES[:3]}, key_prefix=PREFIX)
+    after = ShardedRedisSessionStore(clients=redis_clients, key_prefix=PREFIX)
+    sessions = {f"session-{i}": {"n": i} for i in range(200)}
+    before.save_many(sessions, ttl=60)
+    before.save("no-ttl", {"n": -1})
+
+    report = rebalance_sessions(redis_clients, after.ring, batch_size=50, key_prefix=PREFIX)
+
+    # 移動するのは4台目の担当になったものだけ
+    assert report.moved == len(redis_clients[NODES[3]].keys())
+    assert 0 < report.moved < 100
+    assert after.get_many(sessions) == list(sessions.values())
+    assert after.get("no-ttl") == {"n": -1}
+    assert 0 < redis_clients[after.node_for("session-1")].ttl(after.key_prefix + "session-1") <= 60
+    assert sum(client.dbsize() for client in redis_clients.values()) == 201
+    before.close()
+    after.close()
+
+
+def test_移動先に新しい値があれば上書きしない(redis_clients):
+    before = ShardedRedisSessionStore(clients={node: redis_clients[node] for node in NODES[:3]}, key_prefix=PREFIX)
+    after = ShardedRedisSessionStore(clients=redis_clients, key_prefix=PREFIX)
+    session_id = next(f"session-{i}" for i in range(1000) if after.node_for(f"session-{i}") == NODES[3])
+    before.save(session_id, {"version": "old"}, ttl=60)
+    after.save(session_id, {"version": "new"}, ttl=60)
+
+    report = rebalance_sessions(redis_clients, after.ring, key_prefix=PREFIX)
+
+    assert report.skipped == 1
+    assert after.get(session_id) == {"version": "new"}
+    assert before.get(session_id) is None
+    before.close()
+    after.close()
+
+
+def test_dry_runでは移動しない(redis_clients):
+    before = ShardedRedisSessionStore(clients={node: redis_clients[node] for node in NODES[:3]}, key_prefix=PREFIX)
+    after = ShardedRedisSessionStore(clients=redis_clients, key_prefix=PREFIX)
+    before.save_many({f"session-{i}": {"n": i} for i in range(100)})
+
+    report = rebalance_sessions(redis_clients, after.ring, dry_run=True, key_prefix=PREFIX)
+
+    assert sum(report.moves.get(node, {}).get(NODES[3], 0) for node in NODES[:3]) > 0
+    assert report.moved == 0
+    assert redis_clients[NODES[3]].dbsize() == 0
+    before.close()
+    after.close()
+
+
+def test_セッション以外のキーは移動しない(redis_clients):
+    """リフレッシュトークンや失効リストのキーは、置き場所の計算に関係なくそのまま残す"""
+    before = ShardedRedisSessionStore(clients={node: redis_clients[node] for node in NODES[:3]}, key_prefix=PREFIX)
+    after = ShardedRedisSessionStore(clients=redis_clients, key_prefix=PREFIX)
+    before.save_many({f"session-{i}": {"n": i} for i in range(100)}, ttl=60)
+    for node in NODES[:3]:
+        redis_clients[node].set(f"refresh_token_family:{node}", "active")
+        redis_clients[node].zadd("revoked_access_tokens", {f"jti-{node}": 1})
+
+    report = rebalance_sessions(redis_clients, after.ring, key_prefix=PREFIX)
+
+    # 移動したセッションは移動先のSCANでもう一度数えられる（セッション以外は数えない）
+    assert report.scanned == 100 + report.moved
+    assert report.moved > 0
+    for node in NODES[:3]:
+        assert redis_clients[node].get(f"refresh_token_family:{node}") == b"active"
+        assert redis_clients[node].zscore("revoked_access_tokens", f"jti-{node}") == 1
+    assert redis_clients[NODES[3]].keys(b"refresh_token_family:*") == []
+    assert redis_clients[NODES[3]].exists("revoked_access_tokens") == 0
+    before.close()
+    after.close()
+
+
+def test_接頭辞が空ならmatchなしでは実行しない():
+    """全キーが対象になってしまうので、Redisに触る前に止める"""
+    ring = HashRing(["redis://a:6379"])
+
+    with pytest.raises(ValueError):
+        rebalance_sessions({"redis://a:6379": None}, ring, key_prefix="")
+    with pytest.raises(SystemExit):
+        main(["--urls", "redis://a:6379", "--key-prefix", ""])